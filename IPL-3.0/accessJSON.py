@@ -1,10 +1,13 @@
-import json
+import player_table
+import player_rates
 
-with open("data/playerInfoProcessed.json") as f:
-	data = json.load(f)
+# Players are served from the compiled table (data/playerTable.bin, built from
+# data/playerInfoProcessed.json on first use) that all worker processes map and share.
+# shrunkRates carries the player's empirical-Bayes shrunk per-ball rates (data/playerRates.bin).
 
 def getPlayerInfo(initials):
 	# fetch = document.find_one({"playerInitials": initials})
-	fetch = data[initials] #may be same for some
+	fetch = player_table.get_table().player(initials) #fresh dict per call; may be same for some
+	fetch['shrunkRates'] = player_rates.get_table().rates(initials)
 
 	return fetch 
\ No newline at end of file
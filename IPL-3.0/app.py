@@ -1,27 +1,25 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, session, jsonify, current_app, abort, send_from_directory, g
+import functools
+import hashlib
 import json
 import mainconnect # Import the game logic from mainconnect.py
-# from match_simulator import MatchSimulator # MatchSimulator is no longer actively used for new game initiation from UI
+import player_table # Compiled player table; mapped once and shared with forked workers
+import scorecard # Single-pass batting scorecard rows (how out, DNB, wickets)
+import ball_outcomes # Typed per-ball outcomes (runs, extras, wicket) emitted by the engines
+import simulator_pool # Live MatchSimulator instances for step-by-step matches
+import snapshot_store # Where step-by-step matches are parked (per process, or a SQLite file shared by workers)
+import pyodide_bundle # Locally vendored Pyodide runtime for the animation player
+import broadcast # Featured matches shared by all their viewers
+import metrics # Prometheus-style /metrics, recorded without locks
+import itertools
 import os
-import copy # For deepcopy if needed by process_batting_innings
+import time
 import uuid # For unique match IDs
 import logging # For logging errors
-import re # For log parsing
-
-app = Flask(__name__)
-app.secret_key = os.urandom(24)
-
-# Configure basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# Temporary directory for storing match logs
-TMP_LOG_DIR = os.path.join(app.root_path, 'tmp_match_logs')
-if not os.path.exists(TMP_LOG_DIR):
-    try:
-        os.makedirs(TMP_LOG_DIR)
-    except OSError as e:
-        logging.error(f"Error creating temporary log directory {TMP_LOG_DIR}: {e}")
 
+SECRET_KEY_FILE = 'secret_key'
+ANIMATION_SCRIPT = 'animation/cricket_animation.py'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600 # Versioned URLs never change content
 
 # --- Helper Functions ---
 def load_teams():
@@ -35,125 +33,78 @@ def load_teams():
         logging.error("Could not decode JSON from teams/teams.json.")
         return {}
 
-def process_batting_innings(bat_tracker_original):
-    bat_tracker = copy.deepcopy(bat_tracker_original)
-    wickets = 0
-    for player, stats in bat_tracker.items():
-        stats['how_out'] = "Not out"
-        if not stats.get('ballLog'):
-            stats['how_out'] = "DNB"
-            stats['runs'] = stats.get('runs', '')
-            stats['balls'] = stats.get('balls', '')
-            continue
-        wicket_found = False
-        for log_entry in stats['ballLog']:
-            parts = log_entry.split(':')
-            if len(parts) > 1:
-                event_details = parts[1]
-                if event_details.startswith("W"):
-                    wickets += 1
-                    wicket_found = True
-                    if "-CaughtBy-" in event_details:
-                        try:
-                            details = event_details.split('-')
-                            catcher = details[details.index('CaughtBy') + 1]
-                            bowler = details[details.index('Bowler') + 1]
-                            stats['how_out'] = f"c {catcher} b {bowler}"
-                        except (ValueError, IndexError): stats['how_out'] = "Caught"
-                    elif "-runout" in event_details: stats['how_out'] = "Run out"
-                    elif "-Bowler-" in event_details:
-                        try:
-                            details = event_details.split('-')
-                            dismissal_type = details[0][1:]
-                            bowler = details[details.index('Bowler') + 1]
-                            stats['how_out'] = f"{dismissal_type} b {bowler}"
-                        except (ValueError, IndexError): stats['how_out'] = "Wicket"
-                    else: stats['how_out'] = "Wicket"
-                    break
-        if not wicket_found and stats.get('balls', 0) == 0 and stats.get('runs', 0) == 0:
-            any_other_batted = False
-            for p_stats_check in bat_tracker.values():
-                if p_stats_check.get('balls',0) > 0 :
-                    any_other_batted = True
-                    break
-            if any_other_batted :
-                stats['how_out'] = "DNB"
-    return bat_tracker, wickets
-
-# Simplifies a detailed match event log into a list of outcomes (runs or "wicket")
-# suitable for the Pygame animation.
-def simplify_event_log(raw_log_entries):
-    simplified_log = []
-    # Regex patterns to identify key events in log strings.
-    # Order of checks matters (e.g., FOUR/SIX before single digit runs).
-    for entry in raw_log_entries:
-        event_text = entry.get("event", "") # Get the raw event string
-
-        # Check for explicit " FOUR" or " SIX"
-        if " FOUR" in event_text:
-            simplified_log.append(4)
-            continue
-        if " SIX" in event_text:
-            simplified_log.append(6)
-            continue
-
-        # Attempt to find (W)icket or single (d)igit runs, typically formatted like " X Score:" or "W Score:"
-        # This pattern looks for a space, then W or a digit, then a space, then expects "Score:" later in the string.
-        match = re.search(r' (W|\d) (?=.*Score:)', event_text)
-        if not match:
-            # Fallback: look for W or 0-6 directly before " Score:" (no space after W/digit)
-            match = re.search(r'(W|[0-6]) Score:', event_text)
-        if not match:
-            # Fallback for more verbose WICKET entries, e.g., "... WICKET Score: ..."
-             match = re.search(r'\s(WICKET)\s+Score:', event_text, re.IGNORECASE)
-             if match: outcome = "wicket"
-             else: outcome = None
-        else:
-            outcome = match.group(1) # The captured group (W or digit)
-
-        if outcome:
-            if outcome == 'W' or outcome.upper() == 'WICKET':
-                simplified_log.append("wicket")
-            elif outcome.isdigit():
-                simplified_log.append(int(outcome))
-        # Handle extras like Wide (WD), No Ball (NB), Leg Bye (LB)
-        elif "Wide" in event_text or "WD" in event_text:
-            simplified_log.append(0) # Represent wide as 0 runs for animation log
-        elif "LB" in event_text or "NB" in event_text:
-            # Check if No Ball log specifies runs scored off it (e.g., "1 NB" or "NB 1")
-            nb_runs_match = re.search(r'(\d(?=\sNB))|(NB\s\d)', event_text)
-            if nb_runs_match:
-                run_part = nb_runs_match.group(1) or nb_runs_match.group(2) # Get the digit part
-                if run_part and run_part.isdigit(): simplified_log.append(int(run_part))
-                else: simplified_log.append(0) # Default to 0 if runs not clearly specified with NB
-            else:
-                simplified_log.append(0) # Default for LB or NB without specified runs
-        # If no specific outcome identified, it's not added to the simplified log.
-        # This helps filter out non-scoring or non-wicket events if necessary.
-
-    return [item for item in simplified_log if item is not None] # Clean out any None entries
+def get_pool():
+    return current_app.extensions['simulator_pool']
+
+def get_hub():
+    return current_app.extensions['broadcast_hub']
+
+def get_metrics():
+    return current_app.extensions['metrics']
+
+def get_teams():
+    # Warmed up once per process by create_app(); falls back to reading the file.
+    teams = current_app.config.get('TEAMS')
+    return teams if teams is not None else load_teams()
+
+@functools.lru_cache(maxsize=4)
+def _file_digest(path, mtime_ns):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def animation_script_version():
+    # Content hash of the animation script, so browsers and the service worker refetch it only after it changed.
+    path = os.path.join(current_app.static_folder, ANIMATION_SCRIPT)
+    misses = _file_digest.cache_info().misses
+    digest = _file_digest(path, os.stat(path).st_mtime_ns)
+    result = 'miss' if _file_digest.cache_info().misses > misses else 'hit' # One request at a time per sync worker
+    get_metrics().inc('ipl_cache_requests_total', cache='animation_script_digest', result=result)
+    return digest
+
+def render_animation_player(match_data_json=None):
+    # The player loads Pyodide from the vendored bundle when there is one (see pyodide_bundle.py), else from the CDN.
+    manifest = current_app.extensions['pyodide_bundle']
+    version = current_app.config['PYODIDE_VERSION']
+    if manifest is not None:
+        pyodide_index_url = url_for('pyodide_vendor_file', version=version, filename=pyodide_bundle.LOCK_FILE)[:-len(pyodide_bundle.LOCK_FILE)]
+    else:
+        pyodide_index_url = pyodide_bundle.CDN_URL.format(version=version)
+    return render_template('animation_player.html', match_data_json=match_data_json,
+                           pyodide_index_url=pyodide_index_url, pyodide_vendored=manifest is not None,
+                           animation_script_url=url_for('static', filename=ANIMATION_SCRIPT, v=animation_script_version()))
+
+_engine_games = itertools.count(1) # next() is atomic, so concurrent requests never share a ticket
+
+def run_engine(kind, team1_code, team2_code, switch):
+    # mainconnect.game() for a web request, recorded in the metrics. Every METRICS_PROFILE_EVERY-th
+    # game runs with the profiler on, so engine section timings are sampled at a small fixed cost.
+    every = current_app.config['METRICS_PROFILE_EVERY']
+    profile = bool(every) and next(_engine_games) % every == 0
+    start = time.perf_counter()
+    match_results = mainconnect.game(manual=False, sentTeamOne=team1_code, sentTeamTwo=team2_code, switch=switch, profile=profile)
+    recorder = get_metrics()
+    recorder.observe('ipl_simulation_duration_seconds', time.perf_counter() - start, kind=kind)
+    recorder.inc('ipl_simulations_total', kind=kind)
+    recorder.inc('ipl_balls_simulated_total', (match_results.get('innings1Balls') or 0) + (match_results.get('innings2Balls') or 0), engine='mainconnect')
+    for section, row in match_results.get('timings', {}).items():
+        recorder.inc('ipl_engine_section_seconds_total', row['total_ms'] / 1000, section=section)
+        recorder.inc('ipl_engine_section_calls_total', row['calls'], section=section)
+    return match_results
 
 # --- End Helper Functions ---
 
-scores_dir_path = os.path.join(os.getcwd(), "scores")
-os.makedirs(scores_dir_path, exist_ok=True)
-for f_remove in os.listdir(scores_dir_path):
-    if os.path.isfile(os.path.join(scores_dir_path, f_remove)):
-        try: os.remove(os.path.join(scores_dir_path, f_remove))
-        except OSError as e: logging.warning(f"Error removing file {f_remove} from scores dir: {e}")
-
 
-@app.route('/', methods=['GET'])
 def index():
-    teams_data = load_teams()
+    teams_data = get_teams()
     session.pop('full_match_data', None)
     session.pop('sim_state', None)
+    if session.get('sim_match_id'):
+        get_pool().discard(session.pop('sim_match_id'))
     session.pop('replay_match_id', None)
     return render_template('index.html', teams=teams_data, scorecard_data=None)
 
-@app.route('/generate_scorecard', methods=['POST'])
 def generate_scorecard():
-    teams_data = load_teams()
+    teams_data = get_teams()
     team1_code = request.form.get('selectedTeam1')
     team2_code = request.form.get('selectedTeam2')
     simulation_type = request.form.get('simulation_type')
@@ -163,15 +114,15 @@ def generate_scorecard():
     if not simulation_type: return redirect(url_for('index', error_message="Please select a simulation type."))
 
     if simulation_type == 'direct':
-        match_results = mainconnect.game(manual=False, sentTeamOne=team1_code, sentTeamTwo=team2_code, switch="webapp")
+        match_results = run_engine('direct', team1_code, team2_code, "webapp")
 
         team1_s_name = teams_data.get(team1_code, {}).get('name', team1_code)
         team2_s_name = teams_data.get(team2_code, {}).get('name', team2_code)
         team1_full_name = teams_data.get(team1_code, {}).get('fullName', team1_s_name)
         team2_full_name = teams_data.get(team2_code, {}).get('fullName', team2_s_name)
 
-        innings1_battracker_processed, wickets1_fallen = process_batting_innings(match_results.get("innings1Battracker", {}))
-        innings2_battracker_processed, wickets2_fallen = process_batting_innings(match_results.get("innings2Battracker", {}))
+        innings1_battracker_processed, wickets1_fallen = scorecard.batting_card(match_results.get("innings1Battracker", {}))
+        innings2_battracker_processed, wickets2_fallen = scorecard.batting_card(match_results.get("innings2Battracker", {}))
 
         scorecard_data_for_template = {
             "team1": team1_code, "team2": team2_code,
@@ -191,11 +142,11 @@ def generate_scorecard():
         return render_template('index.html', teams=teams_data, scorecard_data=scorecard_data_for_template)
 
     elif simulation_type == 'ball_by_ball':
-        match_results = mainconnect.game(manual=False, sentTeamOne=team1_code, sentTeamTwo=team2_code, switch="webapp_full_log")
+        match_results = run_engine('ball_by_ball', team1_code, team2_code, "webapp_full_log")
         innings1_battracker_original = match_results.get("innings1Battracker", {})
         innings2_battracker_original = match_results.get("innings2Battracker", {})
-        processed_bat_tracker1, wickets1_fallen = process_batting_innings(innings1_battracker_original)
-        processed_bat_tracker2, wickets2_fallen = process_batting_innings(innings2_battracker_original)
+        processed_bat_tracker1, wickets1_fallen = scorecard.batting_card(innings1_battracker_original)
+        processed_bat_tracker2, wickets2_fallen = scorecard.batting_card(innings2_battracker_original)
         team1_full_data = teams_data.get(team1_code, {})
         team2_full_data = teams_data.get(team2_code, {})
 
@@ -215,7 +166,7 @@ def generate_scorecard():
         }
 
         match_id = str(uuid.uuid4())
-        tmp_file_path = os.path.join(TMP_LOG_DIR, f"match_log_{match_id}.json")
+        tmp_file_path = os.path.join(current_app.config['TMP_LOG_DIR'], f"match_log_{match_id}.json")
 
         try:
             with open(tmp_file_path, 'w') as f:
@@ -229,13 +180,12 @@ def generate_scorecard():
     else:
         return redirect(url_for('index', error_message="Invalid simulation type selected."))
 
-@app.route('/replay_match_view')
 def replay_match_view():
     match_id = session.get('replay_match_id')
     if not match_id:
         return redirect(url_for('index', error_message="No match ID found for replay."))
 
-    tmp_file_path = os.path.join(TMP_LOG_DIR, f"match_log_{match_id}.json")
+    tmp_file_path = os.path.join(current_app.config['TMP_LOG_DIR'], f"match_log_{match_id}.json")
 
     try:
         with open(tmp_file_path, 'r') as f:
@@ -259,17 +209,15 @@ def replay_match_view():
 
 # Route to render the animation player HTML page.
 # This page will load Pyodide and the Pygame animation script.
-@app.route('/play_animation')
 def play_animation():
     # This route can be used if we want to navigate to the animation player
     # without pre-loading specific match data (e.g., allowing user to select log in Pygame UI).
-    return render_template('animation_player.html') # match_data_json is not passed here
+    return render_animation_player() # match_data_json is not passed here
 
 # Route to set up and launch the cricket animation with specific match data.
 # It simulates a match, processes the log, and passes data to the animation player.
-@app.route('/setup_animation', methods=['POST'])
 def setup_animation():
-    teams_data = load_teams() # Load team information (names, colors, etc.)
+    teams_data = get_teams() # Load team information (names, colors, etc.)
     team1_code = request.form.get('selectedTeam1') # Get selected Team 1 from form
     team2_code = request.form.get('selectedTeam2') # Get selected Team 2 from form
 
@@ -281,61 +229,375 @@ def setup_animation():
 
     # Simulate a full match to get the logs.
     # "webapp_full_log" switch ensures detailed logs are generated by mainconnect.py.
-    match_results = mainconnect.game(manual=False, sentTeamOne=team1_code, sentTeamTwo=team2_code, switch="webapp_full_log")
-
-    raw_log_to_process = []
-    batting_team_animation = "" # Team that will be shown batting in animation (Team A)
-    bowling_team_animation = "" # Team that will be shown bowling in animation (Team B)
-
-    # Determine which innings log to use for the animation.
-    # The animation is currently set up for one innings. We prioritize team1_code as the batting team.
-    if match_results.get("innings1BatTeam", "").lower() == team1_code.lower():
-        raw_log_to_process = match_results.get("innings1Log", [])
-        batting_team_animation = team1_code
-        bowling_team_animation = team2_code
-    elif match_results.get("innings2BatTeam", "").lower() == team1_code.lower():
-        raw_log_to_process = match_results.get("innings2Log", [])
-        batting_team_animation = team1_code
-        bowling_team_animation = team2_code
-    else:
-        # Fallback: if team1_code didn't bat for some reason, use the first innings log.
-        raw_log_to_process = match_results.get("innings1Log", [])
-        batting_team_animation = match_results.get("innings1BatTeam", team1_code)
-        # Ensure bowling_team_animation is correctly set to the other team.
-        if batting_team_animation.lower() == team1_code.lower():
-            bowling_team_animation = team2_code
-        else:
-            bowling_team_animation = team1_code
-
-    # Convert the raw textual event log into a simplified list of outcomes for Pygame.
-    simplified_animation_log = simplify_event_log(raw_log_to_process)
-
-    # If log simplification fails or results in an empty log, use a default test log.
-    if not simplified_animation_log:
-        simplified_animation_log = [0, 1, 4, "wicket", 6, 0, 0, 0, 2, 0, 1, 0, 4, 0, "wicket", 6, 0, 1, 2, 0] # Default for testing
-
-    # Get team details (name, colors) from loaded team data.
-    team_a_info = teams_data.get(batting_team_animation.lower(), {})
-    team_b_info = teams_data.get(bowling_team_animation.lower(), {})
-
-    # Helper to convert hex color strings (e.g., "#RRGGBB") to RGB tuples (R,G,B) for Pygame.
-    def hex_to_rgb(hex_color):
-        hex_color = hex_color.lstrip('#')
-        if len(hex_color) == 6:
-            return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        return (0,0,255) # Default to blue if hex string is invalid
-
-    # Prepare data structure to be passed to the animation player template.
-    match_data = {
-        "team_a_name": team_a_info.get("name", batting_team_animation),
-        "team_b_name": team_b_info.get("name", bowling_team_animation),
-        "team_a_color_hex": team_a_info.get("colorPrimary", "#0000FF"), # Default blue
-        "team_b_color_hex": team_b_info.get("colorPrimary", "#FF0000"), # Default red
-        "log": simplified_animation_log
-    }
+    match_results = run_engine('animation', team1_code, team2_code, "webapp_full_log")
+
+    # Both innings, as structured deliveries with the chase target (Team A bats first).
+    match_data = ball_outcomes.animation_match_data(match_results, teams_data, team1_code, team2_code)
 
     # Render the animation player, passing the match data as a JSON string.
-    return render_template('animation_player.html', match_data_json=json.dumps(match_data))
+    return render_animation_player(json.dumps(match_data))
+
+# Vendored Pyodide files. The version is part of the URL, so they can be cached for good.
+def pyodide_vendor_file(version, filename):
+    manifest = current_app.extensions['pyodide_bundle']
+    if manifest is None or version != manifest['version'] or filename not in manifest['files']:
+        abort(404)
+    response = send_from_directory(pyodide_bundle.bundle_path(current_app.config['PYODIDE_DIR'], version), filename,
+                                   max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# Service worker precaching the animation player's runtime and script. Served from the site root so
+# its scope covers /vendor/ and /static/, and never cached itself so a new bundle or script is picked up.
+def animation_service_worker():
+    manifest = current_app.extensions['pyodide_bundle']
+    script_version = animation_script_version()
+    precache = [url_for('static', filename=ANIMATION_SCRIPT, v=script_version)]
+    cache_name = f"animation-{script_version}"
+    if manifest is not None:
+        precache += [url_for('pyodide_vendor_file', version=manifest['version'], filename=name) for name in manifest['files']]
+        cache_name = f"animation-{manifest['version']}-{script_version}"
+    response = current_app.response_class(
+        render_template('animation_sw.js', cache_name=cache_name, precache_urls=precache),
+        mimetype='application/javascript')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Step-by-step matches: the MatchSimulator lives in the app's SimulatorPool and the session only
+# carries its match id. Each advance request sends the client's state cursor and gets back one
+# delta covering every ball it asked for (see MatchSimulator.get_game_state_delta).
+MAX_BALLS_PER_REQUEST = 36
+
+def start_live_match():
+    team1_code = request.form.get('selectedTeam1')
+    team2_code = request.form.get('selectedTeam2')
+    if not team1_code or not team2_code: return redirect(url_for('index', error_message="Please select two teams."))
+    if team1_code == team2_code: return redirect(url_for('index', error_message="Please select two different teams."))
+    teams_data = get_teams()
+    if team1_code not in teams_data or team2_code not in teams_data: return redirect(url_for('index', error_message="Unknown team selected."))
+    if session.get('sim_match_id'):
+        get_pool().discard(session.pop('sim_match_id'))
+    match_id, _ = get_pool().create(team1_code, team2_code)
+    session['sim_match_id'] = match_id
+    get_metrics().inc('ipl_simulations_total', kind='live')
+    return redirect(url_for('live_match_view'))
+
+def live_match_view():
+    with get_pool().checkout(session.get('sim_match_id')) as simulator:
+        if simulator is None:
+            return redirect(url_for('index', error_message="Match not found. It might have expired."))
+        game_state = simulator.get_game_state()
+    return render_template('ball_by_ball.html', game_state=game_state)
+
+def _advance_live_match(advance):
+    payload = request.get_json(silent=True) or {}
+    cursor = payload.get('cursor')
+    if cursor is not None and not isinstance(cursor, int):
+        return jsonify({"error": "cursor must be an integer."}), 400
+    try:
+        with get_pool().checkout(session.get('sim_match_id')) as simulator:
+            if simulator is None:
+                return jsonify({"error": "Match not found. It might have expired; start a new one."}), 404
+            result = advance(simulator, cursor, payload)
+    except snapshot_store.SnapshotConflict: # Another worker played this match meanwhile (e.g. a second tab)
+        return jsonify({"error": "This match was just played on elsewhere; reload it."}), 409
+    get_metrics().inc('ipl_balls_simulated_total', len(result.get('ball_events', ())), engine='simulator')
+    return jsonify(result)
+
+def simulate_next_ball():
+    # {"cursor": n, "balls": k} plays up to k balls in one round trip (auto-play batching).
+    def advance(simulator, cursor, payload):
+        try:
+            balls = int(payload.get('balls', 1))
+        except (TypeError, ValueError):
+            balls = 1
+        return simulator.simulate_balls(min(max(balls, 1), MAX_BALLS_PER_REQUEST), cursor)
+    return _advance_live_match(advance)
+
+def simulate_next_over():
+    return _advance_live_match(lambda simulator, cursor, payload: simulator.simulate_next_over(cursor))
+
+# Featured matches: one simulation per match, fanned out to every viewer (see broadcast.py).
+# The event stream is Server-Sent Events. With BROADCAST_STREAM_WINDOW = 0 each request sends what
+# is new and closes, telling the browser to reconnect when the next ball is due, so a viewer never
+# ties up a sync worker; with threaded or async workers a window of N seconds keeps the stream open.
+BROADCAST_HEARTBEAT_SECONDS = 15
+
+def start_broadcast():
+    team1_code = request.form.get('selectedTeam1')
+    team2_code = request.form.get('selectedTeam2')
+    if not team1_code or not team2_code: return redirect(url_for('index', error_message="Please select two teams."))
+    if team1_code == team2_code: return redirect(url_for('index', error_message="Please select two different teams."))
+    if team1_code not in get_teams() or team2_code not in get_teams(): return redirect(url_for('index', error_message="Unknown team selected."))
+    match = get_hub().feature(team1_code, team2_code)
+    get_metrics().inc('ipl_simulations_total', kind='featured')
+    return redirect(url_for('broadcast_view', match_id=match.match_id))
+
+def broadcast_view(match_id):
+    match = get_hub().get(match_id)
+    if match is None:
+        return redirect(url_for('index', error_message="Featured match not found."))
+    seq, snapshot = match.snapshot()
+    snapshot = json.loads(snapshot)
+    return render_template('ball_by_ball.html', game_state=snapshot['summary'],
+                           broadcast={'events_url': url_for('broadcast_events', match_id=match_id, since=seq),
+                                      'recent_balls': snapshot['recent_balls']})
+
+def _sse(data, event, event_id=None):
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: {event}\ndata: {data}\n\n"
+
+def broadcast_events(match_id):
+    match = get_hub().get(match_id)
+    if match is None:
+        return jsonify({"error": "Featured match not found."}), 404
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        seq = int(last_id) if last_id is not None else None
+    except ValueError:
+        seq = None
+    window = current_app.config['BROADCAST_STREAM_WINDOW']
+    recorder = get_metrics() # The stream runs after the request context is gone
+
+    def stream():
+        nonlocal seq
+        events = match.events_since(seq)[0] if seq is not None else None
+        deadline = time.monotonic() + window
+        while True:
+            if events is None: # New viewer, or too far behind for the ring: catch up in one message
+                seq, snapshot = match.snapshot()
+                recorder.inc('ipl_broadcast_events_sent_total', event='snapshot')
+                yield _sse(snapshot, 'snapshot', seq)
+            else:
+                recorder.inc('ipl_broadcast_events_sent_total', len(events), event='ball')
+                for seq, data in events:
+                    yield _sse(data, 'ball', seq)
+            remaining = deadline - time.monotonic()
+            if match.game_over or remaining <= 0:
+                break
+            events, _ = match.wait(seq, min(remaining, BROADCAST_HEARTBEAT_SECONDS))
+            if events == []:
+                yield ": keep-alive\n\n"
+        if match.game_over and seq >= match.seq:
+            yield _sse("{}", 'end')
+        else:
+            # Reconnect (with Last-Event-ID) just after the next ball is due
+            yield f"retry: {int((match.seconds_to_next_ball() or 0) * 1000) + 250}\n\n"
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Metrics: request latency per route is recorded around every request; gauges and cache hit
+# ratios the app already tracks are read when /metrics is scraped (see metrics.py).
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+def _record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        get_metrics().observe('ipl_http_request_duration_seconds', time.perf_counter() - start,
+                              route=route, method=request.method, status=str(response.status_code))
+    return response
+
+def _describe_metrics(recorder):
+    recorder.describe('ipl_http_request_duration_seconds', 'histogram', 'Time to build each response, by route, method and status.')
+    recorder.describe('ipl_simulation_duration_seconds', 'histogram', 'Time to simulate a full match with mainconnect.game(), by kind.')
+    recorder.describe('ipl_simulations_total', 'counter', 'Matches simulated or started, by kind.')
+    recorder.describe('ipl_balls_simulated_total', 'counter', 'Balls simulated, by engine.')
+    recorder.describe('ipl_engine_section_seconds_total', 'counter', 'Exclusive engine time per hot-path section in profiled games (see profiling.py).')
+    recorder.describe('ipl_engine_section_calls_total', 'counter', 'Engine section calls in profiled games.')
+    recorder.describe('ipl_cache_requests_total', 'counter', 'Cache lookups by cache and result.')
+    recorder.describe('ipl_broadcast_events_sent_total', 'counter', 'Featured match events sent to viewers, from the ring (ball) or as a catch-up snapshot.')
+
+def _tmp_log_usage(tmp_log_dir):
+    files = size = 0
+    try:
+        with os.scandir(tmp_log_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files += 1
+                    size += entry.stat().st_size
+    except OSError:
+        pass
+    return files, size
+
+def _snapshot_store_metrics(stats):
+    return [
+        ('ipl_snapshot_store_entries', 'gauge', 'Step-by-step matches in the snapshot store.', [({}, stats['parked'])]),
+        ('ipl_snapshot_store_bytes', 'gauge', 'Size of the snapshots in the snapshot store.', [({}, stats['parked_bytes'])]),
+    ]
+
+def _collect_process_metrics(app):
+    # What each worker holds for itself; every worker reports it and /metrics adds them up.
+    pool = app.extensions['simulator_pool']
+    stats = pool.stats()
+    return (_snapshot_store_metrics(stats) if not pool.store.shared else []) + [
+        ('ipl_simulator_pool_live', 'gauge', 'Live step-by-step simulators.', [({}, stats['live'])]),
+        ('ipl_featured_matches', 'gauge', 'Featured matches being broadcast.', [({}, len(app.extensions['broadcast_hub']))]),
+    ]
+
+def _collect_app_metrics(app, values):
+    # Read at scrape time only, so none of this costs anything per request.
+    files, size = _tmp_log_usage(app.config['TMP_LOG_DIR'])
+    pool = app.extensions['simulator_pool']
+    lookups = {}
+    for labels, count in values('ipl_cache_requests_total').items(): # Every worker's, as gathered for this scrape
+        labels = dict(labels)
+        hits, total = lookups.get(labels['cache'], (0, 0))
+        lookups[labels['cache']] = (hits + (count if labels['result'] == 'hit' else 0), total + count)
+    return (_snapshot_store_metrics(pool.stats()) if pool.store.shared else []) + [
+        ('ipl_tmp_log_files', 'gauge', 'Replay match logs in TMP_LOG_DIR.', [({}, files)]),
+        ('ipl_tmp_log_bytes', 'gauge', 'Size of the replay match logs in TMP_LOG_DIR.', [({}, size)]),
+        ('ipl_cache_hit_ratio', 'gauge', 'Share of lookups served from the cache since start.', [
+            ({'cache': cache}, hits / total if total else 0.0) for cache, (hits, total) in sorted(lookups.items())]),
+    ]
+
+def metrics_view():
+    return Response(get_metrics().render(), mimetype=metrics.CONTENT_TYPE)
+
+_ROUTES = [
+    ('/', index, ['GET']),
+    ('/generate_scorecard', generate_scorecard, ['POST']),
+    ('/replay_match_view', replay_match_view, ['GET']),
+    ('/play_animation', play_animation, ['GET']),
+    ('/setup_animation', setup_animation, ['POST']),
+    ('/vendor/pyodide/<version>/<path:filename>', pyodide_vendor_file, ['GET']),
+    ('/animation_sw.js', animation_service_worker, ['GET']),
+    ('/start_live_match', start_live_match, ['POST']),
+    ('/live_match', live_match_view, ['GET']),
+    ('/simulate_next_ball', simulate_next_ball, ['POST']),
+    ('/simulate_next_over', simulate_next_over, ['POST']),
+    ('/start_broadcast', start_broadcast, ['POST']),
+    ('/broadcast/<match_id>', broadcast_view, ['GET']),
+    ('/broadcast/<match_id>/events', broadcast_events, ['GET']),
+    ('/metrics', metrics_view, ['GET']),
+]
+
+
+def clear_scores_dir(scores_dir):
+    # mainconnect.game() writes one scorecard text file per match here; start each server run clean.
+    os.makedirs(scores_dir, exist_ok=True)
+    for f_remove in os.listdir(scores_dir):
+        if os.path.isfile(os.path.join(scores_dir, f_remove)):
+            try: os.remove(os.path.join(scores_dir, f_remove))
+            except OSError as e: logging.warning(f"Error removing file {f_remove} from scores dir: {e}")
+
+
+def load_secret_key(instance_path):
+    """Returns the instance's persistent secret key, creating it on first use.
+
+    Every worker (and every restart) must sign sessions with the same key, so a per-process
+    os.urandom() key is not enough. The key is written to a private temp file and hard-linked
+    into place, so workers starting together all end up reading the one complete key.
+    """
+    key_path = os.path.join(instance_path, SECRET_KEY_FILE)
+    if not os.path.exists(key_path):
+        os.makedirs(instance_path, exist_ok=True)
+        tmp_path = f"{key_path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(os.urandom(32).hex())
+        try:
+            os.link(tmp_path, key_path)
+        except FileExistsError:
+            pass # Another worker won the race; use its key
+        finally:
+            os.remove(tmp_path)
+    with open(key_path, 'r') as f:
+        return f.read().strip()
+
+
+def warmup(app):
+    """Loads everything a request would otherwise load lazily.
+
+    Called from create_app, so under gunicorn's preload_app it runs once in the master and the
+    data is shared copy-on-write with the forked workers; without preload each worker warms itself.
+    """
+    app.config['TEAMS'] = load_teams()
+    logging.info(f"Warmed up {len(player_table.get_table())} players and {len(app.config['TEAMS'])} teams")
+
+
+def create_app(test_config=None):
+    """Application factory. Importing this module has no side effects: WSGI servers call
+    create_app() through wsgi.py and the dev server is started from __main__ below.
+
+    Configuration, lowest to highest precedence: defaults, IPL_* environment variables
+    (IPL_SECRET_KEY, IPL_TMP_LOG_DIR, IPL_WARMUP=false, ...), then test_config.
+    """
+    app = Flask(__name__, instance_relative_config=True)
+    app.config.from_mapping(
+        TMP_LOG_DIR=os.path.join(app.root_path, 'tmp_match_logs'),
+        SCORES_DIR=os.path.join(os.getcwd(), 'scores'),
+        WARMUP=True,
+        SIM_POOL_SIZE=256, # Live step-by-step simulators per process; the rest are parked as snapshots
+        SIM_IDLE_TIMEOUT=1800, # Seconds before an untouched live simulator is parked
+        SNAPSHOT_DB='', # SQLite file shared by all workers for step-by-step matches; '' parks them in process memory
+        SNAPSHOT_MAX_ENTRIES=10000, # Parked matches kept; the least recently used beyond this are dropped
+        SNAPSHOT_TTL=86400, # Seconds an untouched match is kept in the SQLite store
+        PYODIDE_DIR=pyodide_bundle.DEFAULT_DIR, # Vendored Pyodide bundles (python pyodide_bundle.py)
+        PYODIDE_VERSION=pyodide_bundle.VERSION,
+        BROADCAST_BALL_INTERVAL=3.0, # Seconds between balls of a featured match
+        BROADCAST_RING_SIZE=256, # Ball events kept for viewers catching up; older viewers get a snapshot
+        BROADCAST_MAX_MATCHES=64, # Featured matches held per process; ids are signed, so clients cannot add their own
+        BROADCAST_STREAM_WINDOW=0, # Seconds an event stream stays open; 0 suits sync workers (see broadcast_events)
+        METRICS_PROFILE_EVERY=100, # Profile every Nth engine game for the section timings in /metrics; 0 never
+        METRICS_DIR='', # Directory where each worker writes its metrics for /metrics to add up; '' reports per process
+        DEBUG=False, # Dev server only (python app.py); the Werkzeug debugger runs code for anyone who can reach it
+        DEV_SERVER_HOST='127.0.0.1', # Interface python app.py listens on
+        DEV_SERVER_PORT=5000,
+    )
+    app.config.from_prefixed_env('IPL')
+    if test_config is not None:
+        app.config.from_mapping(test_config)
+    if not app.config.get('SECRET_KEY'):
+        app.config['SECRET_KEY'] = load_secret_key(app.instance_path)
+
+    # Configure basic logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Temporary directory for storing match logs
+    try:
+        os.makedirs(app.config['TMP_LOG_DIR'], exist_ok=True)
+    except OSError as e:
+        logging.error(f"Error creating temporary log directory {app.config['TMP_LOG_DIR']}: {e}")
+    os.makedirs(app.config['SCORES_DIR'], exist_ok=True)
+
+    recorder = app.extensions['metrics'] = metrics.Metrics(directory=app.config['METRICS_DIR'] or None)
+    _describe_metrics(recorder)
+
+    if app.config['SNAPSHOT_DB']:
+        store = snapshot_store.SqliteSnapshotStore(
+            app.config['SNAPSHOT_DB'], max_entries=app.config['SNAPSHOT_MAX_ENTRIES'], ttl=app.config['SNAPSHOT_TTL'])
+    else:
+        store = snapshot_store.SnapshotStore(max_entries=app.config['SNAPSHOT_MAX_ENTRIES'])
+    app.extensions['simulator_pool'] = simulator_pool.SimulatorPool(
+        max_live=app.config['SIM_POOL_SIZE'], idle_timeout=app.config['SIM_IDLE_TIMEOUT'], store=store,
+        on_lookup=functools.partial(recorder.inc, 'ipl_cache_requests_total', cache='simulator_pool'))
+
+    app.extensions['broadcast_hub'] = broadcast.BroadcastHub(
+        ball_interval=app.config['BROADCAST_BALL_INTERVAL'], ring_size=app.config['BROADCAST_RING_SIZE'],
+        team_codes=set(app.config.get('TEAMS') or load_teams()) or None,
+        max_matches=app.config['BROADCAST_MAX_MATCHES'], secret=app.config['SECRET_KEY'])
+
+    app.extensions['pyodide_bundle'] = pyodide_bundle.load_manifest(app.config['PYODIDE_DIR'], app.config['PYODIDE_VERSION'])
+    if app.extensions['pyodide_bundle'] is None:
+        logging.info("No vendored Pyodide bundle; the animation player loads Pyodide from the CDN.")
+
+    recorder.add_collector(functools.partial(_collect_process_metrics, app), per_process=True)
+    recorder.add_collector(functools.partial(_collect_app_metrics, app))
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+
+    for rule, view_func, methods in _ROUTES:
+        app.add_url_rule(rule, view_func=view_func, methods=methods)
+
+    if app.config['WARMUP']:
+        warmup(app)
+    return app
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app = create_app()
+    clear_scores_dir(app.config['SCORES_DIR'])
+    app.run(debug=app.config['DEBUG'], host=app.config['DEV_SERVER_HOST'], port=app.config['DEV_SERVER_PORT'])
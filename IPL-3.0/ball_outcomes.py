@@ -0,0 +1,152 @@
+import re
+
+# Typed per-ball outcome channel emitted by the engines next to the commentary text.
+# Like dismissals, an outcome is a plain dict so it survives json.dump into the replay logs:
+#   {'runs': 0, 'extras': 0, 'extra_type': None, 'wicket': 'caught'}
+# 'runs' are off the bat, 'extras' are added to the total on top of them and 'wicket' holds
+# the dismissal type (see dismissals.normalize_type) or None.
+
+WIDE = "wide"
+NO_BALL = "noball"
+LEG_BYE = "legbye"
+
+WICKET_TOKEN = "wicket"
+
+
+def make_outcome(runs=0, wicket=None, extra_type=None, extras=0):
+    return {'runs': runs, 'extras': extras, 'extra_type': extra_type, 'wicket': wicket}
+
+
+def animation_token(outcome):
+    """Maps one outcome to the token the pygame animation expects: "wicket" or the runs off the ball.
+
+    Extras are shown as a dot ball, which is what the text parser always did for wides.
+    """
+    if outcome['wicket']:
+        return WICKET_TOKEN
+    return outcome['runs']
+
+
+def simplify_outcomes(log_entries):
+    """Animation log for a list of engine log entries, read straight from their 'outcome' channel.
+
+    Entries without one (replay logs saved before the channel existed) go through the legacy
+    text parser.
+    """
+    simplified_log = []
+    for entry in log_entries:
+        outcome = entry.get('outcome')
+        if outcome is not None:
+            simplified_log.append(animation_token(outcome))
+        else:
+            token = _legacy_token(entry.get("event", ""))
+            if token is not None:
+                simplified_log.append(token)
+    return simplified_log
+
+
+def animation_ball(outcome):
+    """Timeline record of one delivery for the animation's full-match mode:
+    {'token': animation token, 'runs': runs added to the total (extras included), 'wicket': bool,
+     'legal': counts towards the over, 'extra_type': see make_outcome}.
+    """
+    return {'token': animation_token(outcome), 'runs': outcome['runs'] + outcome['extras'],
+            'wicket': bool(outcome['wicket']), 'legal': outcome['extra_type'] not in (WIDE, NO_BALL),
+            'extra_type': outcome['extra_type']}
+
+
+def animation_balls(log_entries):
+    """Timeline records (see animation_ball) for an innings log. Entries without an outcome channel
+    go through the legacy text parser and count as legal deliveries worth their token."""
+    balls = []
+    for entry in log_entries:
+        outcome = entry.get('outcome')
+        if outcome is not None:
+            balls.append(animation_ball(outcome))
+            continue
+        token = _legacy_token(entry.get("event", ""))
+        if token is not None:
+            balls.append({'token': token, 'runs': 0 if token == WICKET_TOKEN else token,
+                          'wicket': token == WICKET_TOKEN, 'legal': True, 'extra_type': None})
+    return balls
+
+
+DEFAULT_ANIMATION_LOG = [0, 1, 4, "wicket", 6, 0, 0, 0, 2, 0, 1, 0, 4, 0, "wicket", 6, 0, 1, 2, 0]
+
+
+def animation_match_data(match_results, teams, team1_code, team2_code, max_overs=20):
+    """Match data for the pygame animation (the page hands it to the script as match_data_for_animation)
+    from a mainconnect.game result. Team A is the side batting first; each innings carries its
+    deliveries as timeline records (see animation_balls) and the chase its target."""
+    batting_first = match_results.get("innings1BatTeam") or team1_code
+    bowling_first = team2_code if batting_first.lower() == team1_code.lower() else team1_code
+    innings = [{"balls": animation_balls(match_results.get("innings1Log", [])), "target": None},
+               {"balls": animation_balls(match_results.get("innings2Log", [])),
+                "target": (match_results.get("innings1Runs") or 0) + 1}]
+    team_a_info = teams.get(batting_first.lower(), {})
+    team_b_info = teams.get(bowling_first.lower(), {})
+    match_data = {
+        "team_a_name": team_a_info.get("name", batting_first),
+        "team_b_name": team_b_info.get("name", bowling_first),
+        "team_a_color_hex": team_a_info.get("colorPrimary", "#0000FF"),
+        "team_b_color_hex": team_b_info.get("colorPrimary", "#FF0000"),
+        "max_overs": max_overs,
+    }
+    if innings[0]["balls"]:
+        match_data["innings"] = innings
+    else:
+        # The logs could not be read at all: play a short test log instead
+        match_data["log"] = list(DEFAULT_ANIMATION_LOG)
+    return match_data
+
+
+# --- Legacy commentary parsing ---
+# Kept for old logs and as the baseline in benchmarks/outcome_channel.py. Patterns are compiled once.
+
+_RUNS_OR_WICKET_RE = re.compile(r' (W|\d) (?=.*Score:)')
+_BEFORE_SCORE_RE = re.compile(r'(W|[0-6]) Score:')
+_WICKET_WORD_RE = re.compile(r'\s(WICKET)\s+Score:', re.IGNORECASE)
+_NO_BALL_RUNS_RE = re.compile(r'(\d(?=\sNB))|(NB\s\d)')
+
+
+def _legacy_token(event_text):
+    # Order of checks matters (e.g., FOUR/SIX before single digit runs).
+    if " FOUR" in event_text:
+        return 4
+    if " SIX" in event_text:
+        return 6
+
+    match = _RUNS_OR_WICKET_RE.search(event_text) or _BEFORE_SCORE_RE.search(event_text)
+    if match:
+        outcome = match.group(1)
+    else:
+        match = _WICKET_WORD_RE.search(event_text)
+        outcome = "wicket" if match else None
+
+    if outcome:
+        if outcome == 'W' or outcome.upper() == 'WICKET':
+            return WICKET_TOKEN
+        if outcome.isdigit():
+            return int(outcome)
+        return None
+    # Extras like Wide (WD), No Ball (NB), Leg Bye (LB)
+    if "Wide" in event_text or "WD" in event_text:
+        return 0
+    if "LB" in event_text or "NB" in event_text:
+        nb_runs_match = _NO_BALL_RUNS_RE.search(event_text)
+        if nb_runs_match:
+            run_part = nb_runs_match.group(1) or nb_runs_match.group(2)
+            if run_part and run_part.isdigit():
+                return int(run_part)
+        return 0
+    return None
+
+
+def simplify_event_text(log_entries):
+    """Animation log recovered from the human-readable 'event' strings only."""
+    simplified_log = []
+    for entry in log_entries:
+        token = _legacy_token(entry.get("event", ""))
+        if token is not None:
+            simplified_log.append(token)
+    return simplified_log
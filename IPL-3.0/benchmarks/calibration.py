@@ -0,0 +1,253 @@
+"""Calibration and regression benchmark for the two match engines.
+
+Runs N seeded matches per engine (mainconnect.game and MatchSimulator), each engine in its own
+child process so peak RSS is per engine, and reports
+  - throughput: matches/s, balls/s and peak RSS
+  - realism: first-innings runs (mean, sigma), first-innings wickets, boundary % of legal balls
+    and the share of chases won
+then compares both against the stored baselines (benchmarks/baselines/calibration.json):
+  - realism metrics with two-sided tests (Welch's test for means, a log variance-ratio test for
+    sigma, a two-proportion test for chases won); a p-value under --alpha is a regression
+  - throughput with a relative tolerance, since it depends on the machine
+and exits with 1 if anything regressed. Seeds are fixed, so an unchanged engine reproduces its
+baseline samples exactly. --profile instead reports where the per-ball time goes (see profiling.py),
+summed over all matches; timings then include the profiler, so nothing is compared.
+
+Run from IPL-3.0/:  python benchmarks/calibration.py [--engine mainconnect|match_simulator] [--matches N]
+                    [--seed S] [--alpha A] [--speed-tolerance T] [--update-baseline] [--profile]
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import profiling
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, RSS is not reported
+    resource = None
+
+ENGINES = ("mainconnect", "match_simulator")
+BASELINE_PATH = os.path.join(current_script_dir, "baselines", "calibration.json")
+
+# (metric, test) pairs checked against the baseline; see compare()
+REALISM_CHECKS = (("inn1_runs", "mean"), ("inn1_runs", "sigma"), ("inn1_wickets", "mean"),
+                  ("boundary_pct", "mean"), ("chase_won", "proportion"))
+
+
+def fixtures(matches):
+    with open(os.path.join(project_root_dir, "teams", "teams.json")) as f:
+        team_codes = list(json.load(f).keys())
+    return list(itertools.islice(itertools.cycle(itertools.permutations(team_codes, 2)), matches))
+
+
+def innings_metrics(log):
+    """(runs, wickets, legal balls, boundaries) of one innings, from the log's outcome channel."""
+    runs = wickets = legal = boundaries = 0
+    for entry in log:
+        outcome = entry.get("outcome")
+        if outcome is None:
+            continue
+        runs += outcome["runs"] + outcome["extras"]
+        wickets += 1 if outcome["wicket"] else 0
+        if outcome["extra_type"] is None:
+            legal += 1
+            boundaries += outcome["runs"] in (4, 6)
+    return runs, wickets, legal, boundaries
+
+
+def _sample(first_log, second_log, chase_won):
+    runs, wickets, legal, boundaries = innings_metrics(first_log)
+    _, _, legal2, boundaries2 = innings_metrics(second_log)
+    return {"inn1_runs": runs, "inn1_wickets": wickets, "balls": legal + legal2,
+            "boundary_pct": 100.0 * (boundaries + boundaries2) / max(legal + legal2, 1), "chase_won": int(chase_won)}
+
+
+def play_mainconnect(team_one, team_two, seed, profile=False):
+    """(sample, timing breakdown) of one match; the breakdown is {} unless profiling."""
+    import mainconnect
+    random.seed(seed)  # mainconnect draws from the module-level random
+    result = mainconnect.game(manual=False, sentTeamOne=team_one, sentTeamTwo=team_two, switch="bench", profile=profile)
+    sample = _sample(result["innings1Log"], result["innings2Log"], result["winner"] == result["innings2BatTeam"])
+    return sample, result.get("timings", {})
+
+
+def play_match_simulator(team_one, team_two, seed, profile=False):
+    from match_simulator import MatchSimulator
+    sim = MatchSimulator(team_one, team_two, seed=seed)
+    if profile:
+        sim.enable_profiling()
+    sim.perform_toss()
+    while not sim.game_over:
+        sim.simulate_one_ball()
+    sample = _sample(sim.innings[1]["log"], sim.innings[2]["log"], sim.match_winner == sim.innings[2]["batting_team_code"])
+    return sample, sim.timing_breakdown()
+
+
+def run_engine(engine, matches, seed, profile=False):
+    """Plays the matches in this process; returns throughput figures, per-match samples and, when
+    profiling, the timing breakdown summed over all matches."""
+    play = play_mainconnect if engine == "mainconnect" else play_match_simulator
+    logging.disable(logging.WARNING)
+    os.chdir(project_root_dir)  # both engines read teams/teams.json relative to the project
+    os.makedirs("scores", exist_ok=True)  # mainconnect.game writes its scorecard there
+    samples = []
+    timings = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # mainconnect prints every ball
+        start = time.perf_counter()
+        for i, (team_one, team_two) in enumerate(fixtures(matches)):
+            sample, breakdown = play(team_one, team_two, seed + i, profile)
+            samples.append(sample)
+            timings.append(breakdown)
+        elapsed = time.perf_counter() - start
+    balls = sum(s["balls"] for s in samples)
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None  # kB on Linux
+    return {"engine": engine, "matches": matches, "seed": seed, "seconds": elapsed,
+            "matches_per_s": matches / elapsed, "balls_per_s": balls / elapsed, "peak_rss_kb": peak_rss_kb,
+            "samples": {metric: [s[metric] for s in samples] for metric in samples[0]},
+            "timings": profiling.aggregate(timings)}
+
+
+def run_engine_isolated(engine, matches, seed, profile=False):
+    """run_engine in a fresh interpreter, so peak RSS and warm caches are the engine's own."""
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", engine,
+                                "--matches", str(matches), "--seed", str(seed)] + (["--profile"] if profile else []),
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout)
+
+
+def summarize(run):
+    summary = {key: run[key] for key in ("matches", "seed", "matches_per_s", "balls_per_s", "peak_rss_kb")}
+    for metric, values in run["samples"].items():
+        summary[metric] = {"n": len(values), "mean": statistics.fmean(values),
+                           "sigma": statistics.stdev(values) if len(values) > 1 else 0.0}
+    return summary
+
+
+def _two_sided_p(z):
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def test_mean(base, current):
+    # Welch's test; with tens of matches per side the normal approximation of t is close enough
+    se = math.sqrt(base["sigma"] ** 2 / base["n"] + current["sigma"] ** 2 / current["n"])
+    if se == 0:
+        return 1.0 if base["mean"] == current["mean"] else 0.0
+    return _two_sided_p((current["mean"] - base["mean"]) / se)
+
+
+def test_sigma(base, current):
+    # log(s1^2 / s2^2) is roughly normal with variance 2/(n1-1) + 2/(n2-1)
+    if base["sigma"] == 0 or current["sigma"] == 0:
+        return 1.0 if base["sigma"] == current["sigma"] else 0.0
+    se = math.sqrt(2 / (base["n"] - 1) + 2 / (current["n"] - 1))
+    return _two_sided_p(math.log(current["sigma"] ** 2 / base["sigma"] ** 2) / se)
+
+
+def test_proportion(base, current):
+    # Means of 0/1 samples are the proportions
+    pooled = (base["mean"] * base["n"] + current["mean"] * current["n"]) / (base["n"] + current["n"])
+    se = math.sqrt(pooled * (1 - pooled) * (1 / base["n"] + 1 / current["n"]))
+    if se == 0:
+        return 1.0 if base["mean"] == current["mean"] else 0.0
+    return _two_sided_p((current["mean"] - base["mean"]) / se)
+
+
+TESTS = {"mean": test_mean, "sigma": test_sigma, "proportion": test_proportion}
+
+
+def compare(baseline, current, alpha, speed_tolerance):
+    """[(check, baseline value, current value, score, ok)]: p-values for realism, ratios for speed."""
+    rows = []
+    for metric, test in REALISM_CHECKS:
+        p = TESTS[test](baseline[metric], current[metric])
+        field = "sigma" if test == "sigma" else "mean"
+        rows.append((f"{metric} {test}", baseline[metric][field], current[metric][field], f"p={p:.3g}", p >= alpha))
+    for key in ("matches_per_s", "balls_per_s"):
+        ratio = current[key] / baseline[key]
+        rows.append((key, baseline[key], current[key], f"x{ratio:.2f}", ratio >= 1 - speed_tolerance))
+    if baseline.get("peak_rss_kb") and current.get("peak_rss_kb"):
+        ratio = current["peak_rss_kb"] / baseline["peak_rss_kb"]
+        rows.append(("peak_rss_kb", baseline["peak_rss_kb"], current["peak_rss_kb"], f"x{ratio:.2f}",
+                     ratio <= 1 + speed_tolerance))
+    return rows
+
+
+def load_baselines(path=BASELINE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engine", choices=ENGINES, action="append", help="engine to run (default: both)")
+    parser.add_argument("--matches", type=int, default=150, help="matches per engine")
+    parser.add_argument("--seed", type=int, default=2024, help="seed of the first match; match i uses seed + i")
+    parser.add_argument("--alpha", type=float, default=0.01, help="significance level for the realism tests")
+    parser.add_argument("--speed-tolerance", type=float, default=0.25,
+                        help="allowed relative drop in throughput (and rise in RSS) before failing")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--profile", action="store_true", help="report the per-ball time breakdown instead of comparing")
+    parser.add_argument("--worker", choices=ENGINES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.profile and args.update_baseline:
+        parser.error("profiled runs are slower; do not store them as a baseline")
+
+    if args.worker:
+        print(json.dumps(run_engine(args.worker, args.matches, args.seed, args.profile)))
+        return 0
+
+    baselines = load_baselines(args.baseline)
+    failed = False
+    for engine in args.engine or ENGINES:
+        run = run_engine_isolated(engine, args.matches, args.seed, args.profile)
+        current = summarize(run)
+        rss = f"{current['peak_rss_kb'] / 1024:.0f} MB" if current["peak_rss_kb"] else "n/a"
+        print(f"{engine}: {current['matches']} matches, {current['matches_per_s']:.1f} matches/s, "
+              f"{current['balls_per_s']:,.0f} balls/s, peak RSS {rss}")
+        print(f"  first innings {current['inn1_runs']['mean']:.1f} ± {current['inn1_runs']['sigma']:.1f} runs, "
+              f"{current['inn1_wickets']['mean']:.2f} wickets; boundaries {current['boundary_pct']['mean']:.1f}% "
+              f"of legal balls; chases won {current['chase_won']['mean'] * 100:.0f}%")
+        if args.profile:
+            print("  " + profiling.format_breakdown(run["timings"]).replace("\n", "\n  "))
+            continue
+        if args.update_baseline:
+            baselines[engine] = current
+            continue
+        if engine not in baselines:
+            print("  no baseline stored (run with --update-baseline)")
+            continue
+        print(f"  {'check':<24}{'baseline':>12}{'current':>12}{'':>12}")
+        for check, base, value, score, ok in compare(baselines[engine], current, args.alpha, args.speed_tolerance):
+            print(f"  {check:<24}{base:>12.3f}{value:>12.3f}{score:>12}  {'ok' if ok else 'REGRESSION'}")
+            failed = failed or not ok
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""Load test for the Flask simulation endpoints.
+
+Replays a weighted mix of full-match requests against the app with a fixed number of concurrent
+clients (an asyncio HTTP/1.1 client, standard library only) and reports
+  - throughput: completed scenarios per second and errors
+  - latency per scenario and overall: p50, p95, p99
+  - server RSS: peak and final, sampled while the load runs (all processes of the server)
+Scenarios: direct (POST /generate_scorecard), ball_by_ball (the same POST, then the replay page it
+redirects to, with the session cookie) and animation (POST /setup_animation). Teams are drawn with
+a fixed seed, so every run sends the same requests.
+
+The app is served by gunicorn -c gunicorn.conf.py (as in production), a single-threaded werkzeug
+server in a child process, the same server in this process, or is any running server given by
+--url. Each run is appended to benchmarks/results/load_test.jsonl under a label (default: the git
+commit) and compared with the last stored run of the same settings, so app versions can be
+compared on one machine.
+
+Run from IPL-3.0/:  python benchmarks/load_test.py [--mix direct=6,ball_by_ball=3,animation=1] [--requests N]
+                    [--concurrency C] [--server gunicorn|werkzeug|inprocess] [--workers W] [--url URL]
+                    [--seed S] [--label L] [--no-save]
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+RESULTS_PATH = os.path.join(current_script_dir, "results", "load_test.jsonl")
+SCENARIOS = ("direct", "ball_by_ball", "animation")
+DEFAULT_MIX = "direct=6,ball_by_ball=3,animation=1"
+SERVERS = ("gunicorn", "werkzeug", "inprocess")
+PERCENTILES = (50, 95, 99)
+RSS_SAMPLE_SECONDS = 0.25
+
+
+def parse_mix(text):
+    """{'direct': 6, ...} from "direct=6,ball_by_ball=3"; unknown scenarios and negative weights are errors."""
+    mix = {}
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}.")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Negative weight for {name}.")
+    if not sum(mix.values()):
+        raise ValueError("The mix has no scenario with a positive weight.")
+    return mix
+
+
+def build_plan(mix, requests, seed, team_codes):
+    """The (scenario, team1, team2) of every request, in order; the same for the same arguments."""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    return [(rng.choices(names, weights)[0], *rng.sample(team_codes, 2)) for _ in range(requests)]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of already sorted values (None when there are none)."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))  # ceil(n * p / 100)
+    return sorted_values[int(rank) - 1]
+
+
+# --- HTTP client ---
+async def http_request(base_url, method, path, form=None, cookie=None, timeout=60.0):
+    """(status, headers, body) of one HTTP/1.1 request on a fresh connection (Connection: close)."""
+    url = urllib.parse.urlsplit(base_url)
+    body = urllib.parse.urlencode(form).encode() if form is not None else b""
+    headers = [f"{method} {path} HTTP/1.1", f"Host: {url.netloc}", "Connection: close", f"Content-Length: {len(body)}"]
+    if form is not None:
+        headers.append("Content-Type: application/x-www-form-urlencoded")
+    if cookie:
+        headers.append(f"Cookie: {cookie}")
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        try:
+            writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+            await writer.drain()
+            response = await reader.read()  # The server closes the connection after the response
+        finally:
+            writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        response_headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            response_headers.setdefault(name.strip().lower(), []).append(value.strip())
+        return int(status_line.split()[1]), response_headers, payload
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+
+async def run_scenario(base_url, scenario, team1, team2, timeout):
+    """Plays one scenario like a browser would; True if it ended in a 200 page."""
+    teams = {"selectedTeam1": team1, "selectedTeam2": team2}
+    if scenario == "animation":
+        status, _, _ = await http_request(base_url, "POST", "/setup_animation", teams, timeout=timeout)
+        return status == 200
+    form = dict(teams, simulation_type=scenario)
+    status, headers, _ = await http_request(base_url, "POST", "/generate_scorecard", form, timeout=timeout)
+    if scenario == "direct":
+        return status == 200
+    if status != 302 or "location" not in headers:
+        return False
+    cookie = "; ".join(value.split(";", 1)[0] for value in headers.get("set-cookie", []))
+    location = urllib.parse.urlsplit(headers["location"][0])
+    status, _, _ = await http_request(base_url, "GET", location.path + (f"?{location.query}" if location.query else ""),
+                                      cookie=cookie, timeout=timeout)
+    return status == 200
+
+
+async def run_load(base_url, plan, concurrency, timeout=60.0):
+    """Runs the plan with concurrency clients, each taking the next request when its last one is done.
+    Returns ([(scenario, seconds, ok)], elapsed seconds)."""
+    pending = iter(plan)
+    results = []
+
+    async def client():
+        for scenario, team1, team2 in pending:
+            start = time.perf_counter()
+            try:
+                ok = await run_scenario(base_url, scenario, team1, team2, timeout)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                ok = False
+            results.append((scenario, time.perf_counter() - start, ok))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    def latency(rows):
+        seconds = sorted(s for _, s, ok in rows if ok)
+        row = {"n": len(rows), "errors": sum(1 for *_, ok in rows if not ok)}
+        row.update({f"p{p}_ms": percentile(seconds, p) * 1000 if seconds else None for p in PERCENTILES})
+        return row
+
+    summary = {"requests": len(results), "seconds": elapsed, "throughput": sum(1 for *_, ok in results if ok) / elapsed,
+               "all": latency(results)}
+    summary["scenarios"] = {name: latency([r for r in results if r[0] == name]) for name in SCENARIOS
+                            if any(r[0] == name for r in results)}
+    return summary
+
+
+# --- Server and its memory ---
+def process_tree_rss_kb(pid):
+    """Resident memory of pid and all its descendants in kB (Linux /proc), or None if unavailable."""
+    try:
+        parents = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as f:
+                        stat = f.read()
+                except OSError:
+                    continue
+                parents[int(entry)] = int(stat.rsplit(")", 1)[1].split()[1])
+    except OSError:
+        return None
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        children = [child for child, parent in parents.items() if parent in frontier]
+        tree.update(children)
+        frontier = children
+    total = 0
+    for member in tree:
+        try:
+            with open(f"/proc/{member}/status") as f:
+                total += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+        except OSError:
+            pass
+    return total or None
+
+
+class RssSampler:
+    """Samples process_tree_rss_kb(pid) in a background thread; peak_kb and last_kb after stop()."""
+
+    def __init__(self, pid, interval=RSS_SAMPLE_SECONDS):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = self.last_kb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        rss = process_tree_rss_kb(self.pid)
+        if rss is not None:
+            self.last_kb = rss
+            self.peak_kb = max(self.peak_kb or 0, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_listening(port, process, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with status {process.returncode} before listening.")
+        with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port), timeout=0.5):
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"The server did not listen on port {port} within {timeout:.0f} s.")
+
+
+def _make_app(tmp_log_dir):
+    import app as app_module
+    logging.disable(logging.WARNING)
+    return app_module.create_app({"TMP_LOG_DIR": tmp_log_dir})
+
+
+@contextlib.contextmanager
+def serve(kind, workers, tmp_dir):
+    """Starts the app; yields (base url, pid whose process tree is the server)."""
+    env = dict(os.environ, IPL_TMP_LOG_DIR=os.path.join(tmp_dir, "logs"))
+    if kind == "inprocess":
+        from werkzeug.serving import make_server
+        os.chdir(project_root_dir)  # the app reads player data and teams relative to the project
+        server = make_server("127.0.0.1", 0, _make_app(env["IPL_TMP_LOG_DIR"]), threaded=False)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_port}", os.getpid()
+        finally:
+            server.shutdown()
+        return
+    port = _free_port()
+    if kind == "gunicorn":
+        env.update(IPL_BIND=f"127.0.0.1:{port}", IPL_WORKERS=str(workers))
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+    else:
+        command = [sys.executable, os.path.abspath(__file__), "--serve", str(port)]
+    process = subprocess.Popen(command, cwd=project_root_dir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_listening(port, process)
+        yield f"http://127.0.0.1:{port}", process.pid
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def serve_forever(port):
+    """The werkzeug child server: one request at a time, like a gunicorn sync worker."""
+    from werkzeug.serving import make_server
+    os.chdir(project_root_dir)
+    app = _make_app(os.environ["IPL_TMP_LOG_DIR"])
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # mainconnect prints every ball
+        make_server("127.0.0.1", port, app, threaded=False).serve_forever()
+
+
+# --- Stored results ---
+def git_label():
+    try:
+        completed = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=project_root_dir,
+                                   capture_output=True, text=True, check=True)
+        return completed.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(path=RESULTS_PATH):
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def save_result(result, path=RESULTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(result, sort_keys=True) + "\n")
+
+
+def previous_result(results, settings):
+    """The most recent stored run with the same settings, or None."""
+    return next((result for result in reversed(results) if result["settings"] == settings), None)
+
+
+def compare(previous, current):
+    """[(metric, previous value, current value, ratio)] for throughput, overall percentiles and peak RSS."""
+    rows = [("throughput", previous["throughput"], current["throughput"])]
+    rows += [(f"p{p}_ms", previous["all"][f"p{p}_ms"], current["all"][f"p{p}_ms"]) for p in PERCENTILES]
+    rows.append(("peak_rss_kb", previous.get("peak_rss_kb"), current.get("peak_rss_kb")))
+    return [(metric, base, value, value / base if base and value is not None else None) for metric, base, value in rows]
+
+
+def _ms(value):
+    return f"{value:>9.1f}" if value is not None else f"{'n/a':>9}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. direct=6,ball_by_ball=3,animation=1")
+    parser.add_argument("--requests", type=int, default=200, help="scenarios to play in total")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients sending at the same time")
+    parser.add_argument("--server", choices=SERVERS, help="how to start the app (default: gunicorn if installed, else werkzeug)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="gunicorn worker processes")
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="with --url: the server's pid, to report its RSS")
+    parser.add_argument("--seed", type=int, default=2024, help="seed of the request plan")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before a request counts as failed")
+    parser.add_argument("--label", help="name of this run in the results (default: git describe)")
+    parser.add_argument("--results", default=RESULTS_PATH, help="results file (JSON lines)")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the results")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        serve_forever(args.serve)
+        return 0
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.server is None and not args.url:
+        try:
+            import gunicorn  # noqa: F401
+            args.server = "gunicorn"
+        except ImportError:
+            args.server = "werkzeug"
+    server = "external" if args.url else args.server
+    workers = args.workers if server == "gunicorn" else 1
+
+    with open(os.path.join(project_root_dir, "teams", "teams.json")) as f:
+        team_codes = sorted(json.load(f))
+    plan = build_plan(mix, args.requests, args.seed, team_codes)
+    settings = {"mix": mix, "requests": args.requests, "concurrency": args.concurrency, "seed": args.seed,
+                "server": server, "workers": workers}
+
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.ExitStack() as stack:
+        if args.url:
+            base_url, pid = args.url.rstrip("/"), args.pid
+        else:
+            base_url, pid = stack.enter_context(serve(args.server, workers, tmp_dir))
+        sampler = RssSampler(pid).start() if pid else None
+        results, elapsed = asyncio.run(run_load(base_url, plan, args.concurrency, args.timeout))
+        if sampler:
+            sampler.stop()
+
+    current = summarize(results, elapsed)
+    current.update(label=args.label or git_label(), time=time.strftime("%Y-%m-%dT%H:%M:%S"), settings=settings,
+                   peak_rss_kb=sampler.peak_kb if sampler else None, final_rss_kb=sampler.last_kb if sampler else None)
+
+    print(f"{current['label']}: {current['requests']} scenarios at concurrency {args.concurrency} against {server}"
+          f"{f' ({workers} workers)' if server == 'gunicorn' else ''}: {current['throughput']:.2f}/s over "
+          f"{elapsed:.1f} s, {current['all']['errors']} errors")
+    print(f"  {'scenario':<14}{'n':>6}{'errors':>8}" + "".join(f"{f'p{p} ms':>9}" for p in PERCENTILES))
+    for name, row in itertools.chain(current["scenarios"].items(), [("all", current["all"])]):
+        print(f"  {name:<14}{row['n']:>6}{row['errors']:>8}" + "".join(_ms(row[f"p{p}_ms"]) for p in PERCENTILES))
+    if current["peak_rss_kb"]:
+        print(f"  server RSS: peak {current['peak_rss_kb'] / 1024:.0f} MB, final {current['final_rss_kb'] / 1024:.0f} MB")
+
+    previous = previous_result(load_results(args.results), settings)
+    if previous is not None:
+        print(f"  compared with {previous['label']} ({previous['time']}):")
+        for metric, base, value, ratio in compare(previous, current):
+            if base is not None and value is not None:
+                print(f"    {metric:<14}{base:>12.1f}{value:>12.1f}{f'x{ratio:.2f}' if ratio else '':>9}")
+    if not args.no_save:
+        save_result(current, args.results)
+        print(f"  stored in {args.results}")
+    return 1 if current["all"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
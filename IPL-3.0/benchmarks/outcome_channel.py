@@ -0,0 +1,80 @@
+"""Regex vs structured animation-log extraction over a simulated season.
+
+Simulates a double round-robin between the teams in teams/teams.json with mainconnect
+(56 matches, 112 innings logs), then times turning every innings log into the pygame
+animation log via
+  - the legacy path: parsing the commentary 'event' strings (ball_outcomes.simplify_event_text)
+  - the structured path: reading each entry's 'outcome' (ball_outcomes.simplify_outcomes)
+and checks that both produce the same tokens.
+
+Run from IPL-3.0/:  python benchmarks/outcome_channel.py [--matches N] [--repeat R]
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import ball_outcomes
+import mainconnect
+
+
+def simulate_season_logs(max_matches=None):
+    with open(os.path.join(project_root_dir, "teams", "teams.json")) as f:
+        team_codes = list(json.load(f).keys())
+    fixtures = list(itertools.permutations(team_codes, 2))
+    if max_matches:
+        fixtures = fixtures[:max_matches]
+    os.makedirs("scores", exist_ok=True)  # mainconnect.game writes its scorecard there
+    logs = []
+    for team_one, team_two in fixtures:
+        result = mainconnect.game(manual=False, sentTeamOne=team_one, sentTeamTwo=team_two, switch="bench")
+        logs.append(result["innings1Log"])
+        logs.append(result["innings2Log"])
+    return logs
+
+
+def time_path(simplify, logs, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for log in logs:
+            simplify(log)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=None, help="limit the number of simulated matches")
+    parser.add_argument("--repeat", type=int, default=20, help="timing repeats; the best run is reported")
+    args = parser.parse_args()
+
+    sim_start = time.perf_counter()
+    logs = simulate_season_logs(args.matches)
+    sim_elapsed = time.perf_counter() - sim_start
+    balls = sum(len(log) for log in logs)
+
+    mismatches = sum(1 for log in logs
+                     if ball_outcomes.simplify_event_text(log) != ball_outcomes.simplify_outcomes(log))
+
+    regex_s = time_path(ball_outcomes.simplify_event_text, logs, args.repeat)
+    structured_s = time_path(ball_outcomes.simplify_outcomes, logs, args.repeat)
+
+    print(f"Simulated {len(logs) // 2} matches ({len(logs)} innings, {balls} log entries) in {sim_elapsed:.1f}s")
+    print(f"{'path':<12}{'total ms':>12}{'ns/ball':>12}{'balls/s':>14}")
+    for name, elapsed in (("regex", regex_s), ("structured", structured_s)):
+        print(f"{name:<12}{elapsed * 1e3:>12.2f}{elapsed * 1e9 / balls:>12.0f}{balls / elapsed:>14,.0f}")
+    print(f"speedup: {regex_s / structured_s:.1f}x, innings with differing tokens: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
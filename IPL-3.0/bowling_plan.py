@@ -0,0 +1,90 @@
+OVERS = 20
+MAX_OVERS = 4 # Per bowler
+
+# Phases as (first over, end over), 0-based like mainconnect's over loop
+PHASES = {'powerplay': (0, 6), 'middle': (6, 17), 'death': (17, 20)}
+# A bowler who has bowled at least REVIEW_BALLS and goes at more than this many runs per ball
+# (without taking wickets) is taken off for the next over he was planned to bowl.
+EXPENSIVE_RUNS_PER_BALL = {'powerplay': 1.7, 'middle': 1.5, 'death': 2.0}
+REVIEW_BALLS = 12
+WICKET_RATE_TO_KEEP = 0.091
+
+# Over allocation for mainconnect's innings. A full plan for the innings is built up front from
+# each bowler's overNumbersObject (how often he bowls that over in real matches) and only the
+# remaining overs are re-planned when a bowler is taken off. Every pick checks that the rest of
+# the innings can still be bowled within the quotas and without back-to-back overs, so planning
+# always finishes in a bounded number of steps: no sampling, and no randomness.
+
+
+def phase_of(over):
+    for phase, (start, end) in PHASES.items():
+        if start <= over < end:
+            return phase
+    return 'death'
+
+
+def over_preference(bowler, over):
+    # overNumbersObject uses 1-based over numbers ("1".."20")
+    return bowler['overNumbersObject'].get(str(over + 1), 0)
+
+
+def can_finish(remaining_overs, quotas, previous):
+    """True if remaining_overs can be bowled from quotas ({initials: overs left}) with nobody
+    bowling two overs in a row, given that `previous` bowled the last one."""
+    capacity = 0
+    for initials, quota in quotas.items():
+        # In n overs a bowler fits at most every other over, one fewer if he would have to start
+        most = remaining_overs // 2 if initials == previous else (remaining_overs + 1) // 2
+        capacity += min(quota, most)
+    return capacity >= remaining_overs
+
+
+class BowlingPlan:
+    def __init__(self, bowling, overs=OVERS, max_overs=MAX_OVERS):
+        self.bowlers = {b['playerInitials']: b for b in bowling}
+        self.order = list(self.bowlers) # Ties go to the engine's bowling order
+        self.overs = overs
+        # With fewer than overs / max_overs bowlers the quota has to give
+        self.max_overs = max(max_overs, -(-overs // max(len(self.order), 1)))
+        self.used = {initials: 0 for initials in self.order}
+        self.plan = self._plan_from(0, None)
+
+    def _plan_from(self, start, previous, avoid=None):
+        """Plans overs start..end given the overs already bowled; `avoid` is kept off over `start` if possible."""
+        quotas = {initials: self.max_overs - used for initials, used in self.used.items()}
+        plan = []
+        for over in range(start, self.overs):
+            ranked = sorted(self.order, key=lambda initials: -over_preference(self.bowlers[initials], over))
+            if over == start and avoid:
+                ranked = [initials for initials in ranked if initials != avoid] + [avoid]
+            pick = None
+            for initials in ranked:
+                if quotas[initials] <= 0 or initials == previous: continue
+                quotas[initials] -= 1
+                if can_finish(self.overs - over - 1, quotas, initials):
+                    pick = initials
+                    break
+                quotas[initials] += 1
+            if pick is None: # Only when the quotas cannot cover the innings (e.g. a single bowler)
+                pick = next((i for i in ranked if quotas[i] > 0 and i != previous), None) or next((i for i in ranked if i != previous), ranked[0])
+                quotas[pick] -= 1
+            plan.append(pick)
+            previous = pick
+        return [None] * start + plan
+
+    def is_expensive(self, initials, over, bowler_tracker):
+        figures = bowler_tracker.get(initials)
+        if not figures or figures['balls'] < REVIEW_BALLS:
+            return False
+        return (figures['runs'] / figures['balls'] > EXPENSIVE_RUNS_PER_BALL[phase_of(over)]
+                and figures['wickets'] / figures['balls'] < WICKET_RATE_TO_KEEP)
+
+    def next_bowler(self, over, bowler_tracker, last_over):
+        """Returns the bowler dict for `over` and records it; re-plans the rest of the innings
+        when the planned bowler is expensive or no longer fits (constant work per over)."""
+        planned = self.plan[over]
+        if planned == last_over or self.used[planned] >= self.max_overs or self.is_expensive(planned, over, bowler_tracker):
+            self.plan = self._plan_from(over, last_over, avoid=planned)
+        chosen = self.plan[over]
+        self.used[chosen] += 1
+        return self.bowlers[chosen]
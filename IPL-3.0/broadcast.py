@@ -0,0 +1,214 @@
+import collections
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+
+from match_simulator import MatchSimulator
+
+# Featured matches watched by many viewers at once.
+#
+# A featured match is one seeded MatchSimulator that plays a ball every ball_interval seconds of
+# wall-clock time from its start. Each ball is played once, by whichever request first finds it
+# due, and encoded to JSON once; every viewer then gets the same bytes from a ring buffer of the
+# latest events. Serving a viewer is a lookup, so the cost of a match does not grow with its
+# audience. A viewer that joins late (or falls behind by more than the ring) gets one compact
+# catch-up snapshot instead of the history: the state header and innings totals (see
+# MatchSimulator.get_game_state_delta) plus the last few balls for the commentary.
+#
+# Nothing runs in the background: matches advance when they are read. That survives forking
+# (gunicorn's preload_app) and lets every worker process serve the same match without talking
+# to the others: the match id encodes teams, seed and start time, so a worker that has never
+# seen an id rebuilds the match from it and, the simulator being deterministic for a seed,
+# produces the very same balls. The per-match cost is therefore per process, not per viewer.
+# With a secret the id also carries an HMAC of the rest, so only matches this app started are
+# rebuilt, not whatever seeds a client makes up; and at most max_matches are held, least
+# recently read first out (an evicted match is simply rebuilt if it is read again).
+#
+#   hub = BroadcastHub(ball_interval=3.0, secret=app.secret_key)
+#   match = hub.feature('csk', 'mi')            # match.match_id == 'csk-mi-<seed>-<start>-<signature>'
+#   events, next_seq = match.events_since(seq)  # [(seq, json)], or None when seq is out of the ring
+#   match.snapshot()                            # (seq, json) catch-up for a new viewer
+
+SNAPSHOT_RECENT_BALLS = 12
+SIGNATURE_LENGTH = 16 # Hex digits of the HMAC-SHA256 kept in a match id
+MAX_MATCH_EVENTS = 320 # More than any match needs (wides and no-balls included); bounds how long an unread match is kept
+
+
+class FeaturedMatch:
+    def __init__(self, match_id, team1_code, team2_code, seed, start, ball_interval, ring_size, clock):
+        self.match_id = match_id
+        self.team1_code = team1_code
+        self.team2_code = team2_code
+        self.seed = seed
+        self.start = start
+        self.ball_interval = ball_interval
+        self._clock = clock
+        self._simulator = None # Created on first read
+        self._events = collections.deque(maxlen=ring_size) # (seq, encoded event)
+        self._recent_balls = collections.deque(maxlen=SNAPSHOT_RECENT_BALLS)
+        self._snapshot = None # (seq, encoded snapshot) for the current seq
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+        self.seq = 0 # Events published so far; event n has seq n
+        self.game_over = False
+        self.finished_at = None
+
+    # --- Producing ---
+    def _balls_due(self, now):
+        return max(0, int((now - self.start) / self.ball_interval))
+
+    def _advance_locked(self, now):
+        if self._simulator is None:
+            self._simulator = MatchSimulator(self.team1_code, self.team2_code, seed=self.seed)
+            self._simulator.perform_toss()
+        due = self._balls_due(now)
+        published = False
+        while self.seq < due and not self.game_over:
+            cursor = self._simulator.state_cursor()
+            innings_num = self._simulator.current_innings_num
+            result = self._simulator.simulate_one_ball(cursor)
+            result['ball_event'] = dict(result['ball_event'], innings_num=innings_num)
+            self.seq += 1
+            self._events.append((self.seq, json.dumps(dict(result, seq=self.seq), separators=(',', ':'))))
+            if 'commentary' not in result['ball_event']:
+                self._recent_balls.append(result['ball_event'])
+            if self._simulator.game_over:
+                self.game_over = True
+                self.finished_at = self.start + self.seq * self.ball_interval
+            published = True
+        if published:
+            self._snapshot = None
+            self._published.notify_all()
+
+    def advance(self):
+        """Plays every ball due by now; returns the latest seq."""
+        with self._lock:
+            self._advance_locked(self._clock())
+            return self.seq
+
+    # --- Consuming ---
+    def events_since(self, seq):
+        """([(seq, encoded event)] after seq, latest seq), or (None, latest seq) when the events after
+        seq have already left the ring and the viewer needs a snapshot."""
+        with self._lock:
+            self._advance_locked(self._clock())
+            return self._events_since_locked(seq), self.seq
+
+    def _events_since_locked(self, seq):
+        if seq >= self.seq:
+            return []
+        if not self._events or self._events[0][0] > seq + 1:
+            return None
+        return [event for event in self._events if event[0] > seq]
+
+    def wait(self, seq, timeout):
+        """Like events_since, but waits up to timeout seconds (until the next ball is due) for news."""
+        deadline = self._clock() + timeout
+        with self._lock:
+            while True:
+                now = self._clock()
+                self._advance_locked(now)
+                events = self._events_since_locked(seq)
+                if events != [] or self.game_over or now >= deadline:
+                    return events, self.seq
+                next_due = self.start + (self.seq + 1) * self.ball_interval
+                self._published.wait(max(0.0, min(deadline, next_due) - now))
+
+    def snapshot(self):
+        """(seq, encoded catch-up snapshot): where the match stands plus the last few balls, built
+        once per ball however many viewers join."""
+        with self._lock:
+            self._advance_locked(self._clock())
+            if self._snapshot is None:
+                summary = self._simulator.get_game_state_delta(self._simulator.state_cursor())
+                payload = {'seq': self.seq, 'summary': summary, 'recent_balls': list(self._recent_balls)}
+                self._snapshot = (self.seq, json.dumps(payload, separators=(',', ':')))
+            return self._snapshot
+
+    def seconds_to_next_ball(self):
+        if self.game_over:
+            return None
+        return max(0.0, self.start + (self.seq + 1) * self.ball_interval - self._clock())
+
+
+class BroadcastHub:
+    def __init__(self, ball_interval=3.0, ring_size=256, retain=600, team_codes=None, max_matches=64,
+                 secret=None, clock=time.time):
+        self.ball_interval = ball_interval
+        self.ring_size = ring_size
+        self.retain = retain # Seconds a finished match stays available
+        self.team_codes = team_codes # Valid team codes for ids rebuilt from requests (None: any)
+        self.max_matches = max_matches
+        self._secret = secret.encode() if isinstance(secret, str) else secret # None: ids are not signed
+        self._clock = clock
+        self._matches = collections.OrderedDict() # Least recently read first
+        self._lock = threading.Lock()
+
+    def _signature(self, base_id):
+        return hmac.new(self._secret, base_id.encode(), hashlib.sha256).hexdigest()[:SIGNATURE_LENGTH]
+
+    def make_id(self, team1_code, team2_code, seed, start):
+        base_id = f"{team1_code}-{team2_code}-{seed}-{int(start)}"
+        return base_id if self._secret is None else f"{base_id}-{self._signature(base_id)}"
+
+    def feature(self, team1_code, team2_code, seed=None, start=None):
+        """Starts (or returns) the featured match of these teams, seed and start time (epoch seconds, default now)."""
+        start = int(self._clock() if start is None else start)
+        seed = int.from_bytes(os.urandom(4), 'big') if seed is None else int(seed)
+        if seed < 0:
+            raise ValueError("seed must not be negative.")
+        return self._get_or_create(self.make_id(team1_code, team2_code, seed, start), team1_code, team2_code, seed, start)
+
+    def get(self, match_id):
+        """The featured match with this id, rebuilt from the id if this process has not seen it; None if invalid."""
+        with self._lock:
+            match = self._matches.get(match_id)
+            if match is not None:
+                self._matches.move_to_end(match_id)
+                return match
+        try:
+            team1_code, team2_code, seed, start = match_id.split('-')[:4]
+            seed, start = int(seed), int(start)
+        except (AttributeError, ValueError):
+            return None
+        # Compared in constant time, so a client cannot find a valid signature digit by digit
+        if not hmac.compare_digest(self.make_id(team1_code, team2_code, seed, start).encode(), match_id.encode()) or team1_code == team2_code:
+            return None
+        if self.team_codes is not None and (team1_code not in self.team_codes or team2_code not in self.team_codes):
+            return None
+        if start > self._clock() + self.ball_interval:
+            return None
+        return self._get_or_create(match_id, team1_code, team2_code, seed, start)
+
+    def _get_or_create(self, match_id, team1_code, team2_code, seed, start):
+        with self._lock:
+            self._prune_locked()
+            match = self._matches.get(match_id)
+            if match is None:
+                match = self._matches[match_id] = FeaturedMatch(
+                    match_id, team1_code, team2_code, seed, start, self.ball_interval, self.ring_size, self._clock)
+                while len(self._matches) > self.max_matches:
+                    self._matches.popitem(last=False)
+            else:
+                self._matches.move_to_end(match_id)
+            return match
+
+    def _prune_locked(self):
+        now = self._clock()
+        for match_id, match in list(self._matches.items()):
+            finished_at = match.finished_at
+            if finished_at is None: # Not read since it ended (or never read at all)
+                finished_at = match.start + MAX_MATCH_EVENTS * match.ball_interval
+            if now - finished_at > self.retain:
+                del self._matches[match_id]
+
+    def matches(self):
+        with self._lock:
+            self._prune_locked()
+            return list(self._matches.values())
+
+    def __len__(self):
+        return len(self._matches)
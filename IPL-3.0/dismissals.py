@@ -0,0 +1,118 @@
+import re
+
+# Structured dismissal records shared by mainconnect, MatchSimulator, app, doipl and src/utils.
+# A dismissal is a plain dict so it survives deepcopy/json.dump of the trackers unchanged:
+#   {'type': 'caught', 'bowler': 'RA Jadeja', 'fielder': 'MS Dhoni', 'ball': 57}
+# 'fielder' is only set for catches, 'bowler' is None for run outs and 'ball' is optional.
+
+RUN_OUT = "run out"
+BOWLER_CREDITED = ("bowled", "caught", "lbw", "stumped", "hitwicket")
+
+_TYPE_ALIASES = {
+    "caughtby": "caught", "caught": "caught", "c": "caught",
+    "runout": RUN_OUT, "run out": RUN_OUT, "run_out": RUN_OUT,
+    "bowled": "bowled", "lbw": "lbw", "stumped": "stumped",
+    "hitwicket": "hitwicket", "hit wicket": "hitwicket",
+}
+
+# Legacy ballLog dismissal entries, e.g.
+#   "57:W-CaughtBy-MS Dhoni-Bowler-RA Jadeja", "12:W-lbw-Bowler-JJ Bumrah", "30:W1-runout"
+# "-Bowler-" is the only reliable separator since player names may themselves contain '-'.
+_LEGACY_RE = re.compile(
+    r"^(?:(?P<ball>\d+):)?W(?P<runs>\d*)-"
+    r"(?:(?P<runout>runout|run out)"
+    r"|CaughtBy-(?P<fielder>.+?)(?:-Bowler-(?P<catch_bowler>.+))?"
+    r"|(?P<type>[A-Za-z ]+)-Bowler-(?P<bowler>.+))$",
+    re.IGNORECASE,
+)
+
+# Any ball-log entry recording a wicket: "57:W", "30:W1-runout", "12:W-lbw-Bowler-X" (but not "8:WD").
+_WICKET_ENTRY_RE = re.compile(r"^(?:\d+:)?W(?!D)")
+
+
+def normalize_type(kind):
+    if not kind:
+        return "wicket"
+    key = str(kind).strip().lower()
+    return _TYPE_ALIASES.get(key, key)
+
+
+def make_dismissal(kind, bowler=None, fielder=None, ball=None):
+    """Builds the dismissal record an engine stores on the batter's tracker at the moment of the wicket."""
+    kind = normalize_type(kind)
+    dismissal = {'type': kind, 'bowler': None if kind == RUN_OUT else bowler}
+    if kind == "caught":
+        dismissal['fielder'] = fielder
+    if ball is not None:
+        dismissal['ball'] = ball
+    return dismissal
+
+
+def parse_dismissal(log_entry):
+    """Parses one legacy ballLog entry. Returns a dismissal dict, or None if the entry is not a wicket."""
+    if not log_entry:
+        return None
+    match = _LEGACY_RE.match(log_entry)
+    if not match:
+        return None
+    ball = int(match.group('ball')) if match.group('ball') else None
+    if match.group('runout'):
+        return make_dismissal(RUN_OUT, ball=ball)
+    if match.group('fielder') is not None:
+        return make_dismissal("caught", match.group('catch_bowler'), match.group('fielder'), ball)
+    return make_dismissal(match.group('type'), match.group('bowler'), ball=ball)
+
+
+def is_wicket_entry(log_entry):
+    return bool(log_entry) and _WICKET_ENTRY_RE.match(log_entry) is not None
+
+
+def dismissal_from_tracker(stats):
+    """Returns the structured dismissal for a batter tracker entry.
+
+    Trackers written by the engines carry it directly; older trackers (e.g. replay logs saved
+    before dismissals were recorded) only have the ballLog, where a dismissal is always the
+    batter's final ball, so only that one entry is parsed.
+    """
+    dismissal = stats.get('dismissal')
+    if dismissal is not None:
+        return dismissal
+    ball_log = stats.get('ballLog')
+    if ball_log:
+        return parse_dismissal(ball_log[-1])
+    return None
+
+
+def format_dismissal(dismissal):
+    """Scorecard text for a dismissal dict ("c X b Y", "lbw b Y", "Run out", ...)."""
+    if not dismissal:
+        return "Not out"
+    kind = dismissal.get('type')
+    bowler = dismissal.get('bowler')
+    if kind == "caught":
+        fielder = dismissal.get('fielder')
+        if fielder and bowler:
+            return f"c {fielder} b {bowler}"
+        return "Caught"
+    if kind == RUN_OUT:
+        return "Run out"
+    if kind in BOWLER_CREDITED and bowler:
+        return f"{kind} b {bowler}"
+    return "Wicket"
+
+
+def batter_outcome(stats):
+    """(dismissal dict or None, how-out text) for one batter tracker entry; the text is the
+    dismissal, "Not out", or "DNB" if they never faced a ball."""
+    dismissal = dismissal_from_tracker(stats)
+    if dismissal is not None:
+        return dismissal, format_dismissal(dismissal)
+    if stats.get('ballLog') or stats.get('balls', 0) > 0:
+        return None, "Not out"
+    return None, "DNB"
+
+
+def how_out(stats):
+    """How-out text for one batter tracker entry (see batter_outcome)."""
+    return batter_outcome(stats)[1]
+
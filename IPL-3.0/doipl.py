@@ -2,6 +2,7 @@ import os
 import sys
 import random
 from mainconnect import game
+import dismissals
 from tabulate import tabulate
 import copy
 
@@ -135,25 +136,8 @@ def display_scorecard(bat_tracker, bowl_tracker, team_name, innings_num):
         runs = data['runs']
         balls = data['balls']
         sr = round((runs / balls) * 100, 2) if balls else 'NA'
-        how_out = "DNB"
-        batted = False
-        for log in data['ballLog']:
-            batted = True
-            if "W" in log:
-                if "CaughtBy" in log:
-                    split_log = log.split("-")
-                    catcher = split_log[2]
-                    bowler = split_log[-1]
-                    how_out = f"c {catcher} b {bowler}"
-                elif "runout" in log:
-                    how_out = "Run out"
-                else:
-                    split_log = log.split("-")
-                    out_type = split_log[1]
-                    bowler = split_log[-1]
-                    how_out = f"{out_type} b {bowler}"
-            else:
-                how_out = "Not out" if balls > 0 else "DNB"
+        how_out = dismissals.how_out(data)
+        batted = bool(data['ballLog'])
         if batted or balls > 0:
             batsmanTabulate.append([player, runs, balls, sr, how_out])
     
@@ -0,0 +1,55 @@
+# gunicorn settings for serving the Flask app: gunicorn -c gunicorn.conf.py
+# Every value can be overridden on the command line or with the IPL_* variables below.
+import gc
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+
+chdir = os.path.dirname(os.path.abspath(__file__))  # player data and teams are read relative to IPL-3.0/
+wsgi_app = "wsgi:app"
+bind = os.environ.get("IPL_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("IPL_WORKERS", multiprocessing.cpu_count()))
+
+# mainconnect.game() redirects sys.stdout for the whole process while a match is simulated,
+# so each worker must run one request at a time: scale with processes, not threads.
+worker_class = "sync"
+threads = 1
+timeout = int(os.environ.get("IPL_TIMEOUT", 60))
+
+# Load the app (and warm up player data) once in the master; workers inherit it copy-on-write.
+preload_app = True
+
+# State the workers share lives in a fresh directory per run, removed on exit, unless the
+# variables name other places:
+#   IPL_SNAPSHOT_DB   live step-by-step matches are checkpointed here, so whichever worker gets
+#                     the next ball can play it (see simulator_pool.py)
+#   IPL_METRICS_DIR   each worker writes its metrics here and GET /metrics adds them up (see metrics.py)
+_run_dir = tempfile.mkdtemp(prefix="ipl-run-")
+os.environ.setdefault("IPL_SNAPSHOT_DB", os.path.join(_run_dir, "snapshots.sqlite3"))
+os.environ.setdefault("IPL_METRICS_DIR", os.path.join(_run_dir, "metrics"))
+
+
+def on_starting(server):
+    import app
+    import metrics
+    app.clear_scores_dir(os.path.join(chdir, "scores"))
+    os.makedirs(os.environ["IPL_METRICS_DIR"], exist_ok=True)
+    metrics.clear_directory(os.environ["IPL_METRICS_DIR"])
+
+
+def when_ready(server):
+    # Move everything loaded so far into the permanent generation so the collector never
+    # touches (and thereby copies) those pages in the workers.
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Forked workers would otherwise all replay the master's random stream, i.e. the same matches.
+    random.seed()
+
+
+def on_exit(server):
+    shutil.rmtree(_run_dir, ignore_errors=True)
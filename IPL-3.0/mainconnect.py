@@ -1,5 +1,11 @@
 import random
 import accessJSON
+import dismissals
+import bowling_plan
+import phase_adjustments
+import matchups
+import profiling
+import ball_outcomes
 import copy
 import sys 
 import json
@@ -86,6 +92,9 @@ innings2Log = []
 
 tossMsg = None
 
+# Per-ball timings; game(profile=True) swaps in a profiling.Profiler for that match
+profiler = profiling.DISABLED
+
 def doToss(pace, spin, outfield, secondInnDew, pitchDetoriate, typeOfPitch, team1, team2):
     global tossMsg
     battingLikely =  0.45
@@ -156,6 +165,22 @@ def pitchInfo(venue, typeOfPitch):
     return [pace, spin, outfield]
 
 
+def playOvers(bowlingPlan, bowlerTracker, changeStrike, bowlBall, overDone):
+    # The over loop of both innings: strike changes ends each over, the plan names the bowler
+    # (see bowling_plan.py) and balls are bowled until overDone(over) says the over or innings is over.
+    lastOver = None
+    for i in range(20):
+        if(i != 0):
+            changeStrike()
+        with profiler.section('bowler_selection'):
+            overBowler = bowlingPlan.next_bowler(i, bowlerTracker, lastOver)
+        n = 0
+        while(not overDone(i)):
+            bowlBall(overBowler, str(i) + "." + str(n + 1))
+            n += 1
+        lastOver = overBowler['playerInitials']
+
+
 def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, dew, detoriate):
     global target, innings1Balls, innings1Runs, innings1Batting, innings1Bowling, winner, winMsg, innings1Battracker, innings1Bowltracker, innings1Log
     # print(battingName, bowlingName, pace, spin, outfield, dew, detoriate)
@@ -164,6 +189,8 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
     battingOrder = []
     catchingOrder = []
     ballLog = []
+    ballLogScanned = 0
+    ballLogWickets = 0
 
     runs = 0
     balls = 0
@@ -202,6 +229,10 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
         #     i['byBowler'][styles]['batOutTypesObject'] = outObj2
 
         i['batOutsRate'] = i['batOutsTotal'] / i['batBallsTotal']
+        # Rates shrunk toward the player's batting-position prior (player_rates.py) replace the raw ratios
+        if(i.get('shrunkRates')):
+            i['batRunDenominationsObject'] = dict(i['shrunkRates']['batRunDenominations'])
+            i['batOutsRate'] = i['shrunkRates']['batOutsRate']
 
         newPos = []
         posAvgObj = {"0": 0, "1": 0, "2": 0, "3": 0, "4": 0, "5": 0, "6": 0, "7":0,"8": 0, "9":0, "10":0}
@@ -261,6 +292,10 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
         #     i['byBatsman'][styles]['bowlOutTypesObject'] = outObj2
 
         i['bowlOutsRate'] = i['bowlOutsTotal'] / i['bowlBallsTotal']
+        # Rates shrunk toward the pace/spin prior (player_rates.py) replace the raw ratios
+        if(i.get('shrunkRates')):
+            i['bowlRunDenominationsObject'] = dict(i['shrunkRates']['bowlRunDenominations'])
+            i['bowlOutsRate'] = i['shrunkRates']['bowlOutsRate']
 
         obj = {"20": 0, "1": 0, "2": 0, "3": 0, "4": 0, "5": 0, "6": 0, "7": 0, "8": 0, "9": 0,
                "10": 0, "11": 0, "12": 0, "13": 0, "14": 0, "15": 0, "16": 0, "17": 0, "18": 0, "19": 0}
@@ -278,23 +313,15 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
     bowling.reverse()
     bowling = bowling[0:7]
 
-    bowlingOpening = sorted(bowling, key=lambda k: k['overNumbersObject']['1'])
-    bowlingOpening.reverse()
-    bowlingOpening[0:7]
-    bowlingDeath = sorted(bowling, key=lambda k: k['overNumbersObject']['19'])
-    bowlingDeath.reverse()
-    bowlingDeath[0:7]
-    bowlingMiddle = sorted(bowling, key=lambda k: k['overNumbersObject']['10'])
-    bowlingMiddle.reverse()
-    bowlingMiddle[0:7]
+    # Who bowls which over: planned up front from overNumbersObject, adjusted after each over
+    bowlingPlan = bowling_plan.BowlingPlan(bowling)
+    phaseAdjustments = phase_adjustments.get_table('mainconnect')
+    # Bowler vs batting hand and batter vs bowling style, for every pair in this innings
+    matchupIndex = matchups.MatchupIndex([b['player'] for b in battingOrder], bowling)
 
     batter1 = battingOrder[0]
     batter2 = battingOrder[1]
     onStrike = batter1
-    bowler1 = bowlingOpening[0]
-    bowler2 = bowlingOpening[1]
-
-    lastOver = None
 
 
     def playerDismissed(player):
@@ -340,7 +367,7 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
         # print(batter2['player']['playerInitials'])
 
     def delivery(bowler, batter, over):
-        nonlocal batterTracker, bowlerTracker, onStrike, ballLog, balls, runs, wickets
+        nonlocal batterTracker, bowlerTracker, onStrike, ballLog, balls, runs, wickets, ballLogScanned, ballLogWickets
         global innings1Log
         batInfo = None
         bowlInfo = None
@@ -348,6 +375,7 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
         noballRate = bowler['bowlNoballRate']
         blname = bowler['playerInitials']
         btname = batter['player']['playerInitials']
+        profiler.enter('probabilities')
 
         # if(bowler['bowlStyle'] in batter['player']['byBowler']):
         #     batInfo = batter['player']['byBowler'][bowler['bowlStyle']]
@@ -396,7 +424,6 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
             denAvg[batKey] = (batInfo['batRunDenominationsObject']
                               [batKey] + bowlInfo['bowlRunDenominationsObject'][batKey])/2
 
-        runRate = 0
         for a,b in zip(batInfo['batOutTypesObject'], bowlInfo['bowlOutTypesObject']):
             outTypeAvg[a] = (batInfo['batOutTypesObject'][a] + bowlInfo['bowlOutTypesObject'][b]) / 2
         outTypeAvg['runOut'] = runoutChance
@@ -414,9 +441,11 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
              ballLog.append(f"{str(balls)}:WD")
              bowlerTracker[blname]['runs'] += 1
              bowlerTracker[blname]['ballLog'].append(f"{str(balls)}:WD")
+             profiler.enter('logging')
              innings1Log.append({"event": over + f" {bowler['displayName']} to {batter['player']['displayName']}" + " Wide" + " Score: " + str(runs) + "/" + str(wickets), 
                 "balls": balls, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), 
-                "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "runs": runs, "wickets": wickets})
+                "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "runs": runs, "wickets": wickets, "outcome": ball_outcomes.make_outcome(0, extra_type=ball_outcomes.WIDE, extras=1)})
+             profiler.exit()
              return
 
             else:
@@ -447,8 +476,10 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                             batterTracker[btname]['runs'] += int(prob['denomination'])
                             batterTracker[btname]['ballLog'].append(f"{str(balls)}:{prob['denomination']}")
                             batterTracker[btname]['balls'] += 1
+                            profiler.enter('logging')
                             innings1Log.append({"event" : over + f" {bowler['displayName']} to {batter['player']['displayName']} " + prob['denomination'] + " Score: " + str(runs) + "/" + str(wickets), "balls": balls, 
-                                "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})                            
+                                "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(int(prob['denomination']))})                            
+                            profiler.exit()
                             ballLog.append(f"{str(balls)}:{prob['denomination']}")
 
                             if(int(prob['denomination']) % 2 == 1):
@@ -494,9 +525,12 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                                     batterTracker[btname]['runs'] += runOutRuns
                                     batterTracker[btname]['ballLog'].append(f"{str(balls)}:{runOutRuns}")
                                     batterTracker[btname]['balls'] += 1
+                                    batterTracker[btname]['dismissal'] = dismissals.make_dismissal(dismissals.RUN_OUT, ball=balls)
+                                    profiler.enter('logging')
                                     innings1Log.append({"event" : over + f" {bowler['displayName']} to {batter['player']['displayName']}" + 
                                         " W" + " Score: " + str(runs) + "/" + str(wickets) + " Run Out!", "balls": balls, "runs": runs,
-                                        "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})
+                                        "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(runOutRuns, dismissals.RUN_OUT)})
+                                    profiler.exit()
                                     playerDismissed(onStrike)
                                     return
 
@@ -534,10 +568,13 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                                     batterTracker[btname]['runs'] += int(prob['denomination'])
                                     batterTracker[btname]['ballLog'].append(f"{str(balls)}:W-CaughtBy-{catcher['playerInitials']}-Bowler-{blname}")
                                     batterTracker[btname]['balls'] += 1
+                                    batterTracker[btname]['dismissal'] = dismissals.make_dismissal("caught", blname, catcher['playerInitials'], balls)
 
+                                    profiler.enter('logging')
                                     innings1Log.append({"event" : over + f" {bowler['displayName']} to {batter['player']['displayName']}" +
                                         " W" + " Score: " + str(runs) + "/" + str(wickets) + f" Caught by {catcher['displayName']}", "balls": balls,
-                                        "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})
+                                        "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(int(prob['denomination']), "caught")})
+                                    profiler.exit()
                                     playerDismissed(onStrike)
                                     return
 
@@ -552,9 +589,12 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                                     batterTracker[btname]['runs'] += int(prob['denomination'])
                                     batterTracker[btname]['ballLog'].append(f"{str(balls)}:W-{out_type}-Bowler-{blname}")
                                     batterTracker[btname]['balls'] += 1
+                                    batterTracker[btname]['dismissal'] = dismissals.make_dismissal(out_type, blname, ball=balls)
+                                    profiler.enter('logging')
                                     innings1Log.append({"event": over + f" {bowler['displayName']} to {batter['player']['displayName']}" +
                                         " W" + " Score: " + str(runs) + "/" + str(wickets) + f" {out_type.title()}", "balls": balls,
-                                        "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})
+                                        "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(int(prob['denomination']), dismissals.normalize_type(out_type))})
+                                    profiler.exit()
                                     playerDismissed(onStrike)
                                     return
 
@@ -569,178 +609,33 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                                 batterTracker[btname]['runs'] += int(prob['denomination'])
                                 batterTracker[btname]['ballLog'].append(f"{str(balls)}:{prob['denomination']}")
                                 batterTracker[btname]['balls'] += 1
+                                profiler.enter('logging')
                                 innings1Log.append({"event": over + f" {bowler['displayName']} to {batter['player']['displayName']} " + prob['denomination'] + " Score: " + str(runs) + "/" + str(wickets),
                                     "balls": balls, "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), 
-                                    "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})
+                                    "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(int(prob['denomination']))})
+                                profiler.exit()
                                 return
 
            
          
 
-        sumLast10 = 0
-        outsLast10 = 0
-        for i in ballLog:
-            spl_bl = i.split(":")
-            if("W" not in spl_bl[1]):
-                sumLast10 += int(spl_bl[1])
-            else:
-                outsLast10 += 1
-
-        if(balls < 105):
-            adjust_last10 = random.uniform(0.02,0.04)
-            if(outsLast10 < 2):
-                denAvg['0'] -= adjust_last10 * (1/2)
-                denAvg['1'] -= adjust_last10 * (1/2)
-                denAvg['2'] += adjust_last10 * (1/2)
-                denAvg['4'] += adjust_last10 * (1/2)
-            else:
-                adjust_last10 += 0.018
-                denAvg['0'] += adjust_last10 * (1.1/2)
-                denAvg['0'] += adjust_last10 * (0.9/2)
-                denAvg['4'] -= adjust_last10 * (1/2)
-                denAvg['6'] -= adjust_last10 * (1/2)
-                outAvg -= 0.02
-
-
-
-        if(batterTracker[btname]['balls'] < 8 and balls < 80):
-            adjust = random.uniform(-0.01, 0.03)
-            outAvg -= 0.015
-            denAvg['0'] += adjust * (1.5/3)
-            denAvg['1'] += adjust * (1/3)
-            denAvg['2'] += adjust * (0.5/3)
-            denAvg['4'] -= adjust * (0.5/3)
-            denAvg['6'] -= adjust * (1.5/3)
-
-        if(batterTracker[btname]['balls'] > 15 and batterTracker[btname]['balls'] < 30):
-            adjust = random.uniform(0.03, 0.07)
-            denAvg['0'] -= adjust * (1/3)
-            # denAvg['1'] -= adjust *(1/3)
-            denAvg['4'] += adjust * (1/3)
-
-        # if(batterTracker[btname]['balls'] > 30):
-        #     adjust = random.uniform(0.05, 0.1)
-        #     denAvg['0'] -= adjust * (1.5/3)
-        #     denAvg['4'] += adjust * (0.75/3)
-        #     denAvg['6'] += adjust * (0.75/3)
-        #     outAvg += 0.01
-
-        if(batterTracker[btname]['balls'] > 20 and (batterTracker[btname]['runs'] / batterTracker[btname]['balls']) < 110):
-            adjust = random.uniform(0.05, 0.08)
-            denAvg['0'] += adjust * (1.5/3)
-            denAvg['1'] += adjust * (0.5/3)
-            denAvg['6'] += adjust * (2/3)
-            outAvg += 0.05
-
-        if(batterTracker[btname]['balls'] > 40 and (batterTracker[btname]['runs'] / batterTracker[btname]['balls']) < 120):
-            adjust = random.uniform(0.06, 0.09)
-            denAvg['0'] += adjust * (1.2/3)
-            denAvg['1'] += adjust * (0.7/3)
-            denAvg['6'] += adjust * (1.8/3)
-            outAvg += 0.04
-
-        if(batterTracker[btname]['balls'] > 30 and (batterTracker[btname]['runs'] / batterTracker[btname]['balls']) > 145 and (wickets < 5) or balls > 102):
-            adjust = random.uniform(0.06, 0.09)
-            denAvg['0'] -= adjust * (1/3)
-            denAvg['1'] -= adjust * (1.5/3)
-            denAvg['4'] += adjust * (1.6/3)
-            denAvg['6'] += adjust * (1.9/3)
-
-        if(balls > 105 and (runs / balls) < 1.17):
-            adjust = random.uniform(0.06, 0.09)
-            denAvg['0'] += adjust * (1.2/3)
-            denAvg['1'] -= adjust * (1.6/3)
-            denAvg['4'] += adjust * (1.4/3)
-            denAvg['6'] += adjust * (2.1/3)
-            outAvg += 0.03
-
-        elif(balls > 60 and (runs/balls) < 1.1):
-            adjust = random.uniform(0.06, 0.09)
-            denAvg['0'] -= adjust * (1.2/3)
-            denAvg['1'] -= adjust * (0.8/3)
-            denAvg['4'] += adjust * (1/3)
-            denAvg['6'] += adjust * (1/3)
-            outAvg += 0.02
-
-
-
-
-        if(balls > 0):
-            runRate = (runs/balls)*6
-
-        if(balls < 12):
-            sixAdjustment = random.uniform(0.02, 0.05)
-            if(outAvg < 0.07):
-                outAvg = 0
-            else:
-                outAvg = outAvg - 0.07
-
-            if(sixAdjustment > denAvg['6']):
-                sixAdjustment = denAvg['6']
-
-            denAvg['6'] -= sixAdjustment
-            denAvg['0'] += sixAdjustment * (1/3)
-            denAvg['1'] += sixAdjustment * (2/3)
+        # Wickets and wides in the ball log so far (the form rule's "pressure"), counted incrementally
+        for logEntry in ballLog[ballLogScanned:]:
+            if("W" in logEntry):
+                ballLogWickets += 1
+        ballLogScanned = len(ballLog)
+
+        outAvg = matchupIndex.apply(denAvg, outAvg, btname, blname)
+
+        # Phase, wickets, batter form and scoring rate adjustments: data/phaseAdjustments.json
+        batterStats = batterTracker[btname]
+        batterRate = (batterStats['runs'] / batterStats['balls']) if batterStats['balls'] > 0 else 0
+        currentRate = ((runs / balls) * 6) if balls > 0 else 0
+        outAvg = phaseAdjustments.apply(denAvg, outAvg, 1, balls, wickets, batterStats['balls'], batterRate, currentRate, ballLogWickets)
+        profiler.exit()
+        with profiler.section('outcome'):
             getOutcome(denAvg, outAvg, over)
 
-        elif(balls >= 12 and balls < 36): #works very well with 120, try to adjust a bit for death and middle but
-        #dont tinker too much
-            if(wickets == 0):
-                defenseAndOneAdjustment = random.uniform(0.05, 0.11)
-                denAvg['0'] -= defenseAndOneAdjustment * (2/3)
-                denAvg['1'] -= defenseAndOneAdjustment * (1/3)
-                denAvg['4'] += defenseAndOneAdjustment * (2/3)
-                denAvg['6'] += defenseAndOneAdjustment * (1/3)
-                getOutcome(denAvg, outAvg, over)
-            else:
-                defenseAndOneAdjustment = random.uniform(0.02, 0.08)
-                denAvg['0'] -= defenseAndOneAdjustment * (2/3)
-                denAvg['1'] -= defenseAndOneAdjustment * (1/3)
-                denAvg['4'] += defenseAndOneAdjustment * (2.5/3)
-                denAvg['6'] += defenseAndOneAdjustment * (0.5/3)
-                outAvg -= 0.03
-
-                getOutcome(denAvg, outAvg, over)
-
-        elif(balls >= 36 and balls < 102): #works very well with 120, try to adjust a bit for death and middle but
-        #dont tinker too much
-            if(wickets < 3):
-                defenseAndOneAdjustment = random.uniform(0.05, 0.11)
-                denAvg['0'] -= defenseAndOneAdjustment * (1.5/3)
-                denAvg['1'] -= defenseAndOneAdjustment * (1/3)
-                denAvg['4'] += defenseAndOneAdjustment * (1.5/3)
-                denAvg['6'] += defenseAndOneAdjustment * (1/3)
-                getOutcome(denAvg, outAvg, over)
-            else:
-                defenseAndOneAdjustment = random.uniform(0.02, 0.07)
-                denAvg['0'] -= defenseAndOneAdjustment * (1.6/3)
-                denAvg['1'] -= defenseAndOneAdjustment * (1.2/3)
-                denAvg['4'] += defenseAndOneAdjustment * (2.1/3)
-                denAvg['6'] += defenseAndOneAdjustment * (0.9/3)
-                outAvg -= 0.03
-
-                getOutcome(denAvg, outAvg, over)
-
-        else: #works very well with 120, try to adjust a bit for death and middle but
-        #dont tinker too much
-            if(wickets < 7):
-                defenseAndOneAdjustment = random.uniform(0.07, 0.1)
-                denAvg['0'] -= defenseAndOneAdjustment * (0.4/3)
-                denAvg['1'] -= defenseAndOneAdjustment * (1/3)
-                denAvg['4'] += defenseAndOneAdjustment * (1.4/3)
-                denAvg['6'] += defenseAndOneAdjustment * (1.8/3)
-                outAvg += 0.01
-                getOutcome(denAvg, outAvg, over)
-            else:
-                defenseAndOneAdjustment = random.uniform(0.07, 0.09)
-                denAvg['0'] -= defenseAndOneAdjustment * (0.4/3)
-                denAvg['1'] -= defenseAndOneAdjustment * (1.8/3)
-                denAvg['4'] += defenseAndOneAdjustment * (1.5/3)
-                denAvg['6'] += defenseAndOneAdjustment * (1.5/3)
-                outAvg += 0.01
-
-                getOutcome(denAvg, outAvg, over)
-
         # elif(balls >= 36 and balls < 102):
         #     if(wickets == 0 or wickets == 1):
         #         defenseAndOneAdjustment = random.uniform(0.07, 0.11)
@@ -784,275 +679,20 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
 
 
 
-    for i in range(20):
-        #change strike here
-        if(i != 0):
-            if(onStrike == batter1):
-                onStrike = batter2
-            else:
-                onStrike = batter1
-        if(i == 0):
-            overBowler = bowler1
-            n = 0
-            while(balls < 6):
-                if(wickets == 10):
-                    break
-                else:
-                    # print(overBowler['byBatsman']['right-hand bat']['bowlRunDenominationsObject']['4'])
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(
-                        onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
-        elif(i == 1):
-            overBowler = bowler2
-            n = 0
-            while(balls < 12):
-                if(wickets == 10):
-                    break
-                else:
-                    # print(overBowler['byBatsman']['right-hand bat']['bowlRunDenominationsObject']['4'])
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(
-                        onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
-
-        elif(i < 6):
-            def powerplayPick(bowlerInp):
-                bowlerDict = bowlerTracker[bowlerInp['playerInitials']]
-                bowlerToReturn = bowlerInp
-                if(bowlerDict['balls'] > 11 or (bowlerDict['runs'] / bowlerDict['balls']) > 1.7):
-                    if(bowlerDict['balls'] > 11 or (bowlerDict['wickets'] / bowlerDict['balls']) < 0.091):
-                        valid = False #continue this
-                        localBowling = sorted(bowling, key=lambda k: k['overNumbersObject'][str(i)])
-                        localBowling.reverse()
-                        while(not valid):
-                            pick = localBowling[random.randint(0,3)]
-                            pickInfo = bowlerTracker[pick['playerInitials']]
-                            if(pickInfo['balls'] < 11 and lastOver != pick['playerInitials']):
-                                bowlerToReturn = pick
-                                valid = True
-                            else:
-                                pass
-                return bowlerToReturn
-
-            overBowler = None
-            if(i % 2 == 1):
-                bowler2 = powerplayPick(bowler2)
-                overBowler = bowler2
-            else:
-                bowler1 = powerplayPick(bowler1)
-                overBowler = bowler1
-            # print(bowlingOpening[0])
-
-            n = 0
-            while(balls < ((i + 1)*6)):
-                if(wickets == 10):
-                    break
-                else:
-                    # print(overBowler['byBatsman']['right-hand bat']['bowlRunDenominationsObject']['4'])
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(
-                        onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
-
-        elif(i < 17): #21 for now but 17 later
-            #2 death exclude
-            def middleOversPick(bowlerInp):
-                bowlerDict = bowlerTracker[bowlerInp['playerInitials']]
-                bowlerToReturn = bowlerInp
-                def inDeathBowlers(bowlerToCheck):
-                    if(bowlerToCheck['playerInitials'] == bowlingDeath[0]['playerInitials'] or
-                        bowlerToCheck['playerInitials'] == bowlingDeath[1]['playerInitials'] or
-                        bowlerToCheck['playerInitials'] == bowlingDeath[2]['playerInitials']):
-                        return True
-                    else:
-                        return False
-
-                if(inDeathBowlers(bowlerInp)):
-                    if((bowlerDict['balls'] > 17) or (bowlerDict['runs'] / bowlerDict['balls']) > 1.5 or ((bowlerDict['runs'] / bowlerDict['balls']) - (balls / runs)) > 0.2 ):
-                        if(bowlerDict['balls'] > 17 or (bowlerDict['runs'] / bowlerDict['balls'] < 0.088)):
-                            valid = False
-                            loopIndex = 3
-                            playersExp = sorted(bowling, key=lambda k: k['bowlBallsTotalRate'])
-                            playersExp.reverse()
-                            # print(playersExp)
-                            expIndex = 0
-                            for pexp in playersExp:
-                                if(expIndex < 4):
-                                    if(not inDeathBowlers(pexp)):
-                                        if(bowlerTracker[pexp['playerInitials']]['balls'] < 7 and pexp['playerInitials'] != lastOver):
-                                            bowlerToReturn = pexp
-                                            valid = True
-                                else:
-                                    break
-                                expIndex += 1
-
-                            while(not valid):
-                                pick = bowlingMiddle[random.randint(0,loopIndex)]
-                                pickInfo = bowlerTracker[pick['playerInitials']]
-                                if(pickInfo['balls'] == 0):
-                                    bowlerToReturn = pick
-                                    valid = True
-                                else:
-                                    if(inDeathBowlers(pickInfo)):
-                                        if(pickInfo['balls'] < 11 and (pickInfo['runs'] / pickInfo['balls']) < 1.5):
-                                            if(pickInfo['playerInitials'] != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-                                        elif(pickInfo['balls'] < 11 and pickInfo['runs'] / pickInfo['balls'] > 0.088):
-                                            if(pickInfo['playerInitials'] != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-                                    else:
-                                        if(pickInfo['balls'] < 24 and (pickInfo['runs'] / pickInfo['balls']) < 1.5):
-                                            if(pickInfo['playerInitials'] != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-                                        elif(pickInfo['balls'] < 11 and pickInfo['runs'] / pickInfo['balls'] > 0.088):
-                                            if(pickInfo['playerInitials'] != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-                                loopIndex += 1
-                                if(loopIndex >= 6):
-                                    for i2 in range(7):
-                                        picked_ = bowlingMiddle[i2]
-                                        picked_info = bowlerTracker[picked_['playerInitials']]
-                                        if(not inDeathBowlers(picked_) and picked_['playerInitials'] != lastOver):
-                                            bowlerToReturn = picked_
-                                            valid = True
-
-
-                else:
-                    if(bowlerDict['balls']) == 0:
-                        pass
-                    else:
-                            
-                        if((bowlerDict['balls'] > 19) or (bowlerDict['runs'] / bowlerDict['balls']) > 1.6 or ((bowlerDict['runs'] / bowlerDict['balls']) - (balls / runs)) > 0.2 ):
-                            if(bowlerDict['balls'] > 19 or (bowlerDict['runs'] / bowlerDict['balls'] < 0.095)):
-                                valid = False
-                                loopIndex = 3
-                                playersExp = sorted(bowling, key=lambda k: k['bowlBallsTotalRate'])
-                                playersExp.reverse()        
-                                # print(playersExp)
-                                expIndex = 0
-                                for pexp in playersExp:
-                                    if(expIndex < 4):
-                                        if(not inDeathBowlers(pexp)):
-                                            if(bowlerTracker[pexp['playerInitials']]['balls'] < 7 and pexp['playerInitials'] != lastOver):
-                                                bowlerToReturn = pexp
-                                                valid = True
-                                    else:
-                                        break
-                                    expIndex += 1
-                                while(not valid):
-                                    pick = bowlingMiddle[random.randint(0,loopIndex)]
-                                    pickInfo = bowlerTracker[pick['playerInitials']]
-                                    if(pickInfo['balls'] == 0):
-                                        bowlerToReturn = pick
-                                        valid = True
-                                    else:
-                                        if(inDeathBowlers(pickInfo)):
-                                            if(pickInfo['balls'] < 11 and ((pickInfo['runs'] / pickInfo['balls']) < 1.7) or
-                                                (pickInfo['runs'] / pickInfo['balls']) > 0.088):
-                                                if(pickInfo['playerInitials'] != lastOver):
-                                                    bowlerToReturn = pick
-                                                    valid = True
-                                        else:
-                                            if(pickInfo['balls'] < 24 and ((pickInfo['runs'] / pickInfo['balls']) < 1.6) or 
-                                                (pickInfo['runs'] / pickInfo['balls'] < 0.1)):
-                                                if(pickInfo['playerInitials'] != lastOver):
-                                                    bowlerToReturn = pick
-                                                    valid = True
-                                    loopIndex += 1
-                                    if(loopIndex >= 6):
-                                        for i2 in range(7):
-                                            picked_ = bowlingMiddle[i2]
-                                            picked_info = bowlerTracker[picked_['playerInitials']]
-                                            if(not inDeathBowlers(picked_) and picked_['playerInitials'] != lastOver):
-                                                bowlerToReturn = picked_
-                                                valid = True
-
-
-                return bowlerToReturn
-
-        
-            overBowler = None
-            if(i % 2 == 1):
-                bowler2 = middleOversPick(bowler2)
-                overBowler = bowler2
-            else:
-                bowler1 = middleOversPick(bowler1)
-                overBowler = bowler1
-
-            n = 0
-            while(balls < ((i + 1)*6)):
-                if(wickets == 10):
-                    break
-                else:
-                    # print(overBowler['byBatsman']['right-hand bat']['bowlRunDenominationsObject']['4'])
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(
-                        onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
-
+    def changeStrike():
+        nonlocal onStrike
+        if(onStrike == batter1):
+            onStrike = batter2
         else:
-            def deathOversPick(bowlerInp):
-                bowlerDict = bowlerTracker[bowlerInp['playerInitials']]
-                bowlerToReturn = bowlerInp
-                def inDeathBowlers(bowlerToCheck):
-                    if(bowlerToCheck['playerInitials'] == bowlingDeath[0]['playerInitials'] or
-                        bowlerToCheck['playerInitials'] == bowlingDeath[1]['playerInitials'] or
-                        bowlerToCheck['playerInitials'] == bowlingDeath[2]['playerInitials']):
-                        return True
-                    else:
-                        return False
-
-                if(not inDeathBowlers(bowlerInp) or bowlerDict['balls'] > 23):
-                    valid = False
-                    pickerIndex = 0
-                    while(not valid):
-                        pick = bowlingDeath[pickerIndex]
-                        pickInfo = bowlerTracker[pick['playerInitials']]
-                        if(pickInfo['balls'] == 0):
-                            bowlerToReturn = pick
-                            valid = True
-                        else:
-                            if(pickInfo['balls'] < 19 and pickInfo['playerInitials'] != lastOver):
-                                for track in bowlerTracker: #SAMPLE FOR OTHER PICKER DEFS | MAKE SURE LESS THAN 24 BALLS BOWLED
-                                    if(lastOver != track):
-                                        if bowlerTracker[track]['balls'] != 0 and bowlerTracker[track]['balls'] < 23:
-                                            if(bowlerTracker[track]['runs'] == 0 and track != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-
-                                            elif((bowlerTracker[track]['balls'] / bowlerTracker[track]['runs']) < 1.2) or (bowlerTracker[track]['wickets'] / bowlerTracker[track]['balls']) > 0.16:
-                                                if(track != lastOver):
-                                                    bowlerToReturn = pick
-                                                    valid = True
-
-                                bowlerToReturn = pick
-                                valid = True
-                        pickerIndex += 1
-                return bowlerToReturn
-
-            overBowler = None
-            if(i % 2 == 1):
-                bowler2 = deathOversPick(bowler2)
-                overBowler = bowler2
-            else:
-                bowler1 = deathOversPick(bowler1)
-                overBowler = bowler1
+            onStrike = batter1
 
-            n = 0
-            while(balls < ((i + 1)*6)):
-                if(wickets == 10):
-                    break
-                else:
-                    # print(overBowler['byBatsman']['right-hand bat']['bowlRunDenominationsObject']['4'])
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(
-                        onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
+    def bowlBall(overBowler, over):
+        with profiler.section('player_copies'):
+            bowlerCopy = copy.deepcopy(overBowler)
+            strikerCopy = copy.deepcopy(onStrike)
+        delivery(bowlerCopy, strikerCopy, over)
+
+    playOvers(bowlingPlan, bowlerTracker, changeStrike, bowlBall, lambda over: balls >= (over + 1)*6 or wickets == 10)
 
 
             
@@ -1067,25 +707,7 @@ def innings1(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
             sr_ = (batterTracker[btckd]['runs']*100) / (batterTracker[btckd]['balls'])
             sr_ = str(round(sr_, 2))
             localArrayTabulate.append(sr_)
-        out = False
-        howOut = "DNB"
-        batted = False
-        for b in batterTracker[btckd]['ballLog']:
-            batted = True
-            if("W" in b):
-                out = True
-                if("CaughtBy" in b):
-                    splitOT = b.split("-")
-                    lcatcher = splitOT[2]
-                    lbowler = splitOT[-1]
-                    howOut = f"c {lcatcher} b {lbowler}"
-                elif("runout" in b):
-                    howOut = "Run out"
-                else:
-                    splitOT = b.split("-")
-                    howOut = f"{splitOT[1]} b {splitOT[-1]}"
-            else:
-                howOut = "Not out"
+        howOut = dismissals.how_out(batterTracker[btckd])
         localArrayTabulate.append(howOut)
         batsmanTabulate.append(localArrayTabulate)
         
@@ -1125,6 +747,8 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
     battingOrder = []
     catchingOrder = []
     ballLog = []
+    ballLogScanned = 0
+    ballLogWickets = 0
 
     runs = 0
     balls = 0
@@ -1164,6 +788,10 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
         #     i['byBowler'][styles]['batOutTypesObject'] = outObj2
 
         i['batOutsRate'] = i['batOutsTotal'] / i['batBallsTotal']
+        # Rates shrunk toward the player's batting-position prior (player_rates.py) replace the raw ratios
+        if(i.get('shrunkRates')):
+            i['batRunDenominationsObject'] = dict(i['shrunkRates']['batRunDenominations'])
+            i['batOutsRate'] = i['shrunkRates']['batOutsRate']
 
         newPos = []
         posAvgObj = {"0": 0, "1": 0, "2": 0, "3": 0, "4": 0, "5": 0, "6": 0, "7":0,"8": 0, "9":0, "10":0}
@@ -1223,6 +851,10 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
         #     i['byBatsman'][styles]['bowlOutTypesObject'] = outObj2
 
         i['bowlOutsRate'] = i['bowlOutsTotal'] / i['bowlBallsTotal']
+        # Rates shrunk toward the pace/spin prior (player_rates.py) replace the raw ratios
+        if(i.get('shrunkRates')):
+            i['bowlRunDenominationsObject'] = dict(i['shrunkRates']['bowlRunDenominations'])
+            i['bowlOutsRate'] = i['shrunkRates']['bowlOutsRate']
 
         obj = {"20": 0, "1": 0, "2": 0, "3": 0, "4": 0, "5": 0, "6": 0, "7": 0, "8": 0, "9": 0,
                "10": 0, "11": 0, "12": 0, "13": 0, "14": 0, "15": 0, "16": 0, "17": 0, "18": 0, "19": 0}
@@ -1240,23 +872,15 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
     bowling.reverse()
     bowling = bowling[0:7]
 
-    bowlingOpening = sorted(bowling, key=lambda k: k['overNumbersObject']['1'])
-    bowlingOpening.reverse()
-    bowlingOpening[0:7]
-    bowlingDeath = sorted(bowling, key=lambda k: k['overNumbersObject']['19'])
-    bowlingDeath.reverse()
-    bowlingDeath[0:7]
-    bowlingMiddle = sorted(bowling, key=lambda k: k['overNumbersObject']['10'])
-    bowlingMiddle.reverse()
-    bowlingMiddle[0:7]
+    # Who bowls which over: planned up front from overNumbersObject, adjusted after each over
+    bowlingPlan = bowling_plan.BowlingPlan(bowling)
+    phaseAdjustments = phase_adjustments.get_table('mainconnect')
+    # Bowler vs batting hand and batter vs bowling style, for every pair in this innings
+    matchupIndex = matchups.MatchupIndex([b['player'] for b in battingOrder], bowling)
 
     batter1 = battingOrder[0]
     batter2 = battingOrder[1]
     onStrike = batter1
-    bowler1 = bowlingOpening[0]
-    bowler2 = bowlingOpening[1]
-
-    lastOver = None
 
 
     def playerDismissed(player):
@@ -1302,7 +926,7 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
         # print(batter2['player']['playerInitials'])
 
     def delivery(bowler, batter, over):
-        nonlocal batterTracker, bowlerTracker, onStrike, ballLog, balls, runs, wickets, targetChased
+        nonlocal batterTracker, bowlerTracker, onStrike, ballLog, balls, runs, wickets, targetChased, ballLogScanned, ballLogWickets
         global winner, winMsg, innings2Log
 
         batInfo = None
@@ -1311,6 +935,7 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
         noballRate = bowler['bowlNoballRate']
         blname = bowler['playerInitials']
         btname = batter['player']['playerInitials']
+        profiler.enter('probabilities')
 
         # if(bowler['bowlStyle'] in batter['player']['byBowler']):
         #     batInfo = batter['player']['byBowler'][bowler['bowlStyle']]
@@ -1359,7 +984,6 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
             denAvg[batKey] = (batInfo['batRunDenominationsObject']
                               [batKey] + bowlInfo['bowlRunDenominationsObject'][batKey])/2
 
-        runRate = 0
         for a,b in zip(batInfo['batOutTypesObject'], bowlInfo['bowlOutTypesObject']):
             outTypeAvg[a] = (batInfo['batOutTypesObject'][a] + bowlInfo['bowlOutTypesObject'][b]) / 2
         outTypeAvg['runOut'] = runoutChance
@@ -1377,9 +1001,11 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
              ballLog.append(f"{str(balls)}:WD")
              bowlerTracker[blname]['runs'] += 1
              bowlerTracker[blname]['ballLog'].append(f"{str(balls)}:WD")
+             profiler.enter('logging')
              innings2Log.append({"event": over + f" {bowler['displayName']} to {batter['player']['displayName']}" + " Wide" + " Score: " + str(runs) + "/" + str(wickets), 
                 "balls": balls, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), 
-                "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "runs": runs, "wickets": wickets})
+                "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "runs": runs, "wickets": wickets, "outcome": ball_outcomes.make_outcome(0, extra_type=ball_outcomes.WIDE, extras=1)})
+             profiler.exit()
              return
 
             else:
@@ -1410,8 +1036,10 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                             batterTracker[btname]['runs'] += int(prob['denomination'])
                             batterTracker[btname]['ballLog'].append(f"{str(balls)}:{prob['denomination']}")
                             batterTracker[btname]['balls'] += 1
+                            profiler.enter('logging')
                             innings2Log.append({"event" : over + f" {bowler['displayName']} to {batter['player']['displayName']} " + prob['denomination'] + " Score: " + str(runs) + "/" + str(wickets), "balls": balls, 
-                                "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})                            
+                                "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(int(prob['denomination']))})                            
+                            profiler.exit()
                             ballLog.append(f"{str(balls)}:{prob['denomination']}")
 
                             if(int(prob['denomination']) % 2 == 1):
@@ -1457,9 +1085,12 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                                     batterTracker[btname]['runs'] += runOutRuns
                                     batterTracker[btname]['ballLog'].append(f"{str(balls)}:{runOutRuns}")
                                     batterTracker[btname]['balls'] += 1
+                                    batterTracker[btname]['dismissal'] = dismissals.make_dismissal(dismissals.RUN_OUT, ball=balls)
+                                    profiler.enter('logging')
                                     innings2Log.append({"event" : over + f" {bowler['displayName']} to {batter['player']['displayName']}" + 
                                         " W" + " Score: " + str(runs) + "/" + str(wickets) + " Run Out!", "balls": balls, "runs": runs,
-                                        "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})
+                                        "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(runOutRuns, dismissals.RUN_OUT)})
+                                    profiler.exit()
                                     playerDismissed(onStrike)
                                     return
 
@@ -1497,10 +1128,13 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                                     batterTracker[btname]['runs'] += int(prob['denomination'])
                                     batterTracker[btname]['ballLog'].append(f"{str(balls)}:W-CaughtBy-{catcher['playerInitials']}-Bowler-{blname}")
                                     batterTracker[btname]['balls'] += 1
+                                    batterTracker[btname]['dismissal'] = dismissals.make_dismissal("caught", blname, catcher['playerInitials'], balls)
 
+                                    profiler.enter('logging')
                                     innings2Log.append({"event" : over + f" {bowler['displayName']} to {batter['player']['displayName']}" +
                                         " W" + " Score: " + str(runs) + "/" + str(wickets) + f" Caught by {catcher['displayName']}", "balls": balls,
-                                        "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})
+                                        "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(int(prob['denomination']), "caught")})
+                                    profiler.exit()
                                     playerDismissed(onStrike)
                                     return
 
@@ -1515,9 +1149,12 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                                     batterTracker[btname]['runs'] += int(prob['denomination'])
                                     batterTracker[btname]['ballLog'].append(f"{str(balls)}:W-{out_type}-Bowler-{blname}")
                                     batterTracker[btname]['balls'] += 1
+                                    batterTracker[btname]['dismissal'] = dismissals.make_dismissal(out_type, blname, ball=balls)
+                                    profiler.enter('logging')
                                     innings2Log.append({"event": over + f" {bowler['displayName']} to {batter['player']['displayName']}" +
                                         " W" + " Score: " + str(runs) + "/" + str(wickets) + f" {out_type.title()}", "balls": balls,
-                                        "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})
+                                        "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(int(prob['denomination']), dismissals.normalize_type(out_type))})
+                                    profiler.exit()
                                     playerDismissed(onStrike)
                                     return
 
@@ -1532,284 +1169,30 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
                                 batterTracker[btname]['runs'] += int(prob['denomination'])
                                 batterTracker[btname]['ballLog'].append(f"{str(balls)}:{prob['denomination']}")
                                 batterTracker[btname]['balls'] += 1
+                                profiler.enter('logging')
                                 innings2Log.append({"event": over + f" {bowler['displayName']} to {batter['player']['displayName']} " + prob['denomination'] + " Score: " + str(runs) + "/" + str(wickets),
                                     "balls": balls, "runs": runs, "batterTracker": copy.deepcopy(batterTracker), "bowlerTracker": copy.deepcopy(bowlerTracker), 
-                                    "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets})
+                                    "batsman": btname,"batter1": batter1['player']['playerInitials'], "batter2": batter2['player']['playerInitials'] , "bowler": blname, "wickets": wickets, "outcome": ball_outcomes.make_outcome(int(prob['denomination']))})
+                                profiler.exit()
                                 return
 
         
-        sumLast10 = 0
-        outsLast10 = 0
-        for i in ballLog:
-            spl_bl = i.split(":")
-            if("W" not in spl_bl[1]):
-                sumLast10 += int(spl_bl[1])
-            else:
-                outsLast10 += 1
-
-        if(balls < 105):
-            adjust_last10 = random.uniform(0.02,0.04)
-            if(outsLast10 < 2):
-                denAvg['0'] -= adjust_last10 * (1/2)
-                denAvg['1'] -= adjust_last10 * (1/2)
-                denAvg['2'] += adjust_last10 * (1/2)
-                denAvg['4'] += adjust_last10 * (1/2)
-            else:
-                adjust_last10 += 0.018
-                denAvg['0'] += adjust_last10 * (1.1/2)
-                denAvg['0'] += adjust_last10 * (0.9/2)
-                denAvg['4'] -= adjust_last10 * (1/2)
-                denAvg['6'] -= adjust_last10 * (1/2)
-                outAvg -= 0.02
-
-
-
-        if(batterTracker[btname]['balls'] < 8 and balls < 80):
-            adjust = random.uniform(-0.01, 0.03)
-            outAvg -= 0.015
-            denAvg['0'] += adjust * (1.5/3)
-            denAvg['1'] += adjust * (1/3)
-            denAvg['2'] += adjust * (0.5/3)
-            denAvg['4'] -= adjust * (0.5/3)
-            denAvg['6'] -= adjust * (1.5/3)
-
-        if(batterTracker[btname]['balls'] > 15 and batterTracker[btname]['balls'] < 30):
-            adjust = random.uniform(0.03, 0.07)
-            denAvg['0'] -= adjust * (1/3)
-            # denAvg['1'] -= adjust *(1/3)
-            denAvg['4'] += adjust * (1/3)
-
-        # if(batterTracker[btname]['balls'] > 30):
-        #     adjust = random.uniform(0.05, 0.1)
-        #     denAvg['0'] -= adjust * (1.5/3)
-        #     denAvg['4'] += adjust * (0.75/3)
-        #     denAvg['6'] += adjust * (0.75/3)
-        #     outAvg += 0.01
-
-        if(batterTracker[btname]['balls'] > 20 and (batterTracker[btname]['runs'] / batterTracker[btname]['balls']) < 110):
-            adjust = random.uniform(0.05, 0.08)
-            denAvg['0'] += adjust * (1.5/3)
-            denAvg['1'] += adjust * (0.5/3)
-            denAvg['6'] += adjust * (2/3)
-            outAvg += 0.05
-
-        if(batterTracker[btname]['balls'] > 40 and (batterTracker[btname]['runs'] / batterTracker[btname]['balls']) < 135):
-            adjust = random.uniform(0.06, 0.09)
-            denAvg['0'] += adjust * (1.5/3)
-            denAvg['1'] += adjust * (0.7/3)
-            denAvg['6'] += adjust * (1.8/3)
-            outAvg += 0.04
-
-        if(batterTracker[btname]['balls'] > 30 and (batterTracker[btname]['runs'] / batterTracker[btname]['balls']) > 145 and (wickets < 5) or balls > 102):
-            adjust = random.uniform(0.06, 0.09)
-            denAvg['0'] -= adjust * (1/3)
-            denAvg['1'] -= adjust * (1.5/3)
-            denAvg['4'] += adjust * (1.6/3)
-            denAvg['6'] += adjust * (1.9/3)
-            outAvg += 0.02
-    
-        rr = 0
-        if(balls != 0):
-            rr = runs / balls
-
-        if(balls < 120):
-            rrr = (target - runs) / (120 - balls)
-
-        if(balls < 12):
-            # print(rrr)
-            if(rrr < 1.5):
-                sixAdjustment = random.uniform(0.02, 0.05)
-                if(outAvg < 0.07):
-                    outAvg = 0
-                else:
-                    outAvg = outAvg - 0.07
-
-                if(sixAdjustment > denAvg['6']):
-                    sixAdjustment = denAvg['6']
-
-                denAvg['6'] -= sixAdjustment
-                denAvg['0'] += sixAdjustment * (1/3)
-                denAvg['1'] += sixAdjustment * (2/3)
-                getOutcome(denAvg, outAvg, over)
-            else:
-                getOutcome(denAvg, outAvg, over)
-
-        elif(balls < 36):
-            rrro = rrr*6
-            if(rrro < 8):
-                adjust = random.uniform(0.05, 0.09)
-                denAvg['6'] -= adjust * (2/3)
-                denAvg['4'] -= adjust * (1/3)
-                denAvg['1'] += adjust
-                outAvg -= 0.04
-                getOutcome(denAvg, outAvg, over)
-
-            elif(rrro >= 8 and rrro <= 10.4):
-                adjust = random.uniform(0.04, 0.08)
-                denAvg['6'] += adjust * (0.6/3)
-                denAvg['4'] += adjust * (1/3)
-                denAvg['0'] += adjust * (1/3)
-                denAvg['1'] -= adjust * (1/3)
-                denAvg['2'] -= adjust * (0.6/3)
-                outAvg -= 0.03
-                getOutcome(denAvg, outAvg, over)
-
-            else:
-                adjust = random.uniform(0.04,0.08)
-                adjust += (rrro*1.1)/1000
-                denAvg['6'] += adjust * (1.5/3)
-                denAvg['4'] += adjust * (1/3)
-                denAvg['0'] += adjust * (0.5/3)
-                denAvg['1'] -= adjust * (2/3)
-                denAvg['2'] -= adjust * (1/3)
-                outAvg += (0.02 + ((rrro*1.1)/1000))
-                getOutcome(denAvg, outAvg, over)
-
-        elif(balls >= 36 and balls < 102): #102 usually, now 120
-            rrro = rrr*6
-            if(rrro < 8):
-                if(wickets < 3):
-                    adjust = random.uniform(0.05, 0.09)
-                    denAvg['6'] -= adjust * (0.8/3)
-                    # denAvg['4'] -= adjust * (0.5/3)
-                    denAvg['0'] -= adjust * (1/3)
-                    denAvg['2'] += adjust * (1/3)
-                    denAvg['1'] += adjust * (1.5/3)
-                    outAvg -= 0.02
-                    getOutcome(denAvg, outAvg, over)
-                else:
-                    adjust = random.uniform(0.05, 0.09)
-                    # denAvg['6'] -= adjust * (2/3)
-                    # denAvg['4'] -= adjust * (1/3)
-                    denAvg['1'] += adjust
-                    outAvg -= 0.04
-                    getOutcome(denAvg, outAvg, over)
-
-            elif(rrro >= 8 and rrro <= 10.4):
-                if(wickets < 3):
-                    adjust = random.uniform(0.6, 0.08)
-                    denAvg['6'] += adjust * (1/3)
-                    denAvg['4'] += adjust * (1.15/3)
-                    denAvg['0'] += adjust * (0.1/3)
-                    denAvg['1'] -= adjust * (1/3)
-                    denAvg['2'] -= adjust * (1/3)
-                    outAvg += 0.015
-                    getOutcome(denAvg, outAvg, over)
-                    
-                else:
-                    adjust = random.uniform(0.04, 0.08)
-                    denAvg['6'] += adjust * (0.95/3)
-                    denAvg['4'] += adjust * (1.12/3)
-                    denAvg['0'] += adjust * (0.2/3)
-                    denAvg['1'] -= adjust * (0.9/3)
-                    denAvg['2'] -= adjust * (0.7/3)
-                    outAvg += 0.01
-                    getOutcome(denAvg, outAvg, over)
-
-
-                
-
-            elif(rrro > 10.4 and rrro < 12):
-                if(wickets < 3):
-                    adjust = random.uniform(0.075, 0.1)
-                    denAvg['6'] += adjust * (1.5/3)
-                    denAvg['4'] += adjust * (1.5/3)
-                    denAvg['0'] += adjust * (0.5/3)
-                    denAvg['1'] -= adjust * (1.5/3)
-                    denAvg['2'] -= adjust * (1.5/3)
-                    denAvg['3'] -= adjust * (0.7/3)
-                    outAvg += 0.025
-                    getOutcome(denAvg, outAvg, over)
-                else:
-                    adjust = random.uniform(0.06, 0.1)
-                    denAvg['6'] += adjust * (1.4/3)
-                    denAvg['4'] += adjust * (1/3)
-                    denAvg['0'] += adjust * (0.6/3)
-                    denAvg['1'] -= adjust * (1.1/3)
-                    denAvg['2'] -= adjust * (1.1/3)
-                    denAvg['3'] -= adjust * (0.7/3)
-                    outAvg += 0.035
-                    getOutcome(denAvg, outAvg, over)
-
-                
-
-            elif(rrro >= 12 and rrro <= 15):
-                if(balls > 85):
-                    if(wickets < 3):
-                        adjust = random.uniform(0.065, 0.115)
-                        denAvg['6'] += adjust * (1.5/3)
-                        denAvg['4'] += adjust * (1.2/3)
-                        denAvg['0'] += adjust * (1.4/3)
-                        denAvg['1'] -= adjust * (1.2/3)
-                        denAvg['2'] -= adjust * (1.7/3)
-                        denAvg['3'] -= adjust * (0.9/3)
-                        outAvg += 0.04
-                        getOutcome(denAvg, outAvg, over)
-                    else:
-                        adjust = random.uniform(0.05, 0.1)
-                        denAvg['6'] += adjust * (1.2/3)
-                        denAvg['4'] += adjust * (0.8/3)
-                        denAvg['0'] += adjust * (1.2/3)
-                        denAvg['1'] -= adjust * (1.2/3)
-                        denAvg['2'] -= adjust * (1.6/3)
-                        denAvg['3'] -= adjust * (0.9/3)
-                        outAvg += 0.05
-                        getOutcome(denAvg, outAvg, over)
-                else:
-                        adjust = random.uniform(0.05, 0.1)
-                        denAvg['6'] += adjust * (1.3/3)
-                        denAvg['4'] += adjust * (1/3)
-                        denAvg['0'] += adjust * (1.2/3)
-                        denAvg['1'] -= adjust * (1.2/3)
-                        denAvg['2'] -= adjust * (1.6/3)
-                        denAvg['3'] -= adjust * (0.9/3)
-                        outAvg += 0.03
-                        getOutcome(denAvg, outAvg, over)
-            else:
-                if(wickets < 3):
-                    adjust = random.uniform(0.075, 0.125)
-                    denAvg['6'] += adjust * (2/3)
-                    denAvg['4'] += adjust * (1.5/3)
-                    denAvg['0'] += adjust * (1.8/3)
-                    denAvg['1'] -= adjust * (1.2/3)
-                    denAvg['2'] -= adjust * (1.6/3)
-                    denAvg['3'] -= adjust * (0.9/3)
-                    outAvg += 0.05
-                    getOutcome(denAvg, outAvg, over)
-                else:
-                    adjust = random.uniform(0.07, 0.12)
-                    denAvg['6'] += adjust * (1.8/3)
-                    denAvg['4'] += adjust * (1.5/3)
-                    denAvg['0'] += adjust * (1.8/3)
-                    denAvg['1'] -= adjust * (1.6/3)
-                    denAvg['2'] -= adjust * (1.7/3)
-                    denAvg['3'] -= adjust * (0.9/3)
-                    outAvg += 0.04
-                    getOutcome(denAvg, outAvg, over)
-
-
-        else: #works very well with 120, try to adjust a bit for death and middle but
-        #dont tinker too much
-            rrro = rrr*6
-            if(wickets < 7 or rrro > 12):
-                defenseAndOneAdjustment = random.uniform(0.07, 0.1)
-                denAvg['0'] += defenseAndOneAdjustment * (1.8/3)
-                denAvg['1'] -= defenseAndOneAdjustment * (1/3)
-                denAvg['4'] += defenseAndOneAdjustment * (1.45/3)
-                denAvg['6'] += defenseAndOneAdjustment * (1.85/3)
-                outAvg += 0.032
-                getOutcome(denAvg, outAvg, over)
-            else:
-                defenseAndOneAdjustment = random.uniform(0.07, 0.09)
-                denAvg['0'] -= defenseAndOneAdjustment * (1.2/3)
-                denAvg['1'] -= defenseAndOneAdjustment * (1.8/3)
-                denAvg['4'] += defenseAndOneAdjustment * (1.5/3)
-                denAvg['6'] += defenseAndOneAdjustment * (1.5/3)
-                outAvg += 0.028
-
-                getOutcome(denAvg, outAvg, over)
-            #logic for last 3 overs chase
-            pass
+        # Wickets and wides in the ball log so far (the form rule's "pressure"), counted incrementally
+        for logEntry in ballLog[ballLogScanned:]:
+            if("W" in logEntry):
+                ballLogWickets += 1
+        ballLogScanned = len(ballLog)
+
+        outAvg = matchupIndex.apply(denAvg, outAvg, btname, blname)
+
+        # Phase, wickets, batter form and scoring rate adjustments: data/phaseAdjustments.json
+        batterStats = batterTracker[btname]
+        batterRate = (batterStats['runs'] / batterStats['balls']) if batterStats['balls'] > 0 else 0
+        requiredRate = ((target - runs) / (120 - balls)) * 6
+        outAvg = phaseAdjustments.apply(denAvg, outAvg, 2, balls, wickets, batterStats['balls'], batterRate, requiredRate, ballLogWickets)
+        profiler.exit()
+        with profiler.section('outcome'):
+            getOutcome(denAvg, outAvg, over)
                     
         if(runs == (target - 1) and (balls == 120 or wickets == 10)):
             print("Match tied")
@@ -1870,286 +1253,20 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
 
 
 
-    for i in range(20):
-        #change strike here
-        if(i != 0):
-            if(onStrike == batter1):
-                onStrike = batter2
-            else:
-                onStrike = batter1
-        if(i == 0):
-            overBowler = bowler1
-            n = 0
-            while(balls < 6 ):
-                if(runs >= target or wickets == 10):
-                    if(runs >= target):
-                        # print("Target Chased")
-                        break
-                    break
-                else:     
-                # print(overBowler['byBatsman']['right-hand bat']['bowlRunDenominationsObject']['4'])
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(
-                        onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
-        elif(i == 1):
-            overBowler = bowler2
-            n = 0
-            while(balls < 12 ):
-                if(runs >= target or wickets == 10):
-                    if(runs >= target):
-                        # print("Target Chased")
-                        break
-                    break
-                else:
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(
-                        onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
-
-        elif(i < 6):
-            def powerplayPick(bowlerInp):
-                bowlerDict = bowlerTracker[bowlerInp['playerInitials']]
-                bowlerToReturn = bowlerInp
-                if(bowlerDict['balls'] > 11 or (bowlerDict['runs'] / bowlerDict['balls']) > 1.7):
-                    if(bowlerDict['balls'] > 11 or (bowlerDict['wickets'] / bowlerDict['balls']) < 0.091):
-                        valid = False #continue this
-                        localBowling = sorted(bowling, key=lambda k: k['overNumbersObject'][str(i)])     
-                        localBowling.reverse()
-                        while(not valid):
-                            pick = localBowling[random.randint(0,3)]
-                            pickInfo = bowlerTracker[pick['playerInitials']]
-                            if(pickInfo['balls'] < 11 and lastOver != pick['playerInitials']):
-                                bowlerToReturn = pick
-                                valid = True
-                            else:
-                                pass
-                return bowlerToReturn
-
-            overBowler = None
-            if(i % 2 == 1):
-                bowler2 = powerplayPick(bowler2)
-                overBowler = bowler2
-            else:
-                bowler1 = powerplayPick(bowler1)
-                overBowler = bowler1
-            # print(bowlingOpening[0])
-
-            n = 0
-            while(balls < ((i + 1)*6) ):
-                if(runs >= target or wickets == 10):
-                    if(runs >= target):
-                        # print("Target Chased")
-                        break
-                    break
-                else: #Add for the case that the team has to save bowler for death (if death bowler certain number of overs then after 2 in pp, save for later)
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
-
-        elif(i < 17): #21 for now but 17 later
-            #2 death exclude
-            def middleOversPick(bowlerInp):
-                bowlerDict = bowlerTracker[bowlerInp['playerInitials']]
-                bowlerToReturn = bowlerInp
-                def inDeathBowlers(bowlerToCheck):
-                    if(bowlerToCheck['playerInitials'] == bowlingDeath[0]['playerInitials'] or
-                        bowlerToCheck['playerInitials'] == bowlingDeath[1]['playerInitials'] or
-                        bowlerToCheck['playerInitials'] == bowlingDeath[2]['playerInitials']):
-                        return True
-                    else:
-                        return False
-
-                if(inDeathBowlers(bowlerInp)):
-                    if((bowlerDict['balls'] > 17) or (bowlerDict['runs'] / bowlerDict['balls']) > 1.5 or ((bowlerDict['runs'] / bowlerDict['balls']) - (balls / runs)) > 0.2 ):
-                        if(bowlerDict['balls'] > 17 or (bowlerDict['runs'] / bowlerDict['balls'] < 0.088)):
-                            valid = False
-                            loopIndex = 3
-                            playersExp = sorted(bowling, key=lambda k: k['bowlBallsTotalRate'])
-                            playersExp.reverse()
-                            # print(playersExp)
-                            expIndex = 0
-                            for pexp in playersExp:
-                                if(expIndex < 4):
-                                    if(not inDeathBowlers(pexp)):
-                                        if(bowlerTracker[pexp['playerInitials']]['balls'] < 7 and pexp['playerInitials'] != lastOver):
-                                            bowlerToReturn = pexp
-                                            valid = True
-                                else:
-                                    break
-                                expIndex += 1
-
-                            while(not valid):
-                                pick = bowlingMiddle[random.randint(0,loopIndex)]
-                                pickInfo = bowlerTracker[pick['playerInitials']]
-                                if(pickInfo['balls'] == 0):
-                                    bowlerToReturn = pick
-                                    valid = True
-                                else:
-                                    if(inDeathBowlers(pickInfo)):
-                                        if(pickInfo['balls'] < 11 and (pickInfo['runs'] / pickInfo['balls']) < 1.5):
-                                            if(pickInfo['playerInitials'] != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-                                        elif(pickInfo['balls'] < 11 and pickInfo['runs'] / pickInfo['balls'] > 0.088):
-                                            if(pickInfo['playerInitials'] != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-                                    else:
-                                        if(pickInfo['balls'] < 24 and (pickInfo['runs'] / pickInfo['balls']) < 1.5):
-                                            if(pickInfo['playerInitials'] != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-                                        elif(pickInfo['balls'] < 11 and pickInfo['runs'] / pickInfo['balls'] > 0.088):
-                                            if(pickInfo['playerInitials'] != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-                                loopIndex += 1
-                                if(loopIndex >= 6):
-                                    for i2 in range(7):
-                                        picked_ = bowlingMiddle[i2]
-                                        picked_info = bowlerTracker[picked_['playerInitials']]
-                                        if(not inDeathBowlers(picked_) and picked_['playerInitials'] != lastOver):
-                                            bowlerToReturn = picked_
-                                            valid = True
-
-
-                else:
-                    if(bowlerDict['balls']) == 0:
-                        pass
-                    else:
-                            
-                        if((bowlerDict['balls'] > 19) or (bowlerDict['runs'] / bowlerDict['balls']) > 1.6 or ((bowlerDict['runs'] / bowlerDict['balls']) - (balls / runs)) > 0.2 ):
-                            if(bowlerDict['balls'] > 19 or (bowlerDict['runs'] / bowlerDict['balls'] < 0.095)):
-                                valid = False
-                                loopIndex = 3
-                                playersExp = sorted(bowling, key=lambda k: k['bowlBallsTotalRate'])
-                                playersExp.reverse()        
-                                # print(playersExp)
-                                expIndex = 0
-                                for pexp in playersExp:
-                                    if(expIndex < 4):
-                                        if(not inDeathBowlers(pexp)):
-                                            if(bowlerTracker[pexp['playerInitials']]['balls'] < 7 and pexp['playerInitials'] != lastOver):
-                                                bowlerToReturn = pexp
-                                                valid = True
-                                    else:
-                                        break
-                                    expIndex += 1
-                                while(not valid):
-                                    pick = bowlingMiddle[random.randint(0,loopIndex)]
-                                    pickInfo = bowlerTracker[pick['playerInitials']]
-                                    if(pickInfo['balls'] == 0):
-                                        bowlerToReturn = pick
-                                        valid = True
-                                    else:
-                                        if(inDeathBowlers(pickInfo)):
-                                            if(pickInfo['balls'] < 11 and ((pickInfo['runs'] / pickInfo['balls']) < 1.7) or
-                                                (pickInfo['runs'] / pickInfo['balls']) > 0.088):
-                                                if(pickInfo['playerInitials'] != lastOver):
-                                                    bowlerToReturn = pick
-                                                    valid = True
-                                        else:
-                                            if(pickInfo['balls'] < 24 and ((pickInfo['runs'] / pickInfo['balls']) < 1.6) or 
-                                                (pickInfo['runs'] / pickInfo['balls'] < 0.1)):
-                                                if(pickInfo['playerInitials'] != lastOver):
-                                                    bowlerToReturn = pick
-                                                    valid = True
-                                    loopIndex += 1
-                                    if(loopIndex >= 6):
-                                        for i2 in range(7):
-                                            picked_ = bowlingMiddle[i2]
-                                            picked_info = bowlerTracker[picked_['playerInitials']]
-                                            if(not inDeathBowlers(picked_) and picked_['playerInitials'] != lastOver):
-                                                bowlerToReturn = picked_
-                                                valid = True
-
-
-                return bowlerToReturn
-
+    def changeStrike():
+        nonlocal onStrike
+        if(onStrike == batter1):
+            onStrike = batter2
+        else:
+            onStrike = batter1
 
-        
-            overBowler = None
-            if(i % 2 == 1):
-                bowler2 = middleOversPick(bowler2)
-                overBowler = bowler2
-            else:
-                bowler1 = middleOversPick(bowler1)
-                overBowler = bowler1
-
-            n = 0
-            while(balls < ((i + 1)*6) ):
-                if(runs >= target or wickets == 10):
-                    if(runs >= target):
-                        # print("Target Chased")
-                        break
-                    break
-                else:
-                 #Add for the case that the team has to save bowler for death (if death bowler certain number of overs then after 2 in pp, save for later)         
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
+    def bowlBall(overBowler, over):
+        with profiler.section('player_copies'):
+            bowlerCopy = copy.deepcopy(overBowler)
+            strikerCopy = copy.deepcopy(onStrike)
+        delivery(bowlerCopy, strikerCopy, over)
 
-        else:
-            def deathOversPick(bowlerInp):
-                bowlerDict = bowlerTracker[bowlerInp['playerInitials']]
-                bowlerToReturn = bowlerInp
-                def inDeathBowlers(bowlerToCheck):
-                    if(bowlerToCheck['playerInitials'] == bowlingDeath[0]['playerInitials'] or
-                        bowlerToCheck['playerInitials'] == bowlingDeath[1]['playerInitials'] or
-                        bowlerToCheck['playerInitials'] == bowlingDeath[2]['playerInitials']):
-                        return True
-                    else:
-                        return False
-
-                if(not inDeathBowlers(bowlerInp) or bowlerDict['balls'] > 23):
-                    valid = False
-                    pickerIndex = 0
-                    while(not valid):
-                        pick = bowlingDeath[pickerIndex]
-                        pickInfo = bowlerTracker[pick['playerInitials']]
-                        if(pickInfo['balls'] == 0):
-                            bowlerToReturn = pick
-                            valid = True
-                        else:
-                            if(pickInfo['balls'] < 19 and pickInfo['playerInitials'] != lastOver):
-                                for track in bowlerTracker: #SAMPLE FOR OTHER PICKER DEFS | MAKE SURE LESS THAN 24 BALLS BOWLED
-                                   if(track != lastOver):
-                                     if bowlerTracker[track]['balls'] != 0 and bowlerTracker[track]['balls'] < 23:
-                                        if(bowlerTracker[track]['runs'] == 0 and track != lastOver):
-                                            bowlerToReturn = pick
-                                            valid = True
-
-                                        elif((bowlerTracker[track]['balls'] / bowlerTracker[track]['runs']) < 1.2) or (bowlerTracker[track]['wickets'] / bowlerTracker[track]['balls']) > 0.16:
-                                            if(track != lastOver):
-                                                bowlerToReturn = pick
-                                                valid = True
-
-                                bowlerToReturn = pick
-                                valid = True
-                        pickerIndex += 1
-                return bowlerToReturn
-
-            overBowler = None
-            if(i % 2 == 1):
-                bowler2 = deathOversPick(bowler2)
-                overBowler = bowler2
-            else:
-                bowler1 = deathOversPick(bowler1)
-                overBowler = bowler1
-
-            n = 0
-            while(balls < ((i + 1)*6) ):
-                if(runs >= target or wickets == 10):
-                    if(runs >= target):
-                        # print("Target Chased")
-                        break
-                    break
-                else:
-                 #Add for the case that the team has to save bowler for death (if death bowler certain number of overs then after 2 in pp, save for later)         
-                    delivery(copy.deepcopy(overBowler), copy.deepcopy(onStrike), str(i) + "." + str(n + 1))
-                    n += 1
-            lastOver = overBowler['playerInitials']
+    playOvers(bowlingPlan, bowlerTracker, changeStrike, bowlBall, lambda over: balls >= (over + 1)*6 or runs >= target or wickets == 10)
 
 
             
@@ -2164,25 +1281,7 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
             sr_ = (batterTracker[btckd]['runs']*100) / (batterTracker[btckd]['balls'])
             sr_ = str(round(sr_, 2))
             localArrayTabulate.append(sr_)
-        out = False
-        howOut = "DNB"
-        batted = False
-        for b in batterTracker[btckd]['ballLog']:
-            batted = True
-            if("W" in b):
-                out = True
-                if("CaughtBy" in b):
-                    splitOT = b.split("-")
-                    lcatcher = splitOT[2]
-                    lbowler = splitOT[-1]
-                    howOut = f"c {lcatcher} b {lbowler}"
-                elif("runout" in b):
-                    howOut = "Run out"
-                else:
-                    splitOT = b.split("-")
-                    howOut = f"{splitOT[1]} b {splitOT[-1]}"
-            else:
-                howOut = "Not out"
+        howOut = dismissals.how_out(batterTracker[btckd])
         localArrayTabulate.append(howOut)
         batsmanTabulate.append(localArrayTabulate)
         
@@ -2212,10 +1311,12 @@ def innings2(batting, bowling, battingName, bowlingName, pace, spin, outfield, d
     innings2Battracker = batterTracker
     innings2Bowltracker = bowlerTracker
 
-def game(manual=True, sentTeamOne=None, sentTeamTwo=None, switch="group"):
+def game(manual=True, sentTeamOne=None, sentTeamTwo=None, switch="group", profile=False):
     global innings1Batting, innings1Bowling, innings2Batting, innings2Bowling, innings1Balls, innings2Balls
     global innings1Log, innings2Log, innings1Battracker, innings2Battracker, innings2Bowltracker, innings1Bowltracker
-    global innings1Runs, innings2Runs
+    global innings1Runs, innings2Runs, profiler
+
+    profiler = profiling.Profiler() if profile else profiling.DISABLED
 
     innings1Batting = None
     innings1Bowling = None
@@ -2276,8 +1377,8 @@ def game(manual=True, sentTeamOne=None, sentTeamTwo=None, switch="group"):
     team2Info = []
 
     # spin, pace factor -> 0.0 - 1.0
-    team1Players = dataFile[team_one_inp]['players'] # Access the 'players' list
-    team2Players = dataFile[team_two_inp]['players'] # Access the 'players' list
+    team1Players = dataFile[team_one_inp]['players'] # Access the 'players' list
+    team2Players = dataFile[team_two_inp]['players'] # Access the 'players' list
     team1 = team_one_inp
     team2 = team_two_inp
     print(team1Players)
@@ -2312,12 +1413,15 @@ def game(manual=True, sentTeamOne=None, sentTeamTwo=None, switch="group"):
     sys.stdout=stdoutOrigin
     # print(innings1Log)
     # print(innings2Log)
-    return {"innings1Batting": innings1Batting, "innings1Bowling": innings1Bowling, "innings2Batting": innings2Batting, 
+    result = {"innings1Batting": innings1Batting, "innings1Bowling": innings1Bowling, "innings2Batting": innings2Batting, 
             "innings2Bowling": innings2Bowling, "innings2Balls": innings2Balls, "innings1Balls": 120, 
             "innings1Runs": innings1Runs, "innings2Runs": innings2Runs, "winMsg": winMsg, "innings1Battracker": innings1Battracker,
             "innings2Battracker": innings2Battracker, "innings1Bowltracker": innings1Bowltracker, "innings2Bowltracker": innings2Bowltracker,
             "innings1BatTeam": getBatting()[2],"innings2BatTeam": getBatting()[3], "winner": winner, "innings1Log": innings1Log,
             "innings2Log": innings2Log, "tossMsg": tossMsg }
+    if(profile):
+        result["timings"] = profiler.breakdown() # Exclusive time per hot-path section, see profiling.py
+    return result
 
 
 
@@ -1,15 +1,91 @@
 import random
+import heapq
 import json
+import struct
+import zlib
 import accessJSON
+import dismissals
+import ball_outcomes
+import phase_adjustments
+import matchups
+import profiling
 import copy
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Snapshot layout: header, then the Mersenne Twister state words and gauss_next, then the
+# zlib-compressed JSON of everything else (see MatchSimulator.to_snapshot).
+SNAPSHOT_MAGIC = b'IPLS'
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct('<4sHHI') # magic, version, RNG state words, compressed state length
+_SNAPSHOT_GAUSS = struct.Struct('<?d')
+
+class _BowlerQuota:
+    """Bowling options for one innings: a heap per phase keyed by (selection score, rank in that phase's list).
+
+    The score only depends on a bowler's own figures, so after each over only the bowler who
+    bowled it is re-keyed (update); superseded heap entries are skipped lazily when they surface.
+    Bowlers who reach 24 balls are never pushed again. pick() is O(log n) amortised.
+    """
+    MAX_BALLS = 24
+
+    def __init__(self, innings_num, phase_lists, stat_pool, bowling_tracker):
+        self.innings_num = innings_num
+        self.tracker = bowling_tracker
+        self.ranks = {phase: {initial: rank for rank, initial in enumerate(initials) if initial in stat_pool} for phase, initials in phase_lists.items()}
+        self.versions = {}
+        self.heaps = {phase: [] for phase in self.ranks}
+        for initials in self.ranks.values():
+            for initial in initials: self.versions[initial] = 0
+        for phase, ranks in self.ranks.items():
+            heap = self.heaps[phase]
+            for initial, rank in ranks.items():
+                score = self._score(initial)
+                if score is not None: heap.append((score, rank, 0, initial))
+            heapq.heapify(heap)
+
+    def _score(self, initial):
+        # Lower is better: economy, minus 10 per wicket, plus a small workload penalty; None once the quota is used.
+        tracker_stats = self.tracker.get(initial, {'balls_bowled': 0, 'runs_conceded': 0, 'wickets': 0})
+        if tracker_stats['balls_bowled'] >= self.MAX_BALLS: return None
+        economy = (tracker_stats['runs_conceded'] / (tracker_stats['balls_bowled'] / 6.0)) if tracker_stats['balls_bowled'] > 0 else 99.0
+        score = economy - (tracker_stats['wickets'] * 10)
+        score += tracker_stats['balls_bowled'] * 0.1
+        return score
+
+    def update(self, initial):
+        if initial not in self.versions: return
+        version = self.versions[initial] = self.versions[initial] + 1
+        score = self._score(initial)
+        if score is None: return
+        for phase, ranks in self.ranks.items():
+            if initial in ranks: heapq.heappush(self.heaps[phase], (score, ranks[initial], version, initial))
+
+    def pick(self, phase, skip=None):
+        """Best bowler for the phase other than `skip`, or None if nobody in the phase list is eligible."""
+        heap = self.heaps.get(phase, []); held = None; chosen = None
+        while heap:
+            _, _, version, initial = heap[0]
+            if version != self.versions[initial]: heapq.heappop(heap); continue
+            if initial == skip and held is None: held = heapq.heappop(heap); continue
+            chosen = initial; break
+        if held is not None: heapq.heappush(heap, held)
+        return chosen
+
+
 class MatchSimulator:
-    def __init__(self, team1_code, team2_code, pitch_factors=None, saved_state=None):
+    profiler = profiling.DISABLED # Per-ball timings are off unless enable_profiling() is called
+    # Hot-path methods timed once profiling is enabled; the wrappers live on the instance, so a
+    # simulator that is not profiled runs the plain methods. The ball log entry is timed inline.
+    _PROFILED_METHODS = {'_play_ball': 'outcome', '_calculate_dynamic_probabilities': 'probabilities',
+                         '_select_next_bowler': 'bowler_selection', '_summary': 'state_summary'}
+
+    def __init__(self, team1_code, team2_code, pitch_factors=None, saved_state=None, seed=None):
         self.team1_code = team1_code.lower()
         self.team2_code = team2_code.lower()
+        self.rng = random.Random(seed) # Per-match RNG so a snapshot can carry (and replay) its exact state
+        self.phase_adjustments = phase_adjustments.get_table('match_simulator')
 
         if pitch_factors:
             self.pace_factor = pitch_factors.get('pace', 1.0)
@@ -39,41 +115,36 @@ class MatchSimulator:
 
         self._initialize_fresh_game_state()
 
-        self.team1_players_stats = {}
-        self.team2_players_stats = {}
+        self.team1_players_stats = self._load_team_players(self.team1_code, team1_player_initials_list)
+        self.team2_players_stats = self._load_team_players(self.team2_code, team2_player_initials_list)
+        self._build_matchups()
 
-        for initial in team1_player_initials_list:
-            processed_initial_str = str(initial).strip()
-            if not processed_initial_str:
-                logging.warning(f"Skipping empty player initial for team {self.team1_code}.")
-                continue
-            raw_stats = None
-            try:
-                raw_stats = accessJSON.getPlayerInfo(processed_initial_str)
-            except KeyError:
-                logging.warning(f"Player initial '{processed_initial_str}' not found for team {self.team1_code}. Using placeholder.")
-            except Exception as e:
-                logging.error(f"Error fetching info for '{processed_initial_str}' (Team {self.team1_code}): {e}. Using placeholder.")
-            self.team1_players_stats[processed_initial_str] = self._preprocess_player_stats(processed_initial_str, raw_stats)
+        self._initialize_batting_order_and_bowlers()
 
-        for initial in team2_player_initials_list:
+        if saved_state and saved_state.get('toss_winner'):
+            self.load_from_saved_state(saved_state)
+
+    def _load_team_players(self, team_code, player_initials_list):
+        players_stats = {}
+        for initial in player_initials_list:
             processed_initial_str = str(initial).strip()
             if not processed_initial_str:
-                logging.warning(f"Skipping empty player initial for team {self.team2_code}.")
+                logging.warning(f"Skipping empty player initial for team {team_code}.")
                 continue
             raw_stats = None
             try:
                 raw_stats = accessJSON.getPlayerInfo(processed_initial_str)
             except KeyError:
-                logging.warning(f"Player initial '{processed_initial_str}' not found for team {self.team2_code}. Using placeholder.")
+                logging.warning(f"Player initial '{processed_initial_str}' not found for team {team_code}. Using placeholder.")
             except Exception as e:
-                logging.error(f"Error fetching info for '{processed_initial_str}' (Team {self.team2_code}): {e}. Using placeholder.")
-            self.team2_players_stats[processed_initial_str] = self._preprocess_player_stats(processed_initial_str, raw_stats)
+                logging.error(f"Error fetching info for '{processed_initial_str}' (Team {team_code}): {e}. Using placeholder.")
+            players_stats[processed_initial_str] = self._preprocess_player_stats(processed_initial_str, raw_stats, copy_input=False)
+        return players_stats
 
-        self._initialize_batting_order_and_bowlers()
-
-        if saved_state and saved_state.get('toss_winner'):
-            self.load_from_saved_state(saved_state)
+    def _build_matchups(self):
+        # Style-split deltas for every batter/bowler pair, worked out once per match
+        players = list(self.team1_players_stats.values()) + list(self.team2_players_stats.values())
+        self.matchups = matchups.MatchupIndex(players, players)
 
     def _initialize_fresh_game_state(self):
         self.batting_team_code = None; self.bowling_team_code = None
@@ -91,6 +162,7 @@ class MatchSimulator:
             self.team2_code: {'powerplay': [], 'middle': [], 'death': []}
         }
         self.next_batsman_index = {self.team1_code: 0, self.team2_code: 0}
+        self._bowler_quota = None # Derived from the bowling trackers; rebuilt on demand, never saved
 
     def _create_placeholder_player_stats(self, initial_str):
         return {
@@ -111,13 +183,14 @@ class MatchSimulator:
             "overNumbersObject": {str(i):0.05 for i in range(20)}
         }
 
-    def _preprocess_player_stats(self, initial, raw_stats_input):
+    def _preprocess_player_stats(self, initial, raw_stats_input, copy_input=True):
+        # copy_input=False hands raw_stats_input over to be updated in place (accessJSON returns a fresh dict per call).
         placeholder = self._create_placeholder_player_stats(initial)
         if raw_stats_input is None:
-            processed = copy.deepcopy(placeholder)
+            processed = placeholder
             logging.warning(f"Using full placeholder for {initial} due to missing raw_stats_input.")
         else:
-            processed = copy.deepcopy(raw_stats_input)
+            processed = copy.deepcopy(raw_stats_input) if copy_input else raw_stats_input
             for p_key, p_value in placeholder.items():
                 if p_key not in processed: # Key missing from raw_stats
                     processed[p_key] = copy.deepcopy(p_value)
@@ -146,6 +219,10 @@ class MatchSimulator:
         processed['bowlOutsRate'] = processed.get('bowlOutsTotal', 0) / bowl_balls
         processed['bowlWideRate'] = processed.get('bowlWides', 0) / bowl_balls if bowl_balls > 0 else 0.01
         processed['bowlNoballRate'] = processed.get('bowlNoballs', 0) / bowl_balls if bowl_balls > 0 else 0.005
+        shrunk = processed.get('shrunkRates') # Empirical-Bayes shrunk rates from player_rates.py, when the player is in the table
+        if isinstance(shrunk, dict):
+            processed['batRunDenominationsObject'] = dict(shrunk['batRunDenominations']); processed['batOutsRate'] = shrunk['batOutsRate']
+            processed['bowlRunDenominationsObject'] = dict(shrunk['bowlRunDenominations']); processed['bowlOutsRate'] = shrunk['bowlOutsRate']
 
         matches = processed.get('matches', 1); matches = 1 if matches == 0 else matches
         processed['catchRate'] = processed.get('catches', 0) / matches
@@ -225,7 +302,7 @@ class MatchSimulator:
         return None
 
     def perform_toss(self):
-        self.toss_winner = random.choice([self.team1_code, self.team2_code]); self.toss_decision = random.choice(['bat', 'field'])
+        self.toss_winner = self.rng.choice([self.team1_code, self.team2_code]); self.toss_decision = self.rng.choice(['bat', 'field'])
         if self.toss_decision == 'bat': self.batting_team_code = self.toss_winner; self.bowling_team_code = self.team1_code if self.toss_winner == self.team2_code else self.team2_code
         else: self.bowling_team_code = self.toss_winner; self.batting_team_code = self.team1_code if self.toss_winner == self.team2_code else self.team2_code
         self.toss_message = f"{self.toss_winner.upper()} won the toss and chose to {self.toss_decision}."
@@ -237,6 +314,7 @@ class MatchSimulator:
         # ... (Copy of the existing _calculate_dynamic_probabilities method from the read_files output)
         denAvg = {str(r): (batsman_obj['batRunDenominationsObject'].get(str(r),0) + bowler_obj['bowlRunDenominationsObject'].get(str(r),0))/2 for r in range(7)}
         outAvg = (batsman_obj['batOutsRate'] + bowler_obj['bowlOutsRate']) / 2
+        outAvg = self.matchups.apply(denAvg, outAvg, batsman_obj['playerInitials'], bowler_obj['playerInitials'])
         outTypeAvg = copy.deepcopy(bowler_obj['bowlOutTypesObject'])
         runout_chance_batsman = batsman_obj.get('runnedOut',0) / (batsman_obj.get('batBallsTotal',1) if batsman_obj.get('batBallsTotal',0) > 0 else 1)
         outTypeAvg['runOut'] = outTypeAvg.get('runOut', 0.005) + runout_chance_batsman / 2
@@ -253,59 +331,13 @@ class MatchSimulator:
             for r in ['4','6']: denAvg[r] = max(0.001, denAvg.get(r,0.001) * (1 - effect*2))
             denAvg['0'] = denAvg.get('0',0) + (effect*0.1); denAvg['1'] = denAvg.get('1',0) + (effect*0.05)
         for r in ['4','6']: denAvg[r] = denAvg.get(r,0) / self.outfield_factor
+        # Phase, wickets, batter form and required rate adjustments: data/phaseAdjustments.json
         balls_faced_batsman = bt_current_ball_stats['balls']; innings_balls_total = inn_data['legal_balls_bowled']
-        innings_runs_total = inn_data['score']; innings_wickets_total = inn_data['wickets']
-        if balls_faced_batsman < 8 and innings_balls_total < 80:
-            adjust = random.uniform(-0.01, 0.03) * (1 if self.current_innings_num == 1 else 0.8)
-            outAvg = max(0.01, outAvg - 0.015)
-            denAvg['0'] = max(0.001, denAvg.get('0',0) + adjust * 0.5); denAvg['1'] = max(0.001, denAvg.get('1',0) + adjust * 0.33)
-            denAvg['2'] = max(0.001, denAvg.get('2',0) + adjust * 0.17); denAvg['4'] = max(0.001, denAvg.get('4',0) - adjust * 0.17)
-            denAvg['6'] = max(0.001, denAvg.get('6',0) - adjust * 0.5)
-        if balls_faced_batsman > 15 and balls_faced_batsman < 30:
-            adjust = random.uniform(0.03, 0.07)
-            denAvg['0'] = max(0.001, denAvg.get('0',0) - adjust * 0.33); denAvg['4'] = max(0.001, denAvg.get('4',0) + adjust * 0.33)
-        if balls_faced_batsman > 20 and (bt_current_ball_stats['runs'] / balls_faced_batsman if balls_faced_batsman > 0 else 0) < 1.1:
-            adjust = random.uniform(0.05, 0.08)
-            denAvg['0'] = max(0.001, denAvg.get('0',0) + adjust * 0.5); denAvg['1'] = max(0.001, denAvg.get('1',0) + adjust * 0.17)
-            denAvg['6'] = max(0.001, denAvg.get('6',0) - adjust * 0.67); outAvg = min(0.95, outAvg + 0.05)
-        if innings_balls_total < 36:
-            outAvg = max(0.01, outAvg - (0.07 if innings_wickets_total == 0 else 0.03))
-            adj = random.uniform(0.05, 0.11) if innings_wickets_total < 2 else random.uniform(0.02, 0.08)
-            denAvg['0'] = max(0.001, denAvg.get('0',0) - adj * 0.67); denAvg['1'] = max(0.001, denAvg.get('1',0) - adj * 0.33)
-            denAvg['4'] = max(0.001, denAvg.get('4',0) + adj * (0.67 if innings_wickets_total < 2 else 0.83))
-            denAvg['6'] = max(0.001, denAvg.get('6',0) + adj * (0.33 if innings_wickets_total < 2 else 0.17))
-        elif innings_balls_total >= 102:
-            adj = random.uniform(0.07, 0.1) if innings_wickets_total < 7 else random.uniform(0.07,0.09)
-            denAvg['0'] = max(0.001, denAvg.get('0',0) + adj * (0.13 if innings_wickets_total < 7 else -0.13))
-            denAvg['1'] = max(0.001, denAvg.get('1',0) - adj * 0.33); denAvg['4'] = max(0.001, denAvg.get('4',0) + adj * 0.48)
-            denAvg['6'] = max(0.001, denAvg.get('6',0) + adj * 0.62); outAvg = min(0.95, outAvg + (0.015 if innings_wickets_total < 7 else 0.025))
-        elif innings_balls_total >= 36 and innings_balls_total < 102:
-            if innings_wickets_total < 3:
-                adj = random.uniform(0.05, 0.11)
-                denAvg['0'] = max(0.001, denAvg.get('0',0) - adj * 0.5); denAvg['1'] = max(0.001, denAvg.get('1',0) - adj*0.33)
-                denAvg['4'] = max(0.001, denAvg.get('4',0) + adj * 0.5); denAvg['6'] = max(0.001, denAvg.get('6',0) + adj*0.33)
-            else:
-                adj = random.uniform(0.02, 0.07)
-                denAvg['0'] = max(0.001, denAvg.get('0',0) - adj * 0.53); denAvg['1'] = max(0.001, denAvg.get('1',0) - adj*0.4)
-                denAvg['4'] = max(0.001, denAvg.get('4',0) + adj * 0.7); denAvg['6'] = max(0.001, denAvg.get('6',0) + adj*0.3)
-                outAvg = max(0.01, outAvg - 0.03)
-        if self.current_innings_num == 2 and innings_balls_total < 120 and self.target > 0:
-            balls_remaining = 120 - innings_balls_total; runs_needed = self.target - innings_runs_total
-            if runs_needed > 0 :
-                rrr = (runs_needed / balls_remaining) * 6 if balls_remaining > 0 else float('inf')
-                if rrr < 8:
-                    adj = random.uniform(0.05, 0.09) * (1 - (rrr/10)*0.5)
-                    denAvg['6'] = max(0.001, denAvg.get('6',0) - adj * 0.67); denAvg['4'] = max(0.001, denAvg.get('4',0) - adj*0.33)
-                    denAvg['1'] = max(0.001, denAvg.get('1',0) + adj); outAvg = max(0.01, outAvg - 0.04)
-                elif rrr <= 10.4:
-                    adj = random.uniform(0.04, 0.08)
-                    denAvg['6'] = max(0.001, denAvg.get('6',0) + adj * 0.2); denAvg['4'] = max(0.001, denAvg.get('4',0) + adj*0.33)
-                    outAvg = min(0.95, outAvg - 0.01)
-                elif rrr > 10.4:
-                    adj = random.uniform(0.04,0.08) + (rrr*1.1)/1000
-                    denAvg['6'] = max(0.001, denAvg.get('6',0) + adj * 0.5); denAvg['4'] = max(0.001, denAvg.get('4',0) + adj*0.33)
-                    denAvg['0'] = max(0.001, denAvg.get('0',0) - adj * 0.17); denAvg['1'] = max(0.001, denAvg.get('1',0) - adj*0.67)
-                    outAvg = min(0.95, outAvg + (0.02 + (rrr*1.1)/1000))
+        batter_rate = bt_current_ball_stats['runs'] / balls_faced_batsman if balls_faced_batsman > 0 else 0
+        if self.current_innings_num == 2: rate = (self.target - inn_data['score']) / (120 - innings_balls_total) * 6 if innings_balls_total < 120 else 0
+        else: rate = inn_data['score'] / innings_balls_total * 6 if innings_balls_total > 0 else 0
+        outAvg = min(0.95, self.phase_adjustments.apply(denAvg, outAvg, self.current_innings_num, innings_balls_total, inn_data['wickets'],
+                                                       balls_faced_batsman, batter_rate, rate, den_floor=0.001, out_floor=0.01))
         current_sum = sum(d for d in denAvg.values() if isinstance(d, (int, float)) and d >= 0)
         if current_sum > 0 : denAvg = {k: max(0, v/current_sum) for k,v in denAvg.items()}
         else: denAvg = {"0":0.5, "1":0.5}; logging.warning(f"denAvg sum zero for {batsman_obj['playerInitials']} vs {bowler_obj['playerInitials']}. Using fallback.")
@@ -316,38 +348,67 @@ class MatchSimulator:
 
     def _select_next_bowler(self):
         current_over_to_be_bowled = self.innings[self.current_innings_num]['overs_completed']
-        bowling_team_stat_pool = self.team1_players_stats if self.bowling_team_code == self.team1_code else self.team2_players_stats
         bowler_tracker_this_innings = self.innings[self.current_innings_num]['bowling_tracker']
         phase = 'powerplay' if current_over_to_be_bowled < 6 else ('death' if current_over_to_be_bowled >= 17 else 'middle')
-        phase_specific_bowler_list = self.team_bowler_phases[self.bowling_team_code][phase]
-        eligible_bowlers = []
-        for initial in phase_specific_bowler_list:
-            if initial not in bowling_team_stat_pool: continue
-            tracker_stats = bowler_tracker_this_innings.get(initial, {'balls_bowled': 0, 'runs_conceded': 0, 'wickets': 0})
-            if tracker_stats['balls_bowled'] >= 24: continue
-            if initial == self.last_over_bowler_initial and len(self.bowlers_list[self.bowling_team_code]) > 1:
-                if len(self.bowlers_list[self.bowling_team_code]) > 2 : continue
-            economy = (tracker_stats['runs_conceded'] / (tracker_stats['balls_bowled'] / 6.0)) if tracker_stats['balls_bowled'] > 0 else 99.0
-            score = economy - (tracker_stats['wickets'] * 10)
-            score += tracker_stats['balls_bowled'] * 0.1
-            eligible_bowlers.append({'initial': initial, 'score': score})
-        if not eligible_bowlers:
-            eligible_bowlers = [{'initial': b, 'score': random.random() + (100 if b == self.last_over_bowler_initial else 0) }
-                                for b in self.bowlers_list[self.bowling_team_code]
-                                if bowler_tracker_this_innings.get(b,{}).get('balls_bowled',0) < 24]
+        quota = self._bowler_quota
+        if quota is None or quota.innings_num != self.current_innings_num:
+            bowling_team_stat_pool = self.team1_players_stats if self.bowling_team_code == self.team1_code else self.team2_players_stats
+            quota = self._bowler_quota = _BowlerQuota(self.current_innings_num, self.team_bowler_phases[self.bowling_team_code], bowling_team_stat_pool, bowler_tracker_this_innings)
+        elif self.last_over_bowler_initial is not None:
+            quota.update(self.last_over_bowler_initial) # The only bowler whose figures changed since the last pick
+        # With two bowlers or fewer the same bowler may bowl consecutive overs
+        skip = self.last_over_bowler_initial if len(self.bowlers_list[self.bowling_team_code]) > 2 else None
+        chosen = quota.pick(phase, skip)
+        if chosen is not None: return chosen
+        eligible_bowlers = [{'initial': b, 'score': self.rng.random() + (100 if b == self.last_over_bowler_initial else 0) }
+                            for b in self.bowlers_list[self.bowling_team_code]
+                            if bowler_tracker_this_innings.get(b,{}).get('balls_bowled',0) < 24]
         if not eligible_bowlers:
-             if self.bowlers_list[self.bowling_team_code]: return random.choice(self.bowlers_list[self.bowling_team_code])
+             if self.bowlers_list[self.bowling_team_code]: return self.rng.choice(self.bowlers_list[self.bowling_team_code])
              return self.last_over_bowler_initial
-        eligible_bowlers.sort(key=lambda x: x['score'])
-        return eligible_bowlers[0]['initial']
-
-    def simulate_one_ball(self):
-        if self.game_over: return {"summary": self.get_game_state(), "ball_event": {"commentary": f"Game is over. {self.win_message}"}}
+        return min(eligible_bowlers, key=lambda x: x['score'])['initial']
+
+    def enable_profiling(self, profiler=None):
+        """Times the per-ball hot path from now on and returns the profiler (pass one in to share it across matches)."""
+        if not self.profiler.enabled:
+            self.profiler = profiler or profiling.Profiler()
+            profiling.instrument(self, self.profiler, self._PROFILED_METHODS)
+        return self.profiler
+
+    def timing_breakdown(self):
+        """Exclusive time per hot-path section ({} unless profiling is enabled); see profiling.py."""
+        return self.profiler.breakdown()
+
+    def simulate_one_ball(self, cursor=None):
+        # With a cursor (see state_cursor) the summary is get_game_state_delta(cursor) instead of the full state.
+        ball_event = self._play_ball()
+        return {"summary": self._summary(cursor), "ball_event": ball_event}
+
+    def simulate_balls(self, count, cursor=None, stop_at_over_end=False):
+        """Plays up to `count` balls (fewer if the match ends, or the over / innings does with stop_at_over_end).
+
+        One summary covers the whole batch; 'ball_events' lists every ball played, tagged with innings_num.
+        """
+        over_at_start = (self.current_innings_num, self.innings[self.current_innings_num]['overs_completed'])
+        ball_events = []
+        for _ in range(max(1, count)):
+            innings_num = self.current_innings_num
+            ball_event = self._play_ball(); ball_events.append(dict(ball_event, innings_num=innings_num))
+            if self.game_over or 'commentary' in ball_event: break
+            if stop_at_over_end and (self.current_innings_num, self.innings[self.current_innings_num]['overs_completed']) != over_at_start: break
+        return {"summary": self._summary(cursor), "ball_event": ball_events[-1], "ball_events": ball_events}
+
+    def simulate_next_over(self, cursor=None):
+        # Wides are re-bowled, so an over is usually 6-8 deliveries; the cap only guards against a stuck innings.
+        return self.simulate_balls(60, cursor, stop_at_over_end=True)
+
+    def _play_ball(self):
+        if self.game_over: return {"commentary": f"Game is over. {self.win_message}"}
         inn_data = self.innings[self.current_innings_num]; batsman_initial = self.current_batsmen['on_strike']; non_striker_initial = self.current_batsmen['non_strike']; bowler_initial = self.current_bowler
-        if not batsman_initial: self._end_innings(); return {"summary": self.get_game_state(), "ball_event": {"commentary": "Innings ended: No batsman available."}}
+        if not batsman_initial: self._end_innings(); return {"commentary": "Innings ended: No batsman available."}
         if not bowler_initial:
             self.current_bowler = self._select_next_bowler(); bowler_initial = self.current_bowler
-            if not bowler_initial: self._end_innings(); return {"summary": self.get_game_state(), "ball_event": {"commentary": "Innings ended: No bowler available for " + self.bowling_team_code}}
+            if not bowler_initial: self._end_innings(); return {"commentary": "Innings ended: No bowler available for " + self.bowling_team_code}
         batsman_obj = self.team1_players_stats.get(batsman_initial) if self.batting_team_code == self.team1_code else self.team2_players_stats.get(batsman_initial)
         bowler_obj = self.team1_players_stats.get(bowler_initial) if self.bowling_team_code == self.team1_code else self.team2_players_stats.get(bowler_initial)
         if not batsman_obj: batsman_obj = self._create_placeholder_player_stats(batsman_initial)
@@ -356,15 +417,15 @@ class MatchSimulator:
         bowler_tracker = inn_data['bowling_tracker'].setdefault(bowler_initial, {'overs_str': "0.0", 'balls_bowled': 0, 'runs_conceded': 0, 'wickets': 0, 'maidens': 0, 'economy': 0.0, 'dots':0})
         denAvg, outAvg, outTypeAvg, wideRate, noballRate = self._calculate_dynamic_probabilities(batsman_obj, bowler_obj, inn_data, batsman_tracker)
         runs_this_ball = 0; is_wicket_this_ball = False; extra_type_this_ball = None; extra_runs_this_ball = 0; is_legal_delivery = True; commentary_this_ball = ""; wicket_details = {}
-        if random.uniform(0,1) < wideRate:
+        if self.rng.uniform(0,1) < wideRate:
             is_legal_delivery = False; extra_type_this_ball = 'Wide'; extra_runs_this_ball = 1
             inn_data['score'] += 1; bowler_tracker['runs_conceded'] += 1; commentary_this_ball = "Wide."
         else:
-            if random.uniform(0,1) < outAvg :
+            if self.rng.uniform(0,1) < outAvg :
                 is_wicket_this_ball = True; inn_data['wickets'] += 1; wicket_type_chosen = "Bowled"
                 out_type_total_prob = sum(v for v in outTypeAvg.values() if isinstance(v, (int,float)) and v > 0)
                 if out_type_total_prob > 0:
-                    out_type_rand = random.uniform(0, out_type_total_prob); current_prob_sum = 0
+                    out_type_rand = self.rng.uniform(0, out_type_total_prob); current_prob_sum = 0
                     for w_type, w_prob in outTypeAvg.items():
                         current_prob_sum += w_prob
                         if out_type_rand <= current_prob_sum: wicket_type_chosen = w_type; break
@@ -374,17 +435,19 @@ class MatchSimulator:
                 if wicket_type_chosen.lower() == 'caught':
                     fielding_team_pool = self.team1_players_stats if self.bowling_team_code == self.team1_code else self.team2_players_stats
                     possible_catchers_initials = [p_init for p_init in fielding_team_pool.keys() if p_init != bowler_initial]
-                    catcher_initial = random.choice(possible_catchers_initials) if possible_catchers_initials else bowler_initial
+                    catcher_initial = self.rng.choice(possible_catchers_initials) if possible_catchers_initials else bowler_initial
                     batsman_tracker['fielder'] = catcher_initial; wicket_details['fielder'] = catcher_initial
                     commentary_this_ball = f"{batsman_initial} c {catcher_initial} b {bowler_initial} OUT!"
                 elif wicket_type_chosen.lower() == 'runout': wicket_details['bowler_credit'] = False
+                batsman_tracker['dismissal'] = dismissals.make_dismissal(wicket_type_chosen, bowler_initial, wicket_details.get('fielder'), inn_data['legal_balls_bowled'] + 1)
+                batsman_tracker['how_out'] = dismissals.format_dismissal(batsman_tracker['dismissal'])
                 self.current_batsmen['on_strike'] = self._get_next_batsman(self.batting_team_code, use_index_from_state=True)
                 if self.current_batsmen['on_strike']: inn_data['batting_tracker'].setdefault(self.current_batsmen['on_strike'], self._create_placeholder_player_stats(self.current_batsmen['on_strike']))['how_out'] = "Not out"
             else:
                 total_run_prob = sum(v for v in denAvg.values() if isinstance(v, (int,float)) and v > 0)
                 runs_this_ball = 0
                 if total_run_prob > 0 :
-                    run_rand = random.uniform(0, total_run_prob); current_prob_sum = 0
+                    run_rand = self.rng.uniform(0, total_run_prob); current_prob_sum = 0
                     for run_val_str, run_prob in denAvg.items():
                         current_prob_sum += run_prob
                         if run_rand <= current_prob_sum: runs_this_ball = int(run_val_str); break
@@ -396,6 +459,7 @@ class MatchSimulator:
         if is_legal_delivery:
             inn_data['balls_bowled'] += 1; inn_data['legal_balls_bowled'] +=1
             batsman_tracker['balls'] += 1; bowler_tracker['balls_bowled'] += 1
+        self.profiler.enter('logging')
         ball_in_over_for_log = inn_data['legal_balls_bowled'] % 6
         if is_legal_delivery and ball_in_over_for_log == 0 and inn_data['legal_balls_bowled'] > 0: ball_in_over_for_log = 6
         ball_log_entry = {'ball_number': inn_data['legal_balls_bowled'], 'over_str': f"{inn_data['overs_completed']}.{ball_in_over_for_log}",
@@ -403,8 +467,11 @@ class MatchSimulator:
             'runs_scored': runs_this_ball, 'is_wicket': is_wicket_this_ball, 'wicket_details': wicket_details,
             'is_extra': bool(extra_type_this_ball), 'extra_type': extra_type_this_ball, 'extra_runs': extra_runs_this_ball,
             'total_runs_ball': runs_this_ball + extra_runs_this_ball, 'commentary_text': commentary_this_ball,
-            'score_after_ball': inn_data['score'], 'wickets_after_ball': inn_data['wickets']}
+            'score_after_ball': inn_data['score'], 'wickets_after_ball': inn_data['wickets'],
+            'outcome': ball_outcomes.make_outcome(runs_this_ball, batsman_tracker['dismissal']['type'] if is_wicket_this_ball else None,
+                                                  ball_outcomes.WIDE if extra_type_this_ball == 'Wide' else None, extra_runs_this_ball)}
         inn_data['log'].append(ball_log_entry)
+        self.profiler.exit()
         if is_legal_delivery and runs_this_ball % 2 == 1: self.current_batsmen['on_strike'], self.current_batsmen['non_strike'] = self.current_batsmen['non_strike'], self.current_batsmen['on_strike']
         max_balls = 120; max_wickets = 10; game_ending_condition = False
         if inn_data['wickets'] >= max_wickets or not self.current_batsmen['on_strike']: game_ending_condition = True
@@ -415,7 +482,7 @@ class MatchSimulator:
             inn_data['overs_completed'] += 1; self.last_over_bowler_initial = self.current_bowler
             self.current_batsmen['on_strike'], self.current_batsmen['non_strike'] = self.current_batsmen['non_strike'], self.current_batsmen['on_strike']
             self.current_bowler = self._select_next_bowler()
-        return {"summary": self.get_game_state(), "ball_event": ball_log_entry}
+        return ball_log_entry
 
     def _end_innings(self):
         inn_data = self.innings[self.current_innings_num]
@@ -440,6 +507,11 @@ class MatchSimulator:
             else: self.match_winner = inn1_bat_team; self.win_message = f"{self.match_winner.upper()} won by {s1 - s2} runs."
 
     def get_game_state(self):
+        state = self._get_game_state_header()
+        state.update({"innings_data": self.innings, "full": True})
+        return state
+
+    def _get_game_state_header(self):
         current_bat_team_code_for_state = None
         current_bowl_team_code_for_state = None
         if self.toss_winner:
@@ -453,7 +525,7 @@ class MatchSimulator:
                 current_bat_team_code_for_state = self.batting_team_code
                 current_bowl_team_code_for_state = self.bowling_team_code
         return {"team1_code": self.team1_code.upper(), "team2_code": self.team2_code.upper(),
-            "current_innings_num": self.current_innings_num, "innings_data": self.innings,
+            "current_innings_num": self.current_innings_num, "cursor": self.state_cursor(),
             "on_strike": self.current_batsmen['on_strike'], "non_striker": self.current_batsmen['non_strike'],
             "current_bowler": self.current_bowler, "target_score": self.target, "game_over": self.game_over,
             "match_winner": self.match_winner.upper() if self.match_winner and self.match_winner != "Tie" else self.match_winner,
@@ -463,6 +535,117 @@ class MatchSimulator:
             "team1_logo": self.team1_raw_data.get('logo'), "team1_primary_color": self.team1_raw_data.get('colorPrimary'),
             "team2_logo": self.team2_raw_data.get('logo'), "team2_primary_color": self.team2_raw_data.get('colorPrimary'),
         }
+
+    # --- Incremental state ---
+    _INNINGS_SUMMARY_FIELDS = ('score', 'wickets', 'balls_bowled', 'legal_balls_bowled', 'overs_completed', 'batting_team_code', 'bowling_team_code')
+
+    def state_cursor(self):
+        """Number of ball log entries across both innings; a client that has seen them all is at this cursor."""
+        return len(self.innings[1]['log']) + len(self.innings[2]['log'])
+
+    def get_game_state_delta(self, cursor):
+        """Game state for a client that has already seen the first `cursor` ball log entries.
+
+        Same top-level keys as get_game_state(), but 'innings_data' only holds each innings' running
+        totals (no logs or trackers); the log entries after the cursor come in 'new_balls' and only the
+        tracker rows of the players involved in them in 'batting_updates' / 'bowling_updates'. Per-ball
+        payloads therefore stay constant-size. An unusable cursor (ahead of the match, e.g. from another
+        session) gets the full state, flagged with 'full': True.
+        """
+        current_cursor = self.state_cursor()
+        if cursor is None or cursor < 0 or cursor > current_cursor:
+            return self.get_game_state()
+        state = self._get_game_state_header()
+        state['innings_data'] = {num: {field: inn[field] for field in self._INNINGS_SUMMARY_FIELDS} for num, inn in self.innings.items()}
+        new_balls = []; batting_updates = {1: {}, 2: {}}; bowling_updates = {1: {}, 2: {}}
+        first_innings_len = len(self.innings[1]['log'])
+        for num, start in ((1, cursor), (2, cursor - first_innings_len)):
+            inn = self.innings[num]
+            for entry in inn['log'][max(0, start):]:
+                new_balls.append(dict(entry, innings_num=num))
+                for initial in (entry['batsman_initial'], entry['non_striker_initial']):
+                    if initial in inn['batting_tracker']: batting_updates[num][initial] = inn['batting_tracker'][initial]
+                if entry['bowler_initial'] in inn['bowling_tracker']: bowling_updates[num][entry['bowler_initial']] = inn['bowling_tracker'][entry['bowler_initial']]
+        # New batsmen / bowler for the next ball (after a wicket, an over or an innings change)
+        current_inn = self.innings.get(self.current_innings_num)
+        if current_inn:
+            for initial in (self.current_batsmen['on_strike'], self.current_batsmen['non_strike']):
+                if initial in current_inn['batting_tracker']: batting_updates[self.current_innings_num][initial] = current_inn['batting_tracker'][initial]
+            if self.current_bowler in current_inn['bowling_tracker']: bowling_updates[self.current_innings_num][self.current_bowler] = current_inn['bowling_tracker'][self.current_bowler]
+        state.update({'full': False, 'base_cursor': cursor, 'new_balls': new_balls,
+                      'batting_updates': batting_updates, 'bowling_updates': bowling_updates})
+        return state
+
+    def _summary(self, cursor):
+        return self.get_game_state() if cursor is None else self.get_game_state_delta(cursor)
+
+    # --- Save / restore ---
+    _STATE_FIELDS = ('batting_team_code', 'bowling_team_code', 'current_batsmen', 'current_bowler', 'last_over_bowler_initial',
+                     'current_innings_num', 'target', 'game_over', 'match_winner', 'win_message',
+                     'toss_winner', 'toss_decision', 'toss_message',
+                     'batting_order', 'bowlers_list', 'team_bowler_phases', 'next_batsman_index')
+
+    def get_saved_state(self):
+        """Everything needed to resume this match except the RNG state, as plain JSON-able data."""
+        state = {field: getattr(self, field) for field in self._STATE_FIELDS}
+        state.update({'team1_code': self.team1_code, 'team2_code': self.team2_code,
+                      'pitch_factors': {'pace': self.pace_factor, 'spin': self.spin_factor, 'outfield': self.outfield_factor},
+                      'team1_raw_data': self.team1_raw_data, 'team2_raw_data': self.team2_raw_data,
+                      'innings': [self.innings[1], self.innings[2]]})
+        return state
+
+    def load_from_saved_state(self, saved_state):
+        self._apply_saved_state(copy.deepcopy(saved_state))
+
+    def _apply_saved_state(self, saved_state):
+        # Takes ownership of saved_state (from_snapshot passes freshly decoded data, so nothing is copied).
+        for field in self._STATE_FIELDS:
+            if field in saved_state: setattr(self, field, saved_state[field])
+        innings = saved_state.get('innings')
+        if isinstance(innings, dict): innings = [innings.get(1, innings.get('1')), innings.get(2, innings.get('2'))]
+        if innings: self.innings = {1: innings[0], 2: innings[1]}
+        self._bowler_quota = None
+        # Placeholder players (e.g. a dummy bowler) are not in the player table; recreate them.
+        for team_code, stats_pool in ((self.team1_code, self.team1_players_stats), (self.team2_code, self.team2_players_stats)):
+            for initial in self.batting_order.get(team_code, []) + self.bowlers_list.get(team_code, []):
+                if initial not in stats_pool: stats_pool[initial] = self._create_placeholder_player_stats(initial)
+
+    def to_snapshot(self):
+        """Compact, versioned binary snapshot of the whole match, including the RNG state."""
+        _, rng_words, gauss_next = self.rng.getstate()
+        state_blob = zlib.compress(json.dumps(self.get_saved_state(), separators=(',', ':')).encode('utf-8'))
+        return b''.join([_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(rng_words), len(state_blob)),
+                         struct.pack(f'<{len(rng_words)}I', *rng_words),
+                         _SNAPSHOT_GAUSS.pack(gauss_next is not None, gauss_next or 0.0),
+                         state_blob])
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Rebuilds a simulator from to_snapshot() output. Team data comes from the snapshot
+        (teams.json is not read); player stats come from the shared player table."""
+        magic, version, rng_word_count, state_len = _SNAPSHOT_HEADER.unpack_from(snapshot, 0)
+        if magic != SNAPSHOT_MAGIC: raise ValueError("Not a MatchSimulator snapshot.")
+        if version != SNAPSHOT_VERSION: raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION}).")
+        offset = _SNAPSHOT_HEADER.size
+        rng_words = struct.unpack_from(f'<{rng_word_count}I', snapshot, offset); offset += 4 * rng_word_count
+        has_gauss, gauss_next = _SNAPSHOT_GAUSS.unpack_from(snapshot, offset); offset += _SNAPSHOT_GAUSS.size
+        state = json.loads(zlib.decompress(snapshot[offset:offset + state_len]).decode('utf-8'))
+
+        sim = cls.__new__(cls)
+        sim.team1_code = state['team1_code']; sim.team2_code = state['team2_code']
+        sim.rng = random.Random()
+        sim.phase_adjustments = phase_adjustments.get_table('match_simulator')
+        sim.rng.setstate((3, rng_words, gauss_next if has_gauss else None))
+        pitch = state['pitch_factors']
+        sim.pace_factor = pitch['pace']; sim.spin_factor = pitch['spin']; sim.outfield_factor = pitch['outfield']
+        sim.team1_raw_data = state['team1_raw_data']; sim.team2_raw_data = state['team2_raw_data']
+        sim.all_teams_data = {sim.team1_code: sim.team1_raw_data, sim.team2_code: sim.team2_raw_data}
+        sim._initialize_fresh_game_state()
+        sim.team1_players_stats = sim._load_team_players(sim.team1_code, sim.team1_raw_data.get('players', []))
+        sim.team2_players_stats = sim._load_team_players(sim.team2_code, sim.team2_raw_data.get('players', []))
+        sim._build_matchups()
+        sim._apply_saved_state(state)
+        return sim
 # --- New MatchSimulator Class END ---
 
 
@@ -0,0 +1,66 @@
+RUN_KEYS = ('0', '1', '2', '3', '4', '5', '6')
+
+# Prior strength, in balls, when shrinking a style split toward the player's overall rates:
+# a split with n balls keeps n / (n + SHRINK_BALLS) of its difference from the overall rate.
+SHRINK_BALLS = 120
+
+# Matchup index: bowler vs batting hand (byBatsman) and batter vs bowling style (byBowler).
+#
+# The player table carries both splits, but working out split rates on every ball was too
+# slow, so the engines only ever used the overall rates. MatchupIndex turns the splits into
+# (run weights, out rate) deltas against each player's overall rates once, when a match or
+# innings is set up, and combines them for every batter/bowler pair up front. A ball then
+# costs one dict lookup and a few additions.
+#
+# The overall rate a split is compared with is pooled over the player's own splits, so the
+# deltas of a player average out to zero across his matchups and a headline field that the
+# splits do not count (run-outs in batOutsTotal, for instance) cannot bias them.
+
+
+def _split_deltas(splits, balls_key, runs_key, outs_key, shrink_balls):
+    """{split: (run deltas, out delta)} for one player's style splits."""
+    splits = {name: split for name, split in splits.items() if isinstance(split, dict) and split.get(balls_key, 0) > 0}
+    total_balls = sum(split[balls_key] for split in splits.values())
+    if not total_balls:
+        return {}
+    pooled_runs = [sum(split.get(runs_key, {}).get(key, 0) for split in splits.values()) / total_balls for key in RUN_KEYS]
+    pooled_out = sum(split.get(outs_key, 0) for split in splits.values()) / total_balls
+    deltas = {}
+    for name, split in splits.items():
+        weight = split[balls_key] + shrink_balls
+        runs = split.get(runs_key, {})
+        run_deltas = tuple((runs.get(key, 0) + shrink_balls * pooled) / weight - pooled for key, pooled in zip(RUN_KEYS, pooled_runs))
+        out_delta = (split.get(outs_key, 0) + shrink_balls * pooled_out) / weight - pooled_out
+        deltas[name] = (run_deltas, out_delta)
+    return deltas
+
+
+class MatchupIndex:
+    def __init__(self, batters, bowlers, shrink_balls=SHRINK_BALLS):
+        bowling_splits = [(bowler, _split_deltas(bowler.get('byBatsman') or {}, 'bowlBallsTotal', 'bowlRunDenominations', 'bowlOutsTotal', shrink_balls))
+                          for bowler in bowlers]
+        self.pairs = {}
+        for batter in batters:
+            batting = _split_deltas(batter.get('byBowler') or {}, 'batBallsTotal', 'batRunDenominations', 'batOutsTotal', shrink_balls)
+            for bowler, bowling in bowling_splits:
+                bat_runs, bat_out = batting.get(bowler.get('bowlStyle'), ((0.0,) * len(RUN_KEYS), 0.0))
+                bowl_runs, bowl_out = bowling.get(batter.get('batStyle'), ((0.0,) * len(RUN_KEYS), 0.0))
+                # Same blend as the engines: the mean of the batter's and the bowler's side
+                run_deltas = tuple((a + b) / 2 for a, b in zip(bat_runs, bowl_runs))
+                if any(run_deltas) or bat_out or bowl_out:
+                    self.pairs[(batter['playerInitials'], bowler['playerInitials'])] = (run_deltas, (bat_out + bowl_out) / 2)
+
+    def pair(self, batter_initials, bowler_initials):
+        """(run deltas in RUN_KEYS order, out delta) for the pair, or None when neither has splits."""
+        return self.pairs.get((batter_initials, bowler_initials))
+
+    def apply(self, den, out, batter_initials, bowler_initials, den_floor=0.0, out_floor=0.0):
+        """Adds the pair's matchup deltas to den (run weights, in place) and returns the adjusted out weight."""
+        deltas = self.pairs.get((batter_initials, bowler_initials))
+        if deltas is None:
+            return out
+        run_deltas, out_delta = deltas
+        for key, delta in zip(RUN_KEYS, run_deltas):
+            if key in den:
+                den[key] = max(den_floor, den[key] + delta)
+        return max(out_floor, out + out_delta)
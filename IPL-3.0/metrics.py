@@ -0,0 +1,284 @@
+import atexit
+import bisect
+import functools
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+import weakref
+
+# In-process metrics in the Prometheus text exposition format (served by app.metrics_view).
+#
+# Recording is lock-free: every thread adds to its own cells (a dict of counter values and one of
+# histogram bucket counts), registered once per thread. Only the owning thread writes to its
+# cells, so increments never contend; a scrape sums the cells of every thread, folding those of
+# threads that have ended into a retired total so short-lived request threads do not pile up.
+# Values a component already tracks (pool sizes, cache_info(), directory sizes) are read at
+# scrape time by collectors instead of being counted on the hot path.
+#
+#   metrics = Metrics()
+#   metrics.describe('ipl_balls_simulated_total', 'counter', 'Balls simulated.')
+#   metrics.inc('ipl_balls_simulated_total', 240, engine='mainconnect')
+#   metrics.describe('ipl_http_request_duration_seconds', 'histogram', 'Request latency.')
+#   metrics.observe('ipl_http_request_duration_seconds', 0.012, route='/')
+#   metrics.add_collector(lambda: [('ipl_pool_live', 'gauge', 'Live simulators.', [({}, 3)])])
+#   metrics.render()                                   # text/plain; version=0.0.4
+#
+# Metrics(directory) adds up the workers of a multi-process server (gunicorn.conf.py sets one):
+# every flush_interval seconds a background thread in each process writes its totals, and the
+# samples of per-process collectors (add_collector(..., per_process=True)), to a file of its own
+# in directory, and a scrape adds up every file. Counters of workers that have exited are kept,
+# so they never go backwards; per-process collector samples only count while their worker is
+# still writing. Without a directory each process reports only itself.
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items()))) if labels else (name, ())
+
+
+def _file_name():
+    return f"metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json" # Unique even if a pid is reused
+
+
+def clear_directory(directory):
+    """Removes the files of an earlier server run, whose counters would otherwise be added in."""
+    for entry in os.scandir(directory):
+        if entry.name.startswith('metrics-'):
+            os.remove(entry.path)
+
+
+class Metrics:
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._threads = [] # (thread, counters, histograms) for every thread that has recorded
+        self._retired = ({}, {}) # Totals of threads that have ended
+        self._families = {} # name -> (type, help, buckets)
+        self._collectors = [] # (collector, per_process)
+        self._lock = threading.Lock() # Registration and scrapes only, never recording
+        self._flusher = None
+        self._file_name = _file_name()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=functools.partial(_after_fork, weakref.ref(self)))
+
+    def _forked(self):
+        # A forked worker starts from zero: what it inherited is the parent's to report, and the
+        # parent's threads (including its flusher) do not exist here.
+        self._local = threading.local()
+        self._threads = []
+        self._retired = ({}, {})
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._file_name = _file_name()
+
+    def describe(self, name, kind, help_text, buckets=LATENCY_BUCKETS):
+        """Declares a metric family: kind is 'counter', 'gauge' or 'histogram'."""
+        self._families[name] = (kind, help_text, tuple(buckets) if kind == 'histogram' else None)
+
+    def add_collector(self, collector, per_process=False):
+        """The collector returns [(name, kind, help, [(labels, value)])]. It is called as collector(values)
+        on every scrape, where values(name) gives {labels: value} of a counter or per-process sample
+        added up over every worker; or, if per_process, as collector() in every worker on each flush,
+        and the samples are added up across workers. Per-process samples suit values each process
+        holds, such as its pool size, as gauges: they stop counting once their worker exits, so
+        anything that must never go backwards belongs in inc() instead."""
+        self._collectors.append((collector, per_process))
+
+    def _cells(self):
+        cells = getattr(self._local, 'cells', None)
+        if cells is None:
+            cells = self._local.cells = ({}, {})
+            with self._lock:
+                self._threads.append((threading.current_thread(), cells[0], cells[1]))
+                if self.directory and self._flusher is None:
+                    self._start_flusher()
+        return cells
+
+    def inc(self, name, amount=1, **labels):
+        counters = self._cells()[0]
+        key = _key(name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        histograms = self._cells()[1]
+        key = _key(name, labels)
+        cell = histograms.get(key)
+        if cell is None:
+            buckets = self._families[name][2]
+            cell = histograms[key] = [0] * (len(buckets) + 1) + [0.0] # Per-bucket counts (+Inf last), then sum
+        cell[bisect.bisect_left(self._families[name][2], value)] += 1
+        cell[-1] += value
+
+    # --- Scraping ---
+    def _totals(self):
+        with self._lock:
+            live = []
+            for thread, counters, histograms in self._threads:
+                if thread.is_alive():
+                    live.append((thread, counters, histograms))
+                else: # Its cells will not change again; fold them in once
+                    _merge(self._retired, counters, histograms)
+            self._threads = live
+            totals = ({key: value for key, value in self._retired[0].items()},
+                      {key: list(cell) for key, cell in self._retired[1].items()})
+            for _, counters, histograms in live:
+                # list(dict.items()) copies in one step, so another thread adding a key cannot break it
+                _merge(totals, dict(list(counters.items())), {key: list(cell) for key, cell in list(histograms.items())})
+        return totals
+
+    def _collect(self, per_process, *args):
+        return [family for collector, flag in self._collectors if flag == per_process for family in collector(*args)]
+
+    # --- Sharing between workers ---
+    def _start_flusher(self):
+        ref = weakref.ref(self) # The thread ends once the Metrics object is gone
+        self._flusher = threading.Thread(target=_flush_loop, args=(ref, self.flush_interval), name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(_flush_at_exit, ref)
+
+    def flush(self):
+        """Writes this process's totals and per-process collector samples to its file in directory."""
+        counters, histograms = self._totals()
+        state = {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, cell] for (name, labels), cell in histograms.items()],
+            'collected': self._collect(per_process=True),
+        }
+        path = os.path.join(self.directory, self._file_name)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(path + '.tmp', path) # Readers see the old file or the new one, never half of one
+
+    def _worker_states(self):
+        # (state, still writing) for the file of every other process that has flushed
+        stale = time.time() - 3 * self.flush_interval
+        for entry in os.scandir(self.directory):
+            if not entry.name.startswith('metrics-') or not entry.name.endswith('.json') or entry.name == self._file_name:
+                continue
+            try:
+                with open(entry.path) as f:
+                    state = json.load(f)
+                live = entry.stat().st_mtime >= stale
+            except (OSError, ValueError): # Removed meanwhile
+                continue
+            yield state, live
+
+    # --- Scraping ---
+    def _gather(self):
+        # Recorded totals and per-process collector samples, added up over every worker
+        counters, histograms = self._totals()
+        collected = self._collect(per_process=True)
+        if self.directory:
+            for state, live in self._worker_states():
+                _merge((counters, histograms),
+                       {(name, _pairs(labels)): value for name, labels, value in state['counters']},
+                       {(name, _pairs(labels)): cell for name, labels, cell in state['histograms']})
+                if live:
+                    collected += state['collected']
+        families = {}
+        for name, kind, help_text, samples in collected:
+            values = families.setdefault(name, (kind, help_text, {}))[2]
+            for labels, value in samples:
+                key = tuple(sorted(labels.items()))
+                values[key] = values.get(key, 0) + value
+        return counters, histograms, families
+
+    def render(self):
+        counters, histograms, families = self._gather()
+
+        def values(name): # What this scrape has gathered, for the scrape-time collectors
+            found = {labels: value for (family, labels), value in counters.items() if family == name}
+            found.update(families.get(name, (None, None, {}))[2])
+            return found
+        for name, kind, help_text, samples in self._collect(False, values):
+            families[name] = (kind, help_text, {tuple(sorted(labels.items())): value for labels, value in samples})
+        series = {}
+        for (name, labels), value in counters.items():
+            series.setdefault(name, []).append((labels, value))
+        for (name, labels), cell in histograms.items():
+            series.setdefault(name, []).append((labels, cell))
+
+        lines = []
+        for name, (kind, help_text, buckets) in self._families.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for labels, value in sorted(series.get(name, []), key=lambda item: item[0]):
+                if kind != 'histogram':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (math.inf,), value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        for name, (kind, help_text, samples) in families.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_labels(labels)} {_number(value)}" for labels, value in sorted(samples.items())]
+        return "\n".join(lines) + "\n"
+
+
+def _after_fork(ref):
+    metrics = ref()
+    if metrics is not None:
+        metrics._forked()
+
+
+def _flush_loop(ref, interval):
+    while True:
+        time.sleep(interval)
+        metrics = ref()
+        if metrics is None:
+            return
+        try:
+            metrics.flush()
+        except OSError as e: # e.g. the directory was removed; try again next time
+            logging.warning(f"Could not write metrics to {metrics.directory}: {e}")
+        del metrics
+
+
+def _flush_at_exit(ref):
+    # Counts from the last flush_interval of an exiting worker would otherwise be lost
+    metrics = ref()
+    if metrics is not None:
+        try:
+            metrics.flush()
+        except OSError:
+            pass
+
+
+def _merge(totals, counters, histograms):
+    for key, value in counters.items():
+        totals[0][key] = totals[0].get(key, 0) + value
+    for key, cell in histograms.items():
+        total = totals[1].get(key)
+        if total is None:
+            totals[1][key] = list(cell)
+        else:
+            for i, count in enumerate(cell):
+                total[i] += count
+
+
+def _pairs(labels):
+    return tuple(tuple(pair) for pair in labels) # JSON turns the label tuples into lists
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
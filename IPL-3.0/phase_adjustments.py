@@ -0,0 +1,125 @@
+import bisect
+import json
+import math
+import os
+
+# Match-situation adjustments to the per-ball outcome weights, as data.
+#
+# Both engines nudge the blended batter/bowler run and out weights by match situation (phase,
+# wickets down, how settled the batter is, scoring or required rate, ...). The rules live in
+# data/phaseAdjustments.json, one list per engine. Each rule is a box of conditions plus an
+# adjustment vector; AdjustmentTable cuts every dimension at the rule thresholds, so all balls
+# in the same cell get the same summed vector, and looks cells up with one bisect per dimension.
+# A cell's vector is built the first time the cell is seen and reused for every later ball.
+#
+# Rule format:
+#   {"when": {"balls": {"ge": 36, "lt": 102}, "wickets": {"lt": 3}},
+#    "scale": [0.05, 0.11], "divisor": 3, "den": {"0": -1.5, "4": 1.5}, "out": -0.03}
+# adds mean(scale) / divisor * den[k] to run weight k and `out` to the out weight. The code
+# used to draw the scale from random.uniform(*scale) on every ball; the table uses its mean.
+# "scale_per_rate" and "out_per_rate" add terms proportional to the rate.
+
+KEYS = ('0', '1', '2', '3', '4', '5', '6', 'out')
+OUT = len(KEYS) - 1
+
+# Situation of the ball being bowled:
+#   innings        1 or 2
+#   balls          legal balls bowled in the innings so far
+#   wickets        wickets down
+#   batter_balls   balls faced by the striker
+#   batter_rate    striker's runs per ball
+#   rate           runs per over: the current rate in the first innings, the required rate in the chase
+#   pressure       wickets and wides in the innings's ball log (mainconnect's form rule)
+DIMENSIONS = ('innings', 'balls', 'wickets', 'batter_balls', 'batter_rate', 'rate', 'pressure')
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'phaseAdjustments.json')
+
+
+def _bounds(condition):
+    """(lower, upper) with lower <= x < upper for a {"ge"/"gt"/"lt"/"le"/"eq": value} condition."""
+    lower, upper = -math.inf, math.inf
+    if 'eq' in condition:
+        lower, upper = condition['eq'], math.nextafter(condition['eq'], math.inf)
+    if 'ge' in condition: lower = condition['ge']
+    if 'gt' in condition: lower = math.nextafter(condition['gt'], math.inf)
+    if 'lt' in condition: upper = condition['lt']
+    if 'le' in condition: upper = math.nextafter(condition['le'], math.inf)
+    return lower, upper
+
+
+def _rule_vectors(rule):
+    # (base, per_rate) vectors of one rule
+    base = [0.0] * len(KEYS)
+    per_rate = [0.0] * len(KEYS)
+    scale = rule.get('scale', [1, 1])
+    divisor = rule.get('divisor', 1)
+    mean_scale = (scale[0] + scale[1]) / 2
+    for key, weight in rule.get('den', {}).items():
+        index = KEYS.index(key)
+        base[index] += mean_scale * weight / divisor
+        per_rate[index] += rule.get('scale_per_rate', 0) * weight / divisor
+    base[OUT] += rule.get('out', 0)
+    per_rate[OUT] += rule.get('out_per_rate', 0)
+    return base, per_rate
+
+
+class AdjustmentTable:
+    def __init__(self, rules):
+        unknown = {dim for rule in rules for dim in rule.get('when', {})} - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown phase adjustment dimensions: {sorted(unknown)}")
+        self.rules = []
+        edges = {dim: set() for dim in DIMENSIONS}
+        for rule in rules:
+            boxes = {dim: _bounds(condition) for dim, condition in rule.get('when', {}).items()}
+            for dim, (lower, upper) in boxes.items():
+                edges[dim].update(edge for edge in (lower, upper) if math.isfinite(edge))
+            self.rules.append((boxes, _rule_vectors(rule)))
+        self.edges = {dim: sorted(values) for dim, values in edges.items()}
+        # A value in cell i of a dimension lies in [edges[i - 1], edges[i]); any value of the
+        # cell stands in for all of them when deciding which rules apply.
+        self.representatives = {dim: [values[0] - 1] + values if values else [0] for dim, values in self.edges.items()}
+        self._cells = {}
+
+    @classmethod
+    def from_file(cls, engine, path=RULES_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)[engine])
+
+    def cell(self, *situation):
+        """Cell index tuple for a situation given in DIMENSIONS order."""
+        return tuple(bisect.bisect_right(self.edges[dim], value) for dim, value in zip(DIMENSIONS, situation))
+
+    def vectors(self, cell):
+        vectors = self._cells.get(cell)
+        if vectors is None:
+            point = {dim: self.representatives[dim][index] for dim, index in zip(DIMENSIONS, cell)}
+            base = [0.0] * len(KEYS)
+            per_rate = [0.0] * len(KEYS)
+            for boxes, (rule_base, rule_per_rate) in self.rules:
+                if all(lower <= point[dim] < upper for dim, (lower, upper) in boxes.items()):
+                    base = [a + b for a, b in zip(base, rule_base)]
+                    per_rate = [a + b for a, b in zip(per_rate, rule_per_rate)]
+            vectors = self._cells[cell] = (tuple(base), tuple(per_rate))
+        return vectors
+
+    def apply(self, den, out, innings, balls, wickets, batter_balls, batter_rate=0.0, rate=0.0, pressure=0,
+              den_floor=0.0, out_floor=0.0):
+        """Adds the situation's adjustment vector to den (run weights, in place) and returns the adjusted out weight."""
+        situation = (innings, balls, wickets, batter_balls, batter_rate, rate, pressure)
+        base, per_rate = self.vectors(self.cell(*situation))
+        for index, key in enumerate(KEYS[:OUT]):
+            if base[index] or per_rate[index]:
+                den[key] = max(den_floor, den.get(key, 0) + base[index] + rate * per_rate[index])
+        return max(out_floor, out + base[OUT] + rate * per_rate[OUT])
+
+
+_tables = {}
+
+
+def get_table(engine):
+    """The engine's table, loaded once per process ('mainconnect' or 'match_simulator')."""
+    table = _tables.get(engine)
+    if table is None:
+        table = _tables[engine] = AdjustmentTable.from_file(engine)
+    return table
@@ -0,0 +1,222 @@
+import json
+import os
+import struct
+import sys
+from array import array
+
+import player_table
+
+# Empirical-Bayes shrunk per-ball rates for every player, compiled into data/playerRates.bin.
+#
+# The engines turn batRunDenominations/batOutsTotal (and the bowling counts) into per-ball rates
+# by dividing by the balls faced or bowled, so a player with 30 balls and two sixes gets the same
+# weight as a regular with thousands. This pipeline shrinks each rate toward the prior of the
+# player's group (batting position band for batting, pace/spin for bowling):
+#
+#   rate = (count + m * prior) / (balls + m)
+#
+# prior is the group's pooled rate and m (in balls) is estimated per group and per outcome from
+# the spread between players (beta-binomial method of moments), so outcomes that really differ
+# between players keep more of each player's own rate. Regulars barely move; players with a few
+# balls end up close to their group, and players who never batted get their group's rates
+# instead of all-zero weights.
+#
+# Everything is computed column by column over the whole player table offline (python
+# player_rates.py) or on first use when the artifact is missing or older than the player JSON,
+# like data/playerTable.bin. The engines only look a player's rates up when loading him.
+
+DEFAULT_PATH = os.path.join(player_table.PROJECT_DIR, 'data', 'playerRates.bin')
+
+MAGIC = b'IPLRATE\0'
+VERSION = 1
+_HEADER = struct.Struct('=8sHHIIIIqq')  # magic, version, reserved, players, cols, meta offset/len, source size/mtime_ns
+
+DENOMINATIONS = player_table.DENOMINATIONS
+# Row layout: batting run rates, batting out rate, bowling run rates, bowling out rate
+COLUMNS = ([('bat', den) for den in DENOMINATIONS] + [('bat', 'out')]
+           + [('bowl', den) for den in DENOMINATIONS] + [('bowl', 'out')])
+
+# Bounds on the prior strength m, in balls. The lower bound keeps a rate with almost no spread
+# between players from being taken at face value, the upper one stops a rate with no measurable
+# spread from wiping out players with real samples.
+MIN_PRIOR_BALLS = 20
+MAX_PRIOR_BALLS = 1000
+
+SPIN_MARKERS = ('break', 'spin', 'orthodox', 'googly')
+
+
+def batting_group(stats):
+    """Batting position band from the positions the player has batted at (0-based)."""
+    positions = [p for p in stats.get('position', []) if p != "null"]
+    if not positions:
+        return 'tail'
+    average = sum(positions) / len(positions)
+    if average < 3: return 'top'
+    if average < 6: return 'middle'
+    if average < 8: return 'lower'
+    return 'tail'
+
+
+def bowling_group(stats):
+    style = (stats.get('bowlStyle') or '').lower()
+    return 'spin' if any(marker in style for marker in SPIN_MARKERS) else 'pace'
+
+
+def _prior(counts, balls):
+    """(pooled rate, prior strength m) for one outcome across one group's players."""
+    sampled = [(c, n) for c, n in zip(counts, balls) if n > 0]
+    total = sum(n for _, n in sampled)
+    if not total:
+        return 0.0, MAX_PRIOR_BALLS
+    p = sum(c for c, _ in sampled) / total
+    spread = sum(n * (c / n - p) ** 2 for c, n in sampled)
+    variance = min(max(p * (1 - p), 1e-9), 0.25)
+    # E[spread] = (k - 1) * p(1 - p) + tau^2 * (N - sum(n^2) / N) under a beta-binomial model
+    effective = total - sum(n * n for _, n in sampled) / total
+    tau2 = (spread - (len(sampled) - 1) * variance) / effective if effective > 0 else 0.0
+    m = variance / tau2 - 1 if tau2 > 0 else MAX_PRIOR_BALLS
+    return p, min(MAX_PRIOR_BALLS, max(MIN_PRIOR_BALLS, m))
+
+
+def build_rates(players):
+    """Shrunk rates for every player: ({name: row in COLUMNS order}, priors by side and group)."""
+    names = list(players)
+    rows = {name: [0.0] * len(COLUMNS) for name in names}
+    priors = {}
+    for side, group_of, balls_field, runs_field, outs_field in (
+            ('bat', batting_group, 'batBallsTotal', 'batRunDenominations', 'batOutsTotal'),
+            ('bowl', bowling_group, 'bowlBallsTotal', 'bowlRunDenominations', 'bowlOutsTotal')):
+        groups = {}
+        for name in names:
+            groups.setdefault(group_of(players[name]), []).append(name)
+        priors[side] = {}
+        for group, members in groups.items():
+            balls = [players[name][balls_field] for name in members]
+            priors[side][group] = {}
+            for col, (col_side, outcome) in enumerate(COLUMNS):
+                if col_side != side:
+                    continue
+                if outcome == 'out':
+                    counts = [players[name][outs_field] for name in members]
+                else:
+                    counts = [players[name][runs_field].get(outcome, 0) for name in members]
+                p, m = _prior(counts, balls)
+                priors[side][group][outcome] = {'rate': p, 'balls': m}
+                for name, c, n in zip(members, counts, balls):
+                    rows[name][col] = (c + m * p) / (n + m)
+    return rows, priors
+
+
+def compile_rates(source=player_table.DEFAULT_SOURCE, path=DEFAULT_PATH, players=None):
+    """Builds the rates from the player JSON at source and writes them to path (atomically); returns path."""
+    if players is None:
+        with open(source) as f:
+            players = json.load(f)
+    rows, priors = build_rates(players)
+    names = list(rows)
+    values = array('d', (value for name in names for value in rows[name]))
+    meta = json.dumps({'names': names, 'priors': priors}).encode('utf-8')
+    meta_offset = _HEADER.size + len(values) * values.itemsize
+    try:
+        source_stat = os.stat(source)
+        source_size, source_mtime = source_stat.st_size, source_stat.st_mtime_ns
+    except OSError:
+        source_size, source_mtime = -1, -1
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(names), len(COLUMNS), meta_offset, len(meta), source_size, source_mtime)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        values.tofile(f)
+        f.write(meta)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _is_current(path, source):
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        source_stat = os.stat(source)
+    except OSError:
+        return False
+    if len(header) != _HEADER.size:
+        return False
+    magic, version, _, _, cols, _, _, source_size, source_mtime = _HEADER.unpack(header)
+    return (magic == MAGIC and version == VERSION and cols == len(COLUMNS)
+            and source_size == source_stat.st_size and source_mtime == source_stat.st_mtime_ns)
+
+
+class RateTable:
+    def __init__(self, data):
+        magic, version, _, players, cols, meta_offset, meta_len, _, _ = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION or cols != len(COLUMNS):
+            raise ValueError("Not a compiled player rates file (or an incompatible version); recompile it.")
+        self._values = array('d')
+        self._values.frombytes(data[_HEADER.size:meta_offset])
+        if len(self._values) != players * cols:
+            raise ValueError("Compiled player rates do not match their header; recompile them.")
+        meta = json.loads(data[meta_offset:meta_offset + meta_len].decode('utf-8'))
+        self.names = meta['names']
+        self.priors = meta['priors']
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def open(cls, path=DEFAULT_PATH, source=player_table.DEFAULT_SOURCE):
+        """Loads the rates at path, (re)building them from source first if they are missing or stale."""
+        if os.path.exists(source) and not _is_current(path, source):
+            compile_rates(source, path)
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def rates(self, name):
+        """Fresh {'batRunDenominations', 'batOutsRate', 'bowlRunDenominations', 'bowlOutsRate'} per-ball
+        rates for the player, or None if unknown."""
+        i = self._index.get(name)
+        if i is None:
+            return None
+        row = self._values[i * len(COLUMNS):(i + 1) * len(COLUMNS)]
+        bowl = len(DENOMINATIONS) + 1
+        return {'batRunDenominations': dict(zip(DENOMINATIONS, row[:len(DENOMINATIONS)])),
+                'batOutsRate': row[len(DENOMINATIONS)],
+                'bowlRunDenominations': dict(zip(DENOMINATIONS, row[bowl:bowl + len(DENOMINATIONS)])),
+                'bowlOutsRate': row[-1]}
+
+
+_table = None
+
+
+def get_table():
+    """The process-wide rates, loaded on first use."""
+    global _table
+    if _table is None:
+        _table = RateTable.open()
+    return _table
+
+
+if __name__ == '__main__':
+    # python player_rates.py [source.json]: rebuild data/playerRates.bin and show who moved most
+    source = sys.argv[1] if len(sys.argv) > 1 else player_table.DEFAULT_SOURCE
+    with open(source) as f:
+        players = json.load(f)
+    compile_rates(source, DEFAULT_PATH, players)
+    table = RateTable.open(DEFAULT_PATH, source)
+    for side, groups in table.priors.items():
+        for group, outcomes in sorted(groups.items()):
+            print(side, group, ' '.join(f"{k}:{v['rate']:.3f}/{v['balls']:.0f}" for k, v in outcomes.items()))
+    moves = []
+    for name, stats in players.items():
+        rates = table.rates(name)
+        if stats['batBallsTotal']:
+            raw = sum(int(k) * v for k, v in stats['batRunDenominations'].items()) / stats['batBallsTotal']
+            shrunk = sum(int(k) * v for k, v in rates['batRunDenominations'].items())
+            moves.append((abs(raw - shrunk), name, stats['batBallsTotal'], raw, shrunk))
+    print("Largest batting changes (runs per ball from denominations):")
+    for _, name, balls, raw, shrunk in sorted(moves, reverse=True)[:10]:
+        print(f"  {name:<24} {balls:>5} balls  {raw:.2f} -> {shrunk:.2f}")
@@ -0,0 +1,268 @@
+import json
+import mmap
+import os
+import struct
+from multiprocessing import shared_memory
+
+# Compiled, read-only player table shared by every worker/pool process.
+#
+# data/playerInfoProcessed.json is compiled once into data/playerTable.bin: a fixed header, one
+# int32 row per player with every count at a fixed column (denominations, out types, over and
+# position histograms, the per-hand and per-bowling-style splits) and a small JSON block with the
+# names and style strings. Opening it is an mmap, so N processes share one physical copy through
+# the page cache; a process pool without a shared filesystem can use export/attach_shared_memory.
+#
+# player(name) materializes a fresh dict in the original JSON schema, so the engines can keep
+# mutating "their" player dicts without one game leaking into the next. overNumbers and position
+# come back as histograms expanded into lists, so their order is not preserved (nothing relies on it).
+# The file is a local build artifact in native byte order; it is rebuilt whenever the JSON changes.
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(PROJECT_DIR, 'data', 'playerInfoProcessed.json')
+DEFAULT_PATH = os.path.join(PROJECT_DIR, 'data', 'playerTable.bin')
+
+MAGIC = b'IPLPTBL\0'
+VERSION = 1
+_HEADER = struct.Struct('=8sHHIIIIqq')  # magic, version, reserved, players, cols, strings offset/len, source size/mtime_ns
+
+SCALARS = ('batRunsTotal', 'batBallsTotal', 'bowlRunsTotal', 'bowlBallsTotal', 'batOutsTotal', 'bowlOutsTotal',
+           'bowlNoballs', 'bowlWides', 'catches', 'runnedOut', 'captained', 'wicketkeeper', 'matches')
+OUT_TYPES = ('caught', 'runOut', 'bowled', 'lbw', 'hitwicket', 'stumped')
+DENOMINATIONS = ('0', '1', '2', '3', '4', '5', '6')
+OVERS = tuple(str(o) for o in range(1, 21))
+POSITIONS = tuple(range(10))
+STRINGS = ('_id', 'playerInitials', 'displayName', 'batStyle', 'bowlStyle')
+
+# Per-split block: presence flag, three totals, out types, run denominations.
+_SPLIT_WIDTH = 1 + 3 + len(OUT_TYPES) + len(DENOMINATIONS)
+_BY_BATSMAN_PREFIX = 'bowl'  # byBatsman: keyed by the batter's hand, holds bowling figures
+_BY_BOWLER_PREFIX = 'bat'    # byBowler: keyed by the bowler's style, holds batting figures
+_HAS_BY_BOWLER = 1
+
+
+class Layout:
+    """Column offsets of one compiled table; the split keys are part of the table itself."""
+
+    def __init__(self, batter_hands, bowling_styles):
+        self.batter_hands = list(batter_hands)
+        self.bowling_styles = list(bowling_styles)
+        col = 0
+        self.flags = col; col += 1
+        self.scalars = {name: col + i for i, name in enumerate(SCALARS)}; col += len(SCALARS)
+        self.bat_out_types = col; col += len(OUT_TYPES)
+        self.bowl_out_types = col; col += len(OUT_TYPES)
+        self.bat_denominations = col; col += len(DENOMINATIONS)
+        self.bowl_denominations = col; col += len(DENOMINATIONS)
+        self.overs = col; col += len(OVERS)
+        self.positions = col; col += len(POSITIONS)
+        self.null_positions = col; col += 1
+        self.by_batsman = {hand: col + i * _SPLIT_WIDTH for i, hand in enumerate(self.batter_hands)}
+        col += len(self.batter_hands) * _SPLIT_WIDTH
+        self.by_bowler = {style: col + i * _SPLIT_WIDTH for i, style in enumerate(self.bowling_styles)}
+        col += len(self.bowling_styles) * _SPLIT_WIDTH
+        self.cols = col
+
+
+def _write_split(row, base, split, prefix):
+    row[base] = 1
+    row[base + 1] = split[f'{prefix}RunsTotal']
+    row[base + 2] = split[f'{prefix}BallsTotal']
+    row[base + 3] = split[f'{prefix}OutsTotal']
+    for i, kind in enumerate(OUT_TYPES):
+        row[base + 4 + i] = split[f'{prefix}OutTypes'][kind]
+    for i, den in enumerate(DENOMINATIONS):
+        row[base + 4 + len(OUT_TYPES) + i] = split[f'{prefix}RunDenominations'][den]
+
+
+def _read_split(row, base, prefix):
+    types_at = base + 4
+    dens_at = types_at + len(OUT_TYPES)
+    return {f'{prefix}RunsTotal': row[base + 1], f'{prefix}BallsTotal': row[base + 2],
+            f'{prefix}OutsTotal': row[base + 3],
+            f'{prefix}OutTypes': {kind: row[types_at + i] for i, kind in enumerate(OUT_TYPES)},
+            f'{prefix}RunDenominations': {den: row[dens_at + i] for i, den in enumerate(DENOMINATIONS)}}
+
+
+def compile_table(source=DEFAULT_SOURCE, path=DEFAULT_PATH, players=None):
+    """Compiles the player JSON into the binary table at path (written atomically) and returns path.
+
+    players may be passed in directly (e.g. already-transformed stats); it defaults to the JSON at source.
+    """
+    if players is None:
+        with open(source) as f:
+            players = json.load(f)
+    batter_hands, bowling_styles = [], []
+    for stats in players.values():
+        for hand in stats.get('byBatsman') or {}:
+            if hand not in batter_hands: batter_hands.append(hand)
+        for style in stats.get('byBowler') or {}:
+            if style not in bowling_styles: bowling_styles.append(style)
+    layout = Layout(batter_hands, bowling_styles)
+
+    names = list(players)
+    ints = []
+    strings = []
+    for name in names:
+        stats = players[name]
+        row = [0] * layout.cols
+        row[layout.flags] = _HAS_BY_BOWLER if 'byBowler' in stats else 0
+        for field, col in layout.scalars.items():
+            row[col] = stats[field]
+        for i, kind in enumerate(OUT_TYPES):
+            row[layout.bat_out_types + i] = stats['batOutTypes'][kind]
+            row[layout.bowl_out_types + i] = stats['bowlOutTypes'][kind]
+        for i, den in enumerate(DENOMINATIONS):
+            row[layout.bat_denominations + i] = stats['batRunDenominations'][den]
+            row[layout.bowl_denominations + i] = stats['bowlRunDenominations'][den]
+        for over in stats['overNumbers']:
+            row[layout.overs + OVERS.index(over)] += 1
+        for position in stats['position']:
+            if position == "null":
+                row[layout.null_positions] += 1
+            else:
+                row[layout.positions + POSITIONS.index(position)] += 1
+        for hand, split in (stats.get('byBatsman') or {}).items():
+            _write_split(row, layout.by_batsman[hand], split, _BY_BATSMAN_PREFIX)
+        for style, split in (stats.get('byBowler') or {}).items():
+            _write_split(row, layout.by_bowler[style], split, _BY_BOWLER_PREFIX)
+        ints.extend(row)
+        strings.append([stats[key] for key in STRINGS])
+
+    matrix = struct.pack(f'={len(ints)}i', *ints)
+    strings_blob = json.dumps({'names': names, 'strings': strings, 'batterHands': batter_hands,
+                               'bowlingStyles': bowling_styles}).encode('utf-8')
+    strings_offset = _HEADER.size + len(matrix)
+    try:
+        source_stat = os.stat(source)
+        source_size, source_mtime = source_stat.st_size, source_stat.st_mtime_ns
+    except OSError:
+        source_size, source_mtime = -1, -1
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(names), layout.cols, strings_offset, len(strings_blob),
+                          source_size, source_mtime)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(matrix)
+        f.write(strings_blob)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _is_current(path, source):
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        source_stat = os.stat(source)
+    except OSError:
+        return False
+    if len(header) != _HEADER.size:
+        return False
+    magic, version, _, _, _, _, _, source_size, source_mtime = _HEADER.unpack(header)
+    return (magic == MAGIC and version == VERSION and source_size == source_stat.st_size
+            and source_mtime == source_stat.st_mtime_ns)
+
+
+class PlayerTable:
+    """Read-only accessor over a compiled table held in any buffer (mmap or shared memory)."""
+
+    def __init__(self, buffer, owner=None):
+        self._buffer = buffer
+        self._owner = owner  # keeps the mmap / SharedMemory alive as long as the table
+        magic, version, _, players, cols, strings_offset, strings_len, _, _ = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a compiled player table (or an incompatible version); recompile it.")
+        self._view = view = memoryview(buffer)
+        self._ints = view[_HEADER.size:strings_offset].cast('i')
+        meta = json.loads(bytes(view[strings_offset:strings_offset + strings_len]).decode('utf-8'))
+        self.names = meta['names']
+        self._strings = meta['strings']
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self.layout = Layout(meta['batterHands'], meta['bowlingStyles'])
+        if self.layout.cols != cols or len(self._ints) != players * cols:
+            raise ValueError("Compiled player table layout does not match its header; recompile it.")
+        self.size = strings_offset + strings_len
+
+    @classmethod
+    def open(cls, path=DEFAULT_PATH, source=DEFAULT_SOURCE):
+        """Maps the compiled table at path, (re)compiling it from source first if it is missing or stale."""
+        if os.path.exists(source) and not _is_current(path, source):
+            compile_table(source, path)
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, owner=mapped)
+
+    @classmethod
+    def attach_shared_memory(cls, name):
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm.buf, owner=shm)
+
+    def export_shared_memory(self, name=None):
+        """Copies the table into a new shared memory block and returns it.
+
+        The caller owns the block: keep it alive while other processes attach and unlink() it at the end.
+        """
+        shm = shared_memory.SharedMemory(name=name, create=True, size=self.size)
+        shm.buf[:self.size] = memoryview(self._buffer)[:self.size]
+        return shm
+
+    def close(self):
+        """Releases the views and unmaps/detaches the buffer (rows handed out must not be used after)."""
+        self._ints.release()
+        self._view.release()
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def row(self, name):
+        """Zero-copy int32 view of one player's row; index it with self.layout."""
+        start = self._index[name] * self.layout.cols
+        return self._ints[start:start + self.layout.cols]
+
+    def value(self, name, field):
+        return self.row(name)[self.layout.scalars[field]]
+
+    def player(self, name):
+        """A fresh, mutable player dict in the playerInfoProcessed.json schema. KeyError if unknown."""
+        i = self._index[name]
+        layout = self.layout
+        row = self.row(name).tolist()
+        stats = dict(zip(STRINGS, self._strings[i]))
+        for field, col in layout.scalars.items():
+            stats[field] = row[col]
+        stats['batOutTypes'] = {kind: row[layout.bat_out_types + j] for j, kind in enumerate(OUT_TYPES)}
+        stats['bowlOutTypes'] = {kind: row[layout.bowl_out_types + j] for j, kind in enumerate(OUT_TYPES)}
+        stats['batRunDenominations'] = {den: row[layout.bat_denominations + j] for j, den in enumerate(DENOMINATIONS)}
+        stats['bowlRunDenominations'] = {den: row[layout.bowl_denominations + j] for j, den in enumerate(DENOMINATIONS)}
+        stats['overNumbers'] = [over for j, over in enumerate(OVERS) for _ in range(row[layout.overs + j])]
+        stats['position'] = ([p for j, p in enumerate(POSITIONS) for _ in range(row[layout.positions + j])]
+                             + ["null"] * row[layout.null_positions])
+        stats['byBatsman'] = {hand: _read_split(row, base, _BY_BATSMAN_PREFIX)
+                              for hand, base in layout.by_batsman.items() if row[base]}
+        if row[layout.flags] & _HAS_BY_BOWLER:
+            stats['byBowler'] = {style: _read_split(row, base, _BY_BOWLER_PREFIX)
+                                 for style, base in layout.by_bowler.items() if row[base]}
+        return stats
+
+
+_table = None
+
+
+def get_table():
+    """The process-wide table, mapped on first use (inherited as-is by forked workers)."""
+    global _table
+    if _table is None:
+        _table = PlayerTable.open()
+    return _table
+
+
+def use_table(table):
+    """Makes table the process-wide one, e.g. PlayerTable.attach_shared_memory(name) in a pool initializer."""
+    global _table
+    _table = table
@@ -0,0 +1,132 @@
+import functools
+import time
+
+# Opt-in per-ball timing for the engines.
+#
+# The engines time their hot-path steps (probabilities, sampling, logging, bowler selection, ...)
+# through a profiler object. By default that is DISABLED, whose sections are one shared object
+# with empty __enter__/__exit__, so an instrumented step costs a couple of attribute lookups and
+# calls. A real Profiler records exclusive time per section: time spent in a nested section is
+# charged to it and not to the enclosing one, so the shares of a breakdown add up to 100%.
+#
+#   profiler = profiling.Profiler()
+#   with profiler.section('sampling'): ...
+#   profiler.enter('logging'); ...; profiler.exit()   # same thing, for long blocks
+#   profiling.instrument(obj, profiler, {'method': 'section'})  # time whole methods of one object
+#   profiler.breakdown()                              # {section: {'calls', 'total_ms', 'mean_us', 'share'}}
+#   profiling.aggregate([breakdown, ...])             # combined breakdown of many matches
+
+
+class _Section:
+    __slots__ = ('_profiler', '_name')
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._profiler.enter(self._name)
+
+    def __exit__(self, *exc_info):
+        self._profiler.exit()
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self._clock = clock
+        self._sections = {}
+        self._stack = []  # [name, start_ns, time in nested sections]
+        self.totals_ns = {}
+        self.calls = {}
+
+    def section(self, name):
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(self, name)
+        return section
+
+    def enter(self, name):
+        self._stack.append([name, self._clock(), 0])
+
+    def exit(self):
+        name, start, nested = self._stack.pop()
+        elapsed = self._clock() - start
+        self.totals_ns[name] = self.totals_ns.get(name, 0) + elapsed - nested
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def breakdown(self):
+        return _breakdown(self.totals_ns, self.calls)
+
+
+class _DisabledSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class _DisabledProfiler:
+    enabled = False
+    _section = _DisabledSection()
+
+    def section(self, name):
+        return self._section
+
+    def enter(self, name):
+        pass
+
+    def exit(self):
+        pass
+
+    def breakdown(self):
+        return {}
+
+
+DISABLED = _DisabledProfiler()
+
+
+def _timed(method, section):
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        with section:
+            return method(*args, **kwargs)
+    return timed
+
+
+def instrument(obj, profiler, methods):
+    """Times obj's methods ({method name: section name}) by shadowing them with timed wrappers on
+    the instance itself, so other instances and the class keep running the plain methods."""
+    for method_name, section_name in methods.items():
+        setattr(obj, method_name, _timed(getattr(obj, method_name), profiler.section(section_name)))
+
+
+def _breakdown(totals_ns, calls):
+    grand_total = sum(totals_ns.values()) or 1
+    return {name: {'calls': calls[name], 'total_ms': total / 1e6, 'mean_us': total / calls[name] / 1e3,
+                   'share': total / grand_total}
+            for name, total in sorted(totals_ns.items(), key=lambda item: -item[1])}
+
+
+def aggregate(breakdowns):
+    """Combines per-match breakdowns (e.g. from a bulk run) into one."""
+    totals_ns = {}
+    calls = {}
+    for breakdown in breakdowns:
+        for name, row in breakdown.items():
+            totals_ns[name] = totals_ns.get(name, 0) + row['total_ms'] * 1e6
+            calls[name] = calls.get(name, 0) + row['calls']
+    return _breakdown(totals_ns, calls)
+
+
+def format_breakdown(breakdown):
+    lines = [f"{'section':<20}{'calls':>10}{'total ms':>12}{'mean us':>10}{'share':>8}"]
+    for name, row in breakdown.items():
+        lines.append(f"{name:<20}{row['calls']:>10}{row['total_ms']:>12.1f}{row['mean_us']:>10.1f}{row['share']:>8.1%}")
+    return "\n".join(lines)
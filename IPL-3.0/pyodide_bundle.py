@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import sys
+import urllib.request
+
+# Locally vendored Pyodide runtime for the animation player (templates/animation_player.html).
+#
+# The player needs the Pyodide runtime plus the micropip and pygame-ce wheels (and whatever they
+# depend on). Loading them from jsDelivr on every visit costs seconds before the first frame and
+# does not work without internet access, so `python pyodide_bundle.py` downloads exactly those
+# files once into vendor/pyodide/<version>/, checks every wheel against the sha256 in Pyodide's
+# lock file and writes a manifest.json listing the bundle:
+#
+#   {"version": "0.26.0", "packages": ["micropip", ...], "files": ["pyodide.js", ...]}
+#
+# The app serves the bundle under /vendor/pyodide/<version>/ with immutable cache headers (the
+# version is part of the URL) and its service worker precaches the files in the manifest. Without
+# a bundle the player falls back to the CDN.
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(PROJECT_DIR, 'vendor', 'pyodide')
+VERSION = '0.26.0'
+CDN_URL = 'https://cdn.jsdelivr.net/pyodide/v{version}/full/'
+PACKAGES = ('micropip', 'pygame-ce')
+
+LOCK_FILE = 'pyodide-lock.json'
+MANIFEST_FILE = 'manifest.json'
+# Runtime files loadPyodide() fetches from its indexURL before any package is loaded
+CORE_FILES = ('pyodide.js', 'pyodide.mjs', 'pyodide.asm.js', 'pyodide.asm.wasm', 'python_stdlib.zip', LOCK_FILE)
+
+
+def resolve_packages(lock, names):
+    """Names of the lock file's packages needed to load names, dependencies included, in load order."""
+    packages = lock['packages']
+    resolved = []
+
+    def visit(name, path):
+        key = name.lower()
+        if key in resolved:
+            return
+        if key not in packages:
+            raise KeyError(f"Package {name!r} is not in the Pyodide lock file.")
+        if key in path:
+            return  # dependency cycle: already being resolved further up
+        for dependency in packages[key].get('depends', []):
+            visit(dependency, path + (key,))
+        resolved.append(key)
+
+    for name in names:
+        visit(name, ())
+    return resolved
+
+
+def bundle_files(lock, names):
+    """Every file of a bundle for names: the runtime, then the packages' wheels in load order."""
+    return list(CORE_FILES) + [lock['packages'][name]['file_name'] for name in resolve_packages(lock, names)]
+
+
+def bundle_path(root=DEFAULT_DIR, version=VERSION):
+    return os.path.join(root, version)
+
+
+def load_manifest(root=DEFAULT_DIR, version=VERSION):
+    """The bundle's manifest, or None when the bundle has not been vendored (or is incomplete)."""
+    path = bundle_path(root, version)
+    try:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != version:
+        return None
+    if not all(os.path.isfile(os.path.join(path, name)) for name in manifest.get('files', [])):
+        return None
+    return manifest
+
+
+def _download(url, path, sha256=None):
+    with urllib.request.urlopen(url) as response:
+        data = response.read()
+    if sha256 is not None and hashlib.sha256(data).hexdigest() != sha256:
+        raise ValueError(f"Checksum mismatch for {url}")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def vendor(root=DEFAULT_DIR, version=VERSION, packages=PACKAGES, base_url=None, log=print):
+    """Downloads the runtime and packages into root/version (files already there are kept) and
+    writes the manifest last, so an interrupted download is never served. Returns the manifest."""
+    base_url = base_url or CDN_URL.format(version=version)
+    path = bundle_path(root, version)
+    os.makedirs(path, exist_ok=True)
+    lock_path = os.path.join(path, LOCK_FILE)
+    if not os.path.exists(lock_path):
+        _download(base_url + LOCK_FILE, lock_path)
+    with open(lock_path) as f:
+        lock = json.load(f)
+    checksums = {entry['file_name']: entry.get('sha256') for entry in lock['packages'].values()}
+
+    files = bundle_files(lock, packages)
+    for name in files:
+        target = os.path.join(path, name)
+        if os.path.exists(target):
+            continue
+        log(f"Downloading {name}")
+        _download(base_url + name, target, checksums.get(name))
+
+    manifest = {'version': version, 'packages': resolve_packages(lock, packages), 'files': files}
+    with open(os.path.join(path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    # python pyodide_bundle.py [version]: vendor the animation player's Pyodide runtime and packages
+    manifest = vendor(version=sys.argv[1] if len(sys.argv) > 1 else VERSION)
+    size = sum(os.path.getsize(os.path.join(bundle_path(version=manifest['version']), name)) for name in manifest['files'])
+    print(f"Pyodide {manifest['version']} with {', '.join(manifest['packages'])}: "
+          f"{len(manifest['files'])} files, {size / 2**20:.1f} MB in {bundle_path(version=manifest['version'])}")
@@ -0,0 +1,219 @@
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+import ball_outcomes
+
+# Headless rendering of the match animation (static/animation/cricket_animation.py) to frames and video.
+#
+# The browser plays the animation in real time; here the same CricketGame runs on SDL's dummy video
+# driver and is stepped at a fixed output frame rate (CricketGame.render_deliveries), so a render
+# takes as long as the drawing does, not as long as the match. The deliveries are cut into
+# segments at over boundaries and each segment is rendered by its own worker process:
+#
+#   out/segments/000/frame_000000.png ...   one directory per segment, numbered from 0
+#   out/frame_000000.png ...                all frames in match order after stitching
+#   out/match.mp4 (or .gif)                 with --encode, through ffmpeg (Pillow for GIFs without it)
+#
+# Every worker seeds random before building the game, so the crowd layout is identical across
+# segments and between runs.
+#
+#   python render_animation.py --teams csk mi --out renders/csk_mi --encode renders/csk_mi.mp4
+#   python render_animation.py --match-data match.json --workers 4 --highlights --scale 0.5
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+ANIMATION_DIR = os.path.join(PROJECT_DIR, 'static', 'animation')
+FRAME_PATTERN = 'frame_%06d.png'
+
+DEFAULT_FPS = 30
+
+
+def deliveries(match_data):
+    """The match's deliveries in playing order, as timeline records (see ball_outcomes.animation_ball)."""
+    if match_data.get('innings'):
+        return [ball for innings in match_data['innings'] for ball in innings.get('balls', [])]
+    return [{'legal': True} for _ in match_data.get('log') or []]
+
+
+def over_starts(match_data):
+    """Index of the first delivery of every over, counted the way the animation's MatchTimeline does:
+    a ball re-bowled after a wide or no-ball does not start a new over."""
+    starts = []
+    innings_list = match_data.get('innings') or [{'balls': deliveries(match_data)}]
+    index = 0
+    for innings in innings_list:
+        legal = 0
+        previous_legal = True
+        for ball in innings.get('balls', []):
+            if legal % 6 == 0 and previous_legal:
+                starts.append(index)
+            legal += 1 if ball['legal'] else 0
+            previous_legal = ball['legal']
+            index += 1
+    return starts
+
+
+def plan_segments(match_data, segments):
+    """[(start, end)] delivery ranges covering the match, about equally long and cut at over starts.
+    Returns fewer ranges than asked for when the match has fewer overs."""
+    total = len(deliveries(match_data))
+    if not total:
+        return []
+    starts = over_starts(match_data)
+    cuts = [0]
+    for k in range(1, max(1, segments)):
+        target = total * k / segments
+        cut = min(starts, key=lambda start: abs(start - target))
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    cuts.append(total)
+    return list(zip(cuts, cuts[1:]))
+
+
+def segment_dir(out_dir, number):
+    return os.path.join(out_dir, 'segments', f'{number:03d}')
+
+
+def _render_segment(match_data, number, start, end, out_dir, fps, scale, seed, highlights):
+    """Worker: renders deliveries [start, end) to PNGs in the segment's directory.
+    Returns (segment number, frames, seconds)."""
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    if ANIMATION_DIR not in sys.path:
+        sys.path.insert(0, ANIMATION_DIR)
+    import pygame
+    import cricket_animation
+
+    began = time.perf_counter()
+    frames_dir = segment_dir(out_dir, number)
+    os.makedirs(frames_dir, exist_ok=True)
+    random.seed(seed)  # Same crowd in every segment
+    game = cricket_animation.CricketGame(dict(match_data, highlights_only=highlights))
+    random.seed(seed + start)
+
+    def save(screen, frame):
+        if scale != 1.0:
+            size = (max(1, round(screen.get_width() * scale)), max(1, round(screen.get_height() * scale)))
+            screen = pygame.transform.smoothscale(screen, size)
+        pygame.image.save(screen, os.path.join(frames_dir, FRAME_PATTERN % frame))
+
+    frames = game.render_deliveries(start, end, fps, save)
+    pygame.quit()
+    return number, frames, time.perf_counter() - began
+
+
+def render(match_data, out_dir, fps=DEFAULT_FPS, scale=1.0, workers=None, segments=None, seed=0, highlights=False):
+    """Renders the match into out_dir/segments/ with a pool of worker processes.
+    Returns ({segment number: (frames, seconds)}, elapsed seconds)."""
+    workers = workers or os.cpu_count() or 1
+    plan = plan_segments(match_data, segments or workers)
+    began = time.perf_counter()
+    results = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_segment, match_data, number, start, end, out_dir, fps, scale, seed, highlights)
+                   for number, (start, end) in enumerate(plan)]
+        for future in concurrent.futures.as_completed(futures):
+            number, frames, seconds = future.result()
+            results[number] = (frames, seconds)
+    return results, time.perf_counter() - began
+
+
+def stitch(out_dir):
+    """Moves the segments' frames into out_dir as one numbered sequence in segment order; returns the frame count."""
+    segments_root = os.path.join(out_dir, 'segments')
+    for name in os.listdir(out_dir):  # Frames of an earlier render
+        if name.startswith('frame_'):
+            os.remove(os.path.join(out_dir, name))
+    frame = 0
+    for name in sorted(os.listdir(segments_root)):
+        frames_dir = os.path.join(segments_root, name)
+        for frame_name in sorted(os.listdir(frames_dir)):
+            os.replace(os.path.join(frames_dir, frame_name), os.path.join(out_dir, FRAME_PATTERN % frame))
+            frame += 1
+    shutil.rmtree(segments_root)
+    return frame
+
+
+def encode(out_dir, output, fps=DEFAULT_FPS):
+    """Encodes the stitched frames into output (.mp4 with H.264, or .gif) with ffmpeg, or with Pillow
+    for GIFs when ffmpeg is not installed."""
+    pattern = os.path.join(out_dir, FRAME_PATTERN)
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg:
+        if output.lower().endswith('.gif'):
+            codec = ['-vf', 'split[a][b];[a]palettegen[p];[b][p]paletteuse']
+        else:
+            codec = ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+        subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(fps), '-i', pattern] + codec + [output],
+                       check=True)
+        return output
+    if output.lower().endswith('.gif'):
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+        if Image is not None:
+            names = sorted(name for name in os.listdir(out_dir) if name.startswith('frame_'))
+            images = [Image.open(os.path.join(out_dir, name)) for name in names]
+            images[0].save(output, save_all=True, append_images=images[1:], duration=round(1000 / fps), loop=0)
+            return output
+    raise RuntimeError(f"Cannot encode {output}: install ffmpeg (or Pillow for GIFs), or keep the PNG frames.")
+
+
+def simulate_match_data(team_one, team_two, seed):
+    """Plays a match with mainconnect and returns the animation's match data for it."""
+    import mainconnect
+    os.chdir(PROJECT_DIR)  # mainconnect reads teams/ and writes scores/ relative to the project
+    os.makedirs('scores', exist_ok=True)
+    with open(os.path.join(PROJECT_DIR, 'teams', 'teams.json')) as f:
+        teams = json.load(f)
+    random.seed(seed)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):  # mainconnect prints every ball
+        result = mainconnect.game(manual=False, sentTeamOne=team_one, sentTeamTwo=team_two, switch="webapp_full_log")
+    return ball_outcomes.animation_match_data(result, teams, team_one, team_two)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the match animation headlessly to PNG frames and video.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--teams', nargs=2, metavar=('TEAM1', 'TEAM2'), help="simulate a match between two team codes")
+    source.add_argument('--match-data', help="JSON file with the animation's match data (as built by app.setup_animation)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the simulated match and the crowd")
+    parser.add_argument('--out', default='renders', help="directory for the frames")
+    parser.add_argument('--encode', metavar='FILE', help="also encode the frames into FILE (.mp4 or .gif)")
+    parser.add_argument('--fps', type=int, default=DEFAULT_FPS, help="output frame rate")
+    parser.add_argument('--scale', type=float, default=1.0, help="scale factor for the saved frames, e.g. 0.5")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument('--segments', type=int, help="segments to cut the match into (default: one per worker)")
+    parser.add_argument('--highlights', action='store_true', help="render boundaries and wickets only")
+    args = parser.parse_args()
+
+    if args.match_data:
+        with open(args.match_data) as f:
+            match_data = json.load(f)
+    else:
+        match_data = simulate_match_data(args.teams[0], args.teams[1], args.seed)
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+
+    results, elapsed = render(match_data, out_dir, args.fps, args.scale, args.workers, args.segments, args.seed,
+                              args.highlights)
+    for number, (frames, seconds) in sorted(results.items()):
+        print(f"segment {number:>3}: {frames:>6} frames in {seconds:6.1f}s ({frames / max(seconds, 1e-9):.1f} frames/s)")
+    total = stitch(out_dir)
+    print(f"{total} frames ({total / args.fps:.0f}s of video) in {elapsed:.1f}s: "
+          f"{total / max(elapsed, 1e-9):.1f} frames/s with {args.workers} workers -> {out_dir}")
+    if args.encode:
+        print(f"Encoded {encode(out_dir, args.encode, args.fps)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,24 @@
+from types import MappingProxyType
+
+import dismissals
+
+# Scorecard rows for the web app, built in a single pass over the engine's batting tracker.
+# The tracker is only read, through a MappingProxyType; each row is a small new dict, so the
+# ballLogs are never copied and the engine's trackers stay untouched.
+
+
+def batting_card(bat_tracker):
+    """Returns ({player: {'runs', 'balls', 'how_out', 'dismissal'}}, wickets) for one innings.
+
+    Players who never faced a ball are "DNB".
+    """
+    view = MappingProxyType(bat_tracker)
+    rows = {}
+    wickets = 0
+    for player, stats in view.items():
+        dismissal, how_out = dismissals.batter_outcome(stats)
+        if dismissal is not None:
+            wickets += 1
+        rows[player] = {'runs': stats.get('runs', ''), 'balls': stats.get('balls', ''),
+                        'how_out': how_out, 'dismissal': dismissal}
+    return rows, wickets
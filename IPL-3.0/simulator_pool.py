@@ -0,0 +1,197 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from match_simulator import MatchSimulator
+from snapshot_store import SnapshotConflict, SnapshotStore
+
+# Live MatchSimulator instances for the step-by-step web view, keyed by match id.
+# A hot match stays in memory so a ball is just a method call; simulators that fall out of
+# the LRU or sit idle past idle_timeout are parked in a SnapshotStore as compact snapshots
+# and rebuilt on their next request, so eviction only costs a restore, never the match.
+#
+# With a shared store (SqliteSnapshotStore) the pool writes through instead: every request that
+# plays a ball checkpoints the match, and a live simulator whose stored revision has moved on
+# (another worker played the last ball) is reloaded before use. Any worker can then serve any
+# match, so no sticky sessions are needed. A checkpoint only replaces the revision the simulator
+# was loaded at: if two workers race on one match the second save raises SnapshotConflict, its
+# stale copy is dropped, and its next checkout reloads what the first one stored.
+
+
+class _Entry:
+    __slots__ = ('simulator', 'lock', 'last_used', 'revision')
+
+    def __init__(self, simulator, now, revision=None):
+        self.simulator = simulator
+        self.lock = threading.Lock() # One request at a time per match; other matches run in parallel
+        self.last_used = now
+        self.revision = revision # Store revision the simulator matches (shared stores only)
+
+
+class SimulatorPool:
+    def __init__(self, max_live=256, idle_timeout=1800, store=None, clock=time.monotonic, on_lookup=None):
+        self.max_live = max_live
+        self.idle_timeout = idle_timeout
+        self.store = store if store is not None else SnapshotStore()
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._parking = {} # Evicted entries being serialized into the store, outside the pool lock
+        self._lock = threading.Lock()
+        self.lookups = {'hit': 0, 'restored': 0, 'miss': 0} # How checkouts were served (see stats)
+        self._on_lookup = on_lookup # Called as on_lookup(result='hit') etc. for every checkout, e.g. to count it in metrics
+
+    def create(self, team1_code, team2_code, seed=None):
+        """Starts a new match (toss done) and returns (match_id, simulator)."""
+        simulator = MatchSimulator(team1_code, team2_code, seed=seed)
+        simulator.perform_toss()
+        match_id = uuid.uuid4().hex
+        revision = self._checkpoint(match_id, simulator, None) if self.store.shared else None
+        with self._lock:
+            self._entries[match_id] = _Entry(simulator, self._clock(), revision)
+            victims = self._evict_locked()
+        self._park(victims)
+        return match_id, simulator
+
+    @contextmanager
+    def checkout(self, match_id):
+        """Yields the match's simulator, held exclusively for the with-block, or None if the match is unknown.
+
+        With a shared store, raises SnapshotConflict on leaving the block if another worker has
+        saved the match since it was loaded; the balls played in the block are then dropped."""
+        while True:
+            entry = self._get_entry(match_id)
+            if entry is None:
+                yield None
+                return
+            entry.lock.acquire()
+            if self._entries.get(match_id) is entry:
+                break
+            entry.lock.release() # Evicted between lookup and lock; look it up again
+        try:
+            entry.last_used = self._clock()
+            cursor = entry.simulator.state_cursor()
+            yield entry.simulator
+        finally:
+            try:
+                if self.store.shared and entry.simulator.state_cursor() != cursor:
+                    try:
+                        entry.revision = self._checkpoint(match_id, entry.simulator, entry.revision)
+                    except SnapshotConflict:
+                        with self._lock: # Its copy has diverged from the stored match; reload on next checkout
+                            if self._entries.get(match_id) is entry:
+                                del self._entries[match_id]
+                        raise
+            finally:
+                entry.last_used = self._clock()
+                entry.lock.release()
+
+    def discard(self, match_id):
+        with self._lock:
+            self._entries.pop(match_id, None)
+        self.store.discard(match_id)
+
+    def reap(self):
+        """Parks every simulator idle for longer than idle_timeout; returns how many were parked."""
+        with self._lock:
+            victims = self._evict_locked()
+        self._park(victims)
+        return len(victims)
+
+    def _checkpoint(self, match_id, simulator, revision):
+        return self.store.save(simulator, match_id, revision)
+
+    def _count_locked(self, result):
+        self.lookups[result] += 1
+        if self._on_lookup is not None:
+            self._on_lookup(result=result)
+
+    def _live_locked(self, match_id):
+        # The live entry, taking back one that is still being parked (its lock is held until then)
+        entry = self._entries.get(match_id)
+        if entry is None:
+            entry = self._parking.get(match_id)
+            if entry is not None:
+                self._entries[match_id] = entry
+        if entry is not None:
+            self._entries.move_to_end(match_id)
+        return entry
+
+    def _get_entry(self, match_id):
+        if not match_id:
+            return None
+        victims = []
+        with self._lock:
+            entry = self._live_locked(match_id)
+            if entry is not None:
+                victims = self._evict_locked()
+        self._park(victims)
+        if entry is not None:
+            if not self.store.shared or self.store.revision(match_id) == entry.revision:
+                with self._lock:
+                    self._count_locked('hit')
+                return entry
+            with self._lock: # Another worker has played on; drop the stale copy and reload it
+                if self._entries.get(match_id) is entry:
+                    del self._entries[match_id]
+        # Restoring takes a few ms; done outside the pool lock
+        if self.store.shared:
+            simulator, revision = self.store.load(match_id)
+        else:
+            simulator, revision = self.store.resume(match_id), None
+        with self._lock:
+            if simulator is None:
+                entry = self._live_locked(match_id) # A concurrent checkout may have restored it meanwhile
+                self._count_locked('miss' if entry is None else 'hit')
+                return entry
+            self._count_locked('restored')
+            entry = self._entries.setdefault(match_id, _Entry(simulator, self._clock(), revision))
+            self._entries.move_to_end(match_id)
+            if not self.store.shared:
+                self.store.discard(match_id)
+            victims = self._evict_locked()
+        self._park(victims)
+        return entry
+
+    def _evict_locked(self):
+        # Idle entries first (oldest are at the front), then the least recently used beyond max_live.
+        # Entries in use by a request are skipped; they are newest in the LRU order anyway.
+        # Returns the evicted (match_id, entry) pairs, still locked, for _park to store once the
+        # pool lock is released, so serializing them never holds up other checkouts.
+        victims = []
+        deadline = self._clock() - self.idle_timeout
+        for match_id in list(self._entries):
+            overflow = len(self._entries) > self.max_live
+            entry = self._entries[match_id]
+            if not overflow and entry.last_used > deadline:
+                break
+            if not entry.lock.acquire(blocking=False):
+                continue
+            del self._entries[match_id]
+            self._parking[match_id] = entry
+            victims.append((match_id, entry))
+        return victims
+
+    def _park(self, victims):
+        for match_id, entry in victims:
+            try:
+                if not self.store.shared: # A shared store already has the latest checkpoint
+                    self.store.park(entry.simulator, match_id)
+            finally:
+                with self._lock:
+                    del self._parking[match_id]
+                    if self._entries.get(match_id) is entry and not self.store.shared:
+                        self.store.discard(match_id) # Checked out again while it was being parked
+                entry.lock.release()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, match_id):
+        return match_id in self._entries or match_id in self._parking or match_id in self.store
+
+    def stats(self):
+        with self._lock:
+            live = len(self._entries)
+        return {'live': live, 'parked': len(self.store), 'parked_bytes': self.store.nbytes(), 'lookups': dict(self.lookups)}
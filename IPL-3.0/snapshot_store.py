@@ -0,0 +1,202 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from match_simulator import MatchSimulator
+
+# Server-side parking for step-by-step matches. Only the compact MatchSimulator.to_snapshot()
+# bytes are kept (a few KB each), so the Flask cookie session just carries the snapshot id and
+# many concurrent matches can be parked without holding live simulators.
+#
+# Two interchangeable stores (park / resume / discard / len / in / nbytes):
+#   SnapshotStore(max_entries)             in-memory LRU, private to the process
+#   SqliteSnapshotStore(path, max_entries, ttl)
+#                                          a SQLite file shared by every worker on the host; each
+#                                          write bumps the id's revision, and save() only writes
+#                                          over the revision it was given, so a pool can tell when
+#                                          another worker has moved a match on (see SimulatorPool)
+# A store's `shared` attribute says which kind it is.
+
+
+class SnapshotStore:
+    shared = False
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def park(self, simulator, snapshot_id=None):
+        """Stores the simulator's snapshot and returns its id (a new one unless given).
+
+        The least recently used snapshot is dropped once max_entries is exceeded.
+        """
+        snapshot_id = snapshot_id or uuid.uuid4().hex
+        snapshot = simulator.to_snapshot()
+        with self._lock:
+            self._snapshots[snapshot_id] = snapshot
+            self._snapshots.move_to_end(snapshot_id)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def resume(self, snapshot_id):
+        """Returns a live simulator for snapshot_id, or None if it is unknown or was evicted."""
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+            if snapshot is None:
+                return None
+            self._snapshots.move_to_end(snapshot_id)
+        return MatchSimulator.from_snapshot(snapshot)
+
+    def discard(self, snapshot_id):
+        with self._lock:
+            self._snapshots.pop(snapshot_id, None)
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def __contains__(self, snapshot_id):
+        return snapshot_id in self._snapshots
+
+    def nbytes(self):
+        with self._lock:
+            return sum(len(snapshot) for snapshot in self._snapshots.values())
+
+
+class SnapshotConflict(Exception):
+    """Raised by SqliteSnapshotStore.save when another process has saved the snapshot since it was loaded."""
+
+
+class SqliteSnapshotStore:
+    """Snapshots in a SQLite file, so every worker process (and the next restart) can resume a match.
+
+    Cleanup is bounded: each write drops snapshots untouched for ttl seconds and, beyond
+    max_entries, the least recently used ones.
+    """
+    shared = True
+
+    _SCHEMA = ("CREATE TABLE IF NOT EXISTS snapshots ("
+               "id TEXT PRIMARY KEY, snapshot BLOB NOT NULL, revision INTEGER NOT NULL, touched REAL NOT NULL)",
+               "CREATE INDEX IF NOT EXISTS snapshots_touched ON snapshots (touched)")
+
+    def __init__(self, path, max_entries=10000, ttl=86400, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._local = threading.local() # sqlite3 connections are not shared between threads
+        self._inherited = [] # Connections copied by fork(); kept so the child never closes the parent's handle
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Created with a connection of its own, closed at once: the store is built in create_app, which
+        # gunicorn's preload_app runs in the master, and no connection may be open across fork().
+        db = self._connect()
+        try:
+            for statement in self._SCHEMA:
+                db.execute(statement)
+        finally:
+            db.close()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10, isolation_level=None) # Transactions are explicit, see _transaction
+        db.execute("PRAGMA journal_mode=WAL") # Readers in one worker do not block a write in another
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _connection(self):
+        # One connection per thread and process: a forked child finds its parent's in the thread-local
+        # and must open its own instead (SQLite connections do not survive fork()).
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'pid', None) != pid:
+            if getattr(local, 'db', None) is not None:
+                self._inherited.append(local.db)
+            local.db = self._connect()
+            local.pid = pid
+        return local.db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE") # Takes the write lock up front, so read-check-write is atomic
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _prune(self, db, now):
+        db.execute("DELETE FROM snapshots WHERE touched < ?", (now - self.ttl,))
+        db.execute("DELETE FROM snapshots WHERE id IN "
+                   "(SELECT id FROM snapshots ORDER BY touched DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def save(self, simulator, snapshot_id, revision=None):
+        """Stores the simulator's snapshot if the stored one is still at revision (None: a new id)
+        and returns the new revision, all in one transaction. Raises SnapshotConflict if another
+        process has saved a different revision meanwhile. A snapshot that was pruned is stored again."""
+        snapshot = simulator.to_snapshot()
+        now = self._clock()
+        with self._transaction() as db:
+            row = db.execute("SELECT revision FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+            if row is not None and row[0] != revision:
+                raise SnapshotConflict(f"Snapshot {snapshot_id} is at revision {row[0]}, not {revision}.")
+            new_revision = (revision or 0) + 1
+            if row is None:
+                db.execute("INSERT INTO snapshots (id, snapshot, revision, touched) VALUES (?, ?, ?, ?)",
+                           (snapshot_id, snapshot, new_revision, now))
+            else:
+                db.execute("UPDATE snapshots SET snapshot = ?, revision = ?, touched = ? WHERE id = ? AND revision = ?",
+                           (snapshot, new_revision, now, snapshot_id, revision))
+            self._prune(db, now)
+        return new_revision
+
+    def park(self, simulator, snapshot_id=None):
+        """Stores the simulator's snapshot whatever is stored under the id, bumping its revision; returns the id."""
+        snapshot_id = snapshot_id or uuid.uuid4().hex
+        snapshot = simulator.to_snapshot()
+        now = self._clock()
+        with self._transaction() as db:
+            db.execute("INSERT INTO snapshots (id, snapshot, revision, touched) VALUES (?, ?, 1, ?) "
+                       "ON CONFLICT (id) DO UPDATE SET snapshot = excluded.snapshot, "
+                       "revision = revision + 1, touched = excluded.touched",
+                       (snapshot_id, snapshot, now))
+            self._prune(db, now)
+        return snapshot_id
+
+    def load(self, snapshot_id):
+        """(live simulator, revision) for snapshot_id, or (None, None) if it is unknown or expired."""
+        now = self._clock()
+        with self._transaction() as db:
+            row = db.execute("SELECT snapshot, revision FROM snapshots WHERE id = ? AND touched >= ?",
+                             (snapshot_id, now - self.ttl)).fetchone()
+            if row is None:
+                return None, None
+            db.execute("UPDATE snapshots SET touched = ? WHERE id = ?", (now, snapshot_id))
+        return MatchSimulator.from_snapshot(row[0]), row[1]
+
+    def resume(self, snapshot_id):
+        """Returns a live simulator for snapshot_id, or None if it is unknown or expired."""
+        return self.load(snapshot_id)[0]
+
+    def revision(self, snapshot_id):
+        """How many times snapshot_id has been saved (None if it is not stored); a cheap staleness check."""
+        row = self._connection().execute("SELECT revision FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def discard(self, snapshot_id):
+        self._connection().execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    def __contains__(self, snapshot_id):
+        return self.revision(snapshot_id) is not None
+
+    def nbytes(self):
+        return self._connection().execute("SELECT COALESCE(SUM(LENGTH(snapshot)), 0) FROM snapshots").fetchone()[0]
@@ -1,16 +1,20 @@
 import asyncio
+import bisect
+import collections
 import platform
 import pygame
 import random
 import math
+import statistics
+import time
 if platform.system() == "Emscripten":
     import js # For accessing Pyodide global scope if running in Pyodide
 
 # --- Constants ---
-# Screen and FPS
+# Screen and drawing rate (FPS caps how often frames are drawn; the animation itself runs at SIM_HZ, see below)
 PLAYER_RADIUS = 15; FIELDER_RADIUS = 12; BALL_RADIUS = 5; FPS = 60; SCREEN_WIDTH = 1280; SCREEN_HEIGHT = 720
 # Colors
-WHITE = (255,255,255); BLACK = (0,0,0); LIGHT_BROWN = (210,180,140); GREEN = (34,139,34)
+WHITE = (255,255,255); BLACK = (0,0,0); LIGHT_BROWN = (210,180,140); GREEN = (34,139,34); LIGHT_GREEN = (144,238,144)
 RED = (255,0,0); BLUE = (0,0,255); YELLOW = (255,255,0); SKY_BLUE = (135,206,235)
 GREY = (200,200,200); DARK_GREY = (100,100,100); CROWD_COLOR_PLACEHOLDER = (160,160,160)
 STUMP_COLOR = (245, 245, 220); STUMP_HIT_COLOR = (255, 69, 0)
@@ -28,13 +32,29 @@ STUMPS_LINE_Y_BATSMAN = int(PITCH_Y_BATSMAN_END-PITCH_LENGTH*0.05)
 STUMP_HEIGHT = 25; STUMP_WIDTH = 3; STUMPS_GAP = 5
 
 # Animation Timing & Parameters
-BOWLER_START_RUNUP_OFFSET = 80; BOWLER_RUNUP_FRAMES = 12; BOWLER_ACTION_FRAMES = 5*2 # Bowler animation
-BALL_TRAVEL_TOTAL_FRAMES = 25; BALL_GRAVITY = 0.3; BALL_BOUNCE_FACTOR = -0.6 # Ball physics
+# The animation advances in fixed simulation steps of 1/SIM_HZ seconds (see AnimationClock), however fast frames are
+# drawn. Durations are given in seconds and converted to steps; speeds and ball physics are per step.
+SIM_HZ = 60
+def sim_steps(seconds): return max(1, round(seconds * SIM_HZ)) # Duration in seconds -> number of simulation steps
+BOWLER_START_RUNUP_OFFSET = 80; BOWLER_RUNUP_STEPS = sim_steps(0.2); BOWLER_ACTION_STEPS = 5*sim_steps(1/30) # Bowler animation (5 poses)
+BALL_TRAVEL_TOTAL_STEPS = sim_steps(25/60); BALL_GRAVITY = 0.3; BALL_BOUNCE_FACTOR = -0.6 # Ball physics
 PITCH_BOUNCE_POINT_OFFSET = PITCH_LENGTH*0.25 # Where ball aims to bounce
-BATSMAN_ACTION_TOTAL_FRAMES = 15 # Batsman animation
-FIELDER_SPEED = 1.5; FIELDER_MAX_MOVE_FRAMES = FPS // 2 # Fielder movement
+BATSMAN_ACTION_TOTAL_STEPS = sim_steps(0.25) # Batsman animation
+FIELDER_SPEED = 1.5; FIELDER_MAX_MOVE_STEPS = sim_steps(0.5) # Fielder movement
+INTER_BALL_PAUSE_STEPS = sim_steps(2.0) # Pause between deliveries
+CROWD_REACTION_STEPS = sim_steps(2.0); CROWD_SETTLE_STEPS = sim_steps(1/3) # Crowd excitement, and the lull before it goes idle
+# Playback
+MAX_FRAME_TIME = 0.25 # Real time credited per drawn frame at most; a longer stall (hidden tab, breakpoint) is dropped, not replayed
+MIN_PLAYBACK_SPEED = 0.25; MAX_PLAYBACK_SPEED = 8.0 # Playback speed range (- and + keys halve/double it, 1 resets, Space pauses)
 CROWD_AREA_HEIGHT = SCREEN_HEIGHT * 0.20 # Crowd display area
 CROWD_FAN_COLORS = [(200,50,50), (50,50,200), (50,150,50), (180,180,30), (100,100,100), (220,120,30)] # Crowd colors
+CROWD_STRIP_WIDTH = 32 # Fans are pre-rendered into vertical strips of this width, animated as a whole
+CROWD_REACTION_WAVES = {1: (1.5, 1.2), 2: (2.5, 1.5)} # Reaction level -> (amplitude factor, speed factor)
+CROWD_MAX_WAVE_OFFSET = 8 # Largest strip offset in pixels (3 px base amplitude * 2.5)
+TIMELINE_BAR_RECT = pygame.Rect(0, SCREEN_HEIGHT-8, SCREEN_WIDTH, 8) # Match progress bar (click to seek)
+# Rendering diagnostics
+SHOW_FRAME_STATS = False # Start with the FPS/frame-time overlay shown (toggle with F in the animation)
+FRAME_STATS_REFRESH_FRAMES = FPS // 4 # Re-render the overlay text four times a second
 
 # Animation Phases (States for the animation state machine)
 ANIMATION_PHASE_PRE_BALL="pre_ball";ANIMATION_PHASE_BOWLER_RUNUP="bowler_runup";ANIMATION_PHASE_BOWLER_ACTION="bowler_action"
@@ -45,63 +65,110 @@ ANIMATION_PHASE_SHOWING_OUTCOME="showing_outcome";ANIMATION_PHASE_PAUSED="paused
 class Scoreboard:
     def __init__(self, font, screen_width):
         self.font = font; self.screen_width = screen_width; self.team_a_name = "Team A"; self.team_b_name = "Team B"; self.batting_team_name = ""; self.score = 0; self.wickets = 0; self.overs_done = 0; self.balls_in_current_over = 0; self.max_overs = 3; self.last_ball_outcome_display = "-"; self.target = 0; self.text_color = BLACK; self.bg_color = (220, 220, 220, 200); self.padding = 10; self.line_height = font.get_linesize() + 4; self.y_position = 45
-    # Sets team names and current batting team.
-    def set_teams(self, ta, tb, btf): self.team_a_name=ta; self.team_b_name=tb; self.batting_team_name=btf; self.max_overs=(20//6)+(1 if (20%6)>0 else 0) # Max overs for 20-ball log
-    # Updates scoreboard data based on ball outcome.
-    def update(self, r, w, ts, tw, tbb):
-        self.score=ts; self.wickets=tw;
-        if tbb>=0: self.overs_done=tbb//6; self.balls_in_current_over=tbb%6
-        else: self.overs_done=0; self.balls_in_current_over=0
-        if w: self.last_ball_outcome_display="WICKET!"
-        elif isinstance(r,int): self.last_ball_outcome_display=str(r)
-        elif isinstance(r,str) and r=="wicket": self.last_ball_outcome_display="WICKET!"
-        else: self.last_ball_outcome_display="-"
-    # Renders the scoreboard on the given surface.
-    def draw(self,s):
+        self._rendered_state = None; self._surface = None; self._position = (0, 0) # Cached rendering, redone only when the displayed values change
+    # Sets team names, current batting team and the innings length in overs.
+    def set_teams(self, ta, tb, btf, max_overs): self.team_a_name=ta; self.team_b_name=tb; self.batting_team_name=btf; self.max_overs=max_overs
+    # Shows a timeline keyframe (see MatchTimeline) for the given batting team.
+    def show(self, keyframe, batting_team_name):
+        self.batting_team_name=batting_team_name; self.score=keyframe.score; self.wickets=keyframe.wickets
+        self.overs_done, self.balls_in_current_over = divmod(keyframe.legal_balls, 6)
+        self.last_ball_outcome_display=keyframe.last_ball; self.target=keyframe.target or 0
+    # Renders the scoreboard panel into a cached surface.
+    def _render(self):
         score_txt=f"{self.batting_team_name}: {self.score} / {self.wickets}"; ov_txt=f"Overs: {self.overs_done}.{self.balls_in_current_over} / {self.max_overs}";lb_txt=f"Last Ball: {self.last_ball_outcome_display}";
-        sc_s=self.font.render(score_txt,True,self.text_color);ov_s=self.font.render(ov_txt,True,self.text_color);lb_s=self.font.render(lb_txt,True,self.text_color);
-        max_w=max(sc_s.get_width(),ov_s.get_width(),lb_s.get_width());tot_h=3*self.line_height+2*self.padding;bg_w=max_w+2*self.padding;
-        bg_x=self.screen_width-bg_w-10;bg_y=self.y_position;
-        sb_bg_s=pygame.Surface((bg_w,tot_h),pygame.SRCALPHA);sb_bg_s.fill(self.bg_color);s.blit(sb_bg_s,(bg_x,bg_y));
-        s.blit(sc_s,(bg_x+self.padding,bg_y+self.padding));s.blit(ov_s,(bg_x+self.padding,bg_y+self.padding+self.line_height));s.blit(lb_s,(bg_x+self.padding,bg_y+self.padding+2*self.line_height))
+        lines=[score_txt,ov_txt,lb_txt]+([f"Target: {self.target}"] if self.target else []);surfs=[self.font.render(t,True,self.text_color) for t in lines]
+        max_w=max(sf.get_width() for sf in surfs);tot_h=len(surfs)*self.line_height+2*self.padding;bg_w=max_w+2*self.padding;
+        panel=pygame.Surface((bg_w,tot_h),pygame.SRCALPHA);panel.fill(self.bg_color);
+        for i,sf in enumerate(surfs):panel.blit(sf,(self.padding,self.padding+i*self.line_height))
+        self._surface=panel;self._position=(self.screen_width-bg_w-10,self.y_position)
+    # Draws the scoreboard on the given surface and returns the area it covers.
+    def draw(self,s):
+        state=(self.batting_team_name,self.score,self.wickets,self.overs_done,self.balls_in_current_over,self.max_overs,self.last_ball_outcome_display,self.target)
+        if state!=self._rendered_state:self._rendered_state=state;self._render()
+        return s.blit(self._surface,self._position)
+
+# Scoreboard state at one point of the match (before or after a delivery).
+Keyframe = collections.namedtuple("Keyframe", "innings score wickets legal_balls last_ball target")
+
+# Ball-by-ball timeline of a match (one or two innings) with scoreboard keyframes.
+# The scoreboard state before and after every delivery is worked out once up front, so showing any position is a
+# lookup: seeking, skipping overs and highlights-only playback jump straight to a ball without replaying earlier ones.
+# A delivery is {'token': 0-6 or "wicket", 'runs': added to the total, 'wicket': bool, 'legal': counts towards the over,
+# 'extra_type': None, "wide", ...}, as built by ball_outcomes.animation_balls on the server.
+class MatchTimeline:
+    def __init__(self,innings,max_overs=None):
+        self.balls=[];self.before=[];self.after=[];self.innings_starts=[];self.over_starts=[];self.highlights=[];self.max_overs=1
+        for number,inn in enumerate(innings):
+            score=wickets=legal=0;last_ball="-";target=inn.get("target");self.innings_starts.append(len(self.balls));previous_legal=True
+            for ball in inn.get("balls",[]):
+                index=len(self.balls)
+                if legal%6==0 and previous_legal:self.over_starts.append(index) # First delivery of an over (not a ball re-bowled after a wide)
+                if ball["wicket"] or ball["token"] in(4,6):self.highlights.append(index)
+                self.before.append(Keyframe(number,score,wickets,legal,last_ball,target))
+                score+=ball["runs"];wickets+=1 if ball["wicket"] else 0;legal+=1 if ball["legal"] else 0;previous_legal=ball["legal"]
+                last_ball="WICKET!" if ball["wicket"] else str(ball["runs"])+(f" {ball['extra_type']}" if ball.get("extra_type") else "")
+                self.after.append(Keyframe(number,score,wickets,legal,last_ball,target));self.balls.append(ball)
+            self.max_overs=max(self.max_overs,-(-legal//6))
+        if max_overs:self.max_overs=max_overs
+    # Builds a one-innings timeline from a flat log of tokens (0-6 or "wicket"), as typed or simulated in standalone mode.
+    @classmethod
+    def from_tokens(cls,tokens):return cls([{"balls":[{"token":t,"runs":0 if t=="wicket" else t,"wicket":t=="wicket","legal":True,"extra_type":None} for t in tokens]}])
+    # Builds the timeline from the page's match data: structured "innings" if present, else the flat "log".
+    @classmethod
+    def from_match_data(cls,data):
+        if data.get("innings"):return cls(data["innings"],data.get("max_overs"))
+        return cls.from_tokens(data.get("log") or [])
+    def __len__(self):return len(self.balls)
+    # Scoreboard state once the match is over (or at the start of an empty timeline).
+    def final_keyframe(self):return self.after[-1] if self.after else Keyframe(0,0,0,0,"-",None)
+    # "over.ball" label of a delivery, e.g. "13.4".
+    def ball_label(self,index):legal=self.before[index].legal_balls;return f"{legal//6}.{legal%6+1}"
+    # Index of the next delivery to play after index: the next ball, or the next boundary/wicket in highlights-only mode.
+    def next_index(self,index,highlights_only=False):return self.next_highlight(index+1) if highlights_only else index+1
+    def next_highlight(self,index):i=bisect.bisect_left(self.highlights,index);return self.highlights[i] if i<len(self.highlights) else len(self.balls)
+    # First delivery of the next over, or of the current one when index is past its first ball (previous over otherwise).
+    def next_over(self,index):i=bisect.bisect_right(self.over_starts,index);return self.over_starts[i] if i<len(self.over_starts) else len(self.balls)
+    def previous_over(self,index):i=bisect.bisect_left(self.over_starts,index)-1;return self.over_starts[i] if i>=0 else 0
+    def next_innings(self,index):i=bisect.bisect_right(self.innings_starts,index);return self.innings_starts[i] if i<len(self.innings_starts) else len(self.balls)
+    def previous_innings(self,index):i=bisect.bisect_left(self.innings_starts,index)-1;return self.innings_starts[i] if i>=0 else 0
 
 # Represents a cricket team with a name and color.
 class Team:
     def __init__(self, name, color_tuple): self.name = name; self.color = color_tuple # color_tuple is (R,G,B)
 # Represents the bowler with animation states for run-up and action.
 class Bowler:
-    def __init__(self,c,x,y):self.color=c;self.initial_x=x;self.initial_y=y;self.x=x;self.y=y;self.radius=PLAYER_RADIUS;self.action_total_frames=BOWLER_ACTION_FRAMES;self.action_current_frame=0;self.runup_total_frames=BOWLER_RUNUP_FRAMES;self.runup_current_frame=0;self.start_runup_y=self.y-BOWLER_START_RUNUP_OFFSET;self.bowling_crease_y=self.y;self.arm_angle=0;self.is_releasing_ball=False
+    def __init__(self,c,x,y):self.color=c;self.initial_x=x;self.initial_y=y;self.x=x;self.y=y;self.radius=PLAYER_RADIUS;self.action_total_frames=BOWLER_ACTION_STEPS;self.action_current_frame=0;self.runup_total_frames=BOWLER_RUNUP_STEPS;self.runup_current_frame=0;self.start_runup_y=self.y-BOWLER_START_RUNUP_OFFSET;self.bowling_crease_y=self.y;self.arm_angle=0;self.is_releasing_ball=False
     # Resets bowler to start of run-up position and animation state.
     def reset_state(self,bcy):self.x=self.initial_x;self.bowling_crease_y=bcy;self.start_runup_y=self.bowling_crease_y-BOWLER_START_RUNUP_OFFSET;self.y=self.start_runup_y;self.runup_current_frame=0;self.action_current_frame=0;self.arm_angle=0;self.is_releasing_ball=False
-    # Draws the bowler and their animated arm.
-    def draw(self,s):pygame.draw.circle(s,self.color,(int(self.x),int(self.y)),self.radius);pygame.draw.circle(s,BLACK,(int(self.x),int(self.y)),self.radius,1);al=self.radius*1.5;ax=self.x+al*math.cos(math.radians(self.arm_angle));ay=self.y-al*math.sin(math.radians(self.arm_angle));pygame.draw.line(s,BLACK,(int(self.x),int(self.y)),(int(ax),int(ay)),4)
+    # Draws the bowler and their animated arm; returns the area drawn.
+    def draw(self,s):body=pygame.draw.circle(s,self.color,(int(self.x),int(self.y)),self.radius);pygame.draw.circle(s,BLACK,(int(self.x),int(self.y)),self.radius,1);al=self.radius*1.5;ax=self.x+al*math.cos(math.radians(self.arm_angle));ay=self.y-al*math.sin(math.radians(self.arm_angle));return body.union(pygame.draw.line(s,BLACK,(int(self.x),int(self.y)),(int(ax),int(ay)),4))
     # Updates bowler's position during run-up. Returns False when run-up is complete.
     def update_runup(self):
         if self.runup_current_frame<self.runup_total_frames:self.runup_current_frame+=1;p=self.runup_current_frame/self.runup_total_frames;self.y=self.start_runup_y+(self.bowling_crease_y-self.start_runup_y)*p;return True
         self.y=self.bowling_crease_y;return False
     # Updates bowler's arm animation during bowling action. Sets is_releasing_ball flag. Returns False when action is complete.
     def update_action(self):
-        if self.action_current_frame<self.action_total_frames:self.action_current_frame+=1;pd=self.action_total_frames//5;cp=self.action_current_frame//pd # 5 conceptual poses
+        if self.action_current_frame>=self.action_total_frames:self.is_releasing_ball=False;return False
+        self.action_current_frame+=1;pd=self.action_total_frames//5;cp=self.action_current_frame//pd # 5 conceptual poses
         if cp==0:self.arm_angle=45 # Arm back
         elif cp==1:self.arm_angle=90 # Arm high
         elif cp==2:self.arm_angle=135;self.is_releasing_ball=True # Release point
         elif cp==3:self.arm_angle=180;self.is_releasing_ball=False # Follow through
         elif cp>=4:self.arm_angle=225 # Action complete
         return True
-        self.is_releasing_ball=False;return False # Should be outside if block if logic is frame-based
 # Represents the batsman with animation states for shots.
 class Batsman:
-    def __init__(self,c,x,y):self.color=c;self.x=x;self.y=y;self.radius=PLAYER_RADIUS;self.bat_width_orig=8;self.bat_height_orig=40;self.bat_color=(139,69,19);self.bat_rect=pygame.Rect(0,0,0,0);self.bat_angle=0;self.bat_draw_x_offset=self.radius;self.action_frames_total=BATSMAN_ACTION_TOTAL_FRAMES;self.action_current_frame=0;self.current_action="idle"
-    # Draws the batsman and their animated bat.
+    def __init__(self,c,x,y):self.color=c;self.x=x;self.y=y;self.radius=PLAYER_RADIUS;self.bat_width_orig=8;self.bat_height_orig=40;self.bat_color=(139,69,19);self.bat_rect=pygame.Rect(0,0,0,0);self.bat_angle=0;self.bat_draw_x_offset=self.radius;self.action_frames_total=BATSMAN_ACTION_TOTAL_STEPS;self.action_current_frame=0;self.current_action="idle"
+    # Draws the batsman and their animated bat; returns the area drawn.
     def draw(self,s):
-        pygame.draw.circle(s,self.color,(self.x,self.y),self.radius)
+        body=pygame.draw.circle(s,self.color,(self.x,self.y),self.radius)
         pygame.draw.circle(s,BLACK,(self.x,self.y),self.radius,1)
         bp_x=self.x+self.bat_draw_x_offset
         bp_y=self.y
         pts=[(-self.bat_width_orig/2,-self.bat_height_orig/2),(self.bat_width_orig/2,-self.bat_height_orig/2),(self.bat_width_orig/2,self.bat_height_orig/2),(-self.bat_width_orig/2,self.bat_height_orig/2)]
         rp=[]
         for px,py in pts:rx=px*math.cos(math.radians(self.bat_angle))-py*math.sin(math.radians(self.bat_angle));ry=px*math.sin(math.radians(self.bat_angle))+py*math.cos(math.radians(self.bat_angle));rp.append((bp_x+rx,bp_y+ry))
-        pygame.draw.polygon(s,self.bat_color,rp)
+        return body.union(pygame.draw.polygon(s,self.bat_color,rp))
     # Initiates a batsman action based on the ball outcome.
     def start_action(self,outcome):
         self.action_current_frame=0
@@ -135,13 +202,14 @@ class Ball:
     def __init__(self,x,y):
         self.initial_x=x;self.initial_y=y;self.x=x;self.y=y;self.radius=BALL_RADIUS;self.color=RED;self.visible=True
         self.start_x,self.start_y=0,0;self.target_x,self.target_y=0,0;self.pitch_bounce_y_coord=0;self.vel_x,self.vel_y=0,0
-        self.gravity=BALL_GRAVITY;self.bounce_factor=BALL_BOUNCE_FACTOR;self.total_travel_frames=BALL_TRAVEL_TOTAL_FRAMES
+        self.gravity=BALL_GRAVITY;self.bounce_factor=BALL_BOUNCE_FACTOR;self.total_travel_frames=BALL_TRAVEL_TOTAL_STEPS
         self.current_travel_frame=0;self.has_bounced=False
         # Shadow attributes
         self.shadow_color = (50, 50, 50, 100); self.shadow_max_size_factor = 1.5; self.shadow_min_size_factor = 0.8; self.shadow_max_dist_for_full_size = PITCH_LENGTH / 3
-    # Draws the ball and its shadow.
+    # Draws the ball and its shadow; returns the area drawn (None if the ball is hidden).
     def draw(self, surface):
         if self.visible:
+            drawn = None
             # Shadow drawing logic
             shadow_plane_y = STUMPS_LINE_Y_BATSMAN - 5 # Y-coordinate on pitch where shadow is cast
             is_ball_within_pitch_height_for_shadow = self.y < shadow_plane_y + 20 # Only draw shadow if ball is somewhat above pitch
@@ -158,10 +226,12 @@ class Ball:
                 try:
                     shadow_surface = pygame.Surface(shadow_rect_dims, pygame.SRCALPHA) # Use SRCALPHA for transparency
                     pygame.draw.ellipse(shadow_surface, final_shadow_color, (0,0, shadow_rect_dims[0], shadow_rect_dims[1]))
-                    surface.blit(shadow_surface, shadow_rect_pos)
+                    drawn = surface.blit(shadow_surface, shadow_rect_pos)
                 except pygame.error: pass # Ignore errors if shadow dimensions are too small
             # Draw the ball itself
-            pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.radius)
+            ball_rect = pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.radius)
+            return ball_rect.union(drawn) if drawn else ball_rect
+        return None
     # Initializes ball's trajectory towards the batsman.
     def start_travel(self,sp,tp,pby):
         self.x, self.y = sp
@@ -196,9 +266,9 @@ class Ball:
 
 # Represents a fielder with basic movement logic.
 class Fielder:
-    def __init__(self,c,x,y):self.color=c;self.x=x;self.y=y;self.radius=FIELDER_RADIUS;self.original_x,self.original_y=x,y;self.target_x,self.target_y=x,y;self.is_moving=False;self.speed=FIELDER_SPEED;self.action_frames=0;self.max_action_frames=FIELDER_MAX_MOVE_FRAMES
-    # Draws the fielder.
-    def draw(self,s):pygame.draw.circle(s,self.color,(int(self.x),int(self.y)),self.radius);pygame.draw.circle(s,BLACK,(int(self.x),int(self.y)),self.radius,1)
+    def __init__(self,c,x,y):self.color=c;self.x=x;self.y=y;self.radius=FIELDER_RADIUS;self.original_x,self.original_y=x,y;self.target_x,self.target_y=x,y;self.is_moving=False;self.speed=FIELDER_SPEED;self.action_frames=0;self.max_action_frames=FIELDER_MAX_MOVE_STEPS
+    # Draws the fielder; returns the area drawn.
+    def draw(self,s):drawn=pygame.draw.circle(s,self.color,(int(self.x),int(self.y)),self.radius);pygame.draw.circle(s,BLACK,(int(self.x),int(self.y)),self.radius,1);return drawn
     # Starts fielder's movement towards a target.
     def start_move(self,tx,ty):self.target_x=tx;self.target_y=ty;self.is_moving=True;self.action_frames=0
     # Updates fielder's position during movement. Returns False when movement is complete.
@@ -212,69 +282,175 @@ class Fielder:
     # Resets fielder to their original position.
     def reset_position(self):self.x,self.y=self.original_x,self.original_y;self.target_x,self.target_y=self.original_x,self.original_y;self.is_moving=False;self.action_frames=0
 # Represents the crowd with reaction animations.
+# Fans are drawn once into vertical sprite strips (CROWD_STRIP_WIDTH wide); a reaction waves whole strips
+# by blitting them at an offset, so a frame costs one blit per strip instead of one ellipse per fan.
 class Crowd:
-    def __init__(self, area_rect, num_fans_approx=150):self.area_rect=area_rect;self.fans=[];self.current_reaction_level=0;self.reaction_duration_frames=FPS*2;self.reaction_timer=0;self.wave_time=0
-        # Initialize individual fans with properties for animation
-        for _ in range(num_fans_approx):fan_w=random.randint(6,12);fan_h=random.randint(12,20);fan_x=random.randint(self.area_rect.left,self.area_rect.right-fan_w);y_b=random.choices([0.5,0.6,0.7,0.8,0.9,1.0],weights=[2,3,4,5,4,2],k=1)[0];fan_y_o=self.area_rect.top+self.area_rect.height*y_b-fan_h;self.fans.append({'rect':pygame.Rect(fan_x,fan_y_o,fan_w,fan_h),'y_orig':fan_y_o,'y_offset':0,'color':random.choice(CROWD_FAN_COLORS),'anim_speed_factor':random.uniform(0.8,1.2),'anim_amplitude_base':random.uniform(1,3)})
+    def __init__(self, area_rect, num_fans_approx=150):
+        self.area_rect=area_rect;self.current_reaction_level=0;self.reaction_duration_frames=CROWD_REACTION_STEPS;self.reaction_timer=0;self.wave_time=0
+        self.needs_redraw=False;self._was_animating=False # Whether the strips moved since the crowd was last drawn at rest
+        self.dirty_rect=area_rect.inflate(0,2*CROWD_MAX_WAVE_OFFSET).clip(pygame.Rect(0,0,SCREEN_WIDTH,SCREEN_HEIGHT)) # Area a waving crowd can cover
+        # Place individual fans, then pre-render them into strips
+        fans=[]
+        for _ in range(num_fans_approx):fan_w=random.randint(6,12);fan_h=random.randint(12,20);fan_x=random.randint(self.area_rect.left,self.area_rect.right-fan_w);y_b=random.choices([0.5,0.6,0.7,0.8,0.9,1.0],weights=[2,3,4,5,4,2],k=1)[0];fan_y_o=self.area_rect.top+self.area_rect.height*y_b-fan_h;fans.append((pygame.Rect(fan_x,fan_y_o,fan_w,fan_h),random.choice(CROWD_FAN_COLORS)))
+        self.strips=self._build_strips(fans)
+        self._blit_sequence=[(strip['surface'],(strip['x'],self.area_rect.top)) for strip in self.strips] # Strips at rest
+    # Groups fans by x position into strips and draws each strip's fans onto its own transparent surface.
+    def _build_strips(self,fans):
+        by_strip={}
+        for rect,color in fans:by_strip.setdefault(rect.left//CROWD_STRIP_WIDTH,[]).append((rect,color))
+        strips=[]
+        for index,members in sorted(by_strip.items()):
+            x=index*CROWD_STRIP_WIDTH;width=max(rect.right for rect,_ in members)-x
+            surface=pygame.Surface((width,int(self.area_rect.height)),pygame.SRCALPHA)
+            for rect,color in members:pygame.draw.ellipse(surface,color,rect.move(-x,-self.area_rect.top))
+            strips.append({'surface':surface.convert_alpha(),'x':x,'anim_speed_factor':random.uniform(0.8,1.2),'anim_amplitude_base':random.uniform(1,3)})
+        return strips
     # Sets the crowd's reaction level based on the ball outcome.
-    def set_reaction(self,outcome):new_reaction_level=0
+    def set_reaction(self,outcome):
+        new_reaction_level=0
         if isinstance(outcome,str)and outcome=="wicket":new_reaction_level=2 # High excitement for wicket
         elif isinstance(outcome,int): # Numerical outcomes (runs)
             if outcome==6 or outcome==4:new_reaction_level=2 # High excitement for boundaries
             elif outcome>=1:new_reaction_level=1 # Mild excitement for other scores
             else:new_reaction_level=0 # Idle for 0 runs
         if new_reaction_level>self.current_reaction_level:self.current_reaction_level=new_reaction_level;self.reaction_timer=self.reaction_duration_frames # Escalate excitement
-        elif new_reaction_level==0 and self.current_reaction_level!=0:self.reaction_timer=FPS//3 # Briefly show no reaction then idle
+        elif new_reaction_level==0 and self.current_reaction_level!=0:self.reaction_timer=CROWD_SETTLE_STEPS # Briefly show no reaction then idle
         elif self.current_reaction_level==0 and new_reaction_level==0:self.reaction_timer=0 # Stay idle
-    # Updates fan animations based on current reaction level.
-    def update(self):self.wave_time+=0.15 # General timer for sine wave
+    # Updates strip offsets based on current reaction level. Returns True if the crowd has to be redrawn.
+    def update(self):
+        self.wave_time+=9.0/SIM_HZ # General timer for sine wave (9 radians per second)
         if self.reaction_timer>0:self.reaction_timer-=1
         if self.reaction_timer==0:self.current_reaction_level=0 # Return to idle after timer
-        for fan in self.fans:amplitude=0;eff_speed=fan['anim_speed_factor']
-        if self.current_reaction_level==1:amplitude=fan['anim_amplitude_base']*1.5;eff_speed*=1.2 # Mild wave
-        elif self.current_reaction_level==2:amplitude=fan['anim_amplitude_base']*2.5;eff_speed*=1.5 # Excited wave
-        if amplitude>0:fan['y_offset']=math.sin(self.wave_time*eff_speed+fan['rect'].x*0.05)*amplitude # Sin wave for y-offset
-        else:fan['y_offset']=0 # Idle
-    # Draws the crowd fans.
-    def draw(self,s):
-        for fan in self.fans:final_y=fan['y_orig']+fan['y_offset'];pygame.draw.ellipse(s,fan['color'],pygame.Rect(fan['rect'].left,final_y,fan['rect'].width,fan['rect'].height))
+        animating=self.current_reaction_level>0
+        self.needs_redraw=animating or self._was_animating;self._was_animating=animating # One more redraw puts the strips back at rest
+        if not self.needs_redraw:return False
+        top=self.area_rect.top
+        if animating:
+            amplitude_factor,speed_factor=CROWD_REACTION_WAVES[self.current_reaction_level]
+            for i,strip in enumerate(self.strips):offset=math.sin(self.wave_time*strip['anim_speed_factor']*speed_factor+strip['x']*0.05)*strip['anim_amplitude_base']*amplitude_factor;self._blit_sequence[i]=(strip['surface'],(strip['x'],top+offset)) # Sin wave for y-offset
+        else:self._blit_sequence=[(strip['surface'],(strip['x'],top)) for strip in self.strips] # Idle
+        return True
+    # Draws the crowd strips and returns the area they can cover.
+    def draw(self,s):s.blits(self._blit_sequence,False);return self.dirty_rect
+
+# Layered renderer for the animation screen.
+# The ground, pitch, creases, bowler's stumps and the crowd at rest are drawn once into a background surface.
+# Each frame restores only the areas drawn over in the previous frame from it, redraws the crowd if it is
+# waving, draws the moving actors and overlays on top and pushes just those areas to the display.
+class SceneRenderer:
+    def __init__(self,screen,draw_static_scene,crowd):
+        self.screen=screen;self.crowd=crowd;self.background=pygame.Surface(screen.get_size()).convert();self.background.fill(SKY_BLUE)
+        draw_static_scene(self.background)
+        if crowd:crowd.draw(self.background) # Fans at rest are part of the background
+        self.previous_rects=[];self.needs_full_redraw=True;self.always_full_redraw=False;self.updated_share=1.0
+    # Forces the next frame to redraw the whole screen (e.g. after a menu screen was shown).
+    def invalidate(self):self.needs_full_redraw=True
+    # Restores the background under last frame's drawing and redraws the crowd if needed. Returns True for a full redraw.
+    def begin_frame(self):
+        self._full=self.needs_full_redraw or self.always_full_redraw;self._crowd_rect=None
+        if self._full:self.screen.blit(self.background,(0,0))
+        else:
+            for rect in self.previous_rects:self.screen.blit(self.background,rect,rect)
+        if self.crowd and (self.crowd.needs_redraw or self._full):
+            if not self._full:self.screen.blit(self.background,self.crowd.dirty_rect,self.crowd.dirty_rect)
+            self._crowd_rect=self.crowd.draw(self.screen)
+        return self._full
+    # Pushes the areas drawn this frame (rects returned by the draw calls; None entries are skipped) to the display.
+    def end_frame(self,rects):
+        rects=[rect for rect in rects if rect]
+        if self._full:pygame.display.flip();self.updated_share=1.0
+        else:
+            updated=self.previous_rects+rects+([self._crowd_rect] if self._crowd_rect else [])
+            pygame.display.update(updated);self.updated_share=min(1.0,sum(rect.width*rect.height for rect in updated)/(SCREEN_WIDTH*SCREEN_HEIGHT))
+        self.previous_rects=rects;self.needs_full_redraw=False
+
+# Rolling frame statistics for the FPS/frame-time overlay (toggle with F; D switches between dirty-rect and full redraws).
+class FrameStats:
+    def __init__(self,font,window=FPS):self.font=font;self.visible=SHOW_FRAME_STATS;self.frame_ms=collections.deque(maxlen=window);self.updated_share=collections.deque(maxlen=window);self._surface=None;self._frames_until_refresh=0
+    # Records one frame: time spent updating and drawing it (without waiting for the next tick) and share of the screen updated.
+    def record(self,frame_ms,updated_share):self.frame_ms.append(frame_ms);self.updated_share.append(updated_share)
+    # Draws the overlay in the bottom-left corner; returns the area drawn (None while hidden).
+    def draw(self,s,fps,full_redraw,animation_clock):
+        if not self.visible or not self.frame_ms:return None
+        self._frames_until_refresh-=1
+        if self._surface is None or self._frames_until_refresh<=0:
+            mode="full redraw" if full_redraw else "dirty rects"
+            speed="paused" if animation_clock.paused else f"x{animation_clock.speed:g}"
+            text=f"{fps:.0f} FPS | frame {statistics.fmean(self.frame_ms):.1f} ms avg, {max(self.frame_ms):.1f} ms max | {statistics.fmean(self.updated_share):.0%} of screen updated ({mode}) | {speed}, {animation_clock.skipped_frames} frames skipped"
+            self._surface=self.font.render(text,True,WHITE,BLACK);self._frames_until_refresh=FRAME_STATS_REFRESH_FRAMES
+        return s.blit(self._surface,(10,TIMELINE_BAR_RECT.top-self._surface.get_height()-5))
+
+# Fixed-timestep animation clock.
+# Real time since the last drawn frame, scaled by the playback speed, is banked and paid out in whole simulation steps
+# of 1/SIM_HZ s, so the animation keeps the same pace however fast frames are drawn: a slow client runs several steps
+# per drawn frame (skipping the frames in between), a fast one draws nothing new until a step is due.
+class AnimationClock:
+    def __init__(self,step=1.0/SIM_HZ,now=time.perf_counter):self.step=step;self._now=now;self.speed=1.0;self.paused=False;self._last=None;self._banked=0.0;self.skipped_frames=0;self.dropped_seconds=0.0
+    # Forgets the time since the last frame (e.g. after the menu screens) so the animation does not jump ahead.
+    def reset(self):self._last=None;self._banked=0.0
+    # Sets the playback speed multiplier, clamped to the supported range.
+    def set_speed(self,speed):self.speed=min(MAX_PLAYBACK_SPEED,max(MIN_PLAYBACK_SPEED,speed))
+    # Returns how many simulation steps are due for this frame (0 if none is due yet or while paused).
+    def advance(self):
+        now=self._now();elapsed=0.0 if self._last is None else now-self._last;self._last=now
+        if elapsed>MAX_FRAME_TIME:self.dropped_seconds+=elapsed-MAX_FRAME_TIME;elapsed=MAX_FRAME_TIME # Do not replay a stall in one burst
+        if self.paused:return 0
+        self._banked+=elapsed*self.speed;steps=int(self._banked/self.step);self._banked-=steps*self.step
+        if steps>1:self.skipped_frames+=steps-1 # Steps run without a frame of their own
+        return steps
+    # Real seconds until the next simulation step is due.
+    def time_until_next_step(self):
+        if self.paused:return 1.0/FPS # Still poll events while paused
+        return max(0.0,(self.step-self._banked)/self.speed)
 
 # Main game class, manages game state, elements, and animation flow.
 class CricketGame:
-    def __init__(self):
+    # match_data: the page's match data (see app.setup_animation), e.g. for headless rendering; in Pyodide it is read from the page.
+    def __init__(self, match_data=None):
         pygame.init(); pygame.font.init() # Initialize Pygame and font module
         # Setup screen and fonts
         self.font = pygame.font.Font(None, 30); self.medium_font = pygame.font.Font(None, 50); self.large_font = pygame.font.Font(None, 74)
         self.screen=pygame.display.set_mode((SCREEN_WIDTH,SCREEN_HEIGHT));pygame.display.set_caption("Cricket Match Animation");self.clock=pygame.time.Clock();
         # Initialize game components
-        self.scoreboard = Scoreboard(self.font, SCREEN_WIDTH); self.current_score = 0; self.current_wickets = 0; self.total_balls_bowled_innings = 0
-        self.game_state="menu";self.team_a=None;self.team_b=None;self.ball_log=[];self.bowler=None;self.batsman=None;self.ball=None;self.fielders=[];self.current_ball_index=0;self.animation_phase=ANIMATION_PHASE_PRE_BALL;self.inter_ball_pause_timer=0;self.inter_ball_pause_duration=FPS*2;self.current_outcome_display="";self.batsman_stumps_hit=False
+        self.scoreboard = Scoreboard(self.font, SCREEN_WIDTH); self.match_data=None; self.timeline=None; self.highlights_only=False # Timeline of the match being played
+        self.game_state="menu";self.team_a=None;self.team_b=None;self.ball_log=[];self.bowler=None;self.batsman=None;self.ball=None;self.fielders=[];self.current_ball_index=0;self.animation_phase=ANIMATION_PHASE_PRE_BALL;self.inter_ball_pause_timer=0;self.inter_ball_pause_duration=INTER_BALL_PAUSE_STEPS;self.current_outcome_display="";self.batsman_stumps_hit=False
         self.fielding_phase_timer=0;self.crowd=Crowd(pygame.Rect(0,0,SCREEN_WIDTH,CROWD_AREA_HEIGHT))
 
-        # Load data if running in Pyodide and data is provided by Flask
+        # Load data if given, or if running in Pyodide and data is provided by Flask
         external_data_loaded=False
-        if platform.system()=="Emscripten":
+        if match_data is not None or platform.system()=="Emscripten":
             try:
-                match_data_js=js.globals.get('match_data_for_animation')
-                if match_data_js:
-                    match_data_py=match_data_js.to_py()
+                match_data_js=None if match_data is not None else js.globals.get('match_data_for_animation')
+                if match_data is not None or match_data_js:
+                    match_data_py=match_data if match_data is not None else match_data_js.to_py()
                     def hex_to_rgb(h):h=h.lstrip('#');return tuple(int(h[i:i+2],16)for i in(0,2,4))if len(h)==6 else(0,0,255) # Helper for color conversion
                     self.team_a=Team(match_data_py.get("team_a_name","Team A"),hex_to_rgb(match_data_py.get("team_a_color_hex","#0000FF")))
                     self.team_b=Team(match_data_py.get("team_b_name","Team B"),hex_to_rgb(match_data_py.get("team_b_color_hex","#FF0000")))
-                    self.ball_log=match_data_py.get("log",[])
-                    if not self.ball_log:self.ball_log=[0,1,4,"wicket",6,0,0,2,0,4,0,"wicket",0,1,0,6,0,0,2,0] # Default log if empty
-                    if self.team_a and self.team_b and self.ball_log:
-                        self.scoreboard.set_teams(self.team_a.name, self.team_b.name, self.team_a.name) # Setup scoreboard teams
+                    self.match_data=match_data_py;self.ball_log=match_data_py.get("log",[]);self.highlights_only=bool(match_data_py.get("highlights_only",False))
+                    if not self.ball_log and not match_data_py.get("innings"):self.ball_log=[0,1,4,"wicket",6,0,0,2,0,4,0,"wicket",0,1,0,6,0,0,2,0] # Default log if empty
+                    if self.team_a and self.team_b:
                         self.game_state="animation"; external_data_loaded=True # Go directly to animation
             except Exception: pass # Ignore errors if Pyodide data access fails
 
         self.ui=UI(self) # Initialize UI (buttons, screens)
+        self.renderer=SceneRenderer(self.screen,self.ui.draw_static_scene,self.crowd);self.frame_stats=FrameStats(self.font) # Layered renderer and its overlay
+        self.animation_clock=AnimationClock();self.frame_start=time.perf_counter() # Fixed-timestep clock driving the animation
+        if external_data_loaded:self.animation_clock.set_speed(float(match_data_py.get("playback_speed",1.0))) # Optional speed from the page
+        self.teams_surf=None;self.teams_surf_innings=None # Cached "A(Bat) vs B(Bowl)" text and the innings it was rendered for
+        self.timeline_bar_surf=None # Cached timeline bar (see draw_timeline_bar)
 
         if external_data_loaded: self.initialize_animation_elements() # Setup animation elements if data loaded
 
+    # (batting team, bowling team) of an innings: Team A bats first.
+    def teams_for_innings(self,innings):return (self.team_a,self.team_b) if innings%2==0 else (self.team_b,self.team_a)
+    # Innings of the current delivery (the last innings once the match is over).
+    def current_innings(self):
+        if not self.timeline or not len(self.timeline):return 0
+        return self.timeline.before[min(self.current_ball_index,len(self.timeline)-1)].innings
     # Sets initial positions for players and ball, resets stumps state.
     def set_player_positions(self,init_setup=False):
-        self.batsman_stumps_hit=False;bats_clr = self.team_a.color if self.team_a else YELLOW;bowl_clr = self.team_b.color if self.team_b else BLUE
+        batting,bowling=self.teams_for_innings(self.current_innings())
+        self.batsman_stumps_hit=False;bats_clr = batting.color if batting else YELLOW;bowl_clr = bowling.color if bowling else BLUE
         bcr_y=STUMPS_LINE_Y_BOWLER+20; bx=PITCH_X+PITCH_WIDTH//2
         if not self.bowler:self.bowler=Bowler(bowl_clr,bx,bcr_y)
         self.bowler.reset_state(bcr_y);self.bowler.color=bowl_clr
@@ -283,7 +459,7 @@ class CricketGame:
         else:self.batsman.x,self.batsman.y,self.batsman.color=btsmn_x,btsmn_y,bats_clr; self.batsman.current_action="idle"; self.batsman.bat_angle=0
         if not self.ball:self.ball=Ball(self.bowler.x,self.bowler.y-self.bowler.radius-BALL_RADIUS)
         self.ball.x,self.ball.y=self.bowler.x,self.bowler.y-self.bowler.radius-BALL_RADIUS;self.ball.visible=True;self.ball.current_travel_frame=0; self.ball.has_bounced=False
-        for fielder in self.fielders: fielder.reset_position() # Reset fielders to original positions
+        for fielder in self.fielders: fielder.reset_position(); fielder.color=bowl_clr # Reset fielders to original positions
     # Initializes all elements needed for the animation state (players, fielders, scores).
     def initialize_animation_elements(self):
         self.set_player_positions(init_setup=True);bowl_clr = self.team_b.color if self.team_b else BLUE; self.fielders=[]
@@ -291,15 +467,27 @@ class CricketGame:
         f_pos=[(PITCH_X+PITCH_WIDTH//2,POPPING_CREASE_Y_BOWLER+60),(PITCH_X-100,PITCH_Y_BOWLER_END+150),(PITCH_X+PITCH_WIDTH+100,PITCH_Y_BOWLER_END+150),(PITCH_X-150,PITCH_Y_BATSMAN_END-150),(PITCH_X+PITCH_WIDTH+150,PITCH_Y_BATSMAN_END-150),(SCREEN_WIDTH//2,PITCH_Y_BATSMAN_END+100),(PITCH_X-200,SCREEN_HEIGHT//2+50),(PITCH_X+PITCH_WIDTH+200,SCREEN_HEIGHT//2+50),(SCREEN_WIDTH//2,PITCH_Y_BOWLER_END+PITCH_LENGTH+100)]
         min_yf=int(SCREEN_HEIGHT*0.20)+FIELDER_RADIUS+5;max_yf=SCREEN_HEIGHT-FIELDER_RADIUS-35 # Field boundaries
         for i in range(9):fx,fy=f_pos[i%len(f_pos)];fy=max(min_yf,min(fy,max_yf));fx=max(FIELDER_RADIUS+35,min(fx,SCREEN_WIDTH-FIELDER_RADIUS-35));self.fielders.append(Fielder(bowl_clr,fx,fy))
-        # Reset game progress for animation
-        self.current_ball_index=0;self.animation_phase=ANIMATION_PHASE_PRE_BALL;self.current_outcome_display=""
-        self.current_score = 0; self.current_wickets = 0; self.total_balls_bowled_innings = 0
-        batting_team_name_for_sb = self.team_a.name if self.team_a else "Batting Team"
-        if self.team_a and self.team_b and not self.scoreboard.batting_team_name: self.scoreboard.set_teams(self.team_a.name, self.team_b.name, batting_team_name_for_sb)
-        self.scoreboard.update(0, False, 0, 0, 0) # Initial scoreboard display
+        # Build the match timeline (keyframes for every delivery) and start from the first ball to play
+        self.timeline=MatchTimeline.from_match_data(self.match_data) if self.match_data and self.match_data.get("innings") else MatchTimeline.from_tokens(self.ball_log);self.timeline_bar_surf=None
+        batting_team_name_for_sb = self.team_a.name if self.team_a else "Batting Team"; bowling_team_name_for_sb = self.team_b.name if self.team_b else "Bowling Team"
+        self.scoreboard.set_teams(batting_team_name_for_sb, bowling_team_name_for_sb, batting_team_name_for_sb, self.timeline.max_overs)
+        self.seek(self.timeline.next_highlight(0) if self.highlights_only else 0)
+    # Jumps to a delivery without replaying earlier ones: players are reset and the scoreboard shows the keyframe before it.
+    def seek(self,index):
+        self.current_ball_index=max(0,min(index,len(self.timeline)));self.inter_ball_pause_timer=0
+        if self.current_ball_index<len(self.timeline):self.reset_for_new_ball()
+        else:self.show_match_over()
+    # Shows the final scoreboard once every delivery has been played.
+    def show_match_over(self):
+        keyframe=self.timeline.final_keyframe();batting,_=self.teams_for_innings(keyframe.innings);self.scoreboard.show(keyframe,batting.name if batting else "")
+        self.animation_phase=ANIMATION_PHASE_MATCH_OVER;self.current_outcome_display="Match Over!";self.scoreboard.last_ball_outcome_display="Match Over"
+        if self.crowd: self.crowd.set_reaction("match_over")
     # Resets state for a new ball delivery.
     def reset_for_new_ball(self):
-        self.set_player_positions();outcome=self.ball_log[self.current_ball_index];self.current_outcome_display=f"Ball {self.current_ball_index+1}: {outcome}";self.animation_phase=ANIMATION_PHASE_BOWLER_RUNUP;self.ball.visible = True
+        i=self.current_ball_index;keyframe=self.timeline.before[i];batting,_=self.teams_for_innings(keyframe.innings)
+        self.set_player_positions();self.scoreboard.show(keyframe,batting.name if batting else "") # O(1): no replay of earlier balls
+        innings_label=f"Inn {keyframe.innings+1}, " if len(self.timeline.innings_starts)>1 else ""
+        self.current_outcome_display=f"{innings_label}{self.timeline.ball_label(i)}: {self.timeline.balls[i]['token']}";self.animation_phase=ANIMATION_PHASE_BOWLER_RUNUP;self.ball.visible = True
     # Generates a sample ball-by-ball log for testing if no external log is provided.
     def generate_ball_log(self):
         log=[];chs=VALID_LOG_OUTCOMES;wts=[0.30,0.20,0.10,0.10,0.15,0.10,0.05];
@@ -308,9 +496,30 @@ class CricketGame:
     # Main game loop, handles events, updates game state, and draws elements.
     def run(self):
         prev_st=self.game_state; is_direct_animation_mode = platform.system() == "Emscripten" and js.globals.get('match_data_for_animation') and self.bowler is not None
+        self.frame_start=time.perf_counter()
         # Event handling
         for ev in pygame.event.get():
             if ev.type==pygame.QUIT:return False
+            if ev.type==pygame.KEYDOWN and self.game_state=="animation": # Playback controls and rendering diagnostics
+                if ev.key==pygame.K_f:self.frame_stats.visible=not self.frame_stats.visible
+                elif ev.key==pygame.K_d:self.renderer.always_full_redraw=not self.renderer.always_full_redraw
+                elif ev.key==pygame.K_SPACE:self.animation_clock.paused=not self.animation_clock.paused
+                elif ev.key in(pygame.K_EQUALS,pygame.K_PLUS,pygame.K_KP_PLUS):self.animation_clock.set_speed(self.animation_clock.speed*2)
+                elif ev.key in(pygame.K_MINUS,pygame.K_KP_MINUS):self.animation_clock.set_speed(self.animation_clock.speed/2)
+                elif ev.key==pygame.K_1:self.animation_clock.set_speed(1.0)
+                elif self.timeline and self.bowler: # Timeline navigation
+                    i=self.current_ball_index
+                    if ev.key==pygame.K_RIGHT:self.seek(self.timeline.next_over(i))
+                    elif ev.key==pygame.K_LEFT:self.seek(self.timeline.previous_over(i))
+                    elif ev.key==pygame.K_PAGEDOWN:self.seek(self.timeline.next_innings(i))
+                    elif ev.key==pygame.K_PAGEUP:self.seek(self.timeline.previous_innings(i))
+                    elif ev.key==pygame.K_HOME:self.seek(0)
+                    elif ev.key==pygame.K_h:
+                        self.highlights_only=not self.highlights_only;self.timeline_bar_surf=None
+                        if self.highlights_only and i<len(self.timeline) and i not in self.timeline.highlights:self.seek(self.timeline.next_highlight(i))
+                self.renderer.invalidate() # Redraw even if no step is due (e.g. while paused)
+            if ev.type==pygame.MOUSEBUTTONDOWN and ev.button==1 and self.game_state=="animation" and self.timeline and self.bowler and TIMELINE_BAR_RECT.inflate(0,16).collidepoint(ev.pos):
+                self.seek(int(ev.pos[0]/TIMELINE_BAR_RECT.width*len(self.timeline)));self.renderer.invalidate() # Click on the timeline bar to seek
             if not is_direct_animation_mode : self.ui.handle_event(ev) # Only process UI events if not in direct animation
         # State transition from UI to animation
         if prev_st!="animation" and self.game_state=="animation":
@@ -318,122 +527,157 @@ class CricketGame:
                 if not self.bowler : self.initialize_animation_elements() # Initialize if not already done (e.g., by external data loading)
             elif not is_direct_animation_mode: self.game_state="log_input";self.ui.log_message_surf=self.font.render("Select teams and log first!",True,RED)
 
-        self.screen.fill(SKY_BLUE) # Background
-        if self.game_state == "animation":
-            if self.crowd : self.crowd.update() # Update crowd animations
-
-        # Draw based on game state
-        if self.game_state=="menu":self.ui.draw_initial_screen()
-        elif self.game_state=="team_selection":self.ui.draw_team_selection_screen()
-        elif self.game_state=="log_input":self.ui.draw_log_input_screen()
-        elif self.game_state=="animation":
-            if not self.bowler: self.ui.draw_animation_scene(None, None, [], None, self.crowd, "Error: Match data missing.", False); # Failsafe draw
-            else: # Normal animation drawing and state machine
-                # Check for match completion
-                if self.animation_phase!=ANIMATION_PHASE_MATCH_OVER and self.current_ball_index>=len(self.ball_log):
-                    self.animation_phase=ANIMATION_PHASE_MATCH_OVER;self.current_outcome_display="Match Over!";
-                    self.scoreboard.last_ball_outcome_display = "Match Over";
-                    if self.crowd: self.crowd.set_reaction("match_over")
-
-                # Animation State Machine
-                if self.animation_phase==ANIMATION_PHASE_PRE_BALL:
-                    if self.current_ball_index<len(self.ball_log):self.reset_for_new_ball()
-                    else:self.animation_phase=ANIMATION_PHASE_MATCH_OVER;self.current_outcome_display="Match Over!"; self.scoreboard.last_ball_outcome_display="Match Over"
-                elif self.animation_phase==ANIMATION_PHASE_BOWLER_RUNUP:
-                    if self.bowler.update_runup(): self.ball.x=self.bowler.x; self.ball.y=self.bowler.y-self.bowler.radius-BALL_RADIUS # Ball follows bowler
-                    else: self.animation_phase=ANIMATION_PHASE_BOWLER_ACTION
-                elif self.animation_phase==ANIMATION_PHASE_BOWLER_ACTION:
-                    if self.bowler.update_action(): # Bowler action in progress
-                        if self.bowler.is_releasing_ball: # Moment of ball release
-                            rx=self.bowler.x+self.bowler.radius*math.cos(math.radians(self.bowler.arm_angle));ry=self.bowler.y-self.bowler.radius*math.sin(math.radians(self.bowler.arm_angle));
-                            bt_y=STUMPS_LINE_Y_BATSMAN;bpy=STUMPS_LINE_Y_BATSMAN-PITCH_BOUNCE_POINT_OFFSET;
-                            self.ball.start_travel((rx,ry),(self.batsman.x,bt_y),bpy); self.animation_phase=ANIMATION_PHASE_BALL_TRAVEL
-                        elif not (self.animation_phase == ANIMATION_PHASE_BALL_TRAVEL) :self.ball.x=self.bowler.x;self.ball.y=self.bowler.y-self.bowler.radius-BALL_RADIUS # Ball held until release
-                    else: # Bowler action finished
-                        if self.animation_phase!=ANIMATION_PHASE_BALL_TRAVEL: self.animation_phase=ANIMATION_PHASE_SHOWING_OUTCOME # Skip to outcome if ball not released
-                elif self.animation_phase==ANIMATION_PHASE_BALL_TRAVEL:
-                    if not self.ball.update_trajectory(): # Ball travel finished
-                        current_outcome = self.ball_log[self.current_ball_index]; self.batsman.start_action(current_outcome)
-                        if current_outcome == "wicket": self.batsman_stumps_hit = True; self.ball.x = self.batsman.x; self.ball.y = STUMPS_LINE_Y_BATSMAN + STUMP_HEIGHT/2; self.ball.visible = False
-                        self.animation_phase = ANIMATION_PHASE_BATSMAN_ACTION
-                elif self.animation_phase == ANIMATION_PHASE_BATSMAN_ACTION:
-                    if not self.batsman.update_animation(): # Batsman animation finished
-                        current_outcome = self.ball_log[self.current_ball_index]; self.total_balls_bowled_innings += 1
-                        runs_on_this_ball = 0; is_wicket_this_ball = False
-                        if isinstance(current_outcome, int): self.current_score += current_outcome; runs_on_this_ball = current_outcome
-                        elif current_outcome == "wicket": self.current_wickets += 1; is_wicket_this_ball = True
-                        self.scoreboard.update(runs_on_this_ball, is_wicket_this_ball, self.current_score, self.current_wickets, self.total_balls_bowled_innings)
-                        if self.crowd: self.crowd.set_reaction(current_outcome)
-                        # Trigger fielding for scoring shots (not wickets)
-                        if isinstance(current_outcome, int) and current_outcome >= 0 and not is_wicket_this_ball:
-                            fielders_to_move_indices = random.sample(range(len(self.fielders)), k=min(2, len(self.fielders)))
-                            for i in fielders_to_move_indices: fielder = self.fielders[i]; target_x = fielder.original_x + random.randint(-25, 25); target_y = fielder.original_y + random.randint(-25, 25); target_x = max(FIELDER_RADIUS, min(target_x, SCREEN_WIDTH - FIELDER_RADIUS)); target_y = max(int(SCREEN_HEIGHT*0.20)+FIELDER_RADIUS, min(target_y, SCREEN_HEIGHT - FIELDER_RADIUS - 30)); fielder.start_move(target_x, target_y)
-                            self.fielding_phase_timer = FIELDER_MAX_MOVE_FRAMES; self.animation_phase = ANIMATION_PHASE_FIELDING
-                        else: self.animation_phase = ANIMATION_PHASE_SHOWING_OUTCOME # Wicket or non-fielding outcome
-                elif self.animation_phase == ANIMATION_PHASE_FIELDING: # Fielders moving
-                    still_fielders_moving = False
-                    for fielder in self.fielders:
-                        if fielder.is_moving:
-                            if fielder.update_movement(): still_fielders_moving = True
-                    self.fielding_phase_timer -=1
-                    if not still_fielders_moving or self.fielding_phase_timer <=0: # Fielding animation time up or fielders stopped
-                        for fielder in self.fielders: fielder.reset_position()
-                        self.animation_phase = ANIMATION_PHASE_SHOWING_OUTCOME
-                elif self.animation_phase==ANIMATION_PHASE_SHOWING_OUTCOME: # Brief pause to show outcome (implicitly handled by pause timer next)
-                    self.inter_ball_pause_timer=self.inter_ball_pause_duration;self.animation_phase=ANIMATION_PHASE_PAUSED
-                elif self.animation_phase==ANIMATION_PHASE_PAUSED: # Pause between balls
-                    self.inter_ball_pause_timer-=1
-                    if self.inter_ball_pause_timer<=0:
-                        self.current_ball_index+=1 # Move to next ball
-                        if self.current_ball_index<len(self.ball_log):self.animation_phase=ANIMATION_PHASE_PRE_BALL
-                        else:self.animation_phase=ANIMATION_PHASE_MATCH_OVER;self.current_outcome_display="Match Over!"; self.scoreboard.last_ball_outcome_display="Match Over"; self.crowd.set_reaction("match_over")
+        if self.game_state!="animation": # Menu screens: plain full redraws
+            self.screen.fill(SKY_BLUE)
+            if self.game_state=="menu":self.ui.draw_initial_screen()
+            elif self.game_state=="team_selection":self.ui.draw_team_selection_screen()
+            elif self.game_state=="log_input":self.ui.draw_log_input_screen()
+            pygame.display.flip();self.renderer.invalidate();self.animation_clock.reset();self.clock.tick();return True
 
-                # Draw all animation elements
-                self.ui.draw_animation_scene(self.bowler,self.batsman,self.fielders,self.ball,self.crowd, self.current_outcome_display,self.batsman_stumps_hit)
-                self.scoreboard.draw(self.screen) # Draw scoreboard overlay
-                # Draw team names overlay
-                if self.team_a and self.team_b:teams_surf=self.font.render(f"{self.team_a.name}(Bat) vs {self.team_b.name}(Bowl)",True,BLACK);self.screen.blit(teams_surf,(10,10))
+        steps=self.animation_clock.advance() # Simulation steps due since the last frame
+        for _ in range(steps):self.step()
+        if not steps and not self.renderer.needs_full_redraw:return True # Nothing moved since the last frame: skip drawing
+        self.draw_frame();self.frame_stats.record((time.perf_counter()-self.frame_start)*1000,self.renderer.updated_share)
+        self.clock.tick();return True # Measures the drawing rate only; main() does the waiting
+    # Draws the animation screen: restores what changed from the background layer, then actors and overlays on top.
+    def draw_frame(self):
+        self.renderer.begin_frame()
+        if not self.bowler: rects = self.ui.draw_animation_scene(None, None, [], None, "Error: Match data missing.", False) # Failsafe draw
+        else:
+            rects = self.ui.draw_animation_scene(self.bowler,self.batsman,self.fielders,self.ball,self.current_outcome_display,self.batsman_stumps_hit)
+            rects.append(self.scoreboard.draw(self.screen)) # Draw scoreboard overlay
+            # Draw team names overlay
+            if self.team_a and self.team_b:
+                innings=self.current_innings()
+                if self.teams_surf_innings!=innings:batting,bowling=self.teams_for_innings(innings);self.teams_surf=self.font.render(f"{batting.name}(Bat) vs {bowling.name}(Bowl)",True,BLACK);self.teams_surf_innings=innings
+                rects.append(self.screen.blit(self.teams_surf,(10,10)))
+            rects.append(self.draw_timeline_bar()) # Match progress; click to seek
+        rects.append(self.frame_stats.draw(self.screen,self.clock.get_fps(),self.renderer.always_full_redraw,self.animation_clock))
+        self.renderer.end_frame(rects)
+    # Headless rendering: plays deliveries [start, end) at a fixed output frame rate, independent of real time, and calls
+    # on_frame(screen, frame_number) after drawing each frame. Returns the number of frames rendered.
+    def render_deliveries(self,start,end,fps,on_frame):
+        self.seek(self.timeline.next_highlight(start) if self.highlights_only else start);end=min(end,len(self.timeline))
+        steps_per_frame=SIM_HZ/fps;banked=0.0;frames=0
+        while self.current_ball_index<end and self.animation_phase!=ANIMATION_PHASE_MATCH_OVER:
+            banked+=steps_per_frame;steps=int(banked);banked-=steps
+            for _ in range(steps):self.step()
+            if self.current_ball_index>=end:break # The segment's last delivery (and its pause) is done
+            self.draw_frame();on_frame(self.screen,frames);frames+=1
+        return frames
+    # Advances the animation by one fixed simulation step.
+    def step(self):
+        if self.crowd : self.crowd.update() # Update crowd animations
+        if self.bowler: # Animation state machine
+            # Check for match completion
+            if self.animation_phase!=ANIMATION_PHASE_MATCH_OVER and self.current_ball_index>=len(self.timeline):self.show_match_over()
 
-        # Draw other UI states if not in animation (menu, team select, log input)
-        elif self.game_state=="menu":self.ui.draw_initial_screen()
-        elif self.game_state=="team_selection":self.ui.draw_team_selection_screen()
-        elif self.game_state=="log_input":self.ui.draw_log_input_screen()
-
-        pygame.display.flip();self.clock.tick(FPS);return True
+            # Animation State Machine
+            if self.animation_phase==ANIMATION_PHASE_PRE_BALL:
+                if self.current_ball_index<len(self.timeline):self.reset_for_new_ball()
+                else:self.show_match_over()
+            elif self.animation_phase==ANIMATION_PHASE_BOWLER_RUNUP:
+                if self.bowler.update_runup(): self.ball.x=self.bowler.x; self.ball.y=self.bowler.y-self.bowler.radius-BALL_RADIUS # Ball follows bowler
+                else: self.animation_phase=ANIMATION_PHASE_BOWLER_ACTION
+            elif self.animation_phase==ANIMATION_PHASE_BOWLER_ACTION:
+                if self.bowler.update_action(): # Bowler action in progress
+                    if self.bowler.is_releasing_ball: # Moment of ball release
+                        rx=self.bowler.x+self.bowler.radius*math.cos(math.radians(self.bowler.arm_angle));ry=self.bowler.y-self.bowler.radius*math.sin(math.radians(self.bowler.arm_angle));
+                        bt_y=STUMPS_LINE_Y_BATSMAN;bpy=STUMPS_LINE_Y_BATSMAN-PITCH_BOUNCE_POINT_OFFSET;
+                        self.ball.start_travel((rx,ry),(self.batsman.x,bt_y),bpy); self.animation_phase=ANIMATION_PHASE_BALL_TRAVEL
+                    elif not (self.animation_phase == ANIMATION_PHASE_BALL_TRAVEL) :self.ball.x=self.bowler.x;self.ball.y=self.bowler.y-self.bowler.radius-BALL_RADIUS # Ball held until release
+                else: # Bowler action finished
+                    if self.animation_phase!=ANIMATION_PHASE_BALL_TRAVEL: self.animation_phase=ANIMATION_PHASE_SHOWING_OUTCOME # Skip to outcome if ball not released
+            elif self.animation_phase==ANIMATION_PHASE_BALL_TRAVEL:
+                if not self.ball.update_trajectory(): # Ball travel finished
+                    current_outcome = self.timeline.balls[self.current_ball_index]['token']; self.batsman.start_action(current_outcome)
+                    if current_outcome == "wicket": self.batsman_stumps_hit = True; self.ball.x = self.batsman.x; self.ball.y = STUMPS_LINE_Y_BATSMAN + STUMP_HEIGHT/2; self.ball.visible = False
+                    self.animation_phase = ANIMATION_PHASE_BATSMAN_ACTION
+            elif self.animation_phase == ANIMATION_PHASE_BATSMAN_ACTION:
+                if not self.batsman.update_animation(): # Batsman animation finished
+                    ball = self.timeline.balls[self.current_ball_index]; current_outcome = ball['token']; is_wicket_this_ball = ball['wicket']
+                    keyframe = self.timeline.after[self.current_ball_index]; batting, _ = self.teams_for_innings(keyframe.innings)
+                    self.scoreboard.show(keyframe, batting.name if batting else "") # Precomputed state after this ball
+                    if self.crowd: self.crowd.set_reaction(current_outcome)
+                    # Trigger fielding for scoring shots (not wickets)
+                    if isinstance(current_outcome, int) and current_outcome >= 0 and not is_wicket_this_ball:
+                        fielders_to_move_indices = random.sample(range(len(self.fielders)), k=min(2, len(self.fielders)))
+                        for i in fielders_to_move_indices: fielder = self.fielders[i]; target_x = fielder.original_x + random.randint(-25, 25); target_y = fielder.original_y + random.randint(-25, 25); target_x = max(FIELDER_RADIUS, min(target_x, SCREEN_WIDTH - FIELDER_RADIUS)); target_y = max(int(SCREEN_HEIGHT*0.20)+FIELDER_RADIUS, min(target_y, SCREEN_HEIGHT - FIELDER_RADIUS - 30)); fielder.start_move(target_x, target_y)
+                        self.fielding_phase_timer = FIELDER_MAX_MOVE_STEPS; self.animation_phase = ANIMATION_PHASE_FIELDING
+                    else: self.animation_phase = ANIMATION_PHASE_SHOWING_OUTCOME # Wicket or non-fielding outcome
+            elif self.animation_phase == ANIMATION_PHASE_FIELDING: # Fielders moving
+                still_fielders_moving = False
+                for fielder in self.fielders:
+                    if fielder.is_moving:
+                        if fielder.update_movement(): still_fielders_moving = True
+                self.fielding_phase_timer -=1
+                if not still_fielders_moving or self.fielding_phase_timer <=0: # Fielding animation time up or fielders stopped
+                    for fielder in self.fielders: fielder.reset_position()
+                    self.animation_phase = ANIMATION_PHASE_SHOWING_OUTCOME
+            elif self.animation_phase==ANIMATION_PHASE_SHOWING_OUTCOME: # Brief pause to show outcome (implicitly handled by pause timer next)
+                self.inter_ball_pause_timer=self.inter_ball_pause_duration;self.animation_phase=ANIMATION_PHASE_PAUSED
+            elif self.animation_phase==ANIMATION_PHASE_PAUSED: # Pause between balls
+                self.inter_ball_pause_timer-=1
+                if self.inter_ball_pause_timer<=0:
+                    self.current_ball_index=self.timeline.next_index(self.current_ball_index,self.highlights_only) # Move to next ball (or highlight)
+                    if self.current_ball_index<len(self.timeline):self.animation_phase=ANIMATION_PHASE_PRE_BALL
+                    else:self.show_match_over()
+    # Draws the timeline bar along the bottom edge: innings breaks, boundaries and wickets, and the current delivery.
+    def draw_timeline_bar(self):
+        n=max(1,len(self.timeline));w=TIMELINE_BAR_RECT.width;h=TIMELINE_BAR_RECT.height
+        if self.timeline_bar_surf is None: # Static part, drawn once per timeline (and highlights mode)
+            bar=pygame.Surface(TIMELINE_BAR_RECT.size);bar.fill(DARK_GREY if not self.highlights_only else (70,70,110))
+            for i in self.timeline.highlights:pygame.draw.line(bar,RED if self.timeline.balls[i]['wicket'] else WHITE,(i*w//n,0),(i*w//n,h))
+            for i in self.timeline.innings_starts[1:]:pygame.draw.line(bar,BLACK,(i*w//n,0),(i*w//n,h),3)
+            self.timeline_bar_surf=bar
+        drawn=self.screen.blit(self.timeline_bar_surf,TIMELINE_BAR_RECT)
+        return drawn.union(self.screen.fill(YELLOW,(TIMELINE_BAR_RECT.x+min(self.current_ball_index,n)*w//n-2,TIMELINE_BAR_RECT.y,4,h)))
+    # Seconds main() may sleep before the next frame: until the next simulation step is due, but at least the rest of the 1/FPS frame budget.
+    def next_frame_delay(self):
+        frame_budget=1.0/FPS-(time.perf_counter()-self.frame_start)
+        if self.game_state!="animation":return max(0.0,frame_budget)
+        return max(0.0,frame_budget,self.animation_clock.time_until_next_step())
 
 # Manages UI elements and screens for standalone mode.
 class UI:
-    def __init__(self, game): self.game=game;self.title_text=self.game.large_font.render("Cricket Match Animation",True,BLACK);self.title_rect=self.title_text.get_rect(center=(SCREEN_WIDTH//2,SCREEN_HEIGHT//4));self.start_button_rect=pygame.Rect(SCREEN_WIDTH//2-150,SCREEN_HEIGHT//2-25,300,50);self.start_button_text=self.game.font.render("Start Animated Match",True,BLACK);self.start_button_text_rect=self.start_button_text.get_rect(center=self.start_button_rect.center);self.sim_button_rect=pygame.Rect(SCREEN_WIDTH//2-150,SCREEN_HEIGHT//2+50,300,50);self.sim_button_text=self.game.font.render("Start Simulation Game",True,BLACK);self.sim_button_text_rect=self.sim_button_text.get_rect(center=self.sim_button_rect.center);self.available_teams=["India","Australia","England","Pakistan","South Africa","New Zealand"];self.selected_team_a_name=None;self.selected_team_b_name=None;self.team_option_height=40;self.team_option_width=200;self.team_a_options_rects=[];self.team_b_options_rects=[];self.select_team_a_text=self.game.medium_font.render("Select Team A (Batting)",True,BLACK);self.select_team_a_rect=self.select_team_a_text.get_rect(center=(SCREEN_WIDTH//4+50,SCREEN_HEIGHT//6));self.select_team_b_text=self.game.medium_font.render("Select Team B (Bowling)",True,BLACK);self.select_team_b_rect=self.select_team_b_text.get_rect(center=(SCREEN_WIDTH*3//4-50,SCREEN_HEIGHT//6));start_y_team=SCREEN_HEIGHT//6+60;
+    def __init__(self, game):
+        self.game=game;self.title_text=self.game.large_font.render("Cricket Match Animation",True,BLACK);self.title_rect=self.title_text.get_rect(center=(SCREEN_WIDTH//2,SCREEN_HEIGHT//4));self.start_button_rect=pygame.Rect(SCREEN_WIDTH//2-150,SCREEN_HEIGHT//2-25,300,50);self.start_button_text=self.game.font.render("Start Animated Match",True,BLACK);self.start_button_text_rect=self.start_button_text.get_rect(center=self.start_button_rect.center);self.sim_button_rect=pygame.Rect(SCREEN_WIDTH//2-150,SCREEN_HEIGHT//2+50,300,50);self.sim_button_text=self.game.font.render("Start Simulation Game",True,BLACK);self.sim_button_text_rect=self.sim_button_text.get_rect(center=self.sim_button_rect.center);self.available_teams=["India","Australia","England","Pakistan","South Africa","New Zealand"];self.selected_team_a_name=None;self.selected_team_b_name=None;self.team_option_height=40;self.team_option_width=200;self.team_a_options_rects=[];self.team_b_options_rects=[];self.select_team_a_text=self.game.medium_font.render("Select Team A (Batting)",True,BLACK);self.select_team_a_rect=self.select_team_a_text.get_rect(center=(SCREEN_WIDTH//4+50,SCREEN_HEIGHT//6));self.select_team_b_text=self.game.medium_font.render("Select Team B (Bowling)",True,BLACK);self.select_team_b_rect=self.select_team_b_text.get_rect(center=(SCREEN_WIDTH*3//4-50,SCREEN_HEIGHT//6));start_y_team=SCREEN_HEIGHT//6+60;
         for i,tn in enumerate(self.available_teams):rA=pygame.Rect(SCREEN_WIDTH//4-self.team_option_width//2+50,start_y_team+i*(self.team_option_height+10),self.team_option_width,self.team_option_height);self.team_a_options_rects.append(rA);rB=pygame.Rect(SCREEN_WIDTH*3//4-self.team_option_width//2-50,start_y_team+i*(self.team_option_height+10),self.team_option_width,self.team_option_height);self.team_b_options_rects.append(rB)
-        self.confirm_teams_button_rect=pygame.Rect(SCREEN_WIDTH//2-100,SCREEN_HEIGHT-100,200,50);self.confirm_teams_button_text=self.game.font.render("Confirm Teams",True,BLACK);self.confirm_teams_button_text_rect=self.confirm_teams_button_text.get_rect(center=self.confirm_teams_button_rect.center);self.log_screen_title_text=self.game.medium_font.render("Provide Ball-by-Ball Log",True,BLACK);self.log_screen_title_rect=self.log_screen_title_text.get_rect(center=(SCREEN_WIDTH//2,SCREEN_HEIGHT//6));self.input_manual_log_button_rect=pygame.Rect(SCREEN_WIDTH//2-200,SCREEN_HEIGHT//4,400,50);self.input_manual_log_button_text=self.game.font.render("Input Manual Log",True,BLACK);self.input_manual_log_button_text_rect=self.input_manual_log_button_text.get_rect(center=self.input_manual_log_button_rect.center);self.simulate_match_button_rect=pygame.Rect(SCREEN_WIDTH//2-200,SCREEN_HEIGHT//4+60,400,50);self.simulate_match_button_text=self.game.font.render("Simulate 20-Ball Match",True,BLACK);self.simulate_match_button_text_rect=self.simulate_match_button_text.get_rect(center=self.simulate_match_button_rect.center);self.manual_log_input_rect=pygame.Rect(SCREEN_WIDTH//2-300,SCREEN_HEIGHT//2+20,600,50);self.manual_log_string="";self.log_input_active=False;self.max_log_chars=100;self.generated_log_display_surf=None;self.log_message_surf=None;self.start_animation_button_rect=pygame.Rect(SCREEN_WIDTH//2-150,SCREEN_HEIGHT-100,300,50);self.start_animation_button_text=self.game.font.render("Start Animation",True,BLACK);self.start_animation_button_text_rect=self.start_animation_button_text.get_rect(center=self.start_animation_button_rect.center)
-    # Helper method to draw stumps.
-    def draw_stumps(self,sfc,xc,yb,hit=False):st_px=[xc-STUMPS_GAP-STUMP_WIDTH//2,xc-STUMP_WIDTH//2,xc+STUMPS_GAP-STUMP_WIDTH//2];clr=STUMP_HIT_COLOR if hit else STUMP_COLOR;
+        self.confirm_teams_button_rect=pygame.Rect(SCREEN_WIDTH//2-100,SCREEN_HEIGHT-100,200,50);self.confirm_teams_button_text=self.game.font.render("Confirm Teams",True,BLACK);self.confirm_teams_button_text_rect=self.confirm_teams_button_text.get_rect(center=self.confirm_teams_button_rect.center);self.log_screen_title_text=self.game.medium_font.render("Provide Ball-by-Ball Log",True,BLACK);self.log_screen_title_rect=self.log_screen_title_text.get_rect(center=(SCREEN_WIDTH//2,SCREEN_HEIGHT//6));self.input_manual_log_button_rect=pygame.Rect(SCREEN_WIDTH//2-200,SCREEN_HEIGHT//4,400,50);self.input_manual_log_button_text=self.game.font.render("Input Manual Log",True,BLACK);self.input_manual_log_button_text_rect=self.input_manual_log_button_text.get_rect(center=self.input_manual_log_button_rect.center);self.simulate_match_button_rect=pygame.Rect(SCREEN_WIDTH//2-200,SCREEN_HEIGHT//4+60,400,50);self.simulate_match_button_text=self.game.font.render("Simulate 20-Ball Match",True,BLACK);self.simulate_match_button_text_rect=self.simulate_match_button_text.get_rect(center=self.simulate_match_button_rect.center);self.manual_log_input_rect=pygame.Rect(SCREEN_WIDTH//2-300,SCREEN_HEIGHT//2+20,600,50);self.manual_log_string="";self.log_input_active=False;self.max_log_chars=100;self.generated_log_display_surf=None;self.log_message_surf=None;self.start_animation_button_rect=pygame.Rect(SCREEN_WIDTH//2-150,SCREEN_HEIGHT-100,300,50);self.start_animation_button_text=self.game.font.render("Start Animation",True,BLACK);self.start_animation_button_text_rect=self.start_animation_button_text.get_rect(center=self.start_animation_button_rect.center);self.status_text=None;self.status_surf=None
+    # Helper method to draw stumps; returns the area drawn.
+    def draw_stumps(self,sfc,xc,yb,hit=False):
+        st_px=[xc-STUMPS_GAP-STUMP_WIDTH//2,xc-STUMP_WIDTH//2,xc+STUMPS_GAP-STUMP_WIDTH//2];clr=STUMP_HIT_COLOR if hit else STUMP_COLOR;drawn=[]
         for sx in st_px:
-            if hit and random.choice([True,False]):pygame.draw.line(sfc,clr,(sx,yb),(sx+random.randint(-5,5),yb-STUMP_HEIGHT-random.randint(0,10)),STUMP_WIDTH+1) # Scatter if hit
-            else:pygame.draw.line(sfc,clr,(sx,yb),(sx,yb-STUMP_HEIGHT),STUMP_WIDTH)
-    # Draws the main animation scene including ground, pitch, players, ball, and crowd.
-    def draw_animation_scene(self, bowler, batsman, fielders, ball_obj, crowd_obj, current_outcome_text="", batsman_stumps_hit=False):
-        # Draw static elements: crowd backdrop, outfield, pitch, creases, boundary
-        crowd_backdrop_rect = pygame.Rect(0, 0, SCREEN_WIDTH, CROWD_AREA_HEIGHT); pygame.draw.rect(self.game.screen, CROWD_COLOR_PLACEHOLDER, crowd_backdrop_rect)
-        if crowd_obj: crowd_obj.draw(self.game.screen) # Draw animated crowd
-        outfield_rect = pygame.Rect(0, CROWD_AREA_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT - CROWD_AREA_HEIGHT); pygame.draw.rect(self.game.screen, GREEN, outfield_rect)
-        pitch_rect = pygame.Rect(PITCH_X, PITCH_Y_BOWLER_END, PITCH_WIDTH, PITCH_LENGTH); pygame.draw.rect(self.game.screen, LIGHT_BROWN, pitch_rect)
-        pc_bw=(PITCH_X-(CREASE_LENGTH-PITCH_WIDTH)//2,POPPING_CREASE_Y_BOWLER);pc_be=(PITCH_X+PITCH_WIDTH+(CREASE_LENGTH-PITCH_WIDTH)//2,POPPING_CREASE_Y_BOWLER);pygame.draw.line(self.game.screen,WHITE,pc_bw,pc_be,3);pc_bw2=(PITCH_X-(CREASE_LENGTH-PITCH_WIDTH)//2,POPPING_CREASE_Y_BATSMAN);pc_be2=(PITCH_X+PITCH_WIDTH+(CREASE_LENGTH-PITCH_WIDTH)//2,POPPING_CREASE_Y_BATSMAN);pygame.draw.line(self.game.screen,WHITE,pc_bw2,pc_be2,3);pygame.draw.line(self.game.screen,WHITE,(PITCH_X,STUMPS_LINE_Y_BOWLER),(PITCH_X+PITCH_WIDTH,STUMPS_LINE_Y_BOWLER),2);pygame.draw.line(self.game.screen,WHITE,(PITCH_X,STUMPS_LINE_Y_BATSMAN),(PITCH_X+PITCH_WIDTH,STUMPS_LINE_Y_BATSMAN),2);bm=30;dl=15;gl=10
-        for x in range(bm,SCREEN_WIDTH-bm,dl+gl):pygame.draw.line(self.game.screen,WHITE,(x,SCREEN_HEIGHT-bm),(min(x+dl,SCREEN_WIDTH-bm),SCREEN_HEIGHT-bm),2)
-        for y in range(int(CROWD_AREA_HEIGHT)+bm,SCREEN_HEIGHT-bm,dl+gl):pygame.draw.line(self.game.screen,WHITE,(bm,y),(bm,min(y+dl,SCREEN_HEIGHT-bm)),2);pygame.draw.line(self.game.screen,WHITE,(SCREEN_WIDTH-bm,y),(SCREEN_WIDTH-bm,min(y+dl,SCREEN_HEIGHT-bm)),2)
-        # Draw stumps
-        self.draw_stumps(self.game.screen,PITCH_X+PITCH_WIDTH//2,STUMPS_LINE_Y_BOWLER);self.draw_stumps(self.game.screen,PITCH_X+PITCH_WIDTH//2,STUMPS_LINE_Y_BATSMAN,batsman_stumps_hit)
+            if hit and random.choice([True,False]):drawn.append(pygame.draw.line(sfc,clr,(sx,yb),(sx+random.randint(-5,5),yb-STUMP_HEIGHT-random.randint(0,10)),STUMP_WIDTH+1)) # Scatter if hit
+            else:drawn.append(pygame.draw.line(sfc,clr,(sx,yb),(sx,yb-STUMP_HEIGHT),STUMP_WIDTH))
+        return drawn[0].unionall(drawn[1:])
+    # Draws the static scene (crowd backdrop, outfield, pitch, creases, boundary, bowler's stumps) once into the renderer's background.
+    def draw_static_scene(self,sfc):
+        crowd_backdrop_rect = pygame.Rect(0, 0, SCREEN_WIDTH, CROWD_AREA_HEIGHT); pygame.draw.rect(sfc, CROWD_COLOR_PLACEHOLDER, crowd_backdrop_rect)
+        outfield_rect = pygame.Rect(0, CROWD_AREA_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT - CROWD_AREA_HEIGHT); pygame.draw.rect(sfc, GREEN, outfield_rect)
+        pitch_rect = pygame.Rect(PITCH_X, PITCH_Y_BOWLER_END, PITCH_WIDTH, PITCH_LENGTH); pygame.draw.rect(sfc, LIGHT_BROWN, pitch_rect)
+        pc_bw=(PITCH_X-(CREASE_LENGTH-PITCH_WIDTH)//2,POPPING_CREASE_Y_BOWLER);pc_be=(PITCH_X+PITCH_WIDTH+(CREASE_LENGTH-PITCH_WIDTH)//2,POPPING_CREASE_Y_BOWLER);pygame.draw.line(sfc,WHITE,pc_bw,pc_be,3);pc_bw2=(PITCH_X-(CREASE_LENGTH-PITCH_WIDTH)//2,POPPING_CREASE_Y_BATSMAN);pc_be2=(PITCH_X+PITCH_WIDTH+(CREASE_LENGTH-PITCH_WIDTH)//2,POPPING_CREASE_Y_BATSMAN);pygame.draw.line(sfc,WHITE,pc_bw2,pc_be2,3);pygame.draw.line(sfc,WHITE,(PITCH_X,STUMPS_LINE_Y_BOWLER),(PITCH_X+PITCH_WIDTH,STUMPS_LINE_Y_BOWLER),2);pygame.draw.line(sfc,WHITE,(PITCH_X,STUMPS_LINE_Y_BATSMAN),(PITCH_X+PITCH_WIDTH,STUMPS_LINE_Y_BATSMAN),2);bm=30;dl=15;gl=10
+        for x in range(bm,SCREEN_WIDTH-bm,dl+gl):pygame.draw.line(sfc,WHITE,(x,SCREEN_HEIGHT-bm),(min(x+dl,SCREEN_WIDTH-bm),SCREEN_HEIGHT-bm),2)
+        for y in range(int(CROWD_AREA_HEIGHT)+bm,SCREEN_HEIGHT-bm,dl+gl):pygame.draw.line(sfc,WHITE,(bm,y),(bm,min(y+dl,SCREEN_HEIGHT-bm)),2);pygame.draw.line(sfc,WHITE,(SCREEN_WIDTH-bm,y),(SCREEN_WIDTH-bm,min(y+dl,SCREEN_HEIGHT-bm)),2)
+        self.draw_stumps(sfc,PITCH_X+PITCH_WIDTH//2,STUMPS_LINE_Y_BOWLER) # The batsman's stumps can be hit, so they are drawn every frame
+    # Draws the moving parts of the animation scene (batsman's stumps, players, ball, outcome text) over the background; returns the areas drawn.
+    def draw_animation_scene(self, bowler, batsman, fielders, ball_obj, current_outcome_text="", batsman_stumps_hit=False):
+        s=self.game.screen;rects=[self.draw_stumps(s,PITCH_X+PITCH_WIDTH//2,STUMPS_LINE_Y_BATSMAN,batsman_stumps_hit)]
         # Draw dynamic elements: players and ball
-        if bowler:bowler.draw(self.game.screen);
-        if batsman:batsman.draw(self.game.screen)
-        for fielder in fielders:fielder.draw(self.game.screen)
-        if ball_obj:ball_obj.draw(self.game.screen)
-        # Draw text overlay for current ball outcome
-        if current_outcome_text:status_surf=self.game.font.render(current_outcome_text,True,BLACK);status_rect=status_surf.get_rect(center=(SCREEN_WIDTH//2,SCREEN_HEIGHT*0.10));self.game.screen.blit(status_surf,status_rect)
+        if bowler:rects.append(bowler.draw(s))
+        if batsman:rects.append(batsman.draw(s))
+        for fielder in fielders:rects.append(fielder.draw(s))
+        if ball_obj:rects.append(ball_obj.draw(s))
+        # Draw text overlay for current ball outcome (rendered once per text)
+        if current_outcome_text:
+            if self.status_text!=current_outcome_text:self.status_text=current_outcome_text;self.status_surf=self.game.font.render(current_outcome_text,True,BLACK)
+            rects.append(s.blit(self.status_surf,self.status_surf.get_rect(center=(SCREEN_WIDTH//2,SCREEN_HEIGHT*0.10))))
+        return rects
     # Draws the initial menu screen.
     def draw_initial_screen(self):self.game.screen.blit(self.title_text,self.title_rect);pygame.draw.rect(self.game.screen,WHITE,self.start_button_rect);pygame.draw.rect(self.game.screen,BLACK,self.start_button_rect,2);self.game.screen.blit(self.start_button_text,self.start_button_text_rect);pygame.draw.rect(self.game.screen,WHITE,self.sim_button_rect);pygame.draw.rect(self.game.screen,BLACK,self.sim_button_rect,2);self.game.screen.blit(self.sim_button_text,self.sim_button_text_rect)
     # Draws the team selection screen.
-    def draw_team_selection_screen(self):self.game.screen.blit(self.select_team_a_text,self.select_team_a_rect);self.game.screen.blit(self.select_team_b_text,self.select_team_b_rect)
+    def draw_team_selection_screen(self):
+        self.game.screen.blit(self.select_team_a_text,self.select_team_a_rect);self.game.screen.blit(self.select_team_b_text,self.select_team_b_rect)
         for i,team_name in enumerate(self.available_teams):
             rect_a=self.team_a_options_rects[i];color_a=WHITE;text_color_a=BLACK
             if team_name==self.selected_team_a_name:color_a=TEAM_COLORS.get(team_name,BLUE);text_color_a=WHITE if team_name!="Australia" else BLACK
@@ -445,13 +689,15 @@ class UI:
         confirm_color=GREY if not(self.selected_team_a_name and self.selected_team_b_name and self.selected_team_a_name!=self.selected_team_b_name) else WHITE
         pygame.draw.rect(self.game.screen,confirm_color,self.confirm_teams_button_rect);pygame.draw.rect(self.game.screen,BLACK,self.confirm_teams_button_rect,2);self.game.screen.blit(self.confirm_teams_button_text,self.confirm_teams_button_text_rect)
     # Draws the log input screen.
-    def draw_log_input_screen(self):self.game.screen.blit(self.log_screen_title_text,self.log_screen_title_rect);pygame.draw.rect(self.game.screen,LIGHT_GREEN if self.log_input_active else WHITE,self.input_manual_log_button_rect);pygame.draw.rect(self.game.screen,BLACK,self.input_manual_log_button_rect,2);self.game.screen.blit(self.input_manual_log_button_text,self.input_manual_log_button_text_rect);sim_color=LIGHT_GREEN if not self.log_input_active and self.generated_log_display_surf else WHITE;pygame.draw.rect(self.game.screen,sim_color,self.simulate_match_button_rect);pygame.draw.rect(self.game.screen,BLACK,self.simulate_match_button_rect,2);self.game.screen.blit(self.simulate_match_button_text,self.simulate_match_button_text_rect);disp_y=self.manual_log_input_rect.top-30
+    def draw_log_input_screen(self):
+        self.game.screen.blit(self.log_screen_title_text,self.log_screen_title_rect);pygame.draw.rect(self.game.screen,LIGHT_GREEN if self.log_input_active else WHITE,self.input_manual_log_button_rect);pygame.draw.rect(self.game.screen,BLACK,self.input_manual_log_button_rect,2);self.game.screen.blit(self.input_manual_log_button_text,self.input_manual_log_button_text_rect);sim_color=LIGHT_GREEN if not self.log_input_active and self.generated_log_display_surf else WHITE;pygame.draw.rect(self.game.screen,sim_color,self.simulate_match_button_rect);pygame.draw.rect(self.game.screen,BLACK,self.simulate_match_button_rect,2);self.game.screen.blit(self.simulate_match_button_text,self.simulate_match_button_text_rect);disp_y=self.manual_log_input_rect.top-30
         if self.log_input_active:pygame.draw.rect(self.game.screen,WHITE,self.manual_log_input_rect);pygame.draw.rect(self.game.screen,BLACK,self.manual_log_input_rect,2);lts=self.game.font.render(self.manual_log_string,True,BLACK);self.game.screen.blit(lts,(self.manual_log_input_rect.x+5,self.manual_log_input_rect.y+5));inst_s=self.game.font.render("Type comma-separated log (e.g., 0,1,wicket,4)",True,DARK_GREY);self.game.screen.blit(inst_s,(self.manual_log_input_rect.x,self.manual_log_input_rect.bottom+5))
         elif self.generated_log_display_surf:self.game.screen.blit(self.generated_log_display_surf,(SCREEN_WIDTH//2-self.generated_log_display_surf.get_width()//2,disp_y+40));inst_s=self.game.font.render("Simulated 20-Ball Log:",True,BLACK);self.game.screen.blit(inst_s,(SCREEN_WIDTH//2-inst_s.get_width()//2,disp_y))
         sa_color=WHITE if self.game.ball_log else GREY;pygame.draw.rect(self.game.screen,sa_color,self.start_animation_button_rect);pygame.draw.rect(self.game.screen,BLACK,self.start_animation_button_rect,2);self.game.screen.blit(self.start_animation_button_text,self.start_animation_button_text_rect)
         if self.log_message_surf:self.game.screen.blit(self.log_message_surf,(SCREEN_WIDTH//2-self.log_message_surf.get_width()//2,self.start_animation_button_rect.top-40))
     # Validates and parses a comma-separated log string.
-    def _validate_and_parse_log(self,log_string):self.log_message_surf=None;
+    def _validate_and_parse_log(self,log_string):
+        self.log_message_surf=None
         if not log_string.strip():self.log_message_surf=self.game.font.render("Manual log is empty.",True,RED);return[]
         items=[i.strip().lower() for i in log_string.split(',')];parsed_log=[]
         for i in items:
@@ -468,8 +714,10 @@ class UI:
         elif self.game.game_state=="team_selection": # ... (Team selection logic)
             if event.type==pygame.MOUSEBUTTONDOWN and event.button==1:
                 for i,r in enumerate(self.team_a_options_rects):
-                    if r.collidepoint(event.pos):self.selected_team_a_name=self.available_teams[i];
-                                                 if self.selected_team_b_name==self.selected_team_a_name:self.selected_team_b_name=None;return
+                    if r.collidepoint(event.pos):
+                        self.selected_team_a_name=self.available_teams[i]
+                        if self.selected_team_b_name==self.selected_team_a_name:self.selected_team_b_name=None
+                        return
                 for i,r in enumerate(self.team_b_options_rects):
                     if r.collidepoint(event.pos):
                         name=self.available_teams[i]
@@ -480,8 +728,6 @@ class UI:
                     team_b_color = TEAM_COLORS.get(self.selected_team_b_name, YELLOW)
                     self.game.team_a=Team(self.selected_team_a_name, team_a_color)
                     self.game.team_b=Team(self.selected_team_b_name, team_b_color)
-                    # Update scoreboard with team names for standalone mode
-                    self.game.scoreboard.set_teams(self.game.team_a.name, self.game.team_b.name, self.game.team_a.name)
                     self.game.game_state="log_input";self.manual_log_string="";self.game.ball_log=[];self.log_input_active=False;self.generated_log_display_surf=None;self.log_message_surf=None
         elif self.game.game_state=="log_input": # ... (Log input logic)
             if event.type==pygame.MOUSEBUTTONDOWN and event.button==1:
@@ -505,14 +751,20 @@ class UI:
 # class Scoreboard: pass
 active_game = None
 # Main asynchronous function to run the game, compatible with Pyodide.
+# Tells the hosting page (templates/animation_player.html) that the first frame is on screen.
+def notify_first_frame():
+    if platform.system() != "Emscripten": return
+    hook = getattr(js, "onAnimationFirstFrame", None)
+    if hook: hook()
+
 async def main():
     global active_game; active_game = CricketGame();
-    running = True
+    running = True; first_frame = True
     while running:
         if active_game: running = active_game.run() # Run game logic and drawing
-        # Yield control for other tasks in browser environment
-        if platform.system() == "Emscripten": await asyncio.sleep(0)
-        else: await asyncio.sleep(1.0 / FPS) # Standard desktop sleep
+        if first_frame: first_frame = False; notify_first_frame() # Ends the page's startup timeline
+        # Sleep until there is something to do; in the browser this also yields to the page's event loop
+        await asyncio.sleep(active_game.next_frame_delay())
     pygame.quit() # Clean up Pygame resources when game loop ends
 
 # Entry point for the script.
@@ -522,4 +774,3 @@ if __name__ == "__main__":
     else: # Running as a standard Python script
         asyncio.run(main())
 
-[end of IPL-3.0/static/animation/cricket_animation.py]
@@ -0,0 +1,35 @@
+// Service worker for the animation player (rendered by app.animation_service_worker).
+// Precaches the Pyodide runtime, its packages and the animation script under a cache named after
+// the bundle version and the script's content hash, and serves them cache-first. A new bundle or
+// script changes the name, so the next install fetches the new files and activation drops the old cache.
+const CACHE_NAME = "{{ cache_name }}";
+const PRECACHE_URLS = {{ precache_urls | tojson }};
+const PRECACHED = new Set(PRECACHE_URLS.map(url => new URL(url, self.location).href));
+
+self.addEventListener("install", event => {
+    event.waitUntil(caches.open(CACHE_NAME).then(cache => cache.addAll(PRECACHE_URLS)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener("activate", event => {
+    event.waitUntil(caches.keys()
+        .then(names => Promise.all(names.filter(name => name.startsWith("animation-") && name !== CACHE_NAME)
+                                         .map(name => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+self.addEventListener("fetch", event => {
+    if (event.request.method !== "GET" || !PRECACHED.has(event.request.url)) {
+        return; // Everything else goes to the network as usual
+    }
+    event.respondWith(caches.open(CACHE_NAME).then(cache => cache.match(event.request).then(cached => {
+        if (cached) {
+            return cached;
+        }
+        return fetch(event.request).then(response => {
+            if (response.ok) {
+                cache.put(event.request, response.clone());
+            }
+            return response;
+        });
+    })));
+});
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+# Helpers shared by the test modules.
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import app as app_module
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.time; tests move now by hand."""
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def in_project_root(test):
+    """Runs the test from the project root, as MatchSimulator reads teams/teams.json relative to it."""
+    cwd = os.getcwd()
+    os.chdir(project_root_dir)
+    test.addCleanup(os.chdir, cwd)
+
+
+def temp_dir(test):
+    """A temporary directory removed after the test."""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    return tmp.name
+
+
+def make_app(test, tmp_dir=None, **config):
+    """A Flask app for the test, run from the project root, writing its logs and scores under
+    tmp_dir (a fresh temporary directory by default) and not warmed up; config overrides any of it."""
+    in_project_root(test)
+    tmp_dir = tmp_dir or temp_dir(test)
+    return app_module.create_app(dict({
+        'SECRET_KEY': 'test', 'TMP_LOG_DIR': os.path.join(tmp_dir, 'logs'),
+        'SCORES_DIR': os.path.join(tmp_dir, 'scores'), 'WARMUP': False,
+    }, **config))
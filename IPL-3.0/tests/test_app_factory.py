@@ -0,0 +1,99 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import app as app_module
+import pyodide_bundle
+from support import make_app
+
+
+class TestAppFactory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_secret_key_is_stable_across_workers(self):
+        instance_path = os.path.join(self.tmp.name, 'instance')
+        first = app_module.load_secret_key(instance_path)
+        self.assertEqual(app_module.load_secret_key(instance_path), first)
+        self.assertEqual(os.listdir(instance_path), [app_module.SECRET_KEY_FILE])
+
+    def test_create_app_uses_config_and_warms_up(self):
+        flask_app = make_app(self, self.tmp.name, WARMUP=True)
+        self.assertEqual(flask_app.secret_key, 'test')
+        self.assertIn('csk', flask_app.config['TEAMS'])
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp.name, 'logs')))
+        response = flask_app.test_client().get('/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_dev_server_is_local_and_without_debugger_by_default(self):
+        flask_app = make_app(self, self.tmp.name)
+        self.assertFalse(flask_app.config['DEBUG'])
+        self.assertEqual(flask_app.config['DEV_SERVER_HOST'], '127.0.0.1')
+
+
+    def _app(self, **config):
+        return make_app(self, self.tmp.name, PYODIDE_DIR=os.path.join(self.tmp.name, 'pyodide'), **config)
+
+    def _vendor_fake_bundle(self):
+        path = pyodide_bundle.bundle_path(os.path.join(self.tmp.name, 'pyodide'), pyodide_bundle.VERSION)
+        os.makedirs(path)
+        files = list(pyodide_bundle.CORE_FILES) + ['pygame_ce-2.4.1-py3-none-any.whl']
+        for name in files:
+            with open(os.path.join(path, name), 'w') as f:
+                f.write(name)
+        with open(os.path.join(path, pyodide_bundle.MANIFEST_FILE), 'w') as f:
+            json.dump({'version': pyodide_bundle.VERSION, 'packages': ['pygame-ce'], 'files': files}, f)
+
+    def test_animation_player_falls_back_to_the_cdn(self):
+        client = self._app().test_client()
+        page = client.get('/play_animation').get_data(as_text=True)
+        self.assertIn('cdn.jsdelivr.net/pyodide/v' + pyodide_bundle.VERSION, page)
+        self.assertEqual(client.get(f'/vendor/pyodide/{pyodide_bundle.VERSION}/pyodide.js').status_code, 404)
+
+    def test_vendored_bundle_is_served_immutable_and_precached(self):
+        self._vendor_fake_bundle()
+        client = self._app().test_client()
+        base = f'/vendor/pyodide/{pyodide_bundle.VERSION}/'
+        page = client.get('/play_animation').get_data(as_text=True)
+        self.assertIn(f'src="{base}pyodide.js"', page)
+        self.assertNotIn('cdn.jsdelivr.net', page)
+
+        response = client.get(base + 'pyodide.asm.wasm')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/wasm')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn(f'max-age={app_module.IMMUTABLE_MAX_AGE}', response.headers['Cache-Control'])
+        self.assertEqual(client.get(base + pyodide_bundle.MANIFEST_FILE).status_code, 404) # Only listed files
+
+        worker = client.get('/animation_sw.js')
+        self.assertEqual(worker.headers['Cache-Control'], 'no-cache')
+        script = worker.get_data(as_text=True)
+        self.assertIn(base + 'pygame_ce-2.4.1-py3-none-any.whl', script)
+        self.assertIn('/static/animation/cricket_animation.py?v=', script)
+
+
+class TestPyodideBundle(unittest.TestCase):
+    def test_packages_resolve_with_dependencies_first(self):
+        lock = {'packages': {
+            'micropip': {'file_name': 'micropip.whl', 'depends': ['packaging']},
+            'packaging': {'file_name': 'packaging.whl', 'depends': []},
+            'pygame-ce': {'file_name': 'pygame_ce.whl', 'depends': ['numpy']},
+            'numpy': {'file_name': 'numpy.whl', 'depends': []},
+        }}
+        self.assertEqual(pyodide_bundle.resolve_packages(lock, ['micropip', 'pygame-ce']),
+                         ['packaging', 'micropip', 'numpy', 'pygame-ce'])
+        self.assertEqual(pyodide_bundle.bundle_files(lock, ['micropip'])[-2:], ['packaging.whl', 'micropip.whl'])
+        with self.assertRaises(KeyError):
+            pyodide_bundle.resolve_packages(lock, ['scipy'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import ball_outcomes
+
+
+class TestBallOutcomes(unittest.TestCase):
+    def setUp(self):
+        self.log = [
+            {"event": "0.1 JJ Bumrah to RD Gaikwad 4 Score: 4/0", "outcome": ball_outcomes.make_outcome(4)},
+            {"event": "0.2 JJ Bumrah to RD Gaikwad Wide Score: 5/0",
+             "outcome": ball_outcomes.make_outcome(0, extra_type=ball_outcomes.WIDE, extras=1)},
+            {"event": "0.2 JJ Bumrah to RD Gaikwad W Score: 5/1 Caught by Ishan Kishan",
+             "outcome": ball_outcomes.make_outcome(0, "caught")},
+            {"event": "0.3 JJ Bumrah to MS Dhoni W Score: 6/2 Run Out!", "outcome": ball_outcomes.make_outcome(1, "run out")},
+            {"event": "0.4 JJ Bumrah to RA Jadeja 0 Score: 6/2", "outcome": ball_outcomes.make_outcome(0)},
+        ]
+
+    def test_structured_path_matches_text_parser(self):
+        expected = [4, 0, "wicket", "wicket", 0]
+        self.assertEqual(ball_outcomes.simplify_outcomes(self.log), expected)
+        self.assertEqual(ball_outcomes.simplify_event_text(self.log), expected)
+
+    def test_entries_without_outcome_fall_back_to_event_text(self):
+        legacy_log = [{"event": entry["event"]} for entry in self.log]
+        self.assertEqual(ball_outcomes.simplify_outcomes(legacy_log), [4, 0, "wicket", "wicket", 0])
+
+    def test_animation_balls_carry_totals_and_legality(self):
+        balls = ball_outcomes.animation_balls(self.log)
+        self.assertEqual([b['token'] for b in balls], [4, 0, "wicket", "wicket", 0])
+        self.assertEqual([b['runs'] for b in balls], [4, 1, 0, 1, 0])  # the wide's extra counts, the run-out run too
+        self.assertEqual([b['legal'] for b in balls], [True, False, True, True, True])
+        self.assertEqual([b['wicket'] for b in balls], [False, False, True, True, False])
+        legacy = ball_outcomes.animation_balls([{"event": entry["event"]} for entry in self.log])
+        self.assertEqual([(b['token'], b['runs'], b['legal']) for b in legacy],
+                         [(4, 4, True), (0, 0, True), ("wicket", 0, True), ("wicket", 0, True), (0, 0, True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from match_simulator import MatchSimulator
+from support import in_project_root
+
+
+def reference_pick(sim):
+    # The full rescan-and-sort the heap replaces (deterministic part only).
+    inn = sim.innings[sim.current_innings_num]
+    over = inn['overs_completed']
+    phase = 'powerplay' if over < 6 else ('death' if over >= 17 else 'middle')
+    eligible = []
+    for initial in sim.team_bowler_phases[sim.bowling_team_code][phase]:
+        stats = inn['bowling_tracker'].get(initial, {'balls_bowled': 0, 'runs_conceded': 0, 'wickets': 0})
+        if stats['balls_bowled'] >= 24: continue
+        if initial == sim.last_over_bowler_initial and len(sim.bowlers_list[sim.bowling_team_code]) > 2: continue
+        economy = stats['runs_conceded'] / (stats['balls_bowled'] / 6.0) if stats['balls_bowled'] > 0 else 99.0
+        eligible.append((economy - stats['wickets'] * 10 + stats['balls_bowled'] * 0.1, initial))
+    eligible.sort(key=lambda x: x[0])
+    return eligible[0][1] if eligible else None
+
+
+class TestBowlerSelection(unittest.TestCase):
+    def setUp(self):
+        in_project_root(self)
+
+    def test_matches_full_rescan_and_respects_quotas(self):
+        for seed in range(6):
+            sim = MatchSimulator('csk', 'mi', seed=seed)
+            sim.perform_toss()
+            while not sim.game_over:
+                over_key = (sim.current_innings_num, sim.innings[sim.current_innings_num]['overs_completed'])
+                sim.simulate_one_ball()
+                if not sim.game_over and (sim.current_innings_num, sim.innings[sim.current_innings_num]['overs_completed']) != over_key:
+                    expected = reference_pick(sim)
+                    if expected is not None:
+                        self.assertEqual(sim.current_bowler, expected)
+            for num in (1, 2):
+                overs = []
+                for entry in sim.innings[num]['log']:
+                    over = entry['over_str'].split('.')[0]
+                    if not overs or overs[-1][0] != over: overs.append((over, entry['bowler_initial']))
+                for (_, first), (_, second) in zip(overs, overs[1:]):
+                    self.assertNotEqual(first, second)
+                for stats in sim.innings[num]['bowling_tracker'].values():
+                    self.assertLessEqual(stats['balls_bowled'], 24)
+
+    def test_restored_match_rebuilds_the_index(self):
+        sim = MatchSimulator('rcb', 'kkr', seed=11)
+        sim.perform_toss()
+        for _ in range(50): sim.simulate_one_ball()
+        restored = MatchSimulator.from_snapshot(sim.to_snapshot())
+        for _ in range(150):
+            self.assertEqual(restored.simulate_one_ball()['ball_event'], sim.simulate_one_ball()['ball_event'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import bowling_plan
+
+
+def make_bowlers(count, favourite_overs=None):
+    # Bowler k prefers the overs in favourite_overs[k] (0-based); everyone else is lukewarm
+    bowlers = []
+    for k in range(count):
+        overs = (favourite_overs or {}).get(k, range(k % 4, 20, 4))
+        bowlers.append({'playerInitials': f"B{k}",
+                        'overNumbersObject': {str(o + 1): (0.9 if o in overs else 0.1) for o in range(20)}})
+    return bowlers
+
+
+def play(plan, tracker=None):
+    tracker = tracker or {}
+    last_over = None
+    sequence = []
+    for over in range(bowling_plan.OVERS):
+        last_over = plan.next_bowler(over, tracker, last_over)['playerInitials']
+        sequence.append(last_over)
+    return sequence
+
+
+class TestBowlingPlan(unittest.TestCase):
+    def assertValid(self, sequence, max_overs=bowling_plan.MAX_OVERS):
+        self.assertEqual(len(sequence), 20)
+        for first, second in zip(sequence, sequence[1:]):
+            self.assertNotEqual(first, second)
+        for initials in set(sequence):
+            self.assertLessEqual(sequence.count(initials), max_overs)
+
+    def test_plan_respects_caps_and_rotation(self):
+        for count in (5, 6, 7):
+            self.assertValid(play(bowling_plan.BowlingPlan(make_bowlers(count))))
+
+    def test_death_specialist_is_saved_for_the_death(self):
+        # B1 likes every over; B0's record is in the first over and at the death, so that is where he bowls
+        bowlers = make_bowlers(7, {0: (0, 17, 19), 1: range(0, 20)})
+        sequence = play(bowling_plan.BowlingPlan(bowlers))
+        self.assertEqual(sequence[0], 'B0')
+        self.assertIn('B0', (sequence[17], sequence[19]))
+        self.assertValid(sequence)
+
+    def test_expensive_bowler_is_taken_off(self):
+        plan = bowling_plan.BowlingPlan(make_bowlers(7))
+        expensive = plan.plan[8]
+        tracker = {expensive: {'balls': 12, 'runs': 30, 'wickets': 0}}
+        last_over = plan.plan[7]
+        self.assertNotEqual(plan.next_bowler(8, tracker, last_over)['playerInitials'], expensive)
+
+    def test_tight_quotas_terminate(self):
+        self.assertValid(play(bowling_plan.BowlingPlan(make_bowlers(5))))
+        # Too few bowlers for 4-over caps: the cap is raised rather than looping forever
+        self.assertValid(play(bowling_plan.BowlingPlan(make_bowlers(3))), max_overs=7)
+        self.assertEqual(play(bowling_plan.BowlingPlan(make_bowlers(1))), ['B0'] * 20)
+
+    def test_plan_is_deterministic(self):
+        self.assertEqual(play(bowling_plan.BowlingPlan(make_bowlers(7))), play(bowling_plan.BowlingPlan(make_bowlers(7))))
+
+
+if __name__ == '__main__':
+    unittest.main()
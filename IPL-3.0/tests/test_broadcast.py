@@ -0,0 +1,130 @@
+import unittest
+import json
+import os
+import sys
+import time
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from broadcast import BroadcastHub
+from support import FakeClock, in_project_root, make_app
+
+
+class TestBroadcastHub(unittest.TestCase):
+    def setUp(self):
+        in_project_root(self)
+        self.clock = FakeClock(1000.0)
+        self.hub = BroadcastHub(ball_interval=2.0, ring_size=8, team_codes={'csk', 'mi'}, clock=self.clock)
+
+    def test_balls_are_played_once_as_they_fall_due(self):
+        match = self.hub.feature('csk', 'mi', seed=3)
+        self.assertEqual(match.events_since(0), ([], 0))
+        self.clock.now += 5.0
+        events, seq = match.events_since(0)
+        self.assertEqual(seq, 2)
+        self.assertEqual([event_seq for event_seq, _ in events], [1, 2])
+        again, _ = match.events_since(0)
+        self.assertIs(again[0][1], events[0][1]) # Encoded once, shared by every viewer
+        ball = json.loads(events[1][1])
+        self.assertEqual(ball['seq'], 2)
+        self.assertEqual(ball['summary']['base_cursor'], 1)
+        self.assertEqual(ball['ball_event']['innings_num'], 1)
+
+    def test_other_processes_rebuild_the_same_match_from_its_id(self):
+        match = self.hub.feature('csk', 'mi', seed=7)
+        other_hub = BroadcastHub(ball_interval=2.0, ring_size=8, team_codes={'csk', 'mi'}, clock=self.clock)
+        self.clock.now += 13.0
+        rebuilt = other_hub.get(match.match_id)
+        self.assertEqual(rebuilt.events_since(0)[0], match.events_since(0)[0])
+
+    def test_late_viewers_get_a_snapshot(self):
+        match = self.hub.feature('csk', 'mi', seed=5)
+        self.clock.now += 2.0 * 20
+        events, seq = match.events_since(0)
+        self.assertIsNone(events) # Older than the ring
+        self.assertEqual(len(match.events_since(seq - 3)[0]), 3)
+        snapshot_seq, snapshot = match.snapshot()
+        self.assertEqual(snapshot_seq, 20)
+        self.assertIs(match.snapshot()[1], snapshot)
+        payload = json.loads(snapshot)
+        self.assertNotIn('log', payload['summary']['innings_data']['1'])
+        self.assertEqual(len(payload['recent_balls']), 12)
+        self.assertEqual(payload['summary']['cursor'], payload['summary']['base_cursor'])
+
+    def test_invalid_ids_are_rejected(self):
+        self.assertIsNone(self.hub.get('csk-mi-1'))
+        self.assertIsNone(self.hub.get('csk-rcb-1-1000'))
+        self.assertIsNone(self.hub.get('csk-csk-1-1000'))
+        self.assertIsNone(self.hub.get('csk-mi-01-1000'))
+        self.assertIsNone(self.hub.get(f'csk-mi-1-{int(self.clock.now) + 60}'))
+        self.assertIsNotNone(self.hub.get('csk-mi-1-1000'))
+
+    def test_signed_ids_only_rebuild_matches_the_app_started(self):
+        hub = BroadcastHub(ball_interval=2.0, team_codes={'csk', 'mi'}, secret='key', clock=self.clock)
+        match = hub.feature('csk', 'mi', seed=4)
+        other_worker = BroadcastHub(ball_interval=2.0, team_codes={'csk', 'mi'}, secret='key', clock=self.clock)
+        self.assertIsNotNone(other_worker.get(match.match_id))
+        self.assertIsNone(other_worker.get('csk-mi-4-1000'))
+        self.assertIsNone(other_worker.get('csk-mi-5-1000-' + match.match_id.rsplit('-', 1)[1]))
+        self.assertIsNone(BroadcastHub(secret='other', clock=self.clock).get(match.match_id))
+        self.assertIsNone(other_worker.get('csk-mi-4-1000-\u00e9'))
+
+    def test_hub_keeps_at_most_max_matches(self):
+        hub = BroadcastHub(ball_interval=2.0, team_codes={'csk', 'mi'}, max_matches=2, clock=self.clock)
+        first = hub.feature('csk', 'mi', seed=1)
+        hub.feature('csk', 'mi', seed=2)
+        hub.get(first.match_id) # Now the most recently read
+        hub.feature('csk', 'mi', seed=3)
+        self.assertEqual(len(hub), 2)
+        self.assertIs(hub.get(first.match_id), first)
+        self.assertNotIn('csk-mi-2-1000', [match.match_id for match in hub.matches()])
+
+    def test_finished_matches_are_dropped_after_retain(self):
+        match = self.hub.feature('csk', 'mi', seed=2)
+        self.clock.now += 2.0 * 400
+        match.advance()
+        self.assertTrue(match.game_over)
+        self.clock.now = match.finished_at + self.hub.retain + 1
+        self.assertEqual(self.hub.matches(), [])
+
+
+class TestBroadcastRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app(self)
+        self.client = self.app.test_client()
+        hub = self.app.extensions['broadcast_hub']
+        self.match = hub.feature('csk', 'mi', seed=11, start=time.time() - 10 * hub.ball_interval - 1)
+
+    def _events(self, response):
+        events = []
+        for block in response.get_data(as_text=True).strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.split('\n') if not line.startswith(':'))
+            events.append(fields)
+        return events
+
+    def test_new_viewer_gets_a_snapshot_then_only_new_balls(self):
+        url = f'/broadcast/{self.match.match_id}/events'
+        events = self._events(self.client.get(url))
+        self.assertEqual(events[0]['event'], 'snapshot')
+        self.assertEqual(events[0]['id'], '10')
+        self.assertIn('retry', events[-1])
+
+        events = self._events(self.client.get(url, headers={'Last-Event-ID': '8'}))
+        self.assertEqual([(e['event'], e['id']) for e in events[:-1]], [('ball', '9'), ('ball', '10')])
+
+    def test_view_page_embeds_the_snapshot(self):
+        response = self.client.get(f'/broadcast/{self.match.match_id}')
+        self.assertEqual(response.status_code, 200)
+        page = response.get_data(as_text=True)
+        self.assertIn('Featured Match', page)
+        self.assertIn('since=10', page)
+        self.assertEqual(self.client.get('/broadcast/nope/events').status_code, 404)
+        unsigned_id = self.match.match_id.rsplit('-', 1)[0]
+        self.assertEqual(self.client.get(f'/broadcast/{unsigned_id}/events').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from benchmarks import calibration
+
+
+def _summary(inn1_mean=170.0, inn1_sigma=25.0, chase=0.45, speed=10.0, rss=30000):
+    metric = lambda mean, sigma: {'n': 200, 'mean': mean, 'sigma': sigma}
+    return {'matches_per_s': speed, 'balls_per_s': speed * 235, 'peak_rss_kb': rss,
+            'inn1_runs': metric(inn1_mean, inn1_sigma), 'inn1_wickets': metric(5.0, 1.5),
+            'boundary_pct': metric(20.0, 4.0), 'chase_won': metric(chase, 0.5)}
+
+
+def _failures(baseline, current):
+    return [check for check, _, _, _, ok in calibration.compare(baseline, current, alpha=0.01, speed_tolerance=0.25) if not ok]
+
+
+class TestCalibrationCompare(unittest.TestCase):
+    def test_identical_run_passes(self):
+        self.assertEqual(_failures(_summary(), _summary()), [])
+
+    def test_realism_regressions_are_caught(self):
+        self.assertEqual(_failures(_summary(), _summary(inn1_mean=168.0)), []) # Within noise
+        self.assertEqual(_failures(_summary(), _summary(inn1_mean=180.0)), ['inn1_runs mean'])
+        self.assertEqual(_failures(_summary(), _summary(inn1_sigma=35.0)), ['inn1_runs sigma'])
+        self.assertEqual(_failures(_summary(), _summary(chase=0.7)), ['chase_won proportion'])
+
+    def test_speed_and_memory_regressions_are_caught(self):
+        self.assertEqual(_failures(_summary(), _summary(speed=8.0)), [])
+        self.assertEqual(_failures(_summary(), _summary(speed=7.0)), ['matches_per_s', 'balls_per_s'])
+        self.assertEqual(_failures(_summary(), _summary(rss=40000)), ['peak_rss_kb'])
+
+    def test_innings_metrics_read_the_outcome_channel(self):
+        log = [{'outcome': {'runs': 4, 'extras': 0, 'extra_type': None, 'wicket': None}},
+               {'outcome': {'runs': 0, 'extras': 1, 'extra_type': 'wide', 'wicket': None}},
+               {'outcome': {'runs': 0, 'extras': 0, 'extra_type': None, 'wicket': 'bowled'}},
+               {'event': 'legacy entry without an outcome'}]
+        self.assertEqual(calibration.innings_metrics(log), (5, 1, 2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import ball_outcomes
+import render_animation
+from ball_outcomes import make_outcome, WIDE
+from support import FakeClock
+
+try:
+    import pygame
+except ImportError: # The animation runs in the browser; pygame is only needed to test or render it here
+    pygame = None
+else:
+    if render_animation.ANIMATION_DIR not in sys.path:
+        sys.path.insert(0, render_animation.ANIMATION_DIR)
+    import cricket_animation
+
+
+@unittest.skipIf(pygame is None, "needs pygame")
+class TestAnimationClock(unittest.TestCase):
+    def setUp(self):
+        self.now = FakeClock()
+        self.clock = cricket_animation.AnimationClock(step=0.125, now=self.now) # Binary fractions keep the sums exact
+        self.assertEqual(self.clock.advance(), 0) # The first frame only starts the clock
+
+    def frame(self, seconds):
+        self.now.now += seconds
+        return self.clock.advance()
+
+    def test_time_is_banked_into_whole_steps(self):
+        self.assertEqual(self.frame(0.0625), 0)
+        self.assertEqual(self.clock.time_until_next_step(), 0.0625)
+        self.assertEqual(self.frame(0.125), 1) # 0.1875 banked: one step, 0.0625 carried over
+        self.assertEqual(self.frame(0.0625), 1)
+        self.assertEqual(self.clock.skipped_frames, 0)
+
+    def test_steps_without_a_frame_are_counted_as_skipped(self):
+        self.assertEqual(self.frame(0.25), 2)
+        self.assertEqual(self.clock.skipped_frames, 1)
+        self.assertEqual(self.frame(0.125), 1)
+        self.assertEqual(self.clock.skipped_frames, 1)
+
+    def test_a_stall_is_dropped_not_replayed(self):
+        self.assertEqual(self.frame(10.0), int(cricket_animation.MAX_FRAME_TIME / 0.125))
+        self.assertEqual(self.clock.dropped_seconds, 10.0 - cricket_animation.MAX_FRAME_TIME)
+
+    def test_speed_scales_time_and_is_clamped(self):
+        self.clock.set_speed(2.0)
+        self.assertEqual(self.frame(0.125), 2)
+        self.assertEqual(self.clock.time_until_next_step(), 0.0625)
+        self.clock.set_speed(100.0)
+        self.assertEqual(self.clock.speed, cricket_animation.MAX_PLAYBACK_SPEED)
+        self.clock.set_speed(0.0)
+        self.assertEqual(self.clock.speed, cricket_animation.MIN_PLAYBACK_SPEED)
+
+    def test_paused_time_is_not_banked(self):
+        self.clock.paused = True
+        self.assertEqual(self.frame(1.0), 0)
+        self.assertEqual(self.clock.time_until_next_step(), 1.0 / cricket_animation.FPS)
+        self.clock.paused = False
+        self.assertEqual(self.frame(0.0625), 0) # Only the time since the last paused frame counts
+        self.assertEqual(self.frame(0.0625), 1)
+
+    def test_reset_forgets_the_time_since_the_last_frame(self):
+        self.frame(0.0625)
+        self.clock.reset()
+        self.assertEqual(self.frame(5.0), 0)
+        self.assertEqual(self.clock.time_until_next_step(), 0.125)
+
+
+
+def _innings(runs, target=None):
+    # runs: 'w' for a wicket, 'wd' for a wide, else the runs off the ball
+    outcomes = [make_outcome(0, wicket='bowled') if r == 'w' else make_outcome(0, extra_type=WIDE, extras=1) if r == 'wd'
+                else make_outcome(r) for r in runs]
+    return {'balls': [ball_outcomes.animation_ball(o) for o in outcomes], 'target': target}
+
+
+@unittest.skipIf(pygame is None, "needs pygame")
+class TestMatchTimeline(unittest.TestCase):
+    def setUp(self):
+        self.timeline = cricket_animation.MatchTimeline([
+            _innings([1, 'wd', 4, 0, 'w', 0, 6,     # Over 1: balls 0-6, a wide inside it
+                      'wd', 0, 0, 0, 0, 0, 1]),     # Over 2: balls 7-13, opened by a wide
+            _innings([4, 0, 'w'], target=21),       # Balls 14-16
+        ])
+
+    def test_keyframes_before_and_after_each_ball(self):
+        Keyframe = cricket_animation.Keyframe
+        timeline = self.timeline
+        self.assertEqual(len(timeline), 17)
+        self.assertEqual(timeline.before[0], Keyframe(0, 0, 0, 0, '-', None))
+        self.assertEqual(timeline.after[1], Keyframe(0, 2, 0, 1, '1 wide', None))
+        self.assertEqual(timeline.after[6], Keyframe(0, 12, 1, 6, '6', None))
+        self.assertEqual(timeline.after[13], Keyframe(0, 14, 1, 12, '1', None))
+        self.assertEqual(timeline.before[14], Keyframe(1, 0, 0, 0, '-', 21)) # The chase starts from zero, with its target
+        self.assertEqual(timeline.final_keyframe(), Keyframe(1, 4, 1, 3, 'WICKET!', 21))
+        self.assertEqual([timeline.ball_label(i) for i in (1, 2, 7, 8, 9)], ['0.2', '0.2', '1.1', '1.1', '1.2'])
+        self.assertEqual(timeline.max_overs, 2)
+
+    def test_a_wide_does_not_start_an_over(self):
+        self.assertEqual(self.timeline.over_starts, [0, 7, 14])
+
+    def test_over_and_innings_navigation(self):
+        timeline = self.timeline
+        self.assertEqual([timeline.next_over(i) for i in (0, 3, 7, 8, 14)], [7, 7, 14, 14, 17])
+        self.assertEqual([timeline.previous_over(i) for i in (0, 3, 7, 9, 15)], [0, 0, 0, 7, 14])
+        self.assertEqual([timeline.next_innings(i) for i in (0, 13, 14)], [14, 14, 17])
+        self.assertEqual([timeline.previous_innings(i) for i in (3, 14, 16)], [0, 0, 14])
+
+    def test_highlights_are_boundaries_and_wickets(self):
+        timeline = self.timeline
+        self.assertEqual(timeline.highlights, [2, 4, 6, 14, 16])
+        self.assertEqual([timeline.next_highlight(i) for i in (0, 5, 7, 17)], [2, 6, 14, 17])
+        self.assertEqual(timeline.next_index(6, highlights_only=True), 14)
+        self.assertEqual(timeline.next_index(6), 7)
+
+    def test_built_from_page_data(self):
+        timeline = cricket_animation.MatchTimeline.from_match_data({'log': [0, 4, 'wicket']})
+        self.assertEqual(timeline.highlights, [1, 2])
+        self.assertEqual(timeline.final_keyframe().score, 4)
+        self.assertEqual(timeline.max_overs, 1)
+        timeline = cricket_animation.MatchTimeline.from_match_data({'innings': [_innings([1] * 6)], 'max_overs': 20})
+        self.assertEqual(timeline.max_overs, 20)
+        self.assertEqual(cricket_animation.MatchTimeline([]).final_keyframe().score, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import dismissals
+
+
+class TestDismissals(unittest.TestCase):
+    def test_parse_caught_with_hyphenated_names(self):
+        d = dismissals.parse_dismissal("57:W-CaughtBy-A Smith-Jones-Bowler-RA Jadeja")
+        self.assertEqual(d, {'type': 'caught', 'bowler': 'RA Jadeja', 'fielder': 'A Smith-Jones', 'ball': 57})
+        self.assertEqual(dismissals.format_dismissal(d), "c A Smith-Jones b RA Jadeja")
+
+    def test_parse_bowler_credited_and_run_out(self):
+        self.assertEqual(dismissals.format_dismissal(dismissals.parse_dismissal("12:W-lbw-Bowler-JJ Bumrah")), "lbw b JJ Bumrah")
+        run_out = dismissals.parse_dismissal("30:W1-runout")
+        self.assertEqual(run_out['type'], dismissals.RUN_OUT)
+        self.assertIsNone(run_out['bowler'])
+        self.assertEqual(dismissals.format_dismissal(run_out), "Run out")
+
+    def test_non_wicket_entries(self):
+        for entry in ("3:4", "8:WD", "9:W", "", None):
+            self.assertIsNone(dismissals.parse_dismissal(entry))
+        self.assertTrue(dismissals.is_wicket_entry("9:W"))
+        self.assertTrue(dismissals.is_wicket_entry("30:W1-runout"))
+        self.assertFalse(dismissals.is_wicket_entry("8:WD"))
+
+    def test_structured_dismissal_takes_precedence_over_ball_log(self):
+        # mainconnect only logs the runs for a run-out batter, so the ballLog alone reads "Not out"
+        stats = {'runs': 1, 'balls': 2, 'ballLog': ["1:0", "2:1"],
+                 'dismissal': dismissals.make_dismissal("runout", "XX", ball=2)}
+        self.assertEqual(dismissals.how_out(stats), "Run out")
+        del stats['dismissal']
+        self.assertEqual(dismissals.how_out(stats), "Not out")
+
+    def test_batter_outcome(self):
+        dismissal = dismissals.make_dismissal("bowled", "XX", ball=3)
+        self.assertEqual(dismissals.batter_outcome({'balls': 3, 'dismissal': dismissal}), (dismissal, "bowled b XX"))
+        self.assertEqual(dismissals.batter_outcome({'balls': 3, 'ballLog': ["1:0"]}), (None, "Not out"))
+        self.assertEqual(dismissals.batter_outcome({'balls': 0}), (None, "DNB"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import json
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from match_simulator import MatchSimulator
+from support import in_project_root
+
+
+class TestGameStateDelta(unittest.TestCase):
+    def setUp(self):
+        in_project_root(self)
+        self.sim = MatchSimulator('csk', 'mi', seed=3)
+        self.sim.perform_toss()
+
+    def test_each_ball_sends_only_the_new_entry(self):
+        cursor = self.sim.get_game_state()['cursor']
+        sizes = []
+        while not self.sim.game_over:
+            summary = self.sim.simulate_one_ball(cursor)['summary']
+            self.assertFalse(summary['full'])
+            self.assertEqual(summary['base_cursor'], cursor)
+            self.assertLessEqual(len(summary['new_balls']), 1)
+            self.assertEqual(summary['cursor'], cursor + len(summary['new_balls']))
+            cursor = summary['cursor']
+            sizes.append(len(json.dumps(summary)))
+        # The full state grows with the match; the delta does not
+        self.assertLess(max(sizes), 4 * min(sizes))
+        self.assertLess(max(sizes) * 10, len(json.dumps(self.sim.get_game_state())))
+
+    def test_replaying_deltas_rebuilds_the_logs(self):
+        cursor = 0
+        logs = {1: [], 2: []}
+        for _ in range(180):
+            summary = self.sim.simulate_one_ball(cursor)['summary']
+            for entry in summary['new_balls']:
+                entry = dict(entry)
+                logs[entry.pop('innings_num')].append(entry)
+            cursor = summary['cursor']
+        full = self.sim.get_game_state()
+        self.assertEqual(logs[1], full['innings_data'][1]['log'])
+        self.assertEqual(logs[2], full['innings_data'][2]['log'])
+
+    def test_unusable_cursor_gets_full_state(self):
+        self.sim.simulate_one_ball()
+        self.assertTrue(self.sim.get_game_state_delta(10 ** 6)['full'])
+        self.assertTrue(self.sim.simulate_one_ball()['summary']['full'])
+
+
+if __name__ == '__main__':
+    unittest.main()
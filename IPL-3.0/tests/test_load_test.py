@@ -0,0 +1,71 @@
+import unittest
+import asyncio
+import os
+import sys
+import threading
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from werkzeug.serving import make_server
+
+from benchmarks import load_test
+from support import make_app
+
+
+class TestLoadTestReport(unittest.TestCase):
+    def test_mix_and_plan(self):
+        self.assertEqual(load_test.parse_mix("direct=3, animation"), {'direct': 3.0, 'animation': 1.0})
+        with self.assertRaises(ValueError):
+            load_test.parse_mix("replay=1")
+        with self.assertRaises(ValueError):
+            load_test.parse_mix("direct=0")
+        plan = load_test.build_plan({'direct': 1, 'animation': 0}, 20, 5, ['csk', 'mi', 'rcb'])
+        self.assertEqual(plan, load_test.build_plan({'direct': 1, 'animation': 0}, 20, 5, ['csk', 'mi', 'rcb']))
+        self.assertTrue(all(scenario == 'direct' and team1 != team2 for scenario, team1, team2 in plan))
+
+    def test_nearest_rank_percentiles(self):
+        values = list(range(1, 101))
+        self.assertEqual([load_test.percentile(values, p) for p in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(load_test.percentile([7], 99), 7)
+        self.assertIsNone(load_test.percentile([], 50))
+
+    def test_summary_leaves_failures_out_of_latency(self):
+        results = [('direct', 0.1, True), ('direct', 0.3, True), ('animation', 5.0, False)]
+        summary = load_test.summarize(results, 2.0)
+        self.assertEqual(summary['throughput'], 1.0)
+        self.assertEqual(summary['all']['errors'], 1)
+        self.assertAlmostEqual(summary['all']['p99_ms'], 300.0)
+        self.assertIsNone(summary['scenarios']['animation']['p50_ms'])
+
+    def test_previous_run_with_the_same_settings_is_compared(self):
+        run = lambda label, throughput, concurrency: {
+            'label': label, 'throughput': throughput, 'settings': {'concurrency': concurrency},
+            'all': {'p50_ms': 100.0, 'p95_ms': 200.0, 'p99_ms': 300.0}, 'peak_rss_kb': None}
+        stored = [run('a', 10.0, 4), run('b', 20.0, 8), run('c', 5.0, 4)]
+        previous = load_test.previous_result(stored, {'concurrency': 8})
+        self.assertEqual(previous['label'], 'b')
+        rows = {metric: ratio for metric, _, _, ratio in load_test.compare(previous, run('d', 30.0, 8))}
+        self.assertEqual(rows['throughput'], 1.5)
+        self.assertIsNone(rows['peak_rss_kb'])
+
+
+class TestLoadTestRun(unittest.TestCase):
+    def setUp(self):
+        app = make_app(self, SCORES_DIR=os.path.join(project_root_dir, 'scores')) # mainconnect writes to scores/ under the working directory
+        server = make_server('127.0.0.1', 0, app, threaded=False)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        self.base_url = f"http://127.0.0.1:{server.server_port}"
+
+    def test_scenarios_complete_against_a_live_server(self):
+        plan = [('direct', 'csk', 'mi'), ('ball_by_ball', 'rcb', 'kkr')]
+        results, elapsed = asyncio.run(load_test.run_load(self.base_url, plan, concurrency=2))
+        self.assertEqual(sorted((scenario, ok) for scenario, _, ok in results), [('ball_by_ball', True), ('direct', True)])
+        self.assertGreater(elapsed, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
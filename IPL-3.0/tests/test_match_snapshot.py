@@ -0,0 +1,118 @@
+import unittest
+import os
+import sys
+import tempfile
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from match_simulator import MatchSimulator
+from snapshot_store import SnapshotConflict, SnapshotStore, SqliteSnapshotStore
+from support import in_project_root
+
+
+def _play(sim, balls):
+    return [sim.simulate_one_ball()['ball_event'] for _ in range(balls)]
+
+
+class TestMatchSnapshot(unittest.TestCase):
+    def setUp(self):
+        in_project_root(self)
+        self.sim = MatchSimulator('csk', 'mi', seed=7)
+        self.sim.perform_toss()
+        _play(self.sim, 40)
+
+    def test_restored_simulator_continues_identically(self):
+        snapshot = self.sim.to_snapshot()
+        with tempfile.TemporaryDirectory() as empty_dir:
+            os.chdir(empty_dir) # no teams/teams.json here: restore must not need it
+            restored = MatchSimulator.from_snapshot(snapshot)
+        self.assertEqual(restored.get_game_state(), self.sim.get_game_state())
+        self.assertEqual(_play(restored, 200), _play(self.sim, 200))
+        self.assertEqual(restored.win_message, self.sim.win_message)
+
+    def test_snapshot_is_versioned(self):
+        snapshot = bytearray(self.sim.to_snapshot())
+        snapshot[4] = 99
+        with self.assertRaises(ValueError):
+            MatchSimulator.from_snapshot(bytes(snapshot))
+        with self.assertRaises(ValueError):
+            MatchSimulator.from_snapshot(b'XXXX' + bytes(snapshot[4:]))
+
+    def test_store_parks_and_evicts_least_recently_used(self):
+        store = SnapshotStore(max_entries=2)
+        first = store.park(self.sim)
+        second = store.park(self.sim)
+        self.assertIsNotNone(store.resume(first)) # first is now the most recently used
+        store.park(self.sim)
+        self.assertIn(first, store)
+        self.assertNotIn(second, store)
+        self.assertIsNone(store.resume(second))
+        resumed = store.resume(first)
+        self.assertEqual(resumed.innings[1]['log'], self.sim.innings[1]['log'])
+
+    def test_sqlite_store_is_shared_and_bounded(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'snapshots.sqlite3')
+        now = [1000.0]
+        store = SqliteSnapshotStore(path, max_entries=2, ttl=60, clock=lambda: now[0])
+        first = store.park(self.sim)
+        self.assertEqual(store.revision(first), 1)
+        store.park(self.sim, first)
+        self.assertEqual(store.revision(first), 2)
+
+        other = SqliteSnapshotStore(path, max_entries=2, ttl=60, clock=lambda: now[0]) # Another worker
+        resumed, revision = other.load(first)
+        self.assertEqual(revision, 2)
+        self.assertEqual(resumed.get_game_state(), self.sim.get_game_state())
+
+        now[0] += 1
+        second = store.park(self.sim)
+        now[0] += 1
+        store.park(self.sim) # Over max_entries: first is the least recently touched
+        self.assertNotIn(first, other)
+        self.assertIn(second, other)
+        now[0] += 61
+        store.park(self.sim)
+        self.assertEqual(len(store), 1) # The rest expired
+        self.assertIsNone(store.resume(second))
+
+    def test_sqlite_save_only_replaces_the_revision_it_was_given(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = SqliteSnapshotStore(os.path.join(tmp.name, 'snapshots.sqlite3'))
+        self.assertEqual(store.save(self.sim, 'match', None), 1)
+        self.assertEqual(store.save(self.sim, 'match', 1), 2)
+        with self.assertRaises(SnapshotConflict):
+            store.save(self.sim, 'match', 1) # Saved by someone else since revision 1
+        with self.assertRaises(SnapshotConflict):
+            store.save(self.sim, 'match', None)
+        self.assertEqual(store.revision('match'), 2)
+        store.discard('match')
+        self.assertEqual(store.save(self.sim, 'match', 2), 3) # Pruned meanwhile: stored again
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs os.fork")
+    def test_sqlite_store_opens_a_new_connection_after_fork(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = SqliteSnapshotStore(os.path.join(tmp.name, 'snapshots.sqlite3'))
+        match_id = store.park(self.sim)
+        parent_db = store._connection()
+        pid = os.fork()
+        if pid == 0: # Child: must not use the parent's connection
+            ok = False
+            try:
+                ok = store._connection() is not parent_db and store.save(self.sim, match_id, 1) == 2
+            finally:
+                os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(store._connection(), parent_db)
+        self.assertEqual(store.revision(match_id), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import matchups
+
+
+def _batter(initials, splits, bat_style='right-hand bat'):
+    return {'playerInitials': initials, 'batStyle': bat_style, 'bowlStyle': 'legbreak', 'byBatsman': {},
+            'byBowler': {style: {'batBallsTotal': balls, 'batOutsTotal': outs, 'batRunDenominations': {'0': dots, '6': sixes}}
+                         for style, (balls, outs, dots, sixes) in splits.items()}}
+
+
+def _bowler(initials, splits, bowl_style='right-arm fast'):
+    return {'playerInitials': initials, 'batStyle': 'right-hand bat', 'bowlStyle': bowl_style, 'byBowler': {},
+            'byBatsman': {hand: {'bowlBallsTotal': balls, 'bowlOutsTotal': outs, 'bowlRunDenominations': {'0': dots, '6': sixes}}
+                          for hand, (balls, outs, dots, sixes) in splits.items()}}
+
+
+class TestMatchupIndex(unittest.TestCase):
+    def test_split_is_shrunk_toward_pooled_rate(self):
+        # Pooled over both splits: 40 outs in 1000 balls. The fast split (200 balls, 20 outs)
+        # keeps 200 / (200 + SHRINK) of its 0.06 gap.
+        batter = _batter('B', {'right-arm fast': (200, 20, 80, 2), 'legbreak': (800, 20, 320, 8)})
+        bowler = _bowler('F', {})
+        index = matchups.MatchupIndex([batter], [bowler])
+        runs, out = index.pair('B', 'F')
+        shrunk = (20 + matchups.SHRINK_BALLS * 0.04) / (200 + matchups.SHRINK_BALLS)
+        self.assertAlmostEqual(out, (shrunk - 0.04) / 2) # Halved: the bowler side adds nothing
+        self.assertAlmostEqual(runs[0], 0.0) # Same dot rate as pooled
+        self.assertGreater(out, 0)
+        self.assertLess(out, (0.1 - 0.04) / 2)
+
+    def test_both_sides_are_blended(self):
+        batter = _batter('B', {'right-arm fast': (100, 10, 30, 0), 'legbreak': (100, 0, 30, 0)}, bat_style='left-hand bat')
+        bowler = _bowler('F', {'left-hand bat': (100, 1, 50, 10), 'right-hand bat': (100, 1, 50, 0)})
+        index = matchups.MatchupIndex([batter], [bowler], shrink_balls=0)
+        runs, out = index.pair('B', 'F')
+        self.assertAlmostEqual(out, (0.1 - 0.05) / 2)
+        self.assertAlmostEqual(runs[6], (0.1 - 0.05) / 2)
+
+    def test_apply_clamps_and_ignores_unknown_pairs(self):
+        batter = _batter('B', {'right-arm fast': (100, 0, 0, 0), 'legbreak': (100, 20, 0, 20)})
+        index = matchups.MatchupIndex([batter], [_bowler('F', {})], shrink_balls=0)
+        den = {'0': 0.3, '6': 0.01}
+        out = index.apply(den, 0.02, 'B', 'F', den_floor=0.001, out_floor=0.01)
+        self.assertEqual(den['6'], 0.001)
+        self.assertEqual(out, 0.01)
+        den = {'0': 0.3, '6': 0.01}
+        self.assertEqual(index.apply(den, 0.02, 'B', 'Nobody'), 0.02)
+        self.assertEqual(den, {'0': 0.3, '6': 0.01})
+        self.assertIsNone(index.pair('F', 'B'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import os
+import sys
+import threading
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from metrics import Metrics
+from support import make_app, temp_dir
+
+
+def _samples(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if line and not line.startswith('#'))
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.metrics.describe('balls_total', 'counter', 'Balls.')
+        self.metrics.describe('latency_seconds', 'histogram', 'Latency.', buckets=(0.1, 1.0))
+
+    def test_counts_from_many_threads_add_up(self):
+        def work():
+            for _ in range(1000):
+                self.metrics.inc('balls_total', engine='sim')
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        self.metrics.inc('balls_total', 5, engine='sim')
+        for thread in threads:
+            thread.join()
+        self.assertEqual(_samples(self.metrics.render())['balls_total{engine="sim"}'], '8005')
+        self.assertEqual(_samples(self.metrics.render())['balls_total{engine="sim"}'], '8005') # Retired threads are folded in once
+
+    def test_histogram_exposition(self):
+        for value in (0.05, 0.5, 0.5, 3.0):
+            self.metrics.observe('latency_seconds', value, route='/')
+        samples = _samples(self.metrics.render())
+        self.assertEqual(samples['latency_seconds_bucket{route="/",le="0.1"}'], '1')
+        self.assertEqual(samples['latency_seconds_bucket{route="/",le="1.0"}'], '3')
+        self.assertEqual(samples['latency_seconds_bucket{route="/",le="+Inf"}'], '4')
+        self.assertEqual(samples['latency_seconds_count{route="/"}'], '4')
+        self.assertAlmostEqual(float(samples['latency_seconds_sum{route="/"}']), 4.05)
+
+    def test_collectors_and_label_escaping(self):
+        self.metrics.add_collector(lambda values: [('live', 'gauge', 'Live.', [({'name': 'a"b'}, 2)])])
+        text = self.metrics.render()
+        self.assertIn('# TYPE live gauge', text)
+        self.assertIn('live{name="a\\"b"} 2', text)
+
+    def test_workers_sharing_a_directory_are_added_up(self):
+        directory = temp_dir(self)
+        workers = [Metrics(directory, flush_interval=3600) for _ in range(2)] # Flushed by hand below
+        for worker, count in zip(workers, (3, 4)):
+            worker.describe('balls_total', 'counter', 'Balls.')
+            worker.describe('latency_seconds', 'histogram', 'Latency.', buckets=(0.1, 1.0))
+            worker.add_collector(lambda: [('live', 'gauge', 'Live.', [({}, 2)])], per_process=True)
+            worker.inc('balls_total', count, engine='sim')
+            worker.observe('latency_seconds', 0.5, route='/')
+        workers[0].add_collector(lambda values: [('balls_seen', 'gauge', 'Balls.', [({}, sum(values('balls_total').values()))])])
+        workers[1].flush()
+        samples = _samples(workers[0].render())
+        self.assertEqual(samples['balls_total{engine="sim"}'], '7')
+        self.assertEqual(samples['balls_seen'], '7') # Scrape-time collectors see every worker's totals
+        self.assertEqual(samples['latency_seconds_count{route="/"}'], '2')
+        self.assertEqual(samples['live'], '4')
+
+        for entry in os.scandir(directory): # The other worker has stopped writing: it exited
+            os.utime(entry.path, (0, 0))
+        samples = _samples(workers[0].render())
+        self.assertEqual(samples['balls_total{engine="sim"}'], '7') # Counters never go backwards
+        self.assertEqual(samples['live'], '2')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs os.fork")
+    def test_forked_worker_starts_from_zero(self):
+        metrics = Metrics(temp_dir(self), flush_interval=3600)
+        metrics.describe('balls_total', 'counter', 'Balls.')
+        metrics.inc('balls_total')
+        pid = os.fork()
+        if pid == 0: # Worker: reports only what it records itself
+            try:
+                metrics.inc('balls_total', 2)
+                metrics.flush()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(_samples(metrics.render())['balls_total'], '3')
+
+
+class TestMetricsRoute(unittest.TestCase):
+    def setUp(self):
+        self.client = make_app(self).test_client()
+
+    def test_requests_and_live_balls_are_reported(self):
+        self.client.post('/start_live_match', data={'selectedTeam1': 'csk', 'selectedTeam2': 'mi'})
+        self.client.post('/simulate_next_ball', json={'cursor': 0, 'balls': 4})
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        samples = _samples(response.get_data(as_text=True))
+        self.assertEqual(samples['ipl_balls_simulated_total{engine="simulator"}'], '4')
+        self.assertEqual(samples['ipl_simulations_total{kind="live"}'], '1')
+        self.assertEqual(samples['ipl_http_request_duration_seconds_count{method="POST",route="/simulate_next_ball",status="200"}'], '1')
+        self.assertEqual(samples['ipl_cache_requests_total{cache="simulator_pool",result="hit"}'], '1')
+        self.assertEqual(samples['ipl_cache_hit_ratio{cache="simulator_pool"}'], '1.0')
+        self.assertEqual(samples['ipl_tmp_log_files'], '0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import os
+import random
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import phase_adjustments
+
+
+def matching_rules_sum(table, situation):
+    # Brute force: add up every rule whose box contains the exact situation.
+    point = dict(zip(phase_adjustments.DIMENSIONS, situation))
+    total = [0.0] * len(phase_adjustments.KEYS)
+    for boxes, (base, _) in table.rules:
+        if all(lower <= point[dim] < upper for dim, (lower, upper) in boxes.items()):
+            total = [a + b for a, b in zip(total, base)]
+    return total
+
+
+class TestPhaseAdjustments(unittest.TestCase):
+    def test_cells_match_rules_including_boundaries(self):
+        rng = random.Random(4)
+        for engine in ('mainconnect', 'match_simulator'):
+            table = phase_adjustments.AdjustmentTable.from_file(engine)
+            situations = [(rng.choice((1, 2)), rng.randint(0, 119), rng.randint(0, 9), rng.randint(0, 60),
+                           rng.uniform(0, 3), rng.choice((8, 9, 10.4, 12, 15, rng.uniform(0, 20))), rng.randint(0, 4))
+                          for _ in range(3000)]
+            for situation in situations:
+                base, _ = table.vectors(table.cell(*situation))
+                for got, expected in zip(base, matching_rules_sum(table, situation)):
+                    self.assertAlmostEqual(got, expected)
+
+    def test_inclusive_rate_edge(self):
+        # "RRR 8-10.4" includes 10.4 itself; anything above it is the next band
+        table = phase_adjustments.AdjustmentTable([
+            {"when": {"rate": {"ge": 8, "le": 10.4}}, "out": 1},
+            {"when": {"rate": {"gt": 10.4}}, "out": 2},
+        ])
+        self.assertEqual(table.apply({}, 0, 2, 40, 0, 0, rate=10.4), 1)
+        self.assertEqual(table.apply({}, 0, 2, 40, 0, 0, rate=10.400001), 2)
+        self.assertEqual(table.apply({}, 0, 2, 40, 0, 0, rate=7.9), 0)
+
+    def test_rules_are_data(self):
+        table = phase_adjustments.AdjustmentTable([
+            {"when": {"balls": {"ge": 102}}, "scale": [0.06, 0.1], "divisor": 2, "den": {"6": 1, "1": -1}, "out": 0.01,
+             "scale_per_rate": 0.01},
+        ])
+        den = {'1': 0.3, '6': 0.05}
+        out = table.apply(den, 0.04, 1, 110, 3, 10, rate=5)
+        self.assertAlmostEqual(den['6'], 0.05 + (0.08 + 0.05) / 2)
+        self.assertAlmostEqual(den['1'], 0.3 - (0.08 + 0.05) / 2)
+        self.assertAlmostEqual(out, 0.05)
+        with self.assertRaises(ValueError):
+            phase_adjustments.AdjustmentTable([{"when": {"overs": {"lt": 6}}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
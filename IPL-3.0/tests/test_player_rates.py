@@ -0,0 +1,75 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import player_rates
+import player_table
+
+
+class TestPlayerRates(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(player_table.DEFAULT_SOURCE) as f:
+            cls.players = json.load(f)
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, 'playerRates.bin')
+        cls.table = player_rates.RateTable.open(cls.path, player_table.DEFAULT_SOURCE)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_small_samples_move_toward_the_group_prior(self):
+        for name, stats in self.players.items():
+            balls = stats['batBallsTotal']
+            prior = self.table.priors['bat'][player_rates.batting_group(stats)]['out']
+            shrunk = self.table.rates(name)['batOutsRate']
+            if balls == 0:
+                self.assertAlmostEqual(shrunk, prior['rate'], msg=name)
+            else:
+                raw = stats['batOutsTotal'] / balls
+                # Between the raw rate and the prior, and closer to the raw rate the more balls there are
+                self.assertLessEqual(min(raw, prior['rate']) - 1e-12, shrunk, name)
+                self.assertLessEqual(shrunk, max(raw, prior['rate']) + 1e-12, name)
+                self.assertAlmostEqual(shrunk - prior['rate'], (raw - prior['rate']) * balls / (balls + prior['balls']), msg=name)
+
+    def test_regulars_barely_move(self):
+        name = max(self.players, key=lambda n: self.players[n]['batBallsTotal'])
+        stats = self.players[name]
+        rates = self.table.rates(name)
+        raw_fours = stats['batRunDenominations']['4'] / stats['batBallsTotal']
+        self.assertAlmostEqual(rates['batRunDenominations']['4'], raw_fours, delta=raw_fours * 0.2)
+
+    def test_prior_strength_is_bounded(self):
+        for side in self.table.priors.values():
+            for outcomes in side.values():
+                for prior in outcomes.values():
+                    self.assertGreaterEqual(prior['balls'], player_rates.MIN_PRIOR_BALLS)
+                    self.assertLessEqual(prior['balls'], player_rates.MAX_PRIOR_BALLS)
+
+    def test_artifact_is_rebuilt_when_the_source_changes(self):
+        source = os.path.join(self.tmp.name, 'players.json')
+        path = os.path.join(self.tmp.name, 'small.bin')
+        name = next(iter(self.players))
+        with open(source, 'w') as f:
+            json.dump({name: self.players[name]}, f)
+        self.assertEqual(len(player_rates.RateTable.open(path, source)), 1)
+        with open(source, 'w') as f:
+            json.dump(dict(list(self.players.items())[:3]), f)
+        table = player_rates.RateTable.open(path, source)
+        self.assertEqual(len(table), 3)
+        self.assertIsNone(table.rates('No Such Player'))
+        first = table.rates(name)
+        first['batRunDenominations']['4'] = -1
+        self.assertNotEqual(table.rates(name)['batRunDenominations']['4'], -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
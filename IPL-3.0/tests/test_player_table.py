@@ -0,0 +1,81 @@
+import unittest
+import collections
+import json
+import os
+import sys
+import tempfile
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import player_table
+
+
+def _comparable(stats):
+    stats = dict(stats)
+    stats['overNumbers'] = collections.Counter(stats['overNumbers'])
+    stats['position'] = collections.Counter(str(p) for p in stats['position'])
+    return stats
+
+
+class TestPlayerTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(player_table.DEFAULT_SOURCE) as f:
+            cls.players = json.load(f)
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, 'playerTable.bin')
+        cls.table = player_table.PlayerTable.open(cls.path, player_table.DEFAULT_SOURCE)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.table.close()
+        cls.tmp.cleanup()
+
+    def test_every_player_round_trips(self):
+        self.assertEqual(len(self.table), len(self.players))
+        for name, stats in self.players.items():
+            self.assertEqual(_comparable(self.table.player(name)), _comparable(stats), name)
+
+    def test_player_dicts_are_independent_copies(self):
+        name = next(iter(self.players))
+        first = self.table.player(name)
+        first['batBallsTotal'] += 1
+        first['batRunDenominations']['4'] = -1
+        self.assertEqual(self.table.player(name)['batBallsTotal'], self.players[name]['batBallsTotal'])
+        self.assertEqual(self.table.value(name, 'batBallsTotal'), self.players[name]['batBallsTotal'])
+        with self.assertRaises(KeyError):
+            self.table.player('No Such Player')
+
+    def test_shared_memory_attach(self):
+        shm = self.table.export_shared_memory()
+        try:
+            attached = player_table.PlayerTable.attach_shared_memory(shm.name)
+            name = list(self.players)[-1]
+            self.assertEqual(attached.player(name), self.table.player(name))
+            attached.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_stale_table_is_recompiled(self):
+        source = os.path.join(self.tmp.name, 'players.json')
+        path = os.path.join(self.tmp.name, 'small.bin')
+        name = next(iter(self.players))
+        with open(source, 'w') as f:
+            json.dump({name: self.players[name]}, f)
+        table = player_table.PlayerTable.open(path, source)
+        self.assertEqual(len(table), 1)
+        table.close()
+        with open(source, 'w') as f:
+            json.dump({name: self.players[name], 'Other': self.players[name]}, f)
+        os.utime(source, ns=(0, 0))
+        table = player_table.PlayerTable.open(path, source)
+        self.assertIn('Other', table)
+        table.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
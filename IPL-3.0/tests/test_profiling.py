@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import profiling
+from match_simulator import MatchSimulator
+from support import FakeClock, in_project_root
+
+
+class TestProfiler(unittest.TestCase):
+    def test_nested_sections_are_exclusive(self):
+        clock = FakeClock(0)
+        profiler = profiling.Profiler(clock)
+        with profiler.section('outcome'):
+            clock.now += 100
+            profiler.enter('logging')
+            clock.now += 30
+            profiler.exit()
+            clock.now += 20
+        with profiler.section('outcome'):
+            clock.now += 50
+        breakdown = profiler.breakdown()
+        self.assertEqual(list(breakdown), ['outcome', 'logging'])
+        self.assertEqual(breakdown['outcome']['calls'], 2)
+        self.assertAlmostEqual(breakdown['outcome']['total_ms'], 170 / 1e6)
+        self.assertAlmostEqual(breakdown['logging']['total_ms'], 30 / 1e6)
+        self.assertAlmostEqual(breakdown['outcome']['share'] + breakdown['logging']['share'], 1.0)
+
+        combined = profiling.aggregate([breakdown, breakdown, {}])
+        self.assertEqual(combined['outcome']['calls'], 4)
+        self.assertAlmostEqual(combined['logging']['total_ms'], 60 / 1e6)
+
+    def test_disabled_profiler_records_nothing(self):
+        with profiling.DISABLED.section('outcome'):
+            profiling.DISABLED.enter('logging')
+            profiling.DISABLED.exit()
+        self.assertEqual(profiling.DISABLED.breakdown(), {})
+
+
+class TestMatchSimulatorProfiling(unittest.TestCase):
+    def setUp(self):
+        in_project_root(self)
+
+    def test_breakdown_covers_the_hot_path(self):
+        sim = MatchSimulator('csk', 'mi', seed=3)
+        plain = MatchSimulator('csk', 'mi', seed=3)
+        profiler = sim.enable_profiling()
+        self.assertIs(sim.enable_profiling(), profiler)
+        for s in (sim, plain):
+            s.perform_toss()
+            for _ in range(30): s.simulate_one_ball()
+        breakdown = sim.timing_breakdown()
+        self.assertEqual(set(breakdown), {'outcome', 'probabilities', 'logging', 'bowler_selection', 'state_summary'})
+        self.assertEqual(breakdown['outcome']['calls'], 30)
+        self.assertEqual(breakdown['logging']['calls'], 30)
+        # Profiling does not change the match, and other simulators stay unprofiled
+        self.assertEqual(sim.get_game_state(), plain.get_game_state())
+        self.assertEqual(plain.timing_breakdown(), {})
+        self.assertNotIn('_play_ball', vars(plain))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import ball_outcomes
+import render_animation
+from ball_outcomes import make_outcome, WIDE
+
+
+def _innings(outcomes):
+    return {'balls': [ball_outcomes.animation_ball(o) for o in outcomes], 'target': None}
+
+
+class TestPlanSegments(unittest.TestCase):
+    def test_segments_cover_the_match_and_cut_at_over_starts(self):
+        two_overs = [make_outcome(1)] * 12
+        match_data = {'innings': [_innings(two_overs * 5), _innings(two_overs * 5)]}
+        plan = render_animation.plan_segments(match_data, 4)
+        self.assertEqual(plan, [(0, 30), (30, 60), (60, 90), (90, 120)])
+        starts = set(render_animation.over_starts(match_data))
+        self.assertTrue(all(start in starts for start, _ in plan))
+
+    def test_extras_do_not_start_an_over(self):
+        over = [make_outcome(0)] * 5 + [make_outcome(0, extra_type=WIDE, extras=1), make_outcome(0)]
+        match_data = {'innings': [_innings(over + over)]}
+        self.assertEqual(render_animation.over_starts(match_data), [0, 7])
+        self.assertEqual(render_animation.plan_segments(match_data, 2), [(0, 7), (7, 14)])
+
+    def test_short_matches_get_fewer_segments(self):
+        self.assertEqual(render_animation.plan_segments({'log': [0, 4, 'wicket']}, 8), [(0, 3)])
+        self.assertEqual(render_animation.plan_segments({'log': []}, 2), [])
+
+
+class TestStitch(unittest.TestCase):
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir)
+
+    def test_frames_are_numbered_in_segment_order(self):
+        for number, frames in ((0, 2), (1, 3), (10, 1)):
+            frames_dir = render_animation.segment_dir(self.out_dir, number)
+            os.makedirs(frames_dir)
+            for frame in range(frames):
+                with open(os.path.join(frames_dir, render_animation.FRAME_PATTERN % frame), 'w') as f:
+                    f.write(f"{number}.{frame}")
+        with open(os.path.join(self.out_dir, render_animation.FRAME_PATTERN % 9), 'w') as f:
+            f.write("stale")
+
+        self.assertEqual(render_animation.stitch(self.out_dir), 6)
+        names = sorted(os.listdir(self.out_dir))
+        contents = []
+        for name in names:
+            with open(os.path.join(self.out_dir, name)) as f:
+                contents.append(f.read())
+        self.assertEqual(contents, ["0.0", "0.1", "1.0", "1.1", "1.2", "10.0"])
+
+
+class TestAnimationMatchData(unittest.TestCase):
+    def test_team_batting_first_is_team_a(self):
+        results = {'innings1BatTeam': 'mi', 'innings1Runs': 150,
+                   'innings1Log': [{'outcome': make_outcome(4)}], 'innings2Log': [{'outcome': make_outcome(0, 'bowled')}]}
+        teams = {'csk': {'name': 'Chennai', 'colorPrimary': '#FFFF00'}, 'mi': {'name': 'Mumbai', 'colorPrimary': '#0000AA'}}
+        data = ball_outcomes.animation_match_data(results, teams, 'csk', 'mi')
+        self.assertEqual((data['team_a_name'], data['team_b_name']), ('Mumbai', 'Chennai'))
+        self.assertEqual(data['team_a_color_hex'], '#0000AA')
+        self.assertEqual([inn['target'] for inn in data['innings']], [None, 151])
+        self.assertNotIn('log', data)
+
+    def test_unreadable_logs_fall_back_to_the_test_log(self):
+        data = ball_outcomes.animation_match_data({'innings1Log': [], 'innings2Log': []}, {}, 'csk', 'mi')
+        self.assertEqual(data['team_a_name'], 'csk')
+        self.assertEqual(data['log'], ball_outcomes.DEFAULT_ANIMATION_LOG)
+        self.assertNotIn('innings', data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import copy
+import os
+import sys
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+import dismissals
+import scorecard
+
+
+class TestBattingCard(unittest.TestCase):
+    def test_single_pass_card_leaves_tracker_untouched(self):
+        tracker = {
+            'A': {'runs': 12, 'balls': 9, 'ballLog': ["1:4", "9:W-lbw-Bowler-B1"],
+                  'dismissal': dismissals.make_dismissal("lbw", "B1", ball=9)},
+            'B': {'runs': 1, 'balls': 2, 'ballLog': ["2:0", "3:1"],
+                  'dismissal': dismissals.make_dismissal("runout", ball=3)},
+            'C': {'runs': 40, 'balls': 25, 'ballLog': ["4:6"]},
+            'D': {'runs': 0, 'balls': 0, 'ballLog': []},
+        }
+        before = copy.deepcopy(tracker)
+        rows, wickets = scorecard.batting_card(tracker)
+        self.assertEqual(tracker, before)
+        self.assertEqual(wickets, 2)
+        self.assertEqual({p: r['how_out'] for p, r in rows.items()},
+                         {'A': "lbw b B1", 'B': "Run out", 'C': "Not out", 'D': "DNB"})
+        self.assertEqual((rows['C']['runs'], rows['C']['balls']), (40, 25))
+        self.assertNotIn('ballLog', rows['A'])
+
+    def test_legacy_trackers_are_read_from_the_ball_log(self):
+        tracker = {
+            'A': {'runs': 10, 'balls': 8, 'ballLog': ["1:4", "8:W-bowled-Bowler-B1"]},
+            'B': {'runs': 30, 'balls': 20, 'ballLog': ["2:1"],
+                  'dismissal': dismissals.make_dismissal("caught", "B2", "F1", 20)},
+            'C': {'runs': 5, 'balls': 4, 'ballLog': ["3:1"]},
+        }
+        rows, wickets = scorecard.batting_card(tracker)
+        self.assertEqual(wickets, 2)
+        self.assertEqual({p: r['how_out'] for p, r in rows.items()},
+                         {'A': "bowled b B1", 'B': "c F1 b B2", 'C': "Not out"})
+
+
+if __name__ == '__main__':
+    unittest.main()
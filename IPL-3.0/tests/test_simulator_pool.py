@@ -0,0 +1,177 @@
+import unittest
+import itertools
+import os
+import runpy
+import sys
+from unittest import mock
+
+from werkzeug.test import Client
+
+current_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root_dir = os.path.dirname(current_script_dir)
+if project_root_dir not in sys.path:
+    sys.path.insert(0, project_root_dir)
+
+from simulator_pool import SimulatorPool
+from snapshot_store import SnapshotConflict, SnapshotStore, SqliteSnapshotStore
+from support import FakeClock, in_project_root, make_app, temp_dir
+
+
+class HookedStore(SnapshotStore):
+    """Runs a hook inside park and resume, to stage what another request does meanwhile."""
+    def __init__(self):
+        super().__init__()
+        self.on_park = self.on_resume = None
+
+    def park(self, simulator, snapshot_id=None):
+        if self.on_park:
+            self.on_park(snapshot_id)
+        return super().park(simulator, snapshot_id)
+
+    def resume(self, snapshot_id):
+        hook, self.on_resume = self.on_resume, None
+        if hook:
+            hook(snapshot_id)
+        return super().resume(snapshot_id)
+
+
+class TestSimulatorPool(unittest.TestCase):
+    def setUp(self):
+        in_project_root(self)
+        self.clock = FakeClock()
+        self.pool = SimulatorPool(max_live=2, idle_timeout=60, clock=self.clock)
+
+    def test_lru_overflow_is_parked_and_resumed(self):
+        first_id, first = self.pool.create('csk', 'mi', seed=1)
+        first.simulate_balls(10)
+        expected = first.get_game_state()
+        self.pool.create('rcb', 'kkr')
+        self.pool.create('dc', 'pbks')
+        self.assertEqual(len(self.pool), 2)
+        self.assertIn(first_id, self.pool.store)
+        with self.pool.checkout(first_id) as resumed:
+            self.assertIsNot(resumed, first)
+            self.assertEqual(resumed.get_game_state(), expected)
+        self.assertNotIn(first_id, self.pool.store)
+
+    def test_idle_simulators_are_parked(self):
+        match_id, _ = self.pool.create('csk', 'mi')
+        self.clock.now += 61
+        self.assertEqual(self.pool.reap(), 1)
+        self.assertEqual(self.pool.stats()['live'], 0)
+        with self.pool.checkout(match_id) as simulator:
+            self.assertIsNotNone(simulator)
+
+    def test_concurrent_restore_is_not_a_miss(self):
+        pool = SimulatorPool(max_live=1, store=HookedStore(), clock=self.clock)
+        match_id, _ = pool.create('csk', 'mi')
+        pool.create('rcb', 'kkr') # Parks the first match
+
+        def other_request(snapshot_id): # Restores the match before this lookup reads the store
+            with pool.checkout(snapshot_id) as simulator:
+                self.assertIsNotNone(simulator)
+        pool.store.on_resume = other_request
+        with pool.checkout(match_id) as simulator:
+            self.assertIsNotNone(simulator)
+        self.assertEqual(pool.lookups['miss'], 0)
+
+    def test_parks_without_holding_the_pool_lock(self):
+        pool = SimulatorPool(max_live=1, store=HookedStore(), clock=self.clock)
+        match_id, _ = pool.create('csk', 'mi')
+        seen = []
+        pool.store.on_park = lambda snapshot_id: seen.append((pool._lock.locked(), snapshot_id in pool))
+        pool.create('rcb', 'kkr')
+        self.assertEqual(seen, [(False, True)]) # Not blocking checkouts, and never missing meanwhile
+        self.assertIn(match_id, pool.store)
+
+    def test_unknown_match(self):
+        with self.pool.checkout('missing') as simulator:
+            self.assertIsNone(simulator)
+
+    def test_next_over_stops_at_the_over(self):
+        _, simulator = self.pool.create('csk', 'mi', seed=5)
+        result = simulator.simulate_next_over()
+        self.assertEqual(simulator.innings[1]['overs_completed'], 1)
+        self.assertEqual(sum(1 for ball in result['ball_events'] if not ball['extra_type']), 6)
+
+
+class TestSharedStore(unittest.TestCase):
+    def setUp(self):
+        in_project_root(self)
+        path = os.path.join(temp_dir(self), 'snapshots.sqlite3')
+        self.worker1 = SimulatorPool(store=SqliteSnapshotStore(path))
+        self.worker2 = SimulatorPool(store=SqliteSnapshotStore(path))
+
+    def test_any_worker_continues_the_match(self):
+        match_id, _ = self.worker1.create('csk', 'mi', seed=3)
+        with self.worker2.checkout(match_id) as simulator:
+            simulator.simulate_balls(6)
+        with self.worker1.checkout(match_id) as simulator: # Its live copy is stale; reloaded
+            self.assertEqual(simulator.state_cursor(), 6)
+            simulator.simulate_balls(6)
+        with self.worker2.checkout(match_id) as simulator:
+            self.assertEqual(simulator.state_cursor(), 12)
+        self.worker2.discard(match_id)
+        with self.worker1.checkout(match_id) as simulator:
+            self.assertIsNone(simulator)
+
+    def test_racing_workers_do_not_lose_balls(self):
+        match_id, _ = self.worker1.create('csk', 'mi', seed=3)
+        with self.assertRaises(SnapshotConflict):
+            with self.worker2.checkout(match_id) as simulator:
+                with self.worker1.checkout(match_id) as first: # Saved while worker2 still holds its copy
+                    first.simulate_balls(6)
+                simulator.simulate_balls(1)
+        with self.worker2.checkout(match_id) as simulator: # The stale copy was dropped; reloaded
+            self.assertEqual(simulator.state_cursor(), 6)
+            simulator.simulate_balls(1)
+        with self.worker1.checkout(match_id) as simulator:
+            self.assertEqual(simulator.state_cursor(), 7)
+
+
+class TestLiveMatchRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = make_app(self).test_client()
+
+    def test_batched_balls_share_one_delta(self):
+        response = self.client.post('/start_live_match', data={'selectedTeam1': 'csk', 'selectedTeam2': 'mi'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get('/live_match').status_code, 200)
+        data = self.client.post('/simulate_next_ball', json={'cursor': 0, 'balls': 5}).get_json()
+        self.assertEqual(len(data['ball_events']), 5)
+        self.assertEqual(data['summary']['new_balls'], data['ball_events'])
+        data = self.client.post('/simulate_next_over', json={'cursor': data['summary']['cursor']}).get_json()
+        self.assertEqual(data['summary']['innings_data']['1']['overs_completed'], 1)
+
+    def test_without_a_match(self):
+        response = self.client.post('/simulate_next_ball', json={'cursor': 0})
+        self.assertEqual(response.status_code, 404)
+
+
+class TestGunicornWorkers(unittest.TestCase):
+    def setUp(self):
+        environ = mock.patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        for name in ('IPL_SNAPSHOT_DB', 'IPL_METRICS_DIR'):
+            os.environ.pop(name, None)
+        config = runpy.run_path(os.path.join(project_root_dir, 'gunicorn.conf.py'))
+        self.addCleanup(config['on_exit'], None)
+        # Configured from the IPL_* variables gunicorn.conf.py set
+        self.workers = [make_app(self, METRICS_DIR='') for _ in range(4)]
+
+    def test_any_worker_plays_the_next_ball(self):
+        turn = itertools.cycle(self.workers) # A load balancer without sticky sessions
+        client = Client(lambda environ, start_response: next(turn)(environ, start_response))
+        response = client.post('/start_live_match', data={'selectedTeam1': 'csk', 'selectedTeam2': 'mi'})
+        self.assertEqual(response.status_code, 302)
+        cursor = 0
+        for _ in range(20):
+            response = client.post('/simulate_next_ball', json={'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            cursor = response.json['summary']['cursor']
+        self.assertEqual(cursor, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
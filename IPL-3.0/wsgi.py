@@ -0,0 +1,9 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py                      # preloaded, forked sync workers
+
+Run from IPL-3.0/ (player data and teams are read relative to it).
+"""
+from app import create_app
+
+app = create_app()